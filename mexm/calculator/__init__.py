@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""In-process calculators for the energy of simulation cells.
+
+These calculators evaluate potentials directly with numpy, so that simple
+properties can be computed without writing files for an external simulation
+code.
+"""
+__author__ = "Eugene J. Ragasa"
+__copyright__ = "Copyright (C) 2016,2017,2018,2019"
+__license__ = "MIT License"
+__version__ = "1.0"
+
+from mexm.calculator.eam import EamCalculator
+from mexm.calculator.lattice_sum import LatticeSum
+from mexm.calculator.elastic import CubicElasticConstants
+from mexm.calculator.threebody import ThreeBodyCalculator
+from mexm.calculator.stillingerweber import StillingerWeberCalculator
+from mexm.calculator.tersoff import TersoffCalculator
+from mexm.calculator.incremental import IncrementalEamCalculator
+from mexm.calculator.dynamics import MolecularDynamics
+from mexm.calculator.phonons import Phonons
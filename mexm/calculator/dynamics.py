@@ -0,0 +1,212 @@
+from collections import OrderedDict
+import numpy as np
+from mexm.crystal import get_atomic_weight
+from mexm.calculator.lattice_sum import EV_PER_CUBIC_ANGSTROM_TO_GPA
+
+# the Boltzmann constant in eV/K
+BOLTZMANN_CONSTANT = 8.617333262e-5
+# the conversion of eV/(Angs amu) to Angs/ps^2
+EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2 = 9648.533212
+
+class MolecularDynamics(object):
+    """an in-process molecular dynamics driver
+
+    The equations of motion are integrated with velocity Verlet in the metal
+    units of LAMMPS, with distances in Angs, energies in eV, masses in amu
+    and times in ps.  The forces come from an in-process calculator, such as
+    EamCalculator or StillingerWeberCalculator, whose neighbor list should
+    have a Verlet skin so that the binning is reused between steps.
+
+    The positions, velocities and accelerations are kept in preallocated
+    arrays which are updated in place, and the positions are written into
+    the array of the simulation cell before every force evaluation.  The
+    temperature is controlled with the Berendsen thermostat, which rescales
+    the velocities after each step, or the Langevin thermostat, which is
+    integrated exactly as an Ornstein-Uhlenbeck process for half a step
+    before and after each velocity Verlet step.
+
+    Args:
+        calculator (mexm.calculator.EamCalculator): the calculator of the
+            forces, with a calculate(cell, forces=True) method
+        cell (mexm.crystal.SimulationCell): the simulation cell, whose
+            positions are updated in place
+        timestep (float,optional): the timestep in ps.  Default is 0.001.
+        masses (dict,optional): the mass of each symbol in amu.  Default is
+            the atomic weight of mexm.crystal.get_atomic_weight.
+        thermostat (str,optional): None, 'berendsen' or 'langevin'.  Default
+            is None, for constant energy.
+        temperature (float,optional): the temperature of the thermostat in K
+        damping (float,optional): the time constant of the thermostat in ps.
+            Default is 0.1.
+        seed (int,optional): the seed of the random numbers of the Langevin
+            thermostat and of the initial velocities
+
+    Attributes:
+        positions (numpy.ndarray): the (N,3) cartesian positions, which are
+            not wrapped into the cell
+        velocities (numpy.ndarray): the (N,3) velocities in Angs/ps
+        accelerations (numpy.ndarray): the (N,3) accelerations in Angs/ps^2
+        masses (numpy.ndarray): the mass of each atom in amu
+        n_steps (int): the number of steps which have been integrated
+        potential_energy (float): the potential energy of the current step
+    """
+    thermostats = [None, 'berendsen', 'langevin']
+
+    def __init__(self, calculator, cell, timestep=0.001, masses=None,
+            thermostat=None, temperature=None, damping=0.1, seed=None):
+        if thermostat not in self.thermostats:
+            msg = "thermostat must be one of {}".format(
+                    ",".join(str(t) for t in self.thermostats))
+            raise ValueError(msg)
+        if thermostat is not None and temperature is None:
+            raise ValueError("the thermostat requires a temperature")
+        if timestep <= 0 or damping <= 0:
+            raise ValueError("the timestep and the damping must be positive")
+
+        self.calculator = calculator
+        self.cell = cell
+        self.timestep = float(timestep)
+        self.thermostat = thermostat
+        self.temperature = temperature
+        self.damping = float(damping)
+        self.random_state = np.random.default_rng(seed)
+        self.n_steps = 0
+
+        n_atoms = cell.n_atoms
+        symbols = [a.symbol for a in cell.atomic_basis]
+        if masses is None:
+            masses = dict((s, get_atomic_weight(s)) for s in set(symbols))
+        self.masses = np.array([masses[s] for s in symbols], dtype=float)
+
+        self._L = cell.a0*np.array(cell.H, dtype=float)
+        self._inverse_L = np.linalg.inv(self._L)
+        self.volume = abs(np.linalg.det(self._L))
+        # the degrees of freedom without the motion of the center of mass
+        self.n_dof = 3*n_atoms - 3 if n_atoms > 1 else 3
+
+        # the work buffers, which are reused by every step
+        self.positions = cell.positions.dot(self._L)
+        self.velocities = np.zeros((n_atoms, 3))
+        self.accelerations = np.zeros((n_atoms, 3))
+        self._force_to_acceleration = \
+                (EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2/self.masses)[:, np.newaxis]
+        self._thermal_velocities = np.sqrt(
+                BOLTZMANN_CONSTANT*EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2 \
+                        /self.masses)[:, np.newaxis]
+        self._noise = np.zeros((n_atoms, 3))
+        self._work = np.zeros((n_atoms, 3))
+        self._mv2 = (0.5/EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2)*self.masses
+
+        self.potential_energy = None
+        self._compute_forces()
+
+    def initialize_velocities(self, temperature):
+        """draw the velocities from the Maxwell-Boltzmann distribution
+
+        The momentum of the center of mass is removed, and the velocities
+        are scaled to the exact temperature.
+
+        Args:
+            temperature (float): the temperature in K
+        """
+        self.random_state.standard_normal(out=self.velocities)
+        self.velocities *= self._thermal_velocities*np.sqrt(temperature)
+        self.velocities -= np.dot(self.masses, self.velocities)/np.sum(self.masses)
+        _temperature = self.get_temperature()
+        if _temperature > 0:
+            self.velocities *= np.sqrt(temperature/_temperature)
+
+    def get_kinetic_energy(self):
+        """float: the kinetic energy in eV"""
+        np.multiply(self.velocities, self.velocities, out=self._work)
+        return float(np.dot(self._mv2, self._work).sum())
+
+    def get_temperature(self):
+        """float: the instantaneous temperature in K"""
+        return 2.*self.get_kinetic_energy()/(self.n_dof*BOLTZMANN_CONSTANT)
+
+    def get_pressure(self):
+        """float: the instantaneous pressure in GPa, from the virial"""
+        _p = (2.*self.get_kinetic_energy() + np.trace(self.calculator.virial)) \
+                /(3.*self.volume)
+        return EV_PER_CUBIC_ANGSTROM_TO_GPA*_p
+
+    def get_thermo(self):
+        """the thermodynamic quantities of the current step
+
+        Returns:
+            OrderedDict: step, time in ps, temperature in K, the potential,
+                kinetic and total energies in eV, and the pressure in GPa
+        """
+        thermo = OrderedDict()
+        thermo['step'] = self.n_steps
+        thermo['time'] = self.n_steps*self.timestep
+        thermo['temperature'] = self.get_temperature()
+        thermo['potential_energy'] = self.potential_energy
+        thermo['kinetic_energy'] = self.get_kinetic_energy()
+        thermo['total_energy'] = thermo['potential_energy'] + thermo['kinetic_energy']
+        thermo['pressure'] = self.get_pressure()
+        return thermo
+
+    def _compute_forces(self):
+        np.dot(self.positions, self._inverse_L, out=self.cell.positions)
+        self.potential_energy = self.calculator.calculate(self.cell, forces=True)
+        np.multiply(self.calculator.forces, self._force_to_acceleration,
+                out=self.accelerations)
+
+    def _apply_langevin(self, dt):
+        _c1 = np.exp(-dt/self.damping)
+        _c2 = np.sqrt((1. - _c1**2)*self.temperature)
+        self.random_state.standard_normal(out=self._noise)
+        self._noise *= self._thermal_velocities
+        self._noise *= _c2
+        self.velocities *= _c1
+        self.velocities += self._noise
+
+    def _apply_berendsen(self):
+        _temperature = self.get_temperature()
+        if _temperature > 0:
+            _scale = 1. + self.timestep/self.damping \
+                    *(self.temperature/_temperature - 1.)
+            self.velocities *= np.sqrt(max(_scale, 0.))
+
+    def _kick(self, dt):
+        np.multiply(self.accelerations, dt, out=self._work)
+        self.velocities += self._work
+
+    def step(self):
+        """integrate a single step"""
+        dt = self.timestep
+        if self.thermostat == 'langevin':
+            self._apply_langevin(0.5*dt)
+
+        self._kick(0.5*dt)
+        np.multiply(self.velocities, dt, out=self._work)
+        self.positions += self._work
+        self._compute_forces()
+        self._kick(0.5*dt)
+
+        if self.thermostat == 'langevin':
+            self._apply_langevin(0.5*dt)
+        elif self.thermostat == 'berendsen':
+            self._apply_berendsen()
+        self.n_steps += 1
+
+    def run(self, n_steps, thermo_stride=100):
+        """integrate steps, streaming the thermodynamic quantities
+
+        Args:
+            n_steps (int): the number of steps
+            thermo_stride (int,optional): the number of steps between the
+                thermodynamic outputs.  Default is 100.
+        Returns:
+            generator: the OrderedDict of get_thermo for the first step and
+                every thermo_stride steps after it
+        """
+        if thermo_stride < 1:
+            raise ValueError("thermo_stride must be positive")
+        yield self.get_thermo()
+        for k in range(1, n_steps + 1):
+            self.step()
+            if k % thermo_stride == 0:
+                yield self.get_thermo()
@@ -0,0 +1,267 @@
+import numpy as np
+from mexm.crystal.neighborlist import NeighborList
+from mexm.potential.tabulated_function import TabulatedFunction
+
+class EamCalculator(object):
+    """an in-process calculator for embedded atom method (EAM) potentials
+
+    The energy of atom i is
+
+        E_i = F_i(rho_i) + 1/2 sum_j V_ij(r_ij),  rho_i = sum_j f_j(r_ij)
+
+    where the sums are over the neighbors within the cutoff.  The tables of
+    the pair potential V, the density f and the embedding function F are
+    taken from an evaluated EamPotential or a read EamSetflFile, and are
+    interpolated with the cubic splines of TabulatedFunction.  The neighbors
+    are found with a periodic NeighborList, and the density contributions
+    are gathered onto the atoms with numpy.bincount, so the calculation is
+    vectorized over all neighbor pairs.
+
+    The forces and the virial use the derivatives of the splines, so they
+    are consistent with the energy.  For an EamPotential whose functions
+    have analytic derivatives, the splines are the cubic Hermite
+    interpolants of the analytic values and derivatives.  The forces are
+    scattered onto the atoms from the pair list with numpy.bincount.  As in
+    the eam/alloy pair style of LAMMPS, the embedding functions are
+    extrapolated linearly for densities past the end of the rho grid.
+
+    Args:
+        potential (mexm.potential.EamPotential or mexm.io.eamtools.EamSetflFile):
+            the potential.  An EamPotential must have been evaluated, so that
+            the pair, density and embedding tables exist.
+        r_cut (float,optional): the cutoff distance.  Default is the cutoff
+            of the potential, or the largest grid point if the potential has
+            no cutoff.
+        skin (float,optional): the Verlet skin of the neighbor list.  Default
+            is 0.
+
+    Attributes:
+        symbols (list of str): the symbols of the potential
+        r (numpy.ndarray): the radial grid
+        rho (numpy.ndarray): the electron density grid
+        r_cut (float): the cutoff distance
+        pair (TabulatedFunction): the pair functions, in the order of the
+            symbol pairs
+        symbol_pairs (list of tuple): the symbol pairs, in the order of the
+            pair functions
+        pair_index (numpy.ndarray): the function of pair for each pair of
+            symbol indices, with shape (n_symbols, n_symbols)
+        density (TabulatedFunction): the density functions, in the order of
+            the symbols
+        embedding (TabulatedFunction): the embedding functions, in the order
+            of the symbols
+        neighbor_list (mexm.crystal.NeighborList): the neighbor list of the
+            last calculation
+        densities (numpy.ndarray): the electron density at each atom from the
+            last calculation
+        energies (numpy.ndarray): the energy of each atom from the last
+            calculation
+        energy (float): the total energy from the last calculation
+        forces (numpy.ndarray): the (N,3) forces on the atoms from the last
+            calculation of the forces
+        virial (numpy.ndarray): the 3x3 virial, sum r_ij (x) f_ij over the
+            pairs, from the last calculation of the forces
+        stress (numpy.ndarray): the 3x3 stress, the derivative of the energy
+            with respect to the strain divided by the volume, from the last
+            calculation of the forces.  The stress is -virial/volume, so it
+            is negative under compression.
+    """
+    def __init__(self, potential, r_cut=None, skin=0.):
+        self.symbols = None
+        self.r = None
+        self.rho = None
+        self.r_cut = None
+        self.pair = None
+        self.symbol_pairs = None
+        self.pair_index = None
+        self.density = None
+        self.embedding = None
+
+        self.neighbor_list = None
+        self.densities = None
+        self.energies = None
+        self.energy = None
+        self.forces = None
+        self.virial = None
+        self.stress = None
+
+        if hasattr(potential, 'func_pairpotential'):
+            self._initialize_from_setfl(potential)
+        else:
+            self._initialize_from_potential(potential)
+
+        if r_cut is None:
+            r_cut = self.r_cut if self.r_cut is not None else self.r[-1]
+        if r_cut > self.r[-1]:
+            msg = "the cutoff {} is larger than the radial grid {}"
+            raise ValueError(msg.format(r_cut, self.r[-1]))
+        self.r_cut = float(r_cut)
+        self.neighbor_list = NeighborList(r_cut=self.r_cut, skin=skin)
+
+    def _initialize_from_setfl(self, setfl):
+        self._set_symbols(setfl.symbols)
+        self.r = np.array(setfl.r, dtype=float)
+        self.rho = np.array(setfl.rho, dtype=float)
+        self.r_cut = setfl.r_cut
+        self.pair = TabulatedFunction.from_setfl(setfl, 'pair')
+        self.density = TabulatedFunction.from_setfl(setfl, 'density')
+        self.embedding = TabulatedFunction.from_setfl(setfl, 'embedding')
+
+    def _initialize_from_potential(self, potential):
+        if potential.pair is None \
+                or potential.density is None \
+                or potential.embedding is None:
+            msg = "the potential must be evaluated before it is used"
+            raise ValueError(msg)
+        self._set_symbols(potential.symbols)
+        self.r = np.array(potential.r, dtype=float)
+        self.rho = np.array(potential.rho, dtype=float)
+        self.r_cut = potential.r_cut
+
+        # analytic derivatives for the functions which implement them
+        x = potential.get_parameter_vector(potential.parameters)
+
+        def get_derivatives(stage, evaluate_packed_and_derivative):
+            _packed_indices = potential.parameter_plan[stage]['packed_indices']
+            if _packed_indices is None:
+                return None
+            try:
+                _, _derivatives = evaluate_packed_and_derivative(
+                        x[_packed_indices])
+            except NotImplementedError:
+                return None
+            return _derivatives
+
+        self.pair = TabulatedFunction.from_grid(
+                grid=self.r,
+                values=[potential.pair[s1 + s2] for s1, s2 in self.symbol_pairs],
+                derivatives=get_derivatives('pair',
+                    lambda X: potential.obj_pair.evaluate_packed_and_derivative(
+                        r=self.r, packed_parameters=X, r_cut=potential.r_cut)))
+        self.density = TabulatedFunction.from_grid(
+                grid=self.r,
+                values=[potential.density[s] for s in self.symbols],
+                derivatives=get_derivatives('density',
+                    lambda X: potential.obj_density.evaluate_packed_and_derivative(
+                        r=self.r, packed_parameters=X, r_cut=potential.r_cut)))
+        self.embedding = TabulatedFunction.from_grid(
+                grid=self.rho,
+                values=[potential.embedding[s] for s in self.symbols],
+                derivatives=get_derivatives('embedding',
+                    lambda X: potential.obj_embedding.evaluate_packed_and_derivative(
+                        rho=self.rho, packed_parameters=X)),
+                extrapolation='linear')
+
+    def _set_symbols(self, symbols):
+        self.symbols = list(symbols)
+        n_symbols = len(self.symbols)
+        self.pair_index = np.zeros((n_symbols, n_symbols), dtype=int)
+        _i1, _i2 = np.triu_indices(n_symbols)
+        self.pair_index[_i1, _i2] = np.arange(_i1.size)
+        self.pair_index[_i2, _i1] = np.arange(_i1.size)
+        self.symbol_pairs = [
+                (self.symbols[k1], self.symbols[k2]) for k1, k2 in zip(_i1, _i2)]
+
+    def get_species(self, cell):
+        """the index of each atom's symbol into the symbols of the potential
+
+        Args:
+            cell (mexm.crystal.SimulationCell): the simulation cell
+        Returns:
+            numpy.ndarray: the index of the symbol of each atom
+        Raises:
+            ValueError: if the cell has a symbol which is not in the potential
+        """
+        _map = []
+        for s in cell.symbol_table:
+            try:
+                _map.append(self.symbols.index(s))
+            except ValueError:
+                _map.append(-1)
+        species = np.array(_map, dtype=int)[cell.species]
+        if np.any(species < 0):
+            msg = "the symbols {} are not in the potential {}"
+            raise ValueError(msg.format(
+                sorted(set(cell.symbols) - set(self.symbols)), self.symbols))
+        return species
+
+    def calculate(self, cell, forces=False):
+        """calculate the energy of a simulation cell
+
+        Args:
+            cell (mexm.crystal.SimulationCell): the simulation cell
+            forces (bool,optional): if True, the forces, virial and stress
+                are also calculated.  Default is False.
+        Returns:
+            float: the total energy
+        """
+        species = self.get_species(cell)
+        self.neighbor_list.update(cell)
+
+        n_atoms = species.size
+        i = self.neighbor_list.centers
+        j = self.neighbor_list.neighbors
+        r_ij = self.neighbor_list.distances
+        pair_rows = self.pair_index[species[i], species[j]]
+
+        # the derivatives are evaluated in the same pass as the values
+        if forces:
+            _f, _df = self.density.evaluate_and_derivative(r_ij, rows=species[j])
+        else:
+            _f = self.density.evaluate(r_ij, rows=species[j])
+        self.densities = np.bincount(i, weights=_f, minlength=n_atoms)
+
+        if forces:
+            _V, _dV = self.pair.evaluate_and_derivative(r_ij, rows=pair_rows)
+            _F, _dF = self.embedding.evaluate_and_derivative(
+                    self.densities, rows=species)
+        else:
+            _V = self.pair.evaluate(r_ij, rows=pair_rows)
+            _F = self.embedding.evaluate(self.densities, rows=species)
+        self.energies = _F + 0.5*np.bincount(i, weights=_V, minlength=n_atoms)
+        self.energy = float(np.sum(self.energies))
+
+        if forces:
+            self._calculate_forces(cell, _dV, _df, _dF)
+        return self.energy
+
+    def _calculate_forces(self, cell, dV, df, dF):
+        n_atoms = dF.size
+        i = self.neighbor_list.centers
+        j = self.neighbor_list.neighbors
+        r_ij = self.neighbor_list.distances
+        d_ij = self.neighbor_list.vectors
+
+        # each pair is stored in both directions, so the pair term is halved
+        # and the embedding term is the one of the central atom
+        _dE = 0.5*dV + dF[i]*df
+
+        # dE/d(d_ij), where d_ij = x_j - x_i
+        _g = (_dE/r_ij)[:, np.newaxis]*d_ij
+        self.forces = np.zeros((n_atoms, 3))
+        for k in range(3):
+            self.forces[:, k] = np.bincount(i, weights=_g[:, k], minlength=n_atoms) \
+                    - np.bincount(j, weights=_g[:, k], minlength=n_atoms)
+
+        self.virial = -d_ij.T.dot(_g)
+        volume = abs(np.linalg.det(cell.a0*np.array(cell.H, dtype=float)))
+        self.stress = -self.virial/volume
+
+    def get_potential_energy(self, cell):
+        """the total energy of a simulation cell"""
+        return self.calculate(cell)
+
+    def get_potential_energies(self, cell):
+        """the energy of each atom of a simulation cell"""
+        self.calculate(cell)
+        return np.copy(self.energies)
+
+    def get_forces(self, cell):
+        """the (N,3) forces on the atoms of a simulation cell"""
+        self.calculate(cell, forces=True)
+        return np.copy(self.forces)
+
+    def get_stress(self, cell):
+        """the 3x3 stress of a simulation cell, see the stress attribute"""
+        self.calculate(cell, forces=True)
+        return np.copy(self.stress)
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+import numpy as np
+from mexm.calculator.lattice_sum import EV_PER_CUBIC_ANGSTROM_TO_GPA
+from mexm.calculator.lattice_sum import LatticeSum
+
+CUBIC_LATTICE_TYPES = ['fcc', 'bcc', 'sc']
+
+class CubicElasticConstants(LatticeSum):
+    """elastic constants of cubic crystals from analytic lattice sums
+
+    The elastic constants are the second derivatives of the energy per atom
+    with respect to the Lagrangian strain, divided by the volume per atom.
+    For an EAM potential, these are
+
+        Omega C_ijkl = sum_s G_s r_s**2 M_ijkl,s
+                + F''(rho) (sum_s n_s f'(r_s) r_s/3)**2 delta_ij delta_kl
+        G_s = 1/2 (V''(r_s) - V'(r_s)/r_s) + F'(rho) (f''(r_s) - f'(r_s)/r_s)
+
+    where M_ijkl,s is the sum of the products of the components of the unit
+    vectors of shell s.  Every atom of the fcc, bcc and sc lattices is a
+    center of inversion, so there are no internal relaxations.  As in
+    LatticeSum, the sums are broadcast over candidates x lattice parameters
+    x shells.  The second derivatives are analytic for the functions which
+    define {stage}_function_and_second_derivative, otherwise they are the
+    central differences of the analytic first derivatives, see
+    LatticeSum._evaluate_function.
+
+    Args:
+        lattice_type (str): fcc, bcc or sc
+        d_max (float,optional): the largest shell distance, in units of the
+            lattice parameter.  Default is 3.
+
+    Attributes:
+        shell_moments_4 (numpy.ndarray): the sum of u_x**4 over each shell
+        shell_moments_22 (numpy.ndarray): the sum of u_x**2 u_y**2 over each
+            shell
+    """
+    def __init__(self, lattice_type, d_max=3.):
+        if lattice_type not in CUBIC_LATTICE_TYPES:
+            msg = "lattice_type must be one of {}".format(
+                    ",".join(CUBIC_LATTICE_TYPES))
+            raise ValueError(msg)
+        LatticeSum.__init__(self, lattice_type=lattice_type, d_max=d_max)
+
+        vectors = self.shell_table.vectors
+        shells = self.shell_table.shell_indices
+        u2 = vectors**2/np.sum(vectors**2, axis=1)[:, np.newaxis]
+        # the cubic symmetry makes the axes equivalent, they are averaged
+        self.shell_moments_4 = np.bincount(
+                shells, weights=np.mean(u2**2, axis=1))
+        self.shell_moments_22 = np.bincount(
+                shells, weights=np.mean(u2*np.roll(u2, 1, axis=1), axis=1))
+
+    def evaluate_elastic_constants(self, potential, a, parameters,
+            symbol=None, r_cut=None):
+        """evaluate the elastic constants for a vector of lattice parameters
+
+        Args:
+            potential (mexm.potential.EamPotential): the potential
+            a (numpy.ndarray): the lattice parameters, see LatticeSum.evaluate
+            parameters (dict or numpy.ndarray): the parameters, see
+                LatticeSum.evaluate
+            symbol (str,optional): the symbol of the element
+            r_cut (float,optional): the cutoff of the potential
+        Returns:
+            OrderedDict: 'C11', 'C12' and 'C44' in GPa.  Each has the shape
+                (n_candidates, n_a), or (n_a,) for a single parameterization.
+        """
+        X, is_single = self._get_parameter_array(potential, parameters)
+        results = self._evaluate_elastic_constants(
+                potential, X, np.asarray(a, dtype=float), symbol, r_cut)
+        if is_single:
+            for key in results:
+                results[key] = results[key][0]
+        return results
+
+    def get_elastic_constants(self, potential, parameters, a_min, a_max,
+            n_a=100, symbol=None, r_cut=None):
+        """the elastic constants at the equilibrium lattice parameter
+
+        Args:
+            potential (mexm.potential.EamPotential): the potential
+            parameters (dict or numpy.ndarray): the parameters
+            a_min (float): the smallest lattice parameter of the grid
+            a_max (float): the largest lattice parameter of the grid
+            n_a (int,optional): the number of points of the grid
+            symbol (str,optional): the symbol of the element
+            r_cut (float,optional): the cutoff of the potential
+        Returns:
+            OrderedDict: the equilibrium properties of
+                LatticeSum.get_equilibrium_properties, with 'C11', 'C12' and
+                'C44' in GPa.  Candidates without a minimum in the grid are
+                nan.
+        """
+        X, is_single = self._get_parameter_array(potential, parameters)
+        results = self.get_equilibrium_properties(
+                potential, X, a_min=a_min, a_max=a_max, n_a=n_a,
+                symbol=symbol, r_cut=r_cut)
+
+        # the candidates without a minimum are evaluated at a_min and masked
+        _is_bracketed = np.isfinite(results['a0'])
+        a0 = np.where(_is_bracketed, results['a0'], a_min)
+        _results = self._evaluate_elastic_constants(
+                potential, X, a0[:, np.newaxis], symbol, r_cut)
+        for key in _results:
+            results[key] = np.where(_is_bracketed, _results[key][:, 0], np.nan)
+
+        if is_single:
+            for key in results:
+                results[key] = float(results[key][0])
+        return results
+
+    def _evaluate_elastic_constants(self, potential, X, a, symbol, r_cut):
+        rows = self._get_rows(potential, symbol)
+        a = self._get_lattice_parameters(X, a, r_cut)
+        r = a[:, :, np.newaxis]*self.shell_distances
+
+        f, df, d2f = self._evaluate_function(
+                potential, X, 'density', rows['density'], r,
+                r_cut=r_cut, second_derivative=True)
+        V, dV, d2V = self._evaluate_function(
+                potential, X, 'pair', rows['pair'], r,
+                r_cut=r_cut, second_derivative=True)
+        rho = f.dot(self.shell_multiplicities)
+        F, dF, d2F = self._evaluate_function(
+                potential, X, 'embedding', rows['embedding'], rho,
+                second_derivative=True)
+
+        G = 0.5*(d2V - dV/r) + dF[:, :, np.newaxis]*(d2f - df/r)
+        _c4 = (G*r**2).dot(self.shell_moments_4)
+        _c22 = (G*r**2).dot(self.shell_moments_22)
+        _c_embedding = d2F*((df*r).dot(self.shell_multiplicities)/3.)**2
+
+        _scale = EV_PER_CUBIC_ANGSTROM_TO_GPA/self.get_atomic_volume(a)
+        results = OrderedDict()
+        results['C11'] = _scale*(_c4 + _c_embedding)
+        results['C12'] = _scale*(_c22 + _c_embedding)
+        results['C44'] = _scale*_c22
+        return results
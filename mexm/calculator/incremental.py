@@ -0,0 +1,239 @@
+import numpy as np
+from mexm.calculator.eam import EamCalculator
+from mexm.crystal.neighborlist import NeighborList
+
+class IncrementalEamCalculator(EamCalculator):
+    """incremental energies of single atom moves for Monte Carlo with EAM
+
+    The calculator is initialized with a simulation cell, and then caches
+    the electron density, the embedding energy and the pair energy of each
+    atom.  A trial move, the displacement of an atom or the exchange of the
+    species of two atoms, only changes the pairs of the moved atoms, so the
+    change in energy is computed from the neighborhoods of the moved atoms
+    in O(neighbors).  The trial move is then either accepted, which commits
+    the cached values of the affected atoms and updates the cell, or
+    rejected, which discards them.
+
+    The neighborhoods come from a candidate neighbor list with a cutoff of
+    r_cut + skin, which is rebuilt when an accepted displacement moves an
+    atom more than half of the skin from its position when the list was
+    built.
+
+    Args:
+        potential (mexm.potential.EamPotential or mexm.io.eamtools.EamSetflFile):
+            the potential, see EamCalculator
+        r_cut (float,optional): the cutoff distance, see EamCalculator
+        skin (float,optional): the skin of the candidate neighbor list.  A
+            trial displacement must be shorter than half of the skin.
+            Default is 1.
+
+    Attributes:
+        cell (mexm.crystal.SimulationCell): the simulation cell, which is
+            updated when a move is accepted
+        species (numpy.ndarray): the index of the symbol of each atom
+        pair_energies (numpy.ndarray): half the pair energy of each atom
+        embedding_energies (numpy.ndarray): the embedding energy of each atom
+        candidate_list (mexm.crystal.NeighborList): the candidate neighbor
+            list, with a cutoff of r_cut + skin
+        trial (dict): the pending trial move, or None
+        n_accepted (int): the number of accepted moves
+        n_rejected (int): the number of rejected moves
+    """
+    def __init__(self, potential, r_cut=None, skin=1.):
+        if skin <= 0:
+            raise ValueError("the skin must be positive")
+        EamCalculator.__init__(self, potential=potential, r_cut=r_cut)
+        self.skin = float(skin)
+        self.candidate_list = NeighborList(r_cut=self.r_cut + self.skin)
+
+        self.cell = None
+        self.species = None
+        self.pair_energies = None
+        self.embedding_energies = None
+        self.trial = None
+        self.n_accepted = 0
+        self.n_rejected = 0
+
+        self._L = None
+        self._positions = None
+        self._reference_positions = None
+
+    def initialize(self, cell):
+        """calculate the energy of a cell and cache the per atom values
+
+        Args:
+            cell (mexm.crystal.SimulationCell): the simulation cell, which
+                is modified in place by accepted moves
+        Returns:
+            float: the total energy
+        """
+        self.cell = cell
+        self.calculate(cell)
+        self.species = self.get_species(cell)
+        self.embedding_energies = self.embedding.evaluate(
+                self.densities, rows=self.species)
+        self.pair_energies = self.energies - self.embedding_energies
+        self.trial = None
+
+        self._L = cell.a0*np.array(cell.H, dtype=float)
+        self._positions = cell.positions.dot(self._L)
+        self._build_candidate_list()
+        return self.energy
+
+    def _build_candidate_list(self):
+        self.candidate_list.build(self.cell)
+        self._reference_positions = np.array(self._positions)
+
+    def propose_displacement(self, i, dx):
+        """the change in energy of displacing an atom
+
+        Args:
+            i (int): the index of the atom
+            dx (numpy.ndarray): the cartesian displacement
+        Returns:
+            float: the change in the total energy
+        Raises:
+            ValueError: if the displacement is not shorter than half the skin
+        """
+        dx = np.asarray(dx, dtype=float)
+        if 2.*np.linalg.norm(dx) >= self.skin:
+            msg = "the displacement {} must be shorter than half the skin {}"
+            raise ValueError(msg.format(np.linalg.norm(dx), self.skin))
+
+        # the pairs of the moved atom are only complete while it is within
+        # half the skin of its reference position
+        x_i = self._positions[i] + dx
+        if 2.*np.linalg.norm(x_i - self._reference_positions[i]) >= self.skin:
+            self._build_candidate_list()
+        return self._propose(
+                atoms=np.array([int(i)]),
+                positions=x_i[np.newaxis, :],
+                species=self.species[[i]])
+
+    def propose_swap(self, i, j):
+        """the change in energy of exchanging the species of two atoms
+
+        Args:
+            i (int): the index of the first atom
+            j (int): the index of the second atom
+        Returns:
+            float: the change in the total energy
+        """
+        if i == j:
+            raise ValueError("the atoms of a swap must be different")
+        atoms = np.array([int(i), int(j)])
+        return self._propose(
+                atoms=atoms,
+                positions=self._positions[atoms],
+                species=self.species[atoms[::-1]])
+
+    def _propose(self, atoms, positions, species):
+        """the change in energy of moving atoms to new positions and species"""
+        offsets = self.candidate_list.offsets
+        _n = offsets[atoms + 1] - offsets[atoms]
+        _pairs = np.concatenate(
+                [np.arange(offsets[a], offsets[a+1]) for a in atoms])
+        _c = np.repeat(np.arange(atoms.size), _n)
+        c = atoms[_c]
+        k = self.candidate_list.neighbors[_pairs]
+        _shifts = self.candidate_list.shifts[_pairs].dot(self._L)
+
+        # the positions and species of the pairs after the move
+        _k_moved = np.full(k.size, -1)
+        for m, a in enumerate(atoms):
+            _k_moved[k == a] = m
+        _is_moved = _k_moved >= 0
+        x_k = np.where(_is_moved[:, np.newaxis],
+                positions[_k_moved], self._positions[k])
+        s_k = np.where(_is_moved, species[_k_moved], self.species[k])
+        s_c = species[_c]
+
+        r_old = np.linalg.norm(
+                self._positions[k] + _shifts - self._positions[c], axis=1)
+        r_new = np.linalg.norm(x_k + _shifts - positions[_c], axis=1)
+        w_old = (r_old < self.r_cut).astype(float)
+        w_new = (r_new < self.r_cut).astype(float)
+
+        # the moved atoms are recomputed from all of their pairs
+        _V_new = w_new*self.pair.evaluate(
+                r_new, rows=self.pair_index[s_c, s_k])
+        _f_new = w_new*self.density.evaluate(r_new, rows=s_k)
+        rho_moved = np.bincount(_c, weights=_f_new, minlength=atoms.size)
+        pair_moved = 0.5*np.bincount(_c, weights=_V_new, minlength=atoms.size)
+
+        # the other neighbors only change by their pairs with the moved atoms
+        _k = k[~_is_moved]
+        _V_old = w_old[~_is_moved]*self.pair.evaluate(
+                r_old[~_is_moved],
+                rows=self.pair_index[self.species[c[~_is_moved]], self.species[_k]])
+        _f_old = w_old[~_is_moved]*self.density.evaluate(
+                r_old[~_is_moved], rows=self.species[c[~_is_moved]])
+        _f_new_k = w_new[~_is_moved]*self.density.evaluate(
+                r_new[~_is_moved], rows=s_c[~_is_moved])
+        neighbors, _index = np.unique(_k, return_inverse=True)
+        rho_neighbors = self.densities[neighbors] + np.bincount(
+                _index, weights=_f_new_k - _f_old, minlength=neighbors.size)
+        pair_neighbors = self.pair_energies[neighbors] + 0.5*np.bincount(
+                _index, weights=_V_new[~_is_moved] - _V_old,
+                minlength=neighbors.size)
+
+        affected = np.concatenate((atoms, neighbors))
+        rho = np.concatenate((rho_moved, rho_neighbors))
+        pair_energies = np.concatenate((pair_moved, pair_neighbors))
+        embedding_energies = self.embedding.evaluate(
+                rho, rows=np.concatenate((species, self.species[neighbors])))
+        energies = embedding_energies + pair_energies
+
+        self.trial = {
+            'atoms': atoms,
+            'positions': positions,
+            'species': species,
+            'affected': affected,
+            'densities': rho,
+            'pair_energies': pair_energies,
+            'embedding_energies': embedding_energies,
+            'energies': energies,
+            'delta_energy': float(np.sum(energies) - np.sum(self.energies[affected]))}
+        return self.trial['delta_energy']
+
+    def accept(self):
+        """commit the pending trial move
+
+        Returns:
+            float: the total energy after the move
+        """
+        if self.trial is None:
+            raise ValueError("there is no trial move to accept")
+        t = self.trial
+        _affected = t['affected']
+        self.densities[_affected] = t['densities']
+        self.pair_energies[_affected] = t['pair_energies']
+        self.embedding_energies[_affected] = t['embedding_energies']
+        self.energies[_affected] = t['energies']
+        self.energy += t['delta_energy']
+
+        # the moved atoms are updated in the cell
+        _inv_L = np.linalg.inv(self._L)
+        atomic_basis = self.cell.atomic_basis
+        for a, x, s in zip(t['atoms'], t['positions'], t['species']):
+            self._positions[a] = x
+            if s != self.species[a]:
+                atomic_basis[a].symbol = self.symbols[s]
+            atomic_basis[a].position = x.dot(_inv_L)
+        self.species[t['atoms']] = t['species']
+
+        self.trial = None
+        self.n_accepted += 1
+        return self.energy
+
+    def reject(self):
+        """discard the pending trial move
+
+        Returns:
+            float: the total energy, which is unchanged
+        """
+        if self.trial is None:
+            raise ValueError("there is no trial move to reject")
+        self.trial = None
+        self.n_rejected += 1
+        return self.energy
@@ -0,0 +1,278 @@
+from collections import OrderedDict
+import numpy as np
+from mexm.crystal.shells import get_shell_table
+from mexm.potential.potential import get_packed_arguments
+
+# the conversion of eV/Angs^3 to GPa
+EV_PER_CUBIC_ANGSTROM_TO_GPA = 160.21766208
+
+class LatticeSum(object):
+    """lattice sums of an EAM potential for a single element
+
+    For a lattice with lattice parameter a, the density and the energy per
+    atom are
+
+        rho(a) = sum_s n_s f(d_s*a)
+        E(a) = F(rho(a)) + 1/2 sum_s n_s V(d_s*a)
+
+    where n_s and d_s are the multiplicity and the reduced distance of the
+    shells.  The shells are the shared tables of mexm.crystal.get_shell_table,
+    and the sums for a vector of lattice parameters and a population of
+    candidate parameterizations are evaluated with broadcasting over
+    candidates x lattice parameters x shells.  The functions are evaluated
+    analytically, with a shifted force cutoff at r_cut, and the pressure
+    uses the analytic derivatives.
+
+    Args:
+        lattice_type (str): fcc, bcc, sc, hcp or diamond
+        d_max (float,optional): the largest shell distance, in units of the
+            lattice parameter.  Default is 3.
+        c_over_a (float,optional): the c/a ratio for hcp.  Default is the
+            ideal ratio.
+
+    Attributes:
+        lattice_type (str): the type of the lattice
+        d_max (float): the largest shell distance
+        shell_table (mexm.crystal.shells.ShellTable): the shared shells
+        shell_distances (numpy.ndarray): the reduced distance of each shell
+        shell_multiplicities (numpy.ndarray): the number of neighbors in each
+            shell
+        volume_factor (float): the volume per atom divided by a**3
+    """
+    def __init__(self, lattice_type, d_max=3., c_over_a=None):
+        self.lattice_type = lattice_type
+        self.d_max = float(d_max)
+        self.shell_table = get_shell_table(
+                lattice_type=lattice_type, d_max=d_max, c_over_a=c_over_a)
+        self.shell_distances = self.shell_table.distances
+        self.shell_multiplicities = self.shell_table.multiplicities
+        self.volume_factor = self.shell_table.volume_factor
+
+    @property
+    def n_shells(self):
+        """int: the number of shells"""
+        return self.shell_distances.size
+
+    def get_atomic_volume(self, a):
+        """the volume per atom for lattice parameters a"""
+        return self.volume_factor*np.asarray(a, dtype=float)**3
+
+    def evaluate(self, potential, a, parameters, symbol=None, r_cut=None):
+        """evaluate the lattice sums for a vector of lattice parameters
+
+        Args:
+            potential (mexm.potential.EamPotential): the potential
+            a (numpy.ndarray): the lattice parameters, with shape (n_a,), or
+                (n_candidates, n_a) for lattice parameters which differ for
+                each candidate
+            parameters (dict or numpy.ndarray): the parameters as a
+                dictionary, a parameter vector in the order of
+                parameter_names, or an array of parameter vectors with shape
+                (n_candidates, n_parameters)
+            symbol (str,optional): the symbol of the element.  Default is the
+                symbol of a single element potential.
+            r_cut (float,optional): the cutoff of the potential.  If None, the
+                sums are over all of the shells.
+        Returns:
+            OrderedDict: the 'energy' per atom in eV, the 'density' and the
+                'pressure' in GPa.  Each has the shape (n_candidates, n_a),
+                or (n_a,) for a single parameterization.
+        Raises:
+            ValueError: if the shells do not extend to the cutoff
+        """
+        X, is_single = self._get_parameter_array(potential, parameters)
+        a = np.asarray(a, dtype=float)
+        results = self._evaluate(potential, X, a, symbol, r_cut)
+        if is_single:
+            for key in results:
+                results[key] = results[key][0]
+        return results
+
+    def get_equilibrium_properties(self, potential, parameters,
+            a_min, a_max, n_a=100, symbol=None, r_cut=None,
+            max_iterations=20, a_tol=1e-10):
+        """the equilibrium properties of the lattice
+
+        The energy is evaluated on a grid of lattice parameters, and the
+        minimum of each candidate is refined with Newton iterations on the
+        pressure.  The bulk modulus is B = -V dP/dV at the equilibrium
+        lattice parameter.
+
+        Args:
+            potential (mexm.potential.EamPotential): the potential
+            parameters (dict or numpy.ndarray): the parameters, see evaluate
+            a_min (float): the smallest lattice parameter of the grid
+            a_max (float): the largest lattice parameter of the grid
+            n_a (int,optional): the number of points of the grid
+            symbol (str,optional): the symbol of the element
+            r_cut (float,optional): the cutoff of the potential
+            max_iterations (int,optional): the maximum number of Newton
+                iterations
+            a_tol (float,optional): the tolerance of the lattice parameter
+        Returns:
+            OrderedDict: the equilibrium lattice parameter 'a0', the energy
+                per atom 'e_coh' and the bulk modulus 'B' in GPa.  Each has
+                the shape (n_candidates,), or is a float for a single
+                parameterization.  Candidates whose minimum is at the end of
+                the grid are nan.
+        """
+        X, is_single = self._get_parameter_array(potential, parameters)
+        _a = np.linspace(a_min, a_max, n_a)
+        _energy = self._evaluate(potential, X, _a, symbol, r_cut)['energy']
+
+        k = np.argmin(_energy, axis=1)
+        _is_bracketed = (k > 0) & (k < n_a - 1)
+        k = np.clip(k, 1, n_a - 2)
+        a_lower = _a[k - 1]
+        a_upper = _a[k + 1]
+
+        # the pressure and dP/da by central differences, for all candidates
+        h = 1e-5*(a_max - a_min)
+        _steps = np.array([-h, 0., h])
+
+        def get_pressure(a):
+            _p = self._evaluate(
+                    potential, X, a[:, np.newaxis] + _steps, symbol, r_cut)
+            return _p, (_p['pressure'][:, 2] - _p['pressure'][:, 0])/(2*h)
+
+        a0 = _a[k]
+        for i in range(max_iterations):
+            _p, _dP = get_pressure(a0)
+            _is_flat = (_dP == 0.)
+            step = np.where(_is_flat, 0., _p['pressure'][:, 1]/np.where(_is_flat, 1., _dP))
+            a_new = np.clip(a0 - step, a_lower, a_upper)
+            _is_converged = np.all(np.abs(a_new - a0) <= a_tol)
+            a0 = a_new
+            if _is_converged:
+                break
+
+        _p, _dP = get_pressure(a0)
+        # B = -V dP/dV = -(a/3) dP/da
+        B = -a0*_dP/3.
+
+        results = OrderedDict()
+        results['a0'] = np.where(_is_bracketed, a0, np.nan)
+        results['e_coh'] = np.where(_is_bracketed, _p['energy'][:, 1], np.nan)
+        results['B'] = np.where(_is_bracketed, B, np.nan)
+        if is_single:
+            for key in results:
+                results[key] = float(results[key][0])
+        return results
+
+    def _get_parameter_array(self, potential, parameters):
+        if isinstance(parameters, dict):
+            parameters = potential.get_parameter_vector(parameters)
+        X = np.asarray(parameters, dtype=float)
+        is_single = (X.ndim == 1)
+        X = np.atleast_2d(X)
+        if X.shape[1] != len(potential.parameter_names):
+            msg = "the parameters must have {} columns".format(
+                    len(potential.parameter_names))
+            raise ValueError(msg)
+        return X, is_single
+
+    def _get_rows(self, potential, symbol):
+        """the rows of the packed functions of the element"""
+        if symbol is None:
+            if len(potential.symbols) != 1:
+                msg = "the symbol must be given for a potential of {}"
+                raise ValueError(msg.format(potential.symbols))
+            symbol = potential.symbols[0]
+
+        if potential.parameter_plan['embedding']['packed_indices'] is None:
+            msg = ("lattice sums are not supported for embedding functions "
+                   "determined from an equation of state")
+            raise NotImplementedError(msg)
+
+        rows = OrderedDict()
+        rows['pair'] = potential.obj_pair.pair_names.index(symbol + symbol)
+        rows['density'] = potential.symbols.index(symbol)
+        rows['embedding'] = potential.symbols.index(symbol)
+        return rows
+
+    def _get_lattice_parameters(self, X, a, r_cut):
+        a = np.broadcast_to(a, (X.shape[0],) + a.shape[-1:])
+        if r_cut is not None and r_cut > self.d_max*np.min(a):
+            msg = "the shells to {} do not extend to the cutoff {} for a={}"
+            raise ValueError(msg.format(self.d_max, r_cut, np.min(a)))
+        return a
+
+    def _evaluate_function(self, potential, X, stage, row, x,
+            r_cut=None, second_derivative=False):
+        """evaluate a function of the potential for each candidate
+
+        Args:
+            potential (mexm.potential.EamPotential): the potential
+            X (numpy.ndarray): the (n_candidates, n_parameters) parameters
+            stage (str): 'pair', 'density' or 'embedding'
+            row (int): the row of the packed function
+            x (numpy.ndarray): the points, with a leading candidate axis
+            r_cut (float,optional): the shifted force cutoff
+            second_derivative (bool,optional): if True, the second derivative
+                is also returned.  It is analytic for the functions which
+                define {stage}_function_and_second_derivative, otherwise it
+                is the central difference of the analytic first derivative.
+        Returns:
+            tuple: the values and the derivatives, and optionally the second
+                derivatives, with the shape of x
+        """
+        obj = getattr(potential, 'obj_{}'.format(stage))
+        _function = getattr(type(obj), '{}_function_and_derivative'.format(stage))
+        if _function is None:
+            msg = "{} does not implement an analytic derivative"
+            raise NotImplementedError(msg.format(type(obj).__name__))
+        _function_2 = getattr(type(obj),
+                '{}_function_and_second_derivative'.format(stage), None)
+        _packed = X[:, potential.parameter_plan[stage]['packed_indices'][row]]
+
+        def evaluate(x):
+            return _function(x, *get_packed_arguments(x[0], _packed))
+
+        if not second_derivative:
+            f, df = evaluate(x)
+        elif _function_2 is not None:
+            f, df, d2f = _function_2(x, *get_packed_arguments(x[0], _packed))
+        else:
+            f, df = evaluate(x)
+            h = 1e-5*np.maximum(np.abs(x), 1.)
+            d2f = (evaluate(x + h)[1] - evaluate(x - h)[1])/(2*h)
+
+        if r_cut is not None:
+            _rc = np.full((X.shape[0],) + (1,)*(x.ndim - 1), float(r_cut))
+            f_rc, df_rc = evaluate(_rc)
+            f = np.where(x < r_cut, f - f_rc - df_rc*(x - r_cut), 0.)
+            df = np.where(x < r_cut, df - df_rc, 0.)
+            if second_derivative:
+                d2f = np.where(x < r_cut, d2f, 0.)
+
+        if second_derivative:
+            return f, df, d2f
+        return f, df
+
+    def _evaluate(self, potential, X, a, symbol, r_cut):
+        rows = self._get_rows(potential, symbol)
+        a = self._get_lattice_parameters(X, a, r_cut)
+        r = a[:, :, np.newaxis]*self.shell_distances
+
+        def get_shell_sum(stage):
+            f, df = self._evaluate_function(
+                    potential, X, stage, rows[stage], r, r_cut=r_cut)
+            # the sums and their derivatives with respect to a
+            return f.dot(self.shell_multiplicities), \
+                    (df*self.shell_distances).dot(self.shell_multiplicities)
+
+        rho, drho_da = get_shell_sum('density')
+        pair, dpair_da = get_shell_sum('pair')
+        F, dF = self._evaluate_function(
+                potential, X, 'embedding', rows['embedding'], rho)
+
+        energy = F + 0.5*pair
+        de_da = dF*drho_da + 0.5*dpair_da
+        # P = -dE/dV, where dV/da = 3V/a
+        pressure = -de_da*a/(3.*self.get_atomic_volume(a))
+
+        results = OrderedDict()
+        results['energy'] = energy
+        results['density'] = rho
+        results['pressure'] = EV_PER_CUBIC_ANGSTROM_TO_GPA*pressure
+        return results
@@ -0,0 +1,428 @@
+import numpy as np
+from mexm.crystal import get_atomic_weight
+from mexm.crystal import get_super_cell_translations
+from mexm.crystal import make_super_cell
+from mexm.crystal.symmetry import get_symmetry_operations
+from mexm.calculator.dynamics import EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2
+
+def get_q_mesh(mesh, shift=(0., 0., 0.)):
+    """the q-points of a regular mesh in the first Brillouin zone
+
+    Args:
+        mesh (list of int): the number of q-points along each reciprocal
+            lattice vector
+        shift (list of float,optional): the shift of the mesh in units of
+            the spacing of the mesh.  Default is a mesh centered on Gamma.
+    Returns:
+        numpy.ndarray: the (n_q,3) q-points in direct coordinates of the
+            reciprocal lattice, in [-1/2,1/2)
+    """
+    mesh = np.asarray(mesh, dtype=int)
+    if mesh.shape != (3,) or np.any(mesh < 1):
+        raise ValueError("the mesh must be 3 positive integers")
+    k = np.stack(np.meshgrid(*[np.arange(n) for n in mesh], indexing='ij'),
+            axis=-1).reshape(-1, 3)
+    q = (k + np.asarray(shift, dtype=float))/mesh
+    return q - np.floor(q + 0.5)
+
+class Phonons(object):
+    """an in-process finite displacement calculator of harmonic phonons
+
+    The force constants are computed by finite differences of the forces of
+    an in-process calculator in a supercell.  Only the displacements which
+    are not related by the space group of the unit cell are evaluated, each
+    atom of the unit cell which is not equivalent to an earlier one is
+    displaced along the fewest of the cartesian directions which span all
+    directions under its site symmetry, and in both senses unless they are
+    related by the site symmetry.  The forces of the displacements are then
+    expanded by the site symmetry, and the force constants of the other
+    atoms of the unit cell by the space group.
+
+    The displacements are evaluated in a batch, each displaced supercell is
+    written into the positions of one copy of the supercell, so that a
+    calculator with a Verlet skin bins the supercell once for the whole set.
+    The dynamical matrices of many q-points are then assembled and
+    diagonalized at once, with the images of each pair at the same minimum
+    distance in the supercell weighted equally.
+
+    Frequencies are in THz, with imaginary frequencies returned as negative
+    frequencies, in the metal units of LAMMPS.
+
+    Args:
+        calculator (mexm.calculator.EamCalculator): the calculator of the
+            forces, with a calculate(cell, forces=True) method
+        cell (mexm.crystal.SimulationCell): the unit cell, at equilibrium
+        supercell (list of int,optional): the number of repeat units in the
+            h1, h2, and h3 directions, or a (3,3) integer transformation
+            matrix, see mexm.crystal.make_super_cell.  Default is [2,2,2].
+        displacement (float,optional): the length of the displacements in
+            Angs.  Default is 0.01.
+        masses (dict,optional): the mass of each symbol in amu.  Default is
+            the atomic weight of mexm.crystal.get_atomic_weight.
+        symprec (float,optional): the tolerance of the symmetry in Angs
+        use_symmetry (bool,optional): if False, every atom of the unit cell
+            is displaced in both senses along the three cartesian directions.
+            Default is True.
+
+    Attributes:
+        supercell (mexm.crystal.SimulationCell): the supercell
+        masses (numpy.ndarray): the mass of each atom of the unit cell in amu
+        rotations (numpy.ndarray): the (n_ops,3,3) cartesian rotations of
+            the space group operations compatible with the supercell
+        irreducible_atoms (numpy.ndarray): the atoms of the unit cell which
+            are displaced
+        displaced_atoms (numpy.ndarray): the supercell index of the atom of
+            each displacement
+        displacements (numpy.ndarray): the (n_displacements,3) cartesian
+            displacements
+        forces (numpy.ndarray): the (n_displacements,N,3) forces of the
+            displacements, less the residual forces of the supercell
+        force_constants (numpy.ndarray): the (n_basis,N,3,3) force constants,
+            the second derivatives of the energy with respect to the
+            displacements of each atom of the unit cell and each atom of the
+            supercell
+    """
+    def __init__(self, calculator, cell, supercell=(2, 2, 2),
+            displacement=0.01, masses=None, symprec=1e-5, use_symmetry=True):
+        if displacement <= 0:
+            raise ValueError("the displacement must be positive")
+        sc = np.asarray(supercell)
+        if sc.ndim == 1:
+            sc = np.diag(sc)
+        sc = np.round(sc).astype(int)
+
+        self.calculator = calculator
+        self.unit_cell = cell
+        self.supercell = make_super_cell(cell, supercell)
+        self.displacement = float(displacement)
+        self.symprec = float(symprec)
+
+        symbols = [a.symbol for a in cell.atomic_basis]
+        if masses is None:
+            masses = dict((s, get_atomic_weight(s)) for s in set(symbols))
+        self.masses = np.array([masses[s] for s in symbols], dtype=float)
+
+        self.n_basis = cell.n_atoms
+        self._sc = sc
+        self._L = cell.a0*np.array(cell.H, dtype=float)
+        self._L_s = self.supercell.a0*np.array(self.supercell.H, dtype=float)
+        self._translations = get_super_cell_translations(sc)
+        self._t0 = int(np.flatnonzero(np.all(self._translations == 0, axis=1))[0])
+        self._initialize_translation_table()
+
+        self._initialize_symmetry(use_symmetry)
+        self._initialize_displacements()
+        self._initialize_images()
+
+        self.forces = None
+        self.force_constants = None
+
+    def _initialize_translation_table(self):
+        _t_min = self._translations.min(axis=0)
+        _shape = tuple(self._translations.max(axis=0) - _t_min + 1)
+        self._translation_table = np.full(np.prod(_shape), -1, dtype=int)
+        self._translation_table[np.ravel_multi_index(
+                (self._translations - _t_min).T, _shape)] = \
+                np.arange(self._translations.shape[0])
+        self._translation_table_origin = _t_min
+        self._translation_table_shape = _shape
+        self._inverse_sc = np.linalg.inv(self._sc)
+
+    def _get_translation_indices(self, n):
+        """the index of the translation equivalent to n in the supercell"""
+        f = n.dot(self._inverse_sc)
+        f -= np.floor(f + 1e-8)
+        n = np.round(f.dot(self._sc)).astype(int)
+        return self._translation_table[np.ravel_multi_index(
+                np.moveaxis(n - self._translation_table_origin, -1, 0),
+                self._translation_table_shape)]
+
+    def _initialize_symmetry(self, use_symmetry):
+        if use_symmetry:
+            W, t, p = get_symmetry_operations(self.unit_cell, self.symprec)
+            # the operations must map the supercell lattice onto itself
+            _W = np.einsum('ij,nkj,kl->nil', self._sc, W, self._inverse_sc)
+            _is_compatible = np.all(np.abs(_W - np.round(_W)) < 1e-8, axis=(1, 2))
+            W, t, p = W[_is_compatible], t[_is_compatible], p[_is_compatible]
+        else:
+            W = np.eye(3, dtype=int)[np.newaxis, :, :]
+            t = np.zeros((1, 3))
+            p = np.arange(self.n_basis)[np.newaxis, :]
+
+        x = np.array(self.unit_cell.positions, dtype=float)
+        self._W = W
+        self._atom_permutations = p
+        # W.x_b + t = x_p(b) + l_b for the lattice vectors l_b
+        self._lattice_shifts = np.round(
+                np.einsum('nij,bj->nbi', W, x) + t[:, np.newaxis, :] \
+                        - x[p]).astype(int)
+        self.rotations = np.einsum('ij,njk,lk->nil',
+                self._L.T, W, np.linalg.inv(self._L))
+
+    def get_supercell_index(self, atom, translation=None):
+        """the index in the supercell of an atom of the unit cell"""
+        if translation is None:
+            return self._t0*self.n_basis + atom
+        return self._get_translation_indices(
+                np.asarray(translation))*self.n_basis + atom
+
+    def _get_supercell_permutations(self, atom):
+        """the permutations of the supercell by the space group operations
+
+        Each operation is combined with the lattice translation which maps
+        the atom in the origin of the supercell onto the atom in the origin.
+
+        Returns:
+            numpy.ndarray: the (n_ops,N) permutations, where supercell atom j
+                is mapped onto supercell atom permutations[k,j]
+        """
+        _shifts = self._lattice_shifts - self._lattice_shifts[:, [atom], :]
+        n = np.einsum('tj,kij->kti', self._translations, self._W)
+        n = n[:, :, np.newaxis, :] + _shifts[:, np.newaxis, :, :]
+        _t = self._get_translation_indices(n)
+        permutations = _t*self.n_basis \
+                + self._atom_permutations[:, np.newaxis, :]
+        return permutations.reshape(self._W.shape[0], -1)
+
+    def _initialize_displacements(self):
+        self.irreducible_atoms = []
+        self._equivalent_atoms = np.full(self.n_basis, -1)
+        for a in range(self.n_basis):
+            if self._equivalent_atoms[a] >= 0:
+                continue
+            self.irreducible_atoms.append(a)
+            self._equivalent_atoms[self._atom_permutations[:, a]] = a
+        self.irreducible_atoms = np.array(self.irreducible_atoms)
+
+        displaced_atoms = []
+        displacements = []
+        for a in self.irreducible_atoms:
+            _is_site = self._atom_permutations[:, a] == a
+            R = self.rotations[_is_site]
+            _images = np.zeros((0, 3))
+            for e in np.eye(3):
+                if np.linalg.matrix_rank(_images, tol=1e-6) == 3:
+                    break
+                _e_images = R.dot(e)
+                _new_images = np.vstack((_images, _e_images))
+                if np.linalg.matrix_rank(_new_images, tol=1e-6) \
+                        == np.linalg.matrix_rank(_images, tol=1e-6):
+                    continue
+                _images = _new_images
+                displacements.append(self.displacement*e)
+                # the opposite sense is only needed if it is not equivalent
+                if not np.any(np.all(np.abs(_e_images + e) < 1e-6, axis=1)):
+                    displacements.append(-self.displacement*e)
+            displaced_atoms += [self.get_supercell_index(a)] \
+                    *(len(displacements) - len(displaced_atoms))
+        self.displaced_atoms = np.array(displaced_atoms, dtype=int)
+        self.displacements = np.array(displacements).reshape(-1, 3)
+
+    def _initialize_images(self):
+        """the minimum images of the pairs of the unit cell and supercell"""
+        x = self.supercell.positions.dot(self._L_s)
+        x_a = x[self.get_supercell_index(np.arange(self.n_basis))]
+        dx = (x[np.newaxis, :, :] - x_a[:, np.newaxis, :]).dot(
+                np.linalg.inv(self._L_s))
+        dx -= np.round(dx)
+
+        _n = np.array(list(np.ndindex(3, 3, 3))) - 1
+        r = (dx[:, :, np.newaxis, :] + _n).dot(self._L_s)
+        d = np.linalg.norm(r, axis=3)
+        _is_image = d < d.min(axis=2, keepdims=True) + self.symprec
+        a, j, m = np.nonzero(_is_image)
+        self._image_atoms = a
+        self._image_neighbors = j
+        self._image_vectors = r[a, j, m]
+        self._image_weights = 1./np.sum(_is_image, axis=2)[a, j]
+
+    def get_displaced_forces(self):
+        """the forces of all the displacements, evaluated in a batch
+
+        The positions of every displacement are written into the same copy
+        of the supercell, which is restored afterwards.
+
+        Returns:
+            numpy.ndarray: the (n_displacements,N,3) forces, less the
+                residual forces of the undisplaced supercell
+        """
+        cell = self.supercell
+        positions = np.array(cell.positions)
+        _inverse_L_s = np.linalg.inv(self._L_s)
+        _du = self.displacements.dot(_inverse_L_s)
+
+        self.calculator.calculate(cell, forces=True)
+        residual_forces = np.array(self.calculator.forces)
+        forces = np.zeros((self.displacements.shape[0], cell.n_atoms, 3))
+        try:
+            for k, (a, du) in enumerate(zip(self.displaced_atoms, _du)):
+                cell.positions[a] = positions[a] + du
+                self.calculator.calculate(cell, forces=True)
+                np.subtract(self.calculator.forces, residual_forces, out=forces[k])
+                cell.positions[a] = positions[a]
+        finally:
+            cell.positions[:] = positions
+        return forces
+
+    def calculate_forces(self):
+        """calculate the forces of the displacements
+
+        Returns:
+            numpy.ndarray: the forces, see get_displaced_forces
+        """
+        self.forces = self.get_displaced_forces()
+        return self.forces
+
+    def calculate_force_constants(self, acoustic_sum_rule=True):
+        """calculate the force constants from the forces of the displacements
+
+        The force constants of each irreducible atom are fit by least
+        squares to its displacements and their images under its site
+        symmetry, and are then rotated onto the equivalent atoms.
+
+        Args:
+            acoustic_sum_rule (bool,optional): if True, the self term of each
+                atom is corrected so that a uniform translation has no
+                restoring force.  Default is True.
+        Returns:
+            numpy.ndarray: the force constants, see force_constants
+        """
+        if self.forces is None:
+            self.calculate_forces()
+
+        N = self.supercell.n_atoms
+        force_constants = np.zeros((self.n_basis, N, 3, 3))
+        for a in self.irreducible_atoms:
+            permutations = self._get_supercell_permutations(a)
+            _is_displaced = self.displaced_atoms == self.get_supercell_index(a)
+            u = self.displacements[_is_displaced]
+            F = self.forces[_is_displaced]
+
+            # the images of the displacements under the site symmetry
+            _is_site = self._atom_permutations[:, a] == a
+            R = self.rotations[_is_site]
+            U = np.einsum('kxy,my->kmx', R, u).reshape(-1, 3)
+            _inverse = np.argsort(permutations[_is_site], axis=1)
+            _F = np.take_along_axis(np.einsum('kxy,mjy->kmjx', R, F),
+                    _inverse[:, np.newaxis, :, np.newaxis], axis=2)
+            _F = _F.reshape(-1, N, 3)
+
+            # F_j = -Phi_ja u, so that Phi_aj = Phi_ja^T = -pinv(U^T)^T F_j
+            _P = np.linalg.pinv(U.T)
+            phi = -np.einsum('my,mjx->jyx', _P, _F)
+
+            # the force constants of the atoms equivalent to a
+            for b in np.flatnonzero(self._equivalent_atoms == a):
+                k = np.flatnonzero(self._atom_permutations[:, a] == b)[0]
+                _R = self.rotations[k]
+                force_constants[b, permutations[k]] = \
+                        np.einsum('xy,jyz,wz->jxw', _R, phi, _R)
+
+        if acoustic_sum_rule:
+            _a = self.get_supercell_index(np.arange(self.n_basis))
+            force_constants[np.arange(self.n_basis), _a] -= \
+                    np.sum(force_constants, axis=1)
+        self.force_constants = force_constants
+        return self.force_constants
+
+    def get_reciprocal_lattice(self):
+        """numpy.ndarray: the reciprocal lattice vectors as rows, in 1/Angs,
+        including the factor of 2 pi"""
+        return 2.*np.pi*np.linalg.inv(self._L).T
+
+    def get_dynamical_matrices(self, q):
+        """the dynamical matrices of q-points
+
+        Args:
+            q (numpy.ndarray): the (n_q,3) q-points in direct coordinates of
+                the reciprocal lattice
+        Returns:
+            numpy.ndarray: the (n_q,3*n_basis,3*n_basis) hermitian dynamical
+                matrices in eV/(Angs^2 amu)
+        """
+        if self.force_constants is None:
+            self.calculate_force_constants()
+        q = np.atleast_2d(np.asarray(q, dtype=float))
+        q_cartesian = q.dot(self.get_reciprocal_lattice())
+
+        a = self._image_atoms
+        j = self._image_neighbors
+        b = j % self.n_basis
+        _w = self._image_weights/np.sqrt(self.masses[a]*self.masses[b])
+        phi = (_w[:, np.newaxis, np.newaxis] \
+                *self.force_constants[a, j]).reshape(-1, 9)
+        phases = np.exp(1j*q_cartesian.dot(self._image_vectors.T))
+
+        n = self.n_basis
+        D = np.zeros((q.shape[0], n, n, 3, 3), dtype=complex)
+        _blocks = a*n + b
+        for block in np.unique(_blocks):
+            _is_block = _blocks == block
+            D[:, block // n, block % n] = phases[:, _is_block].dot(
+                    phi[_is_block]).reshape(-1, 3, 3)
+        D = D.transpose(0, 1, 3, 2, 4).reshape(q.shape[0], 3*n, 3*n)
+        return 0.5*(D + np.conj(D.transpose(0, 2, 1)))
+
+    def get_frequencies(self, q, eigenvectors=False, chunk_size=1024):
+        """the phonon frequencies of q-points
+
+        Args:
+            q (numpy.ndarray): the (n_q,3) q-points in direct coordinates of
+                the reciprocal lattice
+            eigenvectors (bool,optional): if True, the eigenvectors are also
+                returned
+            chunk_size (int,optional): the largest number of q-points
+                diagonalized at once
+        Returns:
+            numpy.ndarray: the (n_q,3*n_basis) frequencies in THz, in
+                ascending order, and the (n_q,3*n_basis,3*n_basis)
+                eigenvectors as columns if eigenvectors is True
+        """
+        q = np.atleast_2d(np.asarray(q, dtype=float))
+        frequencies = np.zeros((q.shape[0], 3*self.n_basis))
+        if eigenvectors:
+            vectors = np.zeros((q.shape[0], 3*self.n_basis, 3*self.n_basis),
+                    dtype=complex)
+        for start in range(0, q.shape[0], chunk_size):
+            _s = slice(start, start + chunk_size)
+            D = self.get_dynamical_matrices(q[_s])
+            if eigenvectors:
+                _l, vectors[_s] = np.linalg.eigh(D)
+            else:
+                _l = np.linalg.eigvalsh(D)
+            frequencies[_s] = np.sign(_l)*np.sqrt(
+                    np.abs(_l)*EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2)/(2.*np.pi)
+        if eigenvectors:
+            return frequencies, vectors
+        return frequencies
+
+    def get_density_of_states(self, mesh=(10, 10, 10), sigma=0.1,
+            frequency_points=None, n_points=201):
+        """the phonon density of states on a mesh of q-points
+
+        Args:
+            mesh (list of int,optional): the q-point mesh, see get_q_mesh
+            sigma (float,optional): the width of the gaussian smearing in THz.
+                Default is 0.1.
+            frequency_points (numpy.ndarray,optional): the frequencies of the
+                density of states in THz.  Default is n_points frequencies
+                spanning the frequencies of the mesh.
+            n_points (int,optional): the number of the default frequencies
+        Returns:
+            tuple: the frequencies in THz and the density of states in
+                states/THz per unit cell, which integrates to 3*n_basis
+        """
+        frequencies = self.get_frequencies(get_q_mesh(mesh)).ravel()
+        if frequency_points is None:
+            frequency_points = np.linspace(
+                    frequencies.min() - 5.*sigma,
+                    frequencies.max() + 5.*sigma, n_points)
+        frequency_points = np.asarray(frequency_points, dtype=float)
+
+        _n_q = frequencies.size // (3*self.n_basis)
+        dos = np.zeros(frequency_points.size)
+        for f in np.array_split(frequencies, max(1, frequencies.size // 4096)):
+            _x = (frequency_points[:, np.newaxis] - f)/sigma
+            dos += np.sum(np.exp(-0.5*_x**2), axis=1)
+        dos /= _n_q*sigma*np.sqrt(2.*np.pi)
+        return frequency_points, dos
@@ -0,0 +1,97 @@
+import numpy as np
+from mexm.calculator.threebody import ThreeBodyCalculator
+from mexm.calculator.threebody import get_2body_keys
+from mexm.calculator.threebody import get_3body_keys
+from mexm.calculator.threebody import get_angle_gradients
+
+class StillingerWeberCalculator(ThreeBodyCalculator):
+    """an in-process calculator for the Stillinger-Weber potential
+
+    The energy is, as in the sw pair style of LAMMPS,
+
+        E = sum_i sum_j>i phi2(r_ij) + sum_i sum_j sum_k>j phi3(r_ij,r_ik,theta_jik)
+        phi2(r) = A epsilon (B (sigma/r)**p - (sigma/r)**q) exp(sigma/(r - a sigma))
+        phi3 = lambda epsilon (cos(theta_jik) - costheta0)**2
+                exp(gamma_ij sigma_ij/(r_ij - a_ij sigma_ij))
+                exp(gamma_ik sigma_ik/(r_ik - a_ik sigma_ik))
+
+    where the cutoff of the pair ij is a_ij sigma_ij.  The two-body
+    parameters A, B, p, q, epsilon, sigma, a and gamma are taken from the
+    pair of symbols, and the three-body parameters lambda and costheta0, and
+    epsilon if it is given for the triplet, from the triplet with the
+    central atom first.  See ThreeBodyCalculator for the names of the
+    parameters.
+
+    Args:
+        symbols (list of str): the symbols of the potential
+        parameters (dict): the parameters of the potential
+        skin (float,optional): the Verlet skin of the neighbor list
+        chunk_size (int,optional): the largest number of triplets evaluated
+            at once
+    """
+    two_body_parameters = ['A', 'B', 'p', 'q', 'epsilon', 'sigma', 'a', 'gamma']
+    three_body_parameters = ['lambda', 'costheta0']
+
+    def _initialize_parameters(self):
+        self.pair_parameters = {}
+        for p in self.two_body_parameters:
+            self.pair_parameters[p] = self.get_pair_parameters(p, get_2body_keys(p))
+        self.triplet_parameters = {}
+        for p in self.three_body_parameters:
+            self.triplet_parameters[p] = self.get_triplet_parameters(
+                    p, get_3body_keys(p))
+
+        # the epsilon of a triplet defaults to the one of the pair ij
+        _get_epsilon_keys = get_3body_keys('epsilon')
+        _get_pair_epsilon_keys = get_2body_keys('epsilon')
+        self.triplet_parameters['epsilon'] = self.get_triplet_parameters(
+                'epsilon',
+                lambda s1, s2, s3: _get_epsilon_keys(s1, s2, s3) \
+                        + _get_pair_epsilon_keys(s1, s2))
+
+        self.pair_cutoffs = self.pair_parameters['a']*self.pair_parameters['sigma']
+
+    def _calculate(self, species, i, j, d, r, offsets, forces):
+        _pair = dict((p, v[species[i], species[j]])
+                for p, v in self.pair_parameters.items())
+        sigma = _pair['sigma']
+        x = r - _pair['a']*sigma
+
+        # the two-body term, each pair is stored in both directions
+        _s_r = sigma/r
+        _exp = np.exp(sigma/x)
+        _u = _pair['B']*_s_r**_pair['p'] - _s_r**_pair['q']
+        _Ae = _pair['A']*_pair['epsilon']
+        phi2 = _Ae*_u*_exp
+        self._add_energies(i, 0.5*phi2)
+        if forces:
+            _du = (-_pair['p']*_pair['B']*_s_r**_pair['p'] \
+                    + _pair['q']*_s_r**_pair['q'])/r
+            dphi2 = _Ae*_exp*(_du - _u*sigma/x**2)
+            self._add_gradients(i, j, d, (0.5*dphi2/r)[:, np.newaxis]*d)
+
+        # the radial factor of the three-body term for each pair
+        _gs = _pair['gamma']*sigma
+        e3 = np.exp(_gs/x)
+        de3 = -e3*_gs/x**2
+
+        for ij, ik in self.get_triplet_chunks(offsets):
+            _t = (species[i[ij]], species[j[ij]], species[j[ik]])
+            _le = self.triplet_parameters['lambda'][_t] \
+                    *self.triplet_parameters['epsilon'][_t]
+            r_ij = r[ij]
+            r_ik = r[ik]
+            cos_theta = np.sum(d[ij]*d[ik], axis=1)/(r_ij*r_ik)
+            _dc = cos_theta - self.triplet_parameters['costheta0'][_t]
+
+            # every triplet is enumerated with j and k in both orders
+            _e = 0.5*_le*e3[ij]*e3[ik]
+            self._add_energies(i[ij], _e*_dc**2)
+            if forces:
+                g_ij, g_ik = get_angle_gradients(
+                        d[ij], r_ij, d[ik], r_ik, cos_theta,
+                        dE_dr_ij=0.5*_le*_dc**2*de3[ij]*e3[ik],
+                        dE_dr_ik=0.5*_le*_dc**2*e3[ij]*de3[ik],
+                        dE_dcos=2.*_e*_dc)
+                self._add_gradients(i[ij], j[ij], d[ij], g_ij)
+                self._add_gradients(i[ij], j[ik], d[ik], g_ik)
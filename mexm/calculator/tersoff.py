@@ -0,0 +1,133 @@
+import numpy as np
+from mexm.calculator.threebody import ThreeBodyCalculator
+from mexm.calculator.threebody import get_3body_keys
+from mexm.calculator.threebody import get_angle_gradients
+
+def get_tersoff_cutoff(r, R, D):
+    """the cutoff function of the Tersoff potential and its derivative
+
+    Args:
+        r (numpy.ndarray): the distances
+        R (numpy.ndarray): the centers of the cutoff region
+        D (numpy.ndarray): the half widths of the cutoff region
+    Returns:
+        tuple: the cutoff function and its derivative
+    """
+    _x = 0.5*np.pi*(r - R)/D
+    _is_inside = np.abs(r - R) < D
+    fc = np.where(r <= R - D, 1., np.where(_is_inside, 0.5 - 0.5*np.sin(_x), 0.))
+    dfc = np.where(_is_inside, -0.25*np.pi/D*np.cos(_x), 0.)
+    return fc, dfc
+
+class TersoffCalculator(ThreeBodyCalculator):
+    """an in-process calculator for the Tersoff potential
+
+    The energy is, as in the tersoff pair style of LAMMPS,
+
+        E = 1/2 sum_i sum_j V_ij
+        V_ij = fc(r_ij) (A exp(-lambda1 r_ij) - b_ij B exp(-lambda2 r_ij))
+        b_ij = (1 + (beta zeta_ij)**n)**(-1/(2n))
+        zeta_ij = sum_k fc(r_ik) g(theta_jik) exp(lambda3**m (r_ij - r_ik)**m)
+        g(theta) = gamma (1 + c**2/d**2 - c**2/(d**2 + (costheta0 - cos(theta))**2))
+
+    The parameters of the pair ij, n, beta, lambda2, B, R, D, lambda1 and A,
+    are those of the triplet i j j, and the parameters of zeta_ij, m, gamma,
+    lambda3, c, d, costheta0, R and D, are those of the triplet i j k.  The
+    triplets are evaluated in two passes, the first accumulates zeta for
+    each pair, and the second scatters the forces of the bond orders.
+
+    Args:
+        symbols (list of str): the symbols of the potential
+        parameters (dict): the parameters of the potential
+        skin (float,optional): the Verlet skin of the neighbor list
+        chunk_size (int,optional): the largest number of triplets evaluated
+            at once
+    """
+    two_body_parameters = ['n', 'beta', 'lambda2', 'B', 'R', 'D', 'lambda1', 'A']
+    three_body_parameters = ['m', 'gamma', 'lambda3', 'c', 'd', 'costheta0', 'R', 'D']
+
+    def _initialize_parameters(self):
+        self.pair_parameters = {}
+        for p in self.two_body_parameters:
+            _get_keys = get_3body_keys(p)
+            self.pair_parameters[p] = self.get_pair_parameters(
+                    p, lambda s1, s2: _get_keys(s1, s2, s2))
+        self.triplet_parameters = {}
+        for p in self.three_body_parameters:
+            self.triplet_parameters[p] = self.get_triplet_parameters(
+                    p, get_3body_keys(p))
+
+        # the neighbor k of the triplet ijk is within the cutoff of ijk
+        _pair_cutoffs = self.pair_parameters['R'] + self.pair_parameters['D']
+        _triplet_cutoffs = self.triplet_parameters['R'] + self.triplet_parameters['D']
+        self.pair_cutoffs = np.maximum(
+                _pair_cutoffs, np.max(_triplet_cutoffs, axis=1))
+
+    def _get_triplet_terms(self, species, i, j, d, r, ij, ik):
+        _t = (species[i[ij]], species[j[ij]], species[j[ik]])
+        _p = dict((k, v[_t]) for k, v in self.triplet_parameters.items())
+        r_ij = r[ij]
+        r_ik = r[ik]
+        cos_theta = np.sum(d[ij]*d[ik], axis=1)/(r_ij*r_ik)
+
+        fc, dfc = get_tersoff_cutoff(r_ik, _p['R'], _p['D'])
+        _c2 = _p['c']**2
+        _d2 = _p['d']**2
+        _h = _p['costheta0'] - cos_theta
+        _denominator = _d2 + _h**2
+        g = _p['gamma']*(1. + _c2/_d2 - _c2/_denominator)
+        dg = -2.*_p['gamma']*_c2*_h/_denominator**2
+
+        _l3m = _p['lambda3']**_p['m']
+        _dr = r_ij - r_ik
+        ex = np.exp(_l3m*_dr**_p['m'])
+        dex = ex*_l3m*_p['m']*_dr**(_p['m'] - 1.)
+
+        zeta = fc*g*ex
+        dzeta_dr_ij = fc*g*dex
+        dzeta_dr_ik = dfc*g*ex - fc*g*dex
+        dzeta_dcos = fc*dg*ex
+        return r_ij, r_ik, cos_theta, zeta, dzeta_dr_ij, dzeta_dr_ik, dzeta_dcos
+
+    def _calculate(self, species, i, j, d, r, offsets, forces):
+        _pair = dict((p, v[species[i], species[j]])
+                for p, v in self.pair_parameters.items())
+
+        zeta = np.zeros(r.size)
+        for ij, ik in self.get_triplet_chunks(offsets):
+            _zeta = self._get_triplet_terms(species, i, j, d, r, ij, ik)[3]
+            zeta += np.bincount(ij, weights=_zeta, minlength=r.size)
+
+        # the bond order and its derivative with respect to zeta
+        _n = _pair['n']
+        _z = (_pair['beta']*zeta)**_n
+        b = (1. + _z)**(-0.5/_n)
+        _is_zero = zeta <= 0.
+        db = np.where(_is_zero, 0.,
+                -0.5*b*_z/((1. + _z)*np.where(_is_zero, 1., zeta)))
+
+        fc, dfc = get_tersoff_cutoff(r, _pair['R'], _pair['D'])
+        f_R = _pair['A']*np.exp(-_pair['lambda1']*r)
+        f_A = -_pair['B']*np.exp(-_pair['lambda2']*r)
+        V = fc*(f_R + b*f_A)
+        self._add_energies(i, 0.5*V)
+        if not forces:
+            return
+
+        dV = dfc*(f_R + b*f_A) \
+                + fc*(-_pair['lambda1']*f_R - b*_pair['lambda2']*f_A)
+        self._add_gradients(i, j, d, (0.5*dV/r)[:, np.newaxis]*d)
+
+        # the forces of the bond orders, through zeta
+        _dE_dzeta = 0.5*fc*f_A*db
+        for ij, ik in self.get_triplet_chunks(offsets):
+            r_ij, r_ik, cos_theta, _, dz_dr_ij, dz_dr_ik, dz_dcos = \
+                    self._get_triplet_terms(species, i, j, d, r, ij, ik)
+            _w = _dE_dzeta[ij]
+            g_ij, g_ik = get_angle_gradients(
+                    d[ij], r_ij, d[ik], r_ik, cos_theta,
+                    dE_dr_ij=_w*dz_dr_ij,
+                    dE_dr_ik=_w*dz_dr_ik,
+                    dE_dcos=_w*dz_dcos)
+            self._add_gradients(i[ij], j[ij], d[ij], g_ij)
+            self._add_gradients(i[ij], j[ik], d[ik], g_ik)
@@ -0,0 +1,328 @@
+import numpy as np
+from mexm.crystal.neighborlist import NeighborList
+from mexm.potential import MEXM_2BODY_FORMAT
+from mexm.potential import MEXM_3BODY_FORMAT
+
+def get_triplets(offsets, start=0, stop=None):
+    """the triplets of the neighbor pairs of a range of central atoms
+
+    A triplet is an ordered pair of distinct neighbors j and k of a central
+    atom i, identified by the indices of the pairs ij and ik in a neighbor
+    list in the CSR layout, where the pairs of atom i are
+    offsets[i]:offsets[i+1].
+
+    Args:
+        offsets (numpy.ndarray): the CSR index pointer of the neighbor list
+        start (int,optional): the first central atom.  Default is 0.
+        stop (int,optional): one past the last central atom.  Default is the
+            number of atoms.
+    Returns:
+        tuple: the index of the pair ij and the index of the pair ik of each
+            triplet, as numpy.ndarray
+    """
+    if stop is None:
+        stop = offsets.size - 1
+    n_neighbors = np.diff(offsets[start:stop+1])
+    p0 = offsets[start]
+
+    # each pair ij is repeated once for each neighbor of its central atom
+    _n = np.repeat(n_neighbors, n_neighbors)
+    _first = np.repeat(offsets[start:stop], n_neighbors)
+    ij = np.repeat(np.arange(p0, offsets[stop]), _n)
+
+    # the position of each repeat within the repeats of its pair ij
+    _starts = np.cumsum(_n) - _n
+    _local = np.arange(ij.size) - np.repeat(_starts, _n)
+    ik = np.repeat(_first, _n) + _local
+
+    _is_triplet = ij != ik
+    return ij[_is_triplet], ik[_is_triplet]
+
+def get_triplet_chunks(offsets, chunk_size):
+    """ranges of central atoms with a bounded number of triplets
+
+    Args:
+        offsets (numpy.ndarray): the CSR index pointer of the neighbor list
+        chunk_size (int): the largest number of triplets in a chunk, unless a
+            single atom has more triplets
+    Returns:
+        list of tuple: the (start, stop) range of the central atoms of each
+            chunk
+    """
+    n_atoms = offsets.size - 1
+    n_neighbors = np.diff(offsets)
+    n_triplets = np.cumsum(n_neighbors*(n_neighbors - 1))
+
+    chunks = []
+    start = 0
+    while start < n_atoms:
+        _n_before = n_triplets[start-1] if start > 0 else 0
+        stop = int(np.searchsorted(
+                n_triplets, _n_before + chunk_size, side='right'))
+        stop = min(max(stop, start + 1), n_atoms)
+        chunks.append((start, stop))
+        start = stop
+    return chunks
+
+def get_angle_gradients(d_ij, r_ij, d_ik, r_ik, cos_theta,
+        dE_dr_ij, dE_dr_ik, dE_dcos):
+    """the gradients of a triplet energy with respect to the bond vectors
+
+    Args:
+        d_ij (numpy.ndarray): the (n,3) vectors from the central atoms to j
+        r_ij (numpy.ndarray): the lengths of d_ij
+        d_ik (numpy.ndarray): the (n,3) vectors from the central atoms to k
+        r_ik (numpy.ndarray): the lengths of d_ik
+        cos_theta (numpy.ndarray): the cosines of the angles jik
+        dE_dr_ij (numpy.ndarray): the partial derivatives of the energy with
+            respect to r_ij
+        dE_dr_ik (numpy.ndarray): the partial derivatives with respect to r_ik
+        dE_dcos (numpy.ndarray): the partial derivatives with respect to the
+            cosine
+    Returns:
+        tuple: the (n,3) gradients with respect to d_ij and d_ik
+    """
+    _rr = r_ij*r_ik
+    g_ij = (dE_dr_ij/r_ij - dE_dcos*cos_theta/r_ij**2)[:, np.newaxis]*d_ij \
+            + (dE_dcos/_rr)[:, np.newaxis]*d_ik
+    g_ik = (dE_dr_ik/r_ik - dE_dcos*cos_theta/r_ik**2)[:, np.newaxis]*d_ik \
+            + (dE_dcos/_rr)[:, np.newaxis]*d_ij
+    return g_ij, g_ik
+
+def get_2body_keys(p):
+    """the names of a two-body parameter, in order of precedence
+
+    The parameter of the pair s1 s2 is MEXM_2BODY_FORMAT in either order, or
+    MEXM_3BODY_FORMAT for the triplet s1 s2 s2, as in the parameter files of
+    LAMMPS.
+    """
+    return lambda s1, s2: [
+            MEXM_2BODY_FORMAT.format(s1=s1, s2=s2, p=p),
+            MEXM_2BODY_FORMAT.format(s1=s2, s2=s1, p=p),
+            MEXM_3BODY_FORMAT.format(s1=s1, s2=s2, s3=s2, p=p)]
+
+def get_3body_keys(p):
+    """the names of a three-body parameter, in order of precedence
+
+    The parameter of the triplet s1 s2 s3 is MEXM_3BODY_FORMAT with the
+    neighbors in either order.
+    """
+    return lambda s1, s2, s3: [
+            MEXM_3BODY_FORMAT.format(s1=s1, s2=s2, s3=s3, p=p),
+            MEXM_3BODY_FORMAT.format(s1=s1, s2=s3, s3=s2, p=p)]
+
+class ThreeBodyCalculator(object):
+    """the base class of in-process calculators for three-body potentials
+
+    The neighbor list of the cell is compacted to the pairs within the
+    cutoff of their pair of species, and the triplets are enumerated from
+    the compact list as index arrays of the pairs ij and ik.  The triplets
+    are processed in chunks of central atoms, so that the memory of the
+    triplet arrays is bounded by chunk_size on large cells.  The two-body
+    and angular terms are evaluated as numpy operations over the pair and
+    triplet arrays, and the energies and forces are gathered onto the atoms
+    with numpy.bincount.
+
+    The parameters are named as in mexm.potential, with the two-body
+    parameters as MEXM_2BODY_FORMAT and the three-body parameters as
+    MEXM_3BODY_FORMAT, where the first symbol of a triplet is the central
+    atom.  A subclass implements _initialize_parameters, which sets
+    pair_cutoffs, and _calculate.
+
+    Args:
+        symbols (list of str): the symbols of the potential
+        parameters (dict): the parameters of the potential
+        skin (float,optional): the Verlet skin of the neighbor list.  Default
+            is 0.
+        chunk_size (int,optional): the largest number of triplets evaluated
+            at once.  Default is 2**20.
+
+    Attributes:
+        symbols (list of str): the symbols of the potential
+        parameters (dict): the parameters of the potential
+        pair_cutoffs (numpy.ndarray): the cutoff of each pair of species,
+            with shape (n_symbols, n_symbols)
+        r_cut (float): the largest cutoff
+        chunk_size (int): the largest number of triplets evaluated at once
+        neighbor_list (mexm.crystal.NeighborList): the neighbor list of the
+            last calculation
+        energies (numpy.ndarray): the energy of each atom from the last
+            calculation
+        energy (float): the total energy from the last calculation
+        forces (numpy.ndarray): the (N,3) forces on the atoms from the last
+            calculation of the forces
+        virial (numpy.ndarray): the 3x3 virial from the last calculation of
+            the forces
+        stress (numpy.ndarray): the 3x3 stress, -virial/volume, from the last
+            calculation of the forces
+    """
+    def __init__(self, symbols, parameters, skin=0., chunk_size=2**20):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.symbols = list(symbols)
+        self.parameters = parameters
+        self.chunk_size = int(chunk_size)
+        self.pair_cutoffs = None
+
+        self.energies = None
+        self.energy = None
+        self.forces = None
+        self.virial = None
+        self.stress = None
+
+        self._initialize_parameters()
+        self.r_cut = float(np.max(self.pair_cutoffs))
+        self.neighbor_list = NeighborList(r_cut=self.r_cut, skin=skin)
+
+    def _initialize_parameters(self):
+        raise NotImplementedError
+
+    def _calculate(self, species, i, j, d, r, offsets, forces):
+        raise NotImplementedError
+
+    def _get_parameter(self, name, keys):
+        for k in keys:
+            if self.parameters.get(k) is not None:
+                return float(self.parameters[k])
+        msg = "the parameter {} is not set, one of {} is required"
+        raise ValueError(msg.format(name, ",".join(keys)))
+
+    def get_pair_parameters(self, name, keys):
+        """a parameter for each pair of species
+
+        Args:
+            name (str): the name of the parameter
+            keys (function): a function of the symbols s1 and s2 which
+                returns the parameter names to look up, in order of precedence
+        Returns:
+            numpy.ndarray: the parameter, with shape (n_symbols, n_symbols)
+        """
+        n = len(self.symbols)
+        values = np.empty((n, n))
+        for i1, s1 in enumerate(self.symbols):
+            for i2, s2 in enumerate(self.symbols):
+                values[i1, i2] = self._get_parameter(name, keys(s1, s2))
+        return values
+
+    def get_triplet_parameters(self, name, keys):
+        """a parameter for each triplet of species
+
+        Args:
+            name (str): the name of the parameter
+            keys (function): a function of the symbols s1, s2 and s3, where s1
+                is the central atom, which returns the parameter names to look
+                up, in order of precedence
+        Returns:
+            numpy.ndarray: the parameter, with shape
+                (n_symbols, n_symbols, n_symbols)
+        """
+        n = len(self.symbols)
+        values = np.empty((n, n, n))
+        for i1, s1 in enumerate(self.symbols):
+            for i2, s2 in enumerate(self.symbols):
+                for i3, s3 in enumerate(self.symbols):
+                    values[i1, i2, i3] = self._get_parameter(
+                            name, keys(s1, s2, s3))
+        return values
+
+    def get_species(self, cell):
+        """the index of each atom's symbol into the symbols of the potential
+
+        Args:
+            cell (mexm.crystal.SimulationCell): the simulation cell
+        Returns:
+            numpy.ndarray: the index of the symbol of each atom
+        Raises:
+            ValueError: if the cell has a symbol which is not in the potential
+        """
+        _map = [self.symbols.index(s) if s in self.symbols else -1
+                for s in cell.symbol_table]
+        species = np.array(_map, dtype=int)[cell.species]
+        if np.any(species < 0):
+            msg = "the symbols {} are not in the potential {}"
+            raise ValueError(msg.format(
+                sorted(set(cell.symbols) - set(self.symbols)), self.symbols))
+        return species
+
+    def get_triplet_chunks(self, offsets):
+        """the triplets of the compact neighbor list, chunk by chunk
+
+        Args:
+            offsets (numpy.ndarray): the CSR index pointer of the compact
+                neighbor list
+        Returns:
+            generator: the pair indices ij and ik of the triplets of each
+                chunk, see get_triplets
+        """
+        for start, stop in get_triplet_chunks(offsets, self.chunk_size):
+            yield get_triplets(offsets, start, stop)
+
+    def calculate(self, cell, forces=False):
+        """calculate the energy of a simulation cell
+
+        Args:
+            cell (mexm.crystal.SimulationCell): the simulation cell
+            forces (bool,optional): if True, the forces, virial and stress
+                are also calculated.  Default is False.
+        Returns:
+            float: the total energy
+        """
+        species = self.get_species(cell)
+        self.neighbor_list.update(cell)
+        n_atoms = species.size
+
+        # the compact neighbor list of the pairs within their cutoff
+        i = self.neighbor_list.centers
+        j = self.neighbor_list.neighbors
+        r = self.neighbor_list.distances
+        _is_pair = r < self.pair_cutoffs[species[i], species[j]]
+        i = i[_is_pair]
+        j = j[_is_pair]
+        d = self.neighbor_list.vectors[_is_pair]
+        r = r[_is_pair]
+        offsets = np.zeros(n_atoms+1, dtype=int)
+        offsets[1:] = np.cumsum(np.bincount(i, minlength=n_atoms))
+
+        self.energies = np.zeros(n_atoms)
+        if forces:
+            self.forces = np.zeros((n_atoms, 3))
+            self.virial = np.zeros((3, 3))
+        self._calculate(species, i, j, d, r, offsets, forces)
+        self.energy = float(np.sum(self.energies))
+
+        if forces:
+            volume = abs(np.linalg.det(cell.a0*np.array(cell.H, dtype=float)))
+            self.stress = -self.virial/volume
+        return self.energy
+
+    def _add_energies(self, centers, energies):
+        self.energies += np.bincount(
+                centers, weights=energies, minlength=self.energies.size)
+
+    def _add_gradients(self, centers, neighbors, d, g):
+        """scatter the gradients g of the energy with respect to d = x_j - x_i"""
+        n_atoms = self.forces.shape[0]
+        for k in range(3):
+            self.forces[:, k] += np.bincount(
+                    centers, weights=g[:, k], minlength=n_atoms) \
+                    - np.bincount(neighbors, weights=g[:, k], minlength=n_atoms)
+        self.virial -= d.T.dot(g)
+
+    def get_potential_energy(self, cell):
+        """the total energy of a simulation cell"""
+        return self.calculate(cell)
+
+    def get_potential_energies(self, cell):
+        """the energy of each atom of a simulation cell"""
+        self.calculate(cell)
+        return np.copy(self.energies)
+
+    def get_forces(self, cell):
+        """the (N,3) forces on the atoms of a simulation cell"""
+        self.calculate(cell, forces=True)
+        return np.copy(self.forces)
+
+    def get_stress(self, cell):
+        """the 3x3 stress of a simulation cell, see the stress attribute"""
+        self.calculate(cell, forces=True)
+        return np.copy(self.stress)
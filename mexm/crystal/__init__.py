@@ -77,45 +77,97 @@ def cartesian2direct(x,H):
 from mexm.crystal.atom import Atom
 from mexm.crystal.simulationcell import SimulationCell
 from mexm.crystal.structuredb import StructureDatabase
+from mexm.crystal.neighborlist import NeighborList
+from mexm.crystal.shells import get_shell_table
+from mexm.crystal.symmetry import get_symmetry_operations
+
+def get_super_cell_translations(sc):
+    """the lattice translations of the unit cell inside of a supercell
+
+    The supercell lattice vectors are the rows of sc.dot(H).  A translation t
+    is inside the supercell when t.dot(inv(sc)) is in [0,1), which is checked
+    exactly in integer arithmetic with the adjugate of sc.
+
+    Args:
+        sc (numpy.ndarray): the (3,3) integer transformation matrix
+    Returns:
+        numpy.ndarray: the (|det(sc)|,3) integer translations, in
+            lexicographic order
+    """
+    det = int(round(np.linalg.det(sc)))
+    if det == 0:
+        raise ValueError("the supercell matrix is singular")
+    adj = np.round(det*np.linalg.inv(sc)).astype(int)
+
+    # the translations lie in the parallelepiped spanned by the rows of sc
+    corners = np.array([np.dot(c,sc) for c in np.ndindex(2,2,2)])
+    ranges = [np.arange(corners[:,k].min(),corners[:,k].max()+1) for k in range(3)]
+    translations = np.stack(
+            np.meshgrid(*ranges,indexing='ij'),axis=-1).reshape(-1,3)
+
+    f = np.sign(det)*translations.dot(adj)
+    is_inside = np.all((f >= 0) & (f < abs(det)),axis=1)
+    translations = translations[is_inside]
+    assert translations.shape[0] == abs(det)
+    return translations
 
 def make_super_cell(structure, sc):
     """makes a supercell from a given cell
 
+    The positions of all the images are generated at once by broadcasting the
+    basis against the lattice translations, and are added without checking
+    for duplicates, since the images of distinct atoms are distinct.
+
     Args:
         structure(pypospack.crystal.SimulationCell): the base structure from
             which the supercell will be made from.
         sc (:obj:`list` of :obj:`int`): the number of repeat units in the h1, h2, and h3
-            directions
+            directions, or a (3,3) integer transformation matrix whose rows
+            are the supercell lattice vectors in units of the lattice vectors
+            of the base structure
     """
     assert isinstance(structure,SimulationCell)
 
+    sc = np.asarray(sc)
+    is_diagonal = sc.ndim == 1
+    if is_diagonal:
+        sc = np.diag(sc)
+    if sc.shape != (3,3) or not np.all(sc == np.round(sc)):
+        raise ValueError("sc must be 3 integers or a (3,3) integer matrix")
+    sc = np.round(sc).astype(int)
+    is_diagonal = is_diagonal or np.count_nonzero(sc - np.diag(np.diag(sc))) == 0
+
     supercell = SimulationCell()
-    supercell.structure_comment = "{}x{}x{}".format(sc[0],sc[1],sc[2])
+    if is_diagonal:
+        supercell.structure_comment = "{}x{}x{}".format(*np.diag(sc))
+    else:
+        supercell.structure_comment = " ".join(str(v) for v in sc.flatten())
 
     # set lattice parameter
     supercell.a0 = structure.a0
 
     # set h_matrix
-    H = np.zeros(shape=[3,3])
-    for i in range(3):
-        H[i,:] = structure.H[i,:] * sc[i]
-    supercell.H = H.copy()
-
-    # add supercell atoms
-    for i in range(sc[0]):
-        for j in range(sc[1]):
-            for k in range(sc[2]):
-                for atom in structure.atomic_basis:
-                    symbol = atom.symbol
-                    position = atom.position
-                    position = [(i+position[0])/sc[0],\
-                                (j+position[1])/sc[1],\
-                                (k+position[2])/sc[2]]
-                    magmom = atom.magmom
-                    supercell.add_atom(
-                        symbol=symbol,
-                        position=position,
-                        magmom=magmom)
+    supercell.H = np.dot(sc,np.array(structure.H,dtype=float))
+
+    # add supercell atoms, as translation-major blocks of the basis
+    translations = get_super_cell_translations(sc)
+    n_translations = translations.shape[0]
+    positions = structure.positions[np.newaxis,:,:] \
+            + translations[:,np.newaxis,:]
+    positions = positions.reshape(-1,3)
+    if is_diagonal:
+        positions = positions/np.diag(sc)
+    else:
+        positions = np.linalg.solve(sc.T,positions.T).T
+        positions = positions - np.floor(positions)
+        positions[positions >= 1.] = 0.
+
+    symbols = np.array(structure.symbol_table,dtype=object)[structure.species]
+    supercell.add_atoms(
+        symbols=list(symbols)*n_translations,
+        positions=positions,
+        magmoms=np.tile(structure.magnetic_moments,n_translations),
+        check_if_atoms_exist=False)
 
     # return a copy of the supercell
     return supercell
@@ -202,15 +254,9 @@ def get_fcc_nearest_neighbor_distance(a0,NN):
     assert isinstance(a0,float)
     assert isinstance(NN,int) or isinstance(NN,float)
 
-    nn_distances = [
-        0,
-        0.707 * a0,
-        1.000 * a0,
-        1.225 * a0,
-        1.414 * a0,
-        1.581 * a0
-    ]
-
     import math
+    shells = get_shell_table('fcc', n_shells=max(int(math.ceil(NN)), 1))
+    nn_distances = np.concatenate(([0.], a0*shells.distances))
+
     return nn_distances[math.ceil(NN)] \
             + (NN%1)*(nn_distances[math.floor(NN)]-nn_distances[math.ceil(NN)])
@@ -0,0 +1,239 @@
+import itertools
+import numpy as np
+
+def get_perpendicular_widths(L):
+    """the distances between opposite faces of a simulation cell
+
+    Args:
+        L (numpy.ndarray): the lattice vectors as row vectors, in cartesian
+            coordinates
+    Returns:
+        numpy.ndarray: the perpendicular width of the cell along each lattice
+            vector
+    """
+    # the columns of inv(L) are the reciprocal vectors without the 2*pi
+    return 1./np.linalg.norm(np.linalg.inv(L),axis=0)
+
+class NeighborList(object):
+    """a neighbor list for a simulation cell with periodic boundary conditions
+
+    The neighbor list is built with cell-list binning in fractional
+    coordinates, so the construction is O(N) for triclinic cells of any
+    shape.  Periodic images are added as ghost atoms within the cutoff of
+    the faces of the cell, which handles cells smaller than the cutoff
+    where an atom interacts with several images of the same atom.
+
+    The neighbors are stored in a compressed sparse row (CSR) layout.  The
+    neighbors of atom i are neighbors[offsets[i]:offsets[i+1]], and each pair
+    is stored in both directions.
+
+    When a Verlet skin is used, the pairs within r_cut + skin are kept, and
+    update only rebuilds the binning when an atom has moved more than half
+    the skin or the lattice vectors have changed.
+
+    Args:
+        r_cut (float): the cutoff distance
+        skin (float,optional): the Verlet skin distance.  Default is 0.
+
+    Attributes:
+        r_cut (float): the cutoff distance
+        skin (float): the Verlet skin distance
+        n_atoms (int): the number of atoms
+        offsets (numpy.ndarray): the CSR index pointer, with shape (n_atoms+1,)
+        neighbors (numpy.ndarray): the index of each neighbor
+        shifts (numpy.ndarray): the periodic image of each neighbor as integer
+            multiples of the lattice vectors, with shape (n_pairs,3)
+        vectors (numpy.ndarray): the cartesian vector from the atom to each
+            neighbor, with shape (n_pairs,3)
+        distances (numpy.ndarray): the distance to each neighbor
+        n_builds (int): the number of times the binning has been done
+    """
+    def __init__(self, r_cut, skin=0.):
+        assert r_cut > 0
+        assert skin >= 0
+
+        self.r_cut = float(r_cut)
+        self.skin = float(skin)
+
+        self.n_atoms = None
+        self.offsets = None
+        self.neighbors = None
+        self.shifts = None
+        self.vectors = None
+        self.distances = None
+        self.n_builds = 0
+
+        # the pairs within r_cut + skin, kept for the verlet skin
+        self._L = None
+        self._reference_positions = None
+        self._i = None
+        self._j = None
+        self._shifts = None
+        self._shift_vectors = None
+
+    @property
+    def n_pairs(self):
+        """int: the number of neighbor pairs, counting each direction"""
+        return self.neighbors.size
+
+    @property
+    def centers(self):
+        """numpy.ndarray: the index of the central atom of each pair"""
+        return np.repeat(np.arange(self.n_atoms),np.diff(self.offsets))
+
+    def get_neighbors(self, i):
+        """the neighbors of an atom
+
+        Args:
+            i (int): the index of the atom
+        Returns:
+            tuple: the neighbor indices, the cartesian vectors, and the
+                distances, as views into the neighbor list
+        """
+        _slice = slice(self.offsets[i],self.offsets[i+1])
+        return self.neighbors[_slice], self.vectors[_slice], self.distances[_slice]
+
+    def build(self, cell):
+        """build the neighbor list for a simulation cell
+
+        Args:
+            cell (mexm.crystal.SimulationCell): the simulation cell, with the
+                positions of the atoms in direct coordinates
+        """
+        L, positions = self._get_lattice_and_positions(cell)
+        self._build(L=L,positions=positions)
+
+    def update(self, cell):
+        """update the neighbor list after the atoms have moved
+
+        The binning is only redone if the lattice vectors changed, the number
+        of atoms changed, or an atom moved more than half the skin.  Otherwise
+        the distances of the pairs within r_cut + skin are recomputed.
+
+        Args:
+            cell (mexm.crystal.SimulationCell): the simulation cell
+        Returns:
+            bool: True if the binning was redone
+        """
+        L, positions = self._get_lattice_and_positions(cell)
+
+        is_rebuild = self._L is None \
+                or positions.shape != self._reference_positions.shape \
+                or not np.array_equal(L,self._L)
+        if not is_rebuild:
+            _displacements = positions - self._reference_positions
+            _max_displacement = np.sqrt(
+                    np.max(np.sum(_displacements**2,axis=1),initial=0.))
+            is_rebuild = 2*_max_displacement > self.skin
+
+        if is_rebuild:
+            self._build(L=L,positions=positions)
+        else:
+            self._set_pairs(L=L,positions=positions)
+        return is_rebuild
+
+    def _get_lattice_and_positions(self, cell):
+        L = cell.a0*np.array(cell.H,dtype=float)
+        positions = cell.positions.dot(L)
+        return L, positions
+
+    def _build(self, L, positions):
+        self.n_builds += 1
+        r_list = self.r_cut + self.skin
+        n_atoms = positions.shape[0]
+
+        # fractional coordinates wrapped into [0,1), the wrapping is recorded
+        # so the shifts refer to the unwrapped positions
+        _direct = np.linalg.solve(L.T,positions.T).T
+        _wrap = np.floor(_direct)
+        _direct = _direct - _wrap
+
+        # any two atoms within r_list differ by at most f along each
+        # fractional coordinate, so the bins of width f in fractional
+        # coordinates only need to be searched in the adjacent bins
+        f = r_list/get_perpendicular_widths(L)
+        m = np.ceil(f).astype(int)
+
+        # ghost atoms are the periodic images within f of the cell faces
+        _image_shifts = np.array(list(itertools.product(
+                *[range(-m[k],m[k]+1) for k in range(3)])))
+        _images = _direct[np.newaxis,:,:] + _image_shifts[:,np.newaxis,:]
+        _is_kept = np.all((_images >= -f) & (_images < 1+f),axis=2)
+        _i_shift,_i_atom = np.nonzero(_is_kept)
+        image_direct = _images[_i_shift,_i_atom]
+        image_atoms = _i_atom
+        image_shifts = _image_shifts[_i_shift]
+
+        # bin the atoms and ghost atoms in the extended cell
+        n_bins = np.ceil((1+2*f)/f).astype(int) + 1
+        _bins = np.floor((image_direct+f)/f).astype(int)
+        _bin_ids = np.ravel_multi_index(_bins.T,n_bins)
+        _order = np.argsort(_bin_ids,kind='stable')
+        _bin_counts = np.bincount(_bin_ids,minlength=np.prod(n_bins))
+        _bin_starts = np.cumsum(_bin_counts) - _bin_counts
+
+        # the central atoms are the images with no shift
+        _is_center = np.all(image_shifts == 0,axis=1)
+        _centers = np.flatnonzero(_is_center)
+        _center_atoms = image_atoms[_centers]
+        _center_bins = _bins[_centers]
+
+        image_positions = image_direct.dot(L)
+        list_i = []
+        list_j = []
+        for _bin_offset in itertools.product([-1,0,1],repeat=3):
+            _nbins = _center_bins + np.array(_bin_offset)
+            _is_valid = np.all((_nbins >= 0) & (_nbins < n_bins),axis=1)
+            _counts = np.zeros(_centers.size,dtype=int)
+            _starts = np.zeros(_centers.size,dtype=int)
+            _nbin_ids = np.ravel_multi_index(_nbins[_is_valid].T,n_bins)
+            _counts[_is_valid] = _bin_counts[_nbin_ids]
+            _starts[_is_valid] = _bin_starts[_nbin_ids]
+
+            # expand each central atom to every atom in the neighboring bin
+            _n_candidates = _counts.sum()
+            _c = np.repeat(np.arange(_centers.size),_counts)
+            _local = np.arange(_n_candidates) \
+                    - np.repeat(np.cumsum(_counts) - _counts,_counts)
+            _images_j = _order[np.repeat(_starts,_counts) + _local]
+            _images_i = _centers[_c]
+
+            _dx = image_positions[_images_j] - image_positions[_images_i]
+            _is_pair = (np.sum(_dx**2,axis=1) < r_list**2) \
+                    & (_images_i != _images_j)
+            list_i.append(_center_atoms[_c[_is_pair]])
+            list_j.append(_images_j[_is_pair])
+
+        _i = np.concatenate(list_i)
+        _images_j = np.concatenate(list_j)
+        _order = np.lexsort((_images_j,_i))
+        _i = _i[_order]
+        _images_j = _images_j[_order]
+
+        # shifts of the unwrapped positions
+        self._i = _i
+        self._j = image_atoms[_images_j]
+        self._shifts = (image_shifts[_images_j]
+                + _wrap[_i].astype(int) - _wrap[self._j].astype(int))
+        # the lattice is fixed until the next build, so the cartesian shifts
+        # are reused by every update
+        self._shift_vectors = self._shifts.dot(L)
+        self._L = np.array(L)
+        self._reference_positions = np.array(positions)
+        self.n_atoms = n_atoms
+
+        self._set_pairs(L=L,positions=positions)
+
+    def _set_pairs(self, L, positions):
+        _vectors = positions[self._j] - positions[self._i]
+        _vectors += self._shift_vectors
+        _distances = np.sqrt(np.einsum('ij,ij->i',_vectors,_vectors))
+        _is_pair = _distances < self.r_cut
+
+        self.neighbors = self._j[_is_pair]
+        self.shifts = self._shifts[_is_pair]
+        self.vectors = _vectors[_is_pair]
+        self.distances = _distances[_is_pair]
+        self.offsets = np.zeros(self.n_atoms+1,dtype=int)
+        self.offsets[1:] = np.cumsum(
+                np.bincount(self._i[_is_pair],minlength=self.n_atoms))
@@ -0,0 +1,195 @@
+"""a registry of the neighbor shells of the standard lattices
+
+The shells are generated once for each lattice, with vectorized enumeration
+of the lattice translations, and the tables are memoized and read-only, so
+that every user of the shell data shares the same arrays.
+"""
+import itertools
+import numpy as np
+from mexm.crystal.neighborlist import get_perpendicular_widths
+
+LATTICE_TYPES = ['fcc', 'bcc', 'sc', 'hcp', 'diamond']
+
+_shell_tables = {}
+
+def get_lattice_basis(lattice_type, c_over_a=None):
+    """the conventional cell of a lattice, in units of the lattice parameter
+
+    Args:
+        lattice_type (str): fcc, bcc, sc, hcp or diamond
+        c_over_a (float,optional): the c/a ratio for hcp.  Default is the
+            ideal ratio, sqrt(8/3).
+    Returns:
+        tuple: the lattice vectors as rows of a 3x3 numpy.ndarray, and the
+            (n_basis,3) numpy.ndarray of the basis in direct coordinates
+    """
+    H = np.eye(3)
+    if lattice_type == 'sc':
+        basis = [[0., 0., 0.]]
+    elif lattice_type == 'bcc':
+        basis = [[0., 0., 0.], [.5, .5, .5]]
+    elif lattice_type in ['fcc', 'diamond']:
+        basis = [[0., 0., 0.], [0., .5, .5], [.5, 0., .5], [.5, .5, 0.]]
+        if lattice_type == 'diamond':
+            basis = basis + [[x + .25 for x in b] for b in basis]
+    elif lattice_type == 'hcp':
+        if c_over_a is None:
+            c_over_a = np.sqrt(8./3.)
+        H = np.array([
+            [1., 0., 0.],
+            [-0.5, 0.5*np.sqrt(3.), 0.],
+            [0., 0., c_over_a]])
+        basis = [[0., 0., 0.], [1./3., 2./3., 0.5]]
+    else:
+        msg = "lattice_type must be one of {}".format(",".join(LATTICE_TYPES))
+        raise ValueError(msg)
+    return H, np.array(basis, dtype=float)
+
+def get_neighbor_vectors(lattice_type, d_max, c_over_a=None, d_tol=1e-6):
+    """the neighbor vectors of a lattice, grouped into shells
+
+    All of the sites of the standard lattices are equivalent, so the
+    neighbors of the atom at the origin are the neighbors of every atom.
+
+    Args:
+        lattice_type (str): fcc, bcc, sc, hcp or diamond
+        d_max (float): the largest neighbor distance, in units of the lattice
+            parameter
+        c_over_a (float,optional): the c/a ratio for hcp
+        d_tol (float,optional): the tolerance in which distances are in the
+            same shell
+    Returns:
+        tuple: the (n_neighbors,3) cartesian vectors from the atom at the
+            origin to its neighbors, in order of increasing distance, and
+            the index of the shell of each vector
+    """
+    H, basis = get_lattice_basis(lattice_type, c_over_a)
+    m = np.ceil(d_max/get_perpendicular_widths(H)).astype(int) + 1
+    translations = np.array(list(itertools.product(
+        *[range(-k, k+1) for k in m])), dtype=float)
+
+    _direct = translations[:, np.newaxis, :] + basis[np.newaxis, :, :] - basis[0]
+    vectors = _direct.reshape(-1, 3).dot(H)
+    d = np.sqrt(np.sum(vectors**2, axis=1))
+    _is_neighbor = (d > d_tol) & (d <= d_max + d_tol)
+    vectors = vectors[_is_neighbor]
+    d = d[_is_neighbor]
+    _order = np.argsort(d, kind='stable')
+    vectors = vectors[_order]
+    d = d[_order]
+
+    # split the sorted distances into shells
+    shells = np.concatenate(([0], np.cumsum(np.diff(d) > d_tol))).astype(int)
+    return vectors, shells
+
+class ShellTable(object):
+    """the neighbor shells of a lattice, in units of the lattice parameter
+
+    The arrays are read-only, since the tables are shared through
+    get_shell_table.
+
+    Args:
+        lattice_type (str): fcc, bcc, sc, hcp or diamond
+        vectors (numpy.ndarray): the neighbor vectors, in order of increasing
+            distance
+        shell_indices (numpy.ndarray): the shell of each neighbor vector
+        c_over_a (float,optional): the c/a ratio for hcp
+
+    Attributes:
+        lattice_type (str): the type of the lattice
+        c_over_a (float): the c/a ratio for hcp, None otherwise
+        distances (numpy.ndarray): the distance of each shell
+        multiplicities (numpy.ndarray): the number of neighbors in each shell
+        vectors (numpy.ndarray): the (n_neighbors,3) neighbor vectors
+        shell_indices (numpy.ndarray): the shell of each neighbor vector
+        volume_factor (float): the volume per atom divided by a**3
+    """
+    def __init__(self, lattice_type, vectors, shell_indices, c_over_a=None):
+        self.lattice_type = lattice_type
+        self.c_over_a = c_over_a
+        self.vectors = np.array(vectors, dtype=float)
+        self.shell_indices = np.array(shell_indices, dtype=int)
+        self.multiplicities = np.bincount(self.shell_indices)
+        self.distances = np.bincount(
+                self.shell_indices,
+                weights=np.sqrt(np.sum(self.vectors**2, axis=1)))/self.multiplicities
+
+        H, basis = get_lattice_basis(lattice_type, c_over_a)
+        self.volume_factor = abs(np.linalg.det(H))/basis.shape[0]
+
+        for v in [self.vectors, self.shell_indices, self.multiplicities, self.distances]:
+            v.flags.writeable = False
+
+    @property
+    def n_shells(self):
+        """int: the number of shells"""
+        return self.distances.size
+
+    def get_distances(self, a):
+        """the shell distances for lattice parameters a
+
+        Args:
+            a (float or numpy.ndarray): the lattice parameters
+        Returns:
+            numpy.ndarray: the distances, with the shape a.shape + (n_shells,)
+        """
+        return np.multiply.outer(a, self.distances)
+
+def get_shell_table(lattice_type, n_shells=None, d_max=None, c_over_a=None):
+    """the memoized neighbor shells of a lattice
+
+    Exactly one of n_shells or d_max is given.  The tables are generated on
+    the first request and then shared, so the returned arrays are read-only.
+
+    Args:
+        lattice_type (str): fcc, bcc, sc, hcp or diamond
+        n_shells (int,optional): the number of shells
+        d_max (float,optional): the largest shell distance, in units of the
+            lattice parameter
+        c_over_a (float,optional): the c/a ratio for hcp.  Default is the
+            ideal ratio.
+    Returns:
+        ShellTable: the shells of the lattice
+    """
+    if lattice_type not in LATTICE_TYPES:
+        msg = "lattice_type must be one of {}".format(",".join(LATTICE_TYPES))
+        raise ValueError(msg)
+    if (n_shells is None) == (d_max is None):
+        raise ValueError("exactly one of n_shells or d_max must be given")
+    if lattice_type != 'hcp':
+        c_over_a = None
+    elif c_over_a is not None:
+        c_over_a = float(c_over_a)
+
+    if n_shells is not None:
+        key = (lattice_type, c_over_a, 'n_shells', int(n_shells))
+    else:
+        key = (lattice_type, c_over_a, 'd_max', float(d_max))
+    if key in _shell_tables:
+        return _shell_tables[key]
+
+    if n_shells is not None:
+        if n_shells < 1:
+            raise ValueError("n_shells must be at least 1")
+        # the number of shells grows with the distance, so the distance is
+        # increased until there are enough shells
+        _d_max = 2.
+        while True:
+            vectors, shells = get_neighbor_vectors(
+                    lattice_type, _d_max, c_over_a)
+            if shells.size > 0 and shells[-1] + 1 > n_shells:
+                break
+            _d_max *= 1.5
+        _is_kept = shells < n_shells
+        vectors = vectors[_is_kept]
+        shells = shells[_is_kept]
+    else:
+        vectors, shells = get_neighbor_vectors(lattice_type, d_max, c_over_a)
+
+    table = ShellTable(
+            lattice_type=lattice_type,
+            vectors=vectors,
+            shell_indices=shells,
+            c_over_a=c_over_a)
+    _shell_tables[key] = table
+    return table
@@ -1,4 +1,102 @@
+import copy
+import numpy as np
 from mexm.crystal import Atom
+from mexm.crystal.spatialhash import SpatialHash
+
+class AtomView(Atom):
+    """an atom stored in the arrays of a simulation cell
+
+    The attributes read and write the row of the atom in the arrays of the
+    simulation cell, so the position is a view rather than a copy.  A view
+    refers to the atom by its index, so it should not be kept across the
+    removal of atoms.
+
+    Args:
+        cell (SimulationCell): the simulation cell which stores the atom
+        index (int): the index of the atom in the simulation cell
+    """
+    def __init__(self, cell, index):
+        self._cell = cell
+        self._index = index
+        self.atom_id = None
+
+    @property
+    def symbol(self):
+        return self._cell._symbol_table[self._cell._species[self._index]]
+
+    @symbol.setter
+    def symbol(self, symbol):
+        self._cell._species[self._index] = self._cell._get_species_index(symbol)
+
+    @property
+    def position(self):
+        self._cell._expose_positions()
+        return self._cell._positions[self._index]
+
+    @position.setter
+    def position(self, position):
+        self._cell._invalidate_spatial_hash()
+        self._cell._positions[self._index] = position
+
+    @property
+    def magnetic_moment(self):
+        return float(self._cell._magnetic_moments[self._index])
+
+    @magnetic_moment.setter
+    def magnetic_moment(self, magmom):
+        self._cell._magnetic_moments[self._index] = magmom
+
+    def __deepcopy__(self, memo):
+        return Atom(
+                symbol=self.symbol,
+                position=np.array(self._cell._positions[self._index]),
+                magmom=self.magnetic_moment)
+
+class AtomicBasis(object):
+    """a list-like view of the atoms of a simulation cell
+
+    Args:
+        cell (SimulationCell): the simulation cell which stores the atoms
+    """
+    def __init__(self, cell):
+        cell._compact()
+        self._cell = cell
+
+    def __len__(self):
+        return self._cell.n_atoms
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [AtomView(self._cell,i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('atomic basis index out of range')
+        return AtomView(self._cell,index)
+
+    def __delitem__(self, index):
+        _indices = np.arange(len(self))[index]
+        self._cell.remove_atoms(np.atleast_1d(_indices))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield AtomView(self._cell,i)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(a) for a in self]
+
+    def append(self, atom):
+        self._cell.add_atoms(
+                symbols=[atom.symbol],
+                positions=[atom.position],
+                magmoms=[atom.magnetic_moment],
+                check_if_atoms_exist=False)
 
 class SimulationCell(object):
     """A structural representation of a material system
@@ -11,10 +109,33 @@ class SimulationCell(object):
         obj (optional): if this argument is set then the this constructor acts
             as a copy constructor.  Will takse :obj:`ase.atoms.Atoms` and
 
+    The atoms are stored as a structure of arrays, a contiguous (N,3) array
+    of positions, an array of species indices into a table of symbols, and an
+    array of magnetic moments.  The arrays have spare capacity, so atoms can
+    be appended in amortized constant time.
+
+    Duplicate atoms are found with a spatial hash of the positions, so
+    add_atom and remove_atom take amortized constant time.  The rows of
+    atoms removed by remove_atom are marked, and the arrays are compacted
+    when they are next accessed.  Since the positions are handed out as
+    writable views, the spatial hash keeps a copy of the positions it holds.
+    After the positions have been accessed, the copy is compared with the
+    positions before the spatial hash is next used, and the spatial hash is
+    only rebuilt if the positions were changed.  Setting the positions
+    discards the spatial hash.
+
     Attributes:
         comment (str): a descriptive description of the crystal structure
-        atomic_basis (:obj:`list` of :obj:`pypospack.crystallography.Atoms`): a list
-            of atoms contained within the crystal structure.
+        atomic_basis (AtomicBasis): a list-like view of the atoms contained
+            within the crystal structure, where each atom is an AtomView.
+            Setting this attribute to a list of Atoms replaces the atoms.
+        positions (numpy.ndarray): the (N,3) array of positions in direct
+            coordinates, as a view into the storage of the cell.
+        species (numpy.ndarray): the index of the symbol of each atom into
+            symbol_table, as a view into the storage of the cell.
+        symbol_table (list of str): the symbols indexed by species.
+        magnetic_moments (numpy.ndarray): the magnetic moment of each atom, as
+            a view into the storage of the cell.
         a0 (float): a scaling factor which scales the lattice vectors by a0.
             Default is 1.
         H (numpy.ndarray): a numpy array containing the lattice vectors as
@@ -29,13 +150,28 @@ class SimulationCell(object):
     """
     def __init__(self, obj=None):
         self.ptol = 1e-3
+        self._initialize_atom_arrays()
 
         if obj is None:
             self._noncopy_init()
-        elif isinstance(obj,ase.atoms.Atoms):
-            self._copy_init_ase(obj)
         elif isinstance(obj,SimulationCell):
             self._copy_init_pypospack(obj)
+        else:
+            import ase.atoms
+            if isinstance(obj,ase.atoms.Atoms):
+                self._copy_init_ase(obj)
+
+    def _initialize_atom_arrays(self, capacity=16):
+        self._n_rows = 0
+        self._n_removed = 0
+        self._symbol_table = []
+        self._positions = np.zeros((capacity,3),dtype=np.float64)
+        self._species = np.zeros(capacity,dtype=np.intp)
+        self._magnetic_moments = np.zeros(capacity,dtype=np.float64)
+        self._is_removed = np.zeros(capacity,dtype=bool)
+        self._spatial_hash = None
+        self._hashed_positions = np.zeros((capacity,3),dtype=np.float64)
+        self._is_positions_exposed = False
 
     def _noncopy_init(self):
         self.comment = "generated by pypospack"
@@ -44,7 +180,6 @@ class SimulationCell(object):
         self.H = np.array([[1,0,0],
                            [0,1,0],
                            [0,0,1]])
-        self.atomic_basis = []
         self.vacancies = []
         self.interstitials = []
 
@@ -53,7 +188,12 @@ class SimulationCell(object):
         self.a0 = obj.a0
         self.H = np.array(obj.H)
 
-        self.atomic_basis = copy.deepcopy(obj.atomic_basis)
+        self._symbol_table = list(obj._symbol_table)
+        self._reserve(obj.n_atoms)
+        self._n_rows = obj.n_atoms
+        self.positions[:] = obj.positions
+        self.species[:] = obj.species
+        self.magnetic_moments[:] = obj.magnetic_moments
         self.vacancies = copy.deepcopy(obj.vacancies)
         self.interstitials = copy.deepcopy(obj.interstitials)
 
@@ -61,18 +201,139 @@ class SimulationCell(object):
         self.comment = "generated by pypospack from ase"
         self.a0 = 1.0
         self.H = np.copy(obj.cell)
-        self.atomic_basis = []
-        for a in obj:
-            symbol = a.symbol
-            position = cartesian2direct(a.position,self.H)
-            for i in range(3):
-                if position[i] < 0:
-                    position[i] = 1 + position[i]
-            self.atomic_basis.append(
-                    Atom(symbol=symbol,position=position))
+        positions = np.linalg.solve(self.H.T,obj.get_positions().T).T
+        positions[positions < 0] += 1
+        self.add_atoms(
+                symbols=obj.get_chemical_symbols(),
+                positions=positions,
+                check_if_atoms_exist=False)
         self.vacancies = []
         self.interstitials = []
 
+    def _reserve(self, n_rows):
+        """grow the atom arrays to hold at least n_rows, doubling capacity"""
+        capacity = self._positions.shape[0]
+        if n_rows <= capacity:
+            return
+        capacity = max(n_rows,2*capacity)
+
+        _positions = np.zeros((capacity,3),dtype=np.float64)
+        _species = np.zeros(capacity,dtype=np.intp)
+        _magnetic_moments = np.zeros(capacity,dtype=np.float64)
+        _is_removed = np.zeros(capacity,dtype=bool)
+        _hashed_positions = np.zeros((capacity,3),dtype=np.float64)
+        _positions[:self._n_rows] = self._positions[:self._n_rows]
+        _species[:self._n_rows] = self._species[:self._n_rows]
+        _magnetic_moments[:self._n_rows] = self._magnetic_moments[:self._n_rows]
+        _is_removed[:self._n_rows] = self._is_removed[:self._n_rows]
+        _hashed_positions[:self._n_rows] = self._hashed_positions[:self._n_rows]
+        self._positions = _positions
+        self._species = _species
+        self._magnetic_moments = _magnetic_moments
+        self._is_removed = _is_removed
+        self._hashed_positions = _hashed_positions
+
+    def _compact(self):
+        """remove the rows of the atoms marked as removed"""
+        if self._n_removed == 0:
+            return
+        _is_kept = ~self._is_removed[:self._n_rows]
+        n_rows = self._n_rows - self._n_removed
+        self._positions[:n_rows] = self._positions[:self._n_rows][_is_kept]
+        self._species[:n_rows] = self._species[:self._n_rows][_is_kept]
+        self._magnetic_moments[:n_rows] = \
+                self._magnetic_moments[:self._n_rows][_is_kept]
+        self._is_removed[:self._n_rows] = False
+        self._n_rows = n_rows
+        self._n_removed = 0
+        self._invalidate_spatial_hash()
+
+    def _invalidate_spatial_hash(self):
+        self._spatial_hash = None
+
+    def _expose_positions(self):
+        """the positions are handed out as a writable view, so the spatial
+        hash is checked against them before it is next used"""
+        self._is_positions_exposed = True
+
+    def _get_spatial_hash(self):
+        """the spatial hash of the rows, which is rebuilt if it was discarded,
+        the exposed positions were changed, or the tolerance has changed"""
+        n_rows = self._n_rows
+        if self._spatial_hash is not None and self._is_positions_exposed:
+            if not np.array_equal(
+                    self._hashed_positions[:n_rows],self._positions[:n_rows]):
+                self._invalidate_spatial_hash()
+        self._is_positions_exposed = False
+
+        if self._spatial_hash is None or self._spatial_hash.ptol != self.ptol:
+            self._spatial_hash = SpatialHash(ptol=self.ptol)
+            self._spatial_hash.build(
+                    positions=self._positions[:n_rows],
+                    is_excluded=self._is_removed[:n_rows])
+            self._hashed_positions[:n_rows] = self._positions[:n_rows]
+        return self._spatial_hash
+
+    def _get_species_index(self, symbol):
+        assert isinstance(symbol,str)
+        try:
+            return self._symbol_table.index(symbol)
+        except ValueError:
+            self._symbol_table.append(symbol)
+            return len(self._symbol_table) - 1
+
+    @property
+    def atomic_basis(self):
+        """AtomicBasis: a list-like view of the atoms"""
+        return AtomicBasis(self)
+
+    @atomic_basis.setter
+    def atomic_basis(self, atoms):
+        atoms = list(atoms)
+        self._n_rows = 0
+        self._n_removed = 0
+        self._is_removed[:] = False
+        self.add_atoms(
+                symbols=[a.symbol for a in atoms],
+                positions=np.array([a.position for a in atoms],dtype=np.float64),
+                magmoms=[a.magnetic_moment for a in atoms],
+                check_if_atoms_exist=False)
+
+    @property
+    def positions(self):
+        """numpy.ndarray: the (N,3) array of positions in direct coordinates"""
+        self._compact()
+        self._expose_positions()
+        return self._positions[:self._n_rows]
+
+    @positions.setter
+    def positions(self, positions):
+        self._compact()
+        self._invalidate_spatial_hash()
+        self._positions[:self._n_rows] = positions
+
+    @property
+    def species(self):
+        """numpy.ndarray: the index of each atom's symbol into symbol_table"""
+        self._compact()
+        return self._species[:self._n_rows]
+
+    @property
+    def symbol_table(self):
+        """list of str: the symbols indexed by species"""
+        return list(self._symbol_table)
+
+    @property
+    def magnetic_moments(self):
+        """numpy.ndarray: the magnetic moment of each atom"""
+        self._compact()
+        return self._magnetic_moments[:self._n_rows]
+
+    @magnetic_moments.setter
+    def magnetic_moments(self, magmoms):
+        self._compact()
+        self._magnetic_moments[:self._n_rows] = magmoms
+
     @property
     def h1(self):
         """numpy.ndarray: which is the a1 lattice vector"""
@@ -158,20 +419,24 @@ class SimulationCell(object):
     @property
     def n_atoms(self):
         """float: the number of atoms in the structure"""
-        n_atoms = len(self.atomic_basis)
-        return n_atoms
+        return self._n_rows - self._n_removed
 
     @property
     def symbols(self):
-        """list of str: a list of the symbols in the structure"""
-
-        symbols = list(set([a.symbol for a in self.atomic_basis+self.interstitials]))
+        """list of str: a list of the symbols in the structure, in the order
+        they were first added"""
+        _is_present = np.bincount(
+                self.species,minlength=len(self._symbol_table)) > 0
+        symbols = [s for s,b in zip(self._symbol_table,_is_present) if b]
         return symbols
 
     def check_if_atom_exists_at_position(self,symbol,position):
         """determines if there is an atom at a position
 
-        This code looks for atoms in the list of atoms in the atomic_basis.
+        This code looks for atoms in the list of atoms in the atomic_basis,
+        using a spatial hash of the positions.  Positions are compared with
+        periodic boundary conditions, within ptol along each direct
+        coordinate.
 
         Returns:
             tuple: The first element if true in an atom exists at the location,
@@ -182,10 +447,13 @@ class SimulationCell(object):
 
         return_value = (False,None)
         # check to see if atom exists in the atomic basis
-        for i,a in enumerate(self.atomic_basis):
-            diff = [abs(position[i]-a.position[i]) for i in range(3)]
-            if max(diff) < self.ptol:
-                return_value = (True,i)
+        rows = self._get_spatial_hash().query(
+                position,self._positions[:self._n_rows])
+        if len(rows) > 0:
+            # the index of the atom once the removed rows are compacted
+            row = rows[-1]
+            index = row - int(np.count_nonzero(self._is_removed[:row]))
+            return_value = (True,index)
 
         return return_value
 
@@ -210,12 +478,79 @@ class SimulationCell(object):
             err_msg = err_msg.format(symbol,position)
             err_msg += 'atomic basis:\n'
             for i,a in enumerate(self.atomic_basis):
-                err_msg += ",".join([str(i),a,a.symbol,a.position])
+                err_msg += ",".join([str(i),a.symbol,str(a.position)]) + "\n"
             raise ValueError(err_msg)
         else:
-            self.atomic_basis.append(
-                Atom(symbol,position,magmom=magmom)
-            )
+            row = self._append_atoms(
+                symbols=[symbol],
+                positions=[position],
+                magmoms=[magmom])
+            self._get_spatial_hash().add(row,self._positions[row])
+            self._hashed_positions[row] = self._positions[row]
+
+    def add_atoms(self, symbols, positions, magmoms=None, check_if_atoms_exist=True):
+        """add many atoms to the structure at once
+
+        Args:
+            symbols (list of str): the symbol of each atom
+            positions (numpy.ndarray): the (N,3) positions of the atoms in
+                direct coordinates
+            magmoms (list of float,optional): the magnetic moment of each atom.
+                Default is 0.
+            check_if_atoms_exist (bool): if True, each atom is checked against
+                the existing atoms as in add_atom.  If the positions are known
+                to be unique, the check can be skipped.
+
+        Raises:
+            ValueError: If an atom already exists in the position.
+        """
+        positions = np.array(positions,dtype=np.float64).reshape(-1,3)
+        n_new = positions.shape[0]
+        if len(symbols) != n_new:
+            raise ValueError("the number of symbols and positions must be equal")
+        if magmoms is None:
+            magmoms = np.zeros(n_new)
+
+        if check_if_atoms_exist:
+            for s,x,m in zip(symbols,positions,magmoms):
+                self.add_atom(symbol=s,position=x,magmom=m)
+            return
+
+        # the spatial hash is rebuilt when it is next needed
+        self._append_atoms(symbols,positions,magmoms)
+        self._invalidate_spatial_hash()
+
+    def _append_atoms(self, symbols, positions, magmoms):
+        """append rows to the atom arrays, returning the first new row"""
+        positions = np.array(positions,dtype=np.float64).reshape(-1,3)
+        n_new = positions.shape[0]
+        _species_indices = {s:self._get_species_index(s) for s in dict.fromkeys(symbols)}
+        n_rows = self._n_rows
+        self._reserve(n_rows + n_new)
+        self._positions[n_rows:n_rows+n_new] = positions
+        self._species[n_rows:n_rows+n_new] = [_species_indices[s] for s in symbols]
+        self._magnetic_moments[n_rows:n_rows+n_new] = magmoms
+        self._n_rows = n_rows + n_new
+        return n_rows
+
+    def remove_atoms(self, indices):
+        """remove atoms from the structure by index
+
+        The remaining atoms keep their order.
+
+        Args:
+            indices (list of int): the indices of the atoms to remove
+        """
+        self._compact()
+        _is_kept = np.ones(self._n_rows,dtype=bool)
+        _is_kept[indices] = False
+        n_rows = int(np.count_nonzero(_is_kept))
+        self._positions[:n_rows] = self._positions[:self._n_rows][_is_kept]
+        self._species[:n_rows] = self._species[:self._n_rows][_is_kept]
+        self._magnetic_moments[:n_rows] = \
+                self._magnetic_moments[:self._n_rows][_is_kept]
+        self._n_rows = n_rows
+        self._invalidate_spatial_hash()
 
     def remove_atom(self, symbol, position):
         """ remove an atom from the structure
@@ -229,12 +564,18 @@ class SimulationCell(object):
 
         """
         self.ptol = 1e-3
-        for i,a in enumerate(self.atomic_basis):
-            if (a.symbol == symbol):
-                diff = [abs(position[j]-a.position[j]) for j in range(3)]
-                if all([k < self.ptol for k in diff]):
-                    del self.atomic_basis[i]
-                    return
+        if symbol in self._symbol_table:
+            species = self._symbol_table.index(symbol)
+            spatial_hash = self._get_spatial_hash()
+            rows = spatial_hash.query(position,self._positions[:self._n_rows])
+            rows = [i for i in rows if self._species[i] == species]
+            if len(rows) > 0:
+                # the row is marked as removed, and compacted later
+                row = rows[0]
+                spatial_hash.remove(row,self._positions[row])
+                self._is_removed[row] = True
+                self._n_removed += 1
+                return
         err_msg = "Tried to remove {} @ {}, no atom found"
         err_msg = err_msg.format(symbol,position)
         raise ValueError(err_msg)
@@ -263,12 +604,12 @@ class SimulationCell(object):
 
     def get_number_of_atoms(self, symbol=None):
         if symbol is None:
-            n_atoms = len(self._atoms)
+            n_atoms = self.n_atoms
+        elif symbol in self._symbol_table:
+            n_atoms = int(np.count_nonzero(
+                    self.species == self._symbol_table.index(symbol)))
         else:
             n_atoms = 0
-            for atom in self.atomic_basis:
-                if (atom.symbol == symbol):
-                    n_atoms += 1
         return n_atoms
 
     def normalize_h_matrix(self):
@@ -0,0 +1,102 @@
+import itertools
+import numpy as np
+
+class SpatialHash(object):
+    """a spatial hash of positions in direct coordinates
+
+    The unit cell is divided into buckets of at least ptol on a side, and
+    each bucket holds the indices of the positions inside of it.  The
+    positions are wrapped into the unit cell, so positions which differ by a
+    lattice vector are in the same bucket.  Since the buckets are at least
+    ptol wide, a position within ptol of another position can only be in the
+    adjacent buckets along each direction.
+
+    Args:
+        ptol (float): the tolerance in which two positions are the same, in
+            direct coordinates
+
+    Attributes:
+        ptol (float): the tolerance in which two positions are the same
+        n_buckets (int): the number of buckets along each lattice vector
+        buckets (dict): the key is the bucket, the value is the list of the
+            indices of the positions in the bucket
+    """
+    def __init__(self, ptol):
+        assert ptol > 0
+        self.ptol = ptol
+        self.n_buckets = max(1, int(np.floor(1./ptol)))
+        self.buckets = {}
+
+    def get_key(self, position):
+        """the bucket which contains a position"""
+        x = np.asarray(position, dtype=float)
+        k = np.floor((x - np.floor(x))*self.n_buckets).astype(int) % self.n_buckets
+        return tuple(k.tolist())
+
+    def get_neighbor_keys(self, position):
+        """the buckets which may contain positions within ptol of a position"""
+        x = np.asarray(position, dtype=float)
+        x = x - np.floor(x)
+        k_lower = np.floor((x - self.ptol)*self.n_buckets).astype(int)
+        k_upper = np.floor((x + self.ptol)*self.n_buckets).astype(int)
+        return set(itertools.product(
+            *[{k % self.n_buckets for k in range(k_lower[i], k_upper[i]+1)}
+                for i in range(3)]))
+
+    def add(self, index, position):
+        self.buckets.setdefault(self.get_key(position), []).append(index)
+
+    def remove(self, index, position):
+        key = self.get_key(position)
+        bucket = self.buckets[key]
+        bucket.remove(index)
+        if len(bucket) == 0:
+            del self.buckets[key]
+
+    def build(self, positions, is_excluded=None):
+        """build the spatial hash for an array of positions
+
+        Args:
+            positions (numpy.ndarray): the (N,3) array of positions
+            is_excluded (numpy.ndarray,optional): a boolean array where the
+                positions which are True are not added
+        """
+        self.buckets = {}
+        indices = np.arange(positions.shape[0])
+        if is_excluded is not None:
+            indices = indices[~is_excluded]
+        if indices.size == 0:
+            return
+
+        x = positions[indices]
+        k = np.floor((x - np.floor(x))*self.n_buckets).astype(int) % self.n_buckets
+        keys, inverse = np.unique(k, axis=0, return_inverse=True)
+        order = np.argsort(inverse.reshape(-1), kind='stable')
+        splits = np.cumsum(np.bincount(inverse.reshape(-1)))[:-1]
+        for key, bucket in zip(keys.tolist(), np.split(indices[order], splits)):
+            self.buckets[tuple(key)] = bucket.tolist()
+
+    def query(self, position, positions):
+        """the indices of the positions within ptol of a position
+
+        Two positions are within ptol if they are within ptol along each
+        direct coordinate, after applying periodic boundary conditions.
+
+        Args:
+            position (list of float): the position to look for
+            positions (numpy.ndarray): the array of positions that the indices
+                of the spatial hash refer to
+        Returns:
+            list of int: the indices of the positions in increasing order
+        """
+        x = np.asarray(position, dtype=float)
+        candidates = []
+        for key in self.get_neighbor_keys(x):
+            candidates += self.buckets.get(key, [])
+        if len(candidates) == 0:
+            return []
+
+        candidates = np.array(sorted(candidates))
+        d = positions[candidates] - x
+        d = d - np.round(d)
+        return candidates[np.max(np.abs(d), axis=1) < self.ptol].tolist()
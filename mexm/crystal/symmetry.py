@@ -0,0 +1,71 @@
+"""the space group operations of a simulation cell
+
+The operations are found by brute force, the rotations are the integer
+matrices in the basis of the lattice vectors which preserve the metric of
+the lattice, and the translations are those which map the atoms onto atoms
+of the same species.  This is adequate for the small cells of the standard
+crystal structures.
+"""
+import itertools
+import numpy as np
+
+def get_lattice_rotations(L, symprec=1e-5):
+    """the rotations which map a lattice onto itself
+
+    Args:
+        L (numpy.ndarray): the lattice vectors as rows, in cartesian
+            coordinates
+        symprec (float,optional): the tolerance in cartesian distance
+    Returns:
+        numpy.ndarray: the (n,3,3) integer rotations W in direct coordinates,
+            which act on column vectors of direct coordinates as W.x
+    """
+    L = np.asarray(L, dtype=float)
+    G = L.dot(L.T)
+    W = np.array(list(itertools.product([-1, 0, 1], repeat=9)), dtype=int)
+    W = W.reshape(-1, 3, 3)
+    _G = np.einsum('nji,jk,nkl->nil', W, G, W)
+    _tol = symprec*np.sqrt(np.max(np.diag(G)))
+    _is_rotation = np.all(np.abs(_G - G) < _tol, axis=(1, 2))
+    return W[_is_rotation]
+
+def get_symmetry_operations(cell, symprec=1e-5):
+    """the space group operations of a simulation cell
+
+    An operation maps the direct coordinates x of an atom to W.x + t, which
+    are the direct coordinates of an atom of the same species, up to a
+    lattice vector.
+
+    Args:
+        cell (mexm.crystal.SimulationCell): the simulation cell
+        symprec (float,optional): the tolerance in cartesian distance
+    Returns:
+        tuple: the (n,3,3) integer rotations, the (n,3) translations in
+            direct coordinates, and the (n,n_atoms) permutations, where atom
+            i is mapped onto atom permutations[k,i] by operation k
+    """
+    L = cell.a0*np.array(cell.H, dtype=float)
+    x = np.array(cell.positions, dtype=float)
+    x = x - np.floor(x)
+    species = np.array(cell.species)
+
+    rotations = []
+    translations = []
+    permutations = []
+    for W in get_lattice_rotations(L, symprec):
+        _x = x.dot(W.T)
+        # the translations which map the first atom onto an atom of its species
+        for t in x[species == species[0]] - _x[0]:
+            _dx = (_x + t)[:, np.newaxis, :] - x[np.newaxis, :, :]
+            _dx -= np.round(_dx)
+            _d = np.sqrt(np.sum(_dx.dot(L)**2, axis=2))
+            _is_match = (_d < symprec) & (species[:, np.newaxis] == species)
+            if not np.all(np.sum(_is_match, axis=1) == 1):
+                continue
+            _p = np.argmax(_is_match, axis=1)
+            if np.unique(_p).size != _p.size:
+                continue
+            rotations.append(W)
+            translations.append(t - np.floor(t + symprec))
+            permutations.append(_p)
+    return np.array(rotations), np.array(translations), np.array(permutations)
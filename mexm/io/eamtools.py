@@ -1,4 +1,11 @@
 import copy
+import hashlib
+import json
+import mmap
+import os
+import stat
+import struct
+import tempfile
 import numpy as np
 import scipy.constants as spc
 from collections import OrderedDict
@@ -18,6 +25,49 @@ def get_eam_radii_vector(r_max,N_r):
 
     return _r, _dr
 
+def get_line_offsets(buffer,chunk_size=1048576):
+    """determine the byte offsets of the lines in a buffer
+
+    The newlines are located in fixed size chunks, so the temporary memory
+    does not scale with the size of the buffer.
+
+    Args:
+        buffer: an object supporting the buffer protocol, such as bytes or
+            an mmap.mmap object
+        chunk_size(int): the number of bytes searched at a time
+    Returns:
+        numpy.ndarray: the offsets of the start of each line, followed by the
+            offset of the end of the buffer.  Line i is buffer[o[i]:o[i+1]].
+    """
+    _n_bytes = len(buffer)
+    _offsets = [np.zeros(1,dtype=np.int64)]
+    for i in range(0,_n_bytes,chunk_size):
+        _chunk = np.frombuffer(buffer,
+                dtype=np.uint8,
+                count=min(chunk_size,_n_bytes-i),
+                offset=i)
+        _offsets.append(np.flatnonzero(_chunk == ord('\n')) + (i+1))
+        del _chunk
+    offsets = np.concatenate(_offsets)
+    if offsets[-1] != _n_bytes:
+        offsets = np.append(offsets,_n_bytes)
+    return offsets
+
+def get_file_sha1(filename):
+    """sha1 hash of the contents of a file
+
+    Args:
+        filename(str): the path of the file
+    Returns:
+        str: the hexadecimal digest
+    """
+    _sha1 = hashlib.sha1()
+    with open(filename,'rb') as f:
+        if os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as mm:
+                _sha1.update(mm)
+    return _sha1.hexdigest()
+
 class EamCurveFitter(object):
     
     def __init__(self, element_names):
@@ -119,8 +169,12 @@ class EamSetflFile(object):
         self.N_VALUES_PER_LINE_RHO = 5
         self.N_VALUES_PER_LINE_R = 5
         self.SETFL_NUM_FORMAT = "{:+24.16E}"
+        self.SETFL_NUM_PERCENT_FORMAT = "%+24.16E"
         self.SETFL_INT_FORMAT = "{:5d}"
         self.PAIR_KEY_FORMAT = "{}.{}"
+        self.SIDECAR_EXTENSION = ".bin"
+        self.SIDECAR_MAGIC = b"MXSETFL1"
+        self.SIDECAR_ALIGNMENT = 64
 
         # these attributes should be treated as private
         self.N_headersection_lines = 5
@@ -268,7 +322,8 @@ class EamSetflFile(object):
             rho,
             pair,
             embedding,
-            density):
+            density,
+            sidecar=False):
         """
         write a setfl file
 
@@ -281,8 +336,140 @@ class EamSetflFile(object):
             pair(collections.OrderedDict)
             embedding(collections.OrderedDict)
             density(collections.OrderedDict)
+            sidecar(bool): if True, the binary sidecar is written alongside
+                the setfl file, see write_sidecar
         """
         assert isinstance(filename,str)
+        self._set_setfl_tables(
+                filename=filename,
+                symbols=symbols,
+                r=r,
+                rcut=rcut,
+                rho=rho,
+                pair=pair,
+                embedding=embedding,
+                density=density)
+
+        _str_out = "\n".join([
+            self.get_str_setfl_header_section().strip(),
+            self.get_str_setfl_atomic_section().strip(),
+            self.get_str_setfl_pairpotential_section().strip()
+            ])
+
+        with open(self.filename,'w') as f:
+            f.write(_str_out)
+
+        if sidecar:
+            self.write_sidecar()
+
+    def write_bulk(self,
+            filename,
+            symbols,
+            r,
+            rcut,
+            rho,
+            pair,
+            embedding,
+            density,
+            n_lines_per_chunk=2000,
+            sidecar=False):
+        """
+        write a setfl file, formatting the tables in bulk
+
+        Each table is formatted in chunks of lines with a single % operation
+        and written to a buffered binary stream, so the whole file is never
+        held in memory.  The output is byte-identical to write.
+
+        Args:
+            filename(str,int,file): a path, an open file descriptor, or a
+                binary file object.  File descriptors and file objects are
+                not closed.
+            symbols(list)
+            r(np.ndarray)
+            rcut(numpy.ndarray)
+            rho(numpy.ndarray)
+            pair(collections.OrderedDict)
+            embedding(collections.OrderedDict)
+            density(collections.OrderedDict)
+            n_lines_per_chunk(int): the number of lines formatted at a time
+            sidecar(bool): if True, the binary sidecar is written alongside
+                the setfl file, see write_sidecar.  This requires filename
+                to be a path.
+        """
+        if sidecar and not isinstance(filename,str):
+            raise ValueError("the sidecar requires the path of the setfl file")
+
+        self._set_setfl_tables(
+                filename=filename if isinstance(filename,str) else None,
+                symbols=symbols,
+                r=r,
+                rcut=rcut,
+                rho=rho,
+                pair=pair,
+                embedding=embedding,
+                density=density)
+
+        if isinstance(filename,str):
+            with open(filename,'wb') as f:
+                self._write_bulk_stream(f,n_lines_per_chunk)
+        elif isinstance(filename,int):
+            with open(filename,'wb',closefd=False) as f:
+                self._write_bulk_stream(f,n_lines_per_chunk)
+        else:
+            self._write_bulk_stream(filename,n_lines_per_chunk)
+
+        if sidecar:
+            self.write_sidecar()
+
+    def _write_bulk_stream(self,f,n_lines_per_chunk):
+        _n = self.N_VALUES_PER_LINE_R
+        _line_format = _n*self.SETFL_NUM_PERCENT_FORMAT + "\n"
+
+        def get_chunks(values):
+            _n_values_per_chunk = _n*n_lines_per_chunk
+            for i in range(0,values.size,_n_values_per_chunk):
+                _values = values[i:i+_n_values_per_chunk].tolist()
+                yield (_line_format*(len(_values)//_n)) % tuple(_values)
+
+        # the sections are stripped by write, which removes the leading
+        # whitespace of the first line of each section and the final newline
+        f.write((self.get_str_setfl_header_section().strip() + "\n").encode())
+
+        for i,s in enumerate(self.symbols):
+            _str_atomic = self.get_str_setfl__atomic_description(s) + "\n"
+            if i == 0:
+                _str_atomic = _str_atomic.lstrip()
+            f.write(_str_atomic.encode())
+            for _str_chunk in get_chunks(self.embedding[s]):
+                f.write(_str_chunk.encode())
+            for _str_chunk in get_chunks(self.density[s]):
+                f.write(_str_chunk.encode())
+
+        _is_first_chunk = True
+        _str_previous = None
+        for i1,s1 in enumerate(self.symbols):
+            for i2,s2 in enumerate(self.symbols):
+                if i1 <= i2:
+                    _pair = self.pair["{}{}".format(s1,s2)] * self.r
+                    for _str_chunk in get_chunks(_pair):
+                        if _is_first_chunk:
+                            _str_chunk = _str_chunk.lstrip()
+                            _is_first_chunk = False
+                        if _str_previous is not None:
+                            f.write(_str_previous.encode())
+                        _str_previous = _str_chunk
+        if _str_previous is not None:
+            f.write(_str_previous[:-1].encode())
+
+    def _set_setfl_tables(self,
+            filename,
+            symbols,
+            r,
+            rcut,
+            rho,
+            pair,
+            embedding,
+            density):
         assert type(symbols) is list
         assert all([type(s) is str for s in symbols])
         assert isinstance(r,np.ndarray)
@@ -314,14 +501,25 @@ class EamSetflFile(object):
         self.d_rho = rho[1] - rho[0]
         self.N_rho = rho.size
 
-        _str_out = "\n".join([
-            self.get_str_setfl_header_section().strip(),
-            self.get_str_setfl_atomic_section().strip(),
-            self.get_str_setfl_pairpotential_section().strip()
-            ])
-
-        with open(self.filename,'w') as f:
-            f.write(_str_out)
+        # the header lines and the tables are kept as the readers set them,
+        # so that the sidecar can be written from the tables of the writer
+        self.lines = self.get_str_setfl_header_section().strip().split("\n")
+        self.symbol_dict = OrderedDict()
+        for s in symbols:
+            args = self.get_str_setfl__atomic_description(s).split()
+            self.symbol_dict[s] = OrderedDict({
+                    'atomic_number':int(args[0]),
+                    'atomic_mass':float(args[1]),
+                    'lattice_constant':float(args[2]),
+                    'lattice_type':args[3]})
+        self.func_embedding = OrderedDict([(s,embedding[s]) for s in symbols])
+        self.func_density = OrderedDict([(s,density[s]) for s in symbols])
+        self.func_pairpotential = OrderedDict()
+        for i1,s1 in enumerate(symbols):
+            for i2,s2 in enumerate(symbols):
+                if i1 <= i2:
+                    k = self.PAIR_KEY_FORMAT.format(s1,s2)
+                    self.func_pairpotential[k] = pair["{}{}".format(s1,s2)]
 
     def get_str_setfl_header_section(self):
         _str_out = "\n".join([
@@ -467,6 +665,258 @@ class EamSetflFile(object):
             self.process_setfl_atomic_section()
             self.process_setfl_pairpotential_section()
 
+    def read_bulk(self,filename=None):
+        """read a setfl file by bulk parsing each numeric block
+
+        The file is memory-mapped.  The header section is processed from the
+        first five lines, then each numeric block is located from the line
+        offsets and parsed with a single call to numpy.fromstring into
+        preallocated arrays.  Unlike read, the lines attribute only contains
+        the header section.
+
+        Args:
+            filename(str,optional): the setfl file to read
+        Raises:
+            ValueError: if the file is shorter than the header indicates, or
+                a numeric block does not have the expected number of values
+        """
+        if filename is not None:
+            assert type(filename) is str
+            self.filename = filename
+
+        with open(self.filename,'rb') as f:
+            with mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as mm:
+                self._read_bulk_buffer(mm)
+
+    def _read_bulk_buffer(self,buffer):
+        _offsets = get_line_offsets(buffer)
+        _n_lines = _offsets.size - 1
+
+        def get_lines(i_start,n_lines):
+            if i_start + n_lines > _n_lines:
+                raise ValueError(
+                    "{} has {} lines, expected at least {}".format(
+                        self.filename,_n_lines,i_start+n_lines))
+            return buffer[_offsets[i_start]:_offsets[i_start+n_lines]]
+
+        def get_block(i_start,n_lines,out):
+            _values = np.fromstring(
+                    get_lines(i_start,n_lines),dtype=np.float64,sep=' ')
+            if _values.size != out.size:
+                raise ValueError(
+                    "{} has a block with {} values, expected {}".format(
+                        self.filename,_values.size,out.size))
+            out[:] = _values
+
+        # the header section is processed from its lines
+        self.lines = [
+                get_lines(i,1).decode().strip()
+                for i in range(self.N_headersection_lines)]
+        self.process_setfl_header_section()
+
+        _N_embedding_lines = self.N_rho // self.N_VALUES_PER_LINE_RHO
+        _N_density_lines = self.N_r // self.N_VALUES_PER_LINE_R
+        _N_pair_lines = self.N_r // self.N_VALUES_PER_LINE_R
+
+        pairs = []
+        for i1,s1 in enumerate(self.symbols):
+            for i2,s2 in enumerate(self.symbols):
+                if i1 <= i2:
+                    pairs.append([s1,s2])
+
+        _embedding = np.empty((self.n_symbols,self.N_rho),dtype=np.float64)
+        _density = np.empty((self.n_symbols,self.N_r),dtype=np.float64)
+        _pair = np.empty((len(pairs),self.N_r),dtype=np.float64)
+
+        self.symbol_dict = OrderedDict()
+        self.func_embedding = OrderedDict()
+        self.func_density = OrderedDict()
+        self.func_pairpotential = OrderedDict()
+
+        i_line = self.N_headersection_lines
+        for i_sym,sym in enumerate(self.symbols):
+            args = get_lines(i_line,1).decode().split()
+            self.symbol_dict[sym] = OrderedDict({
+                    'atomic_number':int(args[0]),
+                    'atomic_mass':float(args[1]),
+                    'lattice_constant':float(args[2]),
+                    'lattice_type':args[3]})
+            i_line += 1
+
+            get_block(i_line,_N_embedding_lines,_embedding[i_sym])
+            self.func_embedding[sym] = _embedding[i_sym]
+            i_line += _N_embedding_lines
+
+            get_block(i_line,_N_density_lines,_density[i_sym])
+            self.func_density[sym] = _density[i_sym]
+            i_line += _N_density_lines
+
+        # the pair potentials are stored as r*V(r)
+        for i_pair,pair in enumerate(pairs):
+            get_block(i_line,_N_pair_lines,_pair[i_pair])
+            i_line += _N_pair_lines
+        _pair /= self.r
+        for i_pair,pair in enumerate(pairs):
+            k = self.PAIR_KEY_FORMAT.format(pair[0],pair[1])
+            self.func_pairpotential[k] = _pair[i_pair]
+
+    def get_sidecar_filename(self,filename=None):
+        if filename is None:
+            filename = self.filename
+        return filename + self.SIDECAR_EXTENSION
+
+    def write_sidecar(self,filename=None):
+        """write the tables into a binary sidecar of the setfl file
+
+        The sidecar starts with a magic string and the length of a JSON header
+        containing the header section of the setfl file, the table layout, and
+        the sha1 hash of the setfl file.  The tables follow as little-endian
+        float64 values in the order r, rho, embedding, density and pair,
+        aligned so they can be memory-mapped.  The pair potentials are stored
+        as V(r), not r*V(r).
+
+        The sidecar is written to a unique temporary file which is renamed,
+        so concurrent readers never see a partially written sidecar.  It has
+        the permissions of the setfl file.
+
+        The tables are those of the last read or write of the setfl file.
+
+        Args:
+            filename(str,optional): the setfl file, which must already exist
+                since its hash is stored in the sidecar.
+        Returns:
+            str: the filename of the sidecar
+        """
+        if filename is not None:
+            self.filename = filename
+
+        _pair_keys = list(self.func_pairpotential.keys())
+        _header = OrderedDict()
+        _header['source_sha1'] = get_file_sha1(self.filename)
+        _header['header_lines'] = list(self.lines[:self.N_headersection_lines])
+        _header['symbol_dict'] = self.symbol_dict
+        _header['pair_keys'] = _pair_keys
+
+        _str_header = json.dumps(_header).encode()
+        _n_prefix = len(self.SIDECAR_MAGIC) + 8 + len(_str_header)
+        _n_padding = -_n_prefix % self.SIDECAR_ALIGNMENT
+
+        _arrays = [self.r,self.rho] \
+                + [self.func_embedding[s] for s in self.symbols] \
+                + [self.func_density[s] for s in self.symbols] \
+                + [self.func_pairpotential[k] for k in _pair_keys]
+
+        sidecar_filename = self.get_sidecar_filename()
+        _fd, _tmp_filename = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(sidecar_filename)),
+                prefix=os.path.basename(sidecar_filename) + '.',
+                suffix='.tmp')
+        try:
+            with os.fdopen(_fd,'wb') as f:
+                f.write(self.SIDECAR_MAGIC)
+                f.write(struct.pack('<Q',len(_str_header) + _n_padding))
+                f.write(_str_header)
+                f.write(b" "*_n_padding)
+                for a in _arrays:
+                    np.ascontiguousarray(a,dtype='<f8').tofile(f)
+            # mkstemp creates the file readable only by its owner
+            os.chmod(_tmp_filename,
+                    stat.S_IMODE(os.stat(self.filename).st_mode))
+            os.replace(_tmp_filename,sidecar_filename)
+        except BaseException:
+            if os.path.exists(_tmp_filename):
+                os.remove(_tmp_filename)
+            raise
+
+        return sidecar_filename
+
+    def read_sidecar(self,filename=None):
+        """load the tables from the binary sidecar of the setfl file
+
+        The tables are memory-mapped read-only, so processes loading the same
+        sidecar share the same pages.  The sidecar is only used if the hash
+        stored in it matches the setfl file.
+
+        Args:
+            filename(str,optional): the setfl file
+        Returns:
+            bool: True if the tables were loaded, False if the sidecar does not
+                exist or is stale.
+        """
+        if filename is not None:
+            assert type(filename) is str
+            self.filename = filename
+
+        sidecar_filename = self.get_sidecar_filename()
+        if not os.path.isfile(sidecar_filename):
+            return False
+
+        with open(sidecar_filename,'rb') as f:
+            if f.read(len(self.SIDECAR_MAGIC)) != self.SIDECAR_MAGIC:
+                return False
+            _n_header = struct.unpack('<Q',f.read(8))[0]
+            _header = json.loads(
+                    f.read(_n_header).decode(),
+                    object_pairs_hook=OrderedDict)
+        _offset = len(self.SIDECAR_MAGIC) + 8 + _n_header
+
+        if _header['source_sha1'] != get_file_sha1(self.filename):
+            return False
+
+        self.lines = list(_header['header_lines'])
+        self.process_setfl_header_section()
+
+        _pair_keys = _header['pair_keys']
+        _n_values = self.N_r + self.N_rho \
+                + self.n_symbols*(self.N_rho + self.N_r) \
+                + len(_pair_keys)*self.N_r
+        _data = np.memmap(sidecar_filename,
+                dtype='<f8',
+                mode='r',
+                offset=_offset,
+                shape=(_n_values,))
+
+        def get_rows(i_start,n_rows,n_columns):
+            _rows = _data[i_start:i_start+n_rows*n_columns]
+            return _rows.reshape(n_rows,n_columns), i_start+n_rows*n_columns
+
+        i = 0
+        _r, i = get_rows(i,1,self.N_r)
+        _rho, i = get_rows(i,1,self.N_rho)
+        _embedding, i = get_rows(i,self.n_symbols,self.N_rho)
+        _density, i = get_rows(i,self.n_symbols,self.N_r)
+        _pair, i = get_rows(i,len(_pair_keys),self.N_r)
+
+        self.r = _r[0]
+        self.rho = _rho[0]
+        self.symbol_dict = _header['symbol_dict']
+        self.func_embedding = OrderedDict(
+                [(s,_embedding[i]) for i,s in enumerate(self.symbols)])
+        self.func_density = OrderedDict(
+                [(s,_density[i]) for i,s in enumerate(self.symbols)])
+        self.func_pairpotential = OrderedDict(
+                [(k,_pair[i]) for i,k in enumerate(_pair_keys)])
+
+        return True
+
+    def read_cached(self,filename=None):
+        """read a setfl file through its binary sidecar
+
+        The tables are loaded from the sidecar if it matches the setfl file,
+        otherwise the setfl file is read with read_bulk and the sidecar is
+        (re)written for the next reader.  Writing the sidecar is best effort,
+        e.g. for a read-only directory the tables are still read.
+
+        Args:
+            filename(str,optional): the setfl file
+        """
+        if not self.read_sidecar(filename):
+            self.read_bulk(filename)
+            try:
+                self.write_sidecar()
+            except OSError:
+                pass
+
     def process_setfl_header_section(self):
         """
         Process the header section of the setfl file.
@@ -1,3 +1,4 @@
+import numpy as np
 import pypospack.crystal as crystal
 
 class LammpsStructure(crystal.SimulationCell):
@@ -44,25 +45,26 @@ class LammpsStructure(crystal.SimulationCell):
 
         atom_id = 1
         for i_symbol, symbol in enumerate(symbol_list):
-            for i_atom, atom in enumerate(self.atomic_basis):
-                if (atom.symbol == symbol):
-                    chrg = 1.  # dummy variable
-                    posx = self.H[0,0]*atom.position[0]*a0
-                    posy = self.H[1,1]*atom.position[1]*a0
-                    posz = self.H[2,2]*atom.position[2]*a0
-                    if atom_style == 'atomic':
-                        str_out = "{} {} {:10.4f} {:10.4f} {:10.4f}\n"
-                        str_out = str_out.format(atom_id,
-                                                 i_symbol + 1,
-                                                 posx, posy, posz)
-                    elif atom_style == 'charge':
-                        str_out = "{} {} {:10.4f} {:10.4f} {:10.4f} {:10.4f}\n"
-                        str_out = str_out.format(atom_id,
-                                                 i_symbol + 1,
-                                                 chrg,
-                                                 posx, posy, posz)
-                    file.write(str_out)
-                    atom_id += 1
+            if symbol not in self.symbol_table:
+                continue
+            is_symbol = self.species == self.symbol_table.index(symbol)
+            n_atoms = int(np.count_nonzero(is_symbol))
+            positions = self.positions[is_symbol] \
+                    * np.diag(self.H) * a0
+
+            # the rows are formatted in bulk as atom_id, atom_type, [chrg,] x, y, z
+            columns = [np.arange(atom_id,atom_id+n_atoms),
+                       np.full(n_atoms,i_symbol+1)]
+            if atom_style == 'atomic':
+                str_out = "%d %d %10.4f %10.4f %10.4f\n"
+            elif atom_style == 'charge':
+                chrg = 1.  # dummy variable
+                str_out = "%d %d %10.4f %10.4f %10.4f %10.4f\n"
+                columns.append(np.full(n_atoms,chrg))
+            rows = np.column_stack(columns + [positions]).astype(object)
+            rows[:,:2] = rows[:,:2].astype(int)
+            file.write((str_out*n_atoms) % tuple(rows.ravel()))
+            atom_id += n_atoms
         file.close()
 
 def write_lammps_structure_file(simulation_cell, filename):
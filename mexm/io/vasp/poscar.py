@@ -1,3 +1,5 @@
+import os
+import numpy as np
 from mexm.crystal import SimulationCell
 
 class VaspPoscarError(Exception):
@@ -22,7 +24,7 @@ class Poscar(SimulationCell):
         self.comment = 'Automatically generated by pypospack'
 
     def get_magmom_tag(self):
-        magmom = [k.magmom for k in self.atomic_basis]
+        magmom = self.magnetic_moments.tolist()
 
         str_magmom = ""
 
@@ -106,15 +108,15 @@ class Poscar(SimulationCell):
             raise VaspPoscarError(msg)
 
         # read in atomic positions
+        atom_symbols = []
+        positions = []
         for s in symbols:
             n_atoms = n_atoms_per_symbol[s]
             for i_atom in range(n_atoms):
                 line = f.readline().strip().split()
-                position = [float(line[i]) for i in range(3)]
-                try:
-                    self.add_atom(s,position)
-                except:
-                    raise
+                positions.append([float(line[i]) for i in range(3)])
+                atom_symbols.append(s)
+        self.add_atoms(symbols=atom_symbols,positions=positions)
     def write(self, filename=None):
         """ write poscar file """
         if filename is None:
@@ -145,14 +147,12 @@ class Poscar(SimulationCell):
         str_poscar += str_atomnum
         str_poscar += "Direct\n"
 
+        pos_template = "{:10.6f} {:10.6f} {:10.6f}\n"
         for symbol in self.symbols:
-            for i, atom in enumerate(self.atomic_basis):
-                if symbol == atom.symbol:
-                    pos_template = "{:10.6f} {:10.6f} {:10.6f}\n"
-                    str_position = pos_template.format(atom.position[0],
-                                                       atom.position[1],
-                                                       atom.position[2])
-                    str_poscar += str_position
+            positions = self.positions[
+                    self.species == self.symbol_table.index(symbol)]
+            str_poscar += (pos_template*positions.shape[0]).format(
+                    *positions.ravel())
 
         f = open(self.filename, 'w')
         f.write(str_poscar)
@@ -96,6 +96,7 @@ from mexm.potential.eam_embedding_function import EamEmbeddingFunction
 from mexm.potential.eam_embedding_eos import EamEmbeddingEquationOfState
 
 from mexm.potential.potential_configuration import PotentialConfiguration
+from mexm.potential.tabulated_function import TabulatedFunction
 
 #------------------------------------------------------------------------------
 # These are pair potentials.
@@ -1,5 +1,6 @@
 from collections import OrderedDict
 import copy
+import numbers
 import numpy as np
 from pypospack.potential import Potential
 from pypospack.potential import PairPotential
@@ -7,9 +8,14 @@ from pypospack.potential import EamDensityFunction
 from pypospack.potential import ExponentialDensityFunction
 from pypospack.potential import EamEmbeddingFunction
 from pypospack.potential import FinnisSinclairEmbeddingFunction
+from pypospack.potential import UniversalEmbeddingFunction
+from pypospack.potential import BjsEmbeddingFunction
 from pypospack.potential import EamEmbeddingEquationOfState
 from pypospack.potential import RoseEquationOfStateEmbeddingFunction
 from pypospack.eamtools import EamSetflFile
+from mexm.potential.evaluation_cache import EvaluationCache
+from mexm.potential.evaluation_cache import get_evaluation_key
+from mexm.crystal.shells import get_shell_table
 
 from pypospack.potential import BornMayerPotential
 from pypospack.potential import MorsePotential
@@ -23,6 +29,9 @@ class EamPotential(Potential):
        func_density(str):
        func_embedding(str):
        filename(str):
+       cache(EvaluationCache,optional): the cache of the tables.  True
+           creates an EvaluationCache with the default budget.  Default is
+           None, the tables are not cached.
 
     Attributes:
        symbols(list of str): the list of symbols
@@ -34,13 +43,19 @@ class EamPotential(Potential):
        r_cut(float): the cutoff distance between two atoms
        N_rho(int): the number of points in the electron density evaluation
        rho_max(float): the maximum electron density
+       cache(EvaluationCache): the cache of the pair, density, and embedding
+           tables, keyed by the parameters of each stage, so that the stages
+           whose parameters are unchanged are not recomputed.  None if
+           caching is disabled, which is the default since each cached table
+           is a copy, which only pays off when parameters recur.
     """
     def __init__(self,
             symbols,
             func_pair=None,
             func_density=None,
             func_embedding=None,
-            filename=None):
+            filename=None,
+            cache=None):
 
         # parameter format strings
         self.PYPOSPACK_EAM_PAIR_FORMAT = "{s1}{s2}_eam_pair_{p}"
@@ -73,6 +88,10 @@ class EamPotential(Potential):
                 symbols="".join(self.symbols))
         self.setfl = None
 
+        if cache is True:
+            cache = EvaluationCache()
+        self.cache = cache
+
         if filename is None:
             self.set_obj_pair(func_pair=func_pair)
             self.set_obj_density(func_density=func_density)
@@ -113,7 +132,7 @@ class EamPotential(Potential):
         return str_out
 
 
-    def _init_parameter_names(self):
+    def _initialize_parameter_names(self):
         if all([self.obj_pair is not None,
                 self.obj_density is not None,
                 self.obj_embedding is not None]):
@@ -124,7 +143,60 @@ class EamPotential(Potential):
         else:
             self.parameter_names = None
 
-    def _init_parameters(self):
+        self._initialize_parameter_plan()
+
+    def _initialize_parameter_plan(self):
+        """compile the mapping from a parameter vector to the sub-functions
+
+        The parameter vector is in the order of parameter_names.  For each of
+        the pair, density and embedding functions, the plan records the names
+        of its parameters without the prefix, the positions of its parameters
+        in the vector, and the positions of the arguments of its packed
+        function, so that evaluation does not need any string processing.
+        The packed positions are None for an embedding function determined
+        from an equation of state.
+        """
+        self.parameter_plan = None
+        if self.parameter_names is None:
+            return
+
+        _indices = OrderedDict([(pn,i) for i,pn in enumerate(self.parameter_names)])
+
+        def get_stage_plan(prefix,keys):
+            _names = [pn for pn in self.parameter_names if pn.startswith(prefix)]
+            stage_plan = OrderedDict()
+            stage_plan['parameter_names'] = [
+                    (pn[len(prefix):],pn) for pn in _names]
+            stage_plan['indices'] = np.array(
+                    [_indices[pn] for pn in _names],dtype=int)
+            if keys is None:
+                stage_plan['packed_indices'] = None
+            else:
+                stage_plan['packed_indices'] = np.array(
+                        [[_indices[prefix + k] for k in row] for row in keys],
+                        dtype=int)
+            return stage_plan
+
+        def get_keys(obj,keys_attribute,parameters_attribute):
+            if getattr(type(obj),parameters_attribute) is None:
+                return None
+            return getattr(obj,keys_attribute)
+
+        self.parameter_plan = OrderedDict()
+        self.parameter_plan['pair'] = get_stage_plan('p_',get_keys(
+            self.obj_pair,
+            'pair_function_parameter_keys',
+            'pair_function_parameters'))
+        self.parameter_plan['density'] = get_stage_plan('d_',get_keys(
+            self.obj_density,
+            'density_function_parameter_keys',
+            'density_function_parameters'))
+        self.parameter_plan['embedding'] = get_stage_plan('e_',get_keys(
+            self.obj_embedding,
+            'embedding_function_parameter_keys',
+            'embedding_function_parameters'))
+
+    def _initialize_parameters(self):
         if self.parameter_names is None:
             return
 
@@ -135,15 +207,10 @@ class EamPotential(Potential):
     def determine_r_max(self,a0,latt_type):
         _a0 = a0
 
-        if latt_type == 'fcc':
-            _d_1NN = 0.707 * _a0
-            _d_2NN = 1.000 * _a0
-            _d_3NN = 1.225 * _a0
-            _d_4NN = 1.414 * _a0
-            _d_5NN = 1.581 * _a0
+        _d_NN = _a0 * get_shell_table(latt_type, n_shells=4).distances
 
         # r_max should be between the 3NN and 4NN
-        _rcut = 0.5 * (_d_3NN + _d_4NN)
+        _rcut = 0.5 * (_d_NN[2] + _d_NN[3])
         return _rcut
 
     def determine_rho_max(self,a0,latt_type):
@@ -156,23 +223,20 @@ class EamPotential(Potential):
                 _parameter_name = k[2:]
                 _parameters[_parameter_name] = v
 
+        # the 1NN and 2NN shells
+        _shells = get_shell_table(latt_type, n_shells=2)
+        _d = _a0 * _shells.distances
+        _natoms = _shells.multiplicities
+
         if latt_type == 'fcc':
-            _d_1NN = 0.707 * _a0
-            _d_2NN = 1.000 * _a0
-            _d_3NN = 1.225 * _a0
-            _d_O = 0.866 * _a0
-            _d_T = 0.433 * _a0
-
-            _natoms_1NN = 12
-            _natoms_2NN = 6
-            _natoms_O = 4
-            _natoms_T = 2
-
-        for s in self.symbols:
-            _rhomax = _natoms_1NN * self.obj_density.evaluate(_d_1NN,_parameters)[s]
-            _rhomax += _natoms_2NN * self.obj_density.evaluate(_d_2NN,_parameters)[s]
-            _rhomax += _natoms_O * self.obj_density.evaluate(_d_O,_parameters)[s]
-            _rhomax += _natoms_T * self.obj_density.evaluate(_d_T,_parameters)[s]
+            # the octahedral and tetrahedral sites
+            _d = np.concatenate((_d, [np.sqrt(3)/2 * _a0, np.sqrt(3)/4 * _a0]))
+            _natoms = np.concatenate((_natoms, [4, 2]))
+
+        # the distances are evaluated in a single call, the largest density
+        # of the symbols is the maximum
+        _density = self.obj_density.evaluate(_d,_parameters)
+        _rhomax = max(np.dot(_natoms, _density[s]) for s in self.symbols)
 
         _rhomax = float(_rhomax)
         return _rhomax
@@ -208,12 +272,39 @@ class EamPotential(Potential):
                 density=self.density,
                 embedding=self.embedding)
 
-    def evaluate(self,r,rho,rcut,parameters):
+    def evaluate(self,r,rho,rcut,parameters,copy_results=True,out=None):
+        """evaluate the pair, density and embedding tables
+
+        By default, the grids and the tables are copies which are owned by
+        this object.  When copy_results is False, the tables are evaluated
+        without copies, see evaluate_parameter_vector for the ownership of
+        the results.
+
+        Args:
+            r(numpy.ndarray): the radial grid
+            rho(numpy.ndarray): the electron density grid
+            rcut(float): the global cutoff
+            parameters(dict): a dictionary of parameter names and values
+            copy_results(bool,optional): if False, the results are read-only
+                views rather than copies.  Default is True.
+            out(dict,optional): output buffers for the no-copy mode, see
+                evaluate_parameter_vector.
+        """
         assert isinstance(r,np.ndarray)
         assert isinstance(rho,np.ndarray)
         assert type(rcut) in [float,int,type(None)]
         assert type(parameters) in [OrderedDict,dict]
 
+        if not copy_results or out is not None:
+            self.evaluate_parameter_vector(
+                    r=r,
+                    rho=rho,
+                    rcut=rcut,
+                    parameters=self.get_parameter_vector(parameters),
+                    copy_results=False,
+                    out=out)
+            return
+
         for p in self.parameters:
             self.parameters[p] = parameters[p]
 
@@ -224,6 +315,380 @@ class EamPotential(Potential):
         self.evaluate_density(r=r,rcut=rcut)
         self.evaluate_embedding(rho)
 
+    def get_parameter_vector(self,parameters):
+        """pack the parameters into a vector in the order of parameter_names
+
+        Args:
+            parameters(dict): a dictionary of parameter names and values
+        Returns:
+            numpy.ndarray: the parameter vector.  For an embedding function
+                determined from an equation of state, which has non-numeric
+                parameters such as the lattice type, the dtype is object.
+        """
+        _values = [parameters[p] for p in self.parameter_names]
+        if self.parameter_plan['embedding']['packed_indices'] is None:
+            return np.array(_values,dtype=object)
+        return np.array(_values,dtype=float)
+
+    def evaluate_parameter_vector(self,r,rho,rcut,parameters,
+            copy_results=True,out=None):
+        """evaluate the potential for a parameter vector
+
+        The slices of the parameter vector are routed to the pair, density and
+        embedding functions through the compiled parameter_plan, without
+        building a dictionary of parameters for each function.  The pair,
+        density and embedding attributes are set as in evaluate.
+
+        When copy_results is False, the tables are not copied.  The r and
+        rho attributes are read-only views of the caller's grids, so the
+        caller must not change the grids while the results are in use.  The
+        rows of the pair, density and embedding attributes are read-only views
+        into a table for each stage.  If out is provided, the tables are
+        evaluated directly into the caller's buffers, a cache hit is copied
+        into the buffer, and the buffers are never cached since they are
+        reused.  Otherwise the tables are the freshly evaluated arrays, which
+        are cached without a copy, or the arrays held by the cache.  In
+        either case, the tables are only valid until the next evaluation with
+        the same buffers, and must be copied to be kept.
+
+        An embedding function determined from an equation of state is
+        evaluated from the pair and density tables by evaluate_embedding,
+        which owns a copy of its table.  The table is copied into
+        out['embedding'] if it is provided.
+
+        Args:
+            r(numpy.ndarray): the radial grid
+            rho(numpy.ndarray): the electron density grid
+            rcut(float): the global cutoff
+            parameters(numpy.ndarray): the parameter vector in the order of
+                parameter_names, see get_parameter_vector
+            copy_results(bool,optional): if False, the results are read-only
+                views rather than copies.  Default is True.
+            out(dict,optional): the output buffers, which are owned by the
+                caller.  The key is 'pair', 'density' or 'embedding', and the
+                value is a writeable array with the shape (n_pairs, n_r),
+                (n_symbols, n_r) or (n_symbols, n_rho).  Any of the keys may
+                be omitted.  Providing out implies copy_results is False.
+        """
+        assert isinstance(r,np.ndarray)
+        assert isinstance(rho,np.ndarray)
+        assert type(rcut) in [float,int,type(None)]
+
+        is_eos = self.parameter_plan['embedding']['packed_indices'] is None
+        x = np.asarray(parameters,dtype=object if is_eos else float)
+        if x.shape != (len(self.parameter_names),):
+            msg_err = "the parameter vector must have the shape ({},)".format(
+                    len(self.parameter_names))
+            raise ValueError(msg_err)
+
+        is_view = not copy_results or out is not None
+        if out is None:
+            out = {}
+
+        for p,v in zip(self.parameter_names,x.tolist()):
+            self.parameters[p] = v
+
+        def get_read_only_view(a):
+            _view = a.view()
+            _view.flags.writeable = False
+            return _view
+
+        self.r_cut = rcut
+        if is_view:
+            self.r = get_read_only_view(r)
+            self.rho = get_read_only_view(rho)
+        else:
+            self.r = copy.deepcopy(r)
+            self.rho = copy.deepcopy(rho)
+
+        def evaluate_stage(stage,obj,keys,evaluate_packed):
+            _plan = self.parameter_plan[stage]
+            _out = out.get(stage) if is_view else None
+            _key = None
+            _values = None
+            if self.cache is not None:
+                _key = get_evaluation_key(
+                        obj,r if stage != 'embedding' else rho,
+                        x[_plan['indices']],
+                        r_cut=rcut if stage != 'embedding' else None)
+                _values = self.cache.get(_key)
+
+            if _values is None:
+                _values = evaluate_packed(x[_plan['packed_indices']],_out)
+                # the fresh table is only referenced by the views, so in the
+                # no-copy mode it is cached without a copy
+                if _key is not None and _out is None:
+                    self.cache.put(_key,_values,copy_value=not is_view)
+            elif _out is not None:
+                np.copyto(_out,_values)
+                _values = _out
+            elif not is_view:
+                _values = np.copy(_values)
+
+            if is_view:
+                _values = get_read_only_view(_values)
+            return OrderedDict(zip(keys,_values))
+
+        self.pair = evaluate_stage(
+                'pair',self.obj_pair,self.obj_pair.pair_names,
+                lambda X,_out: self.obj_pair.evaluate_packed(
+                    r=r,packed_parameters=X,r_cut=rcut,out=_out))
+        self.density = evaluate_stage(
+                'density',self.obj_density,self.symbols,
+                lambda X,_out: self.obj_density.evaluate_packed(
+                    r=r,packed_parameters=X,r_cut=rcut,out=_out))
+        if is_eos:
+            # the equation of state is solved with the tables of the pair and
+            # density objects, which are not set by the packed evaluation
+            self.obj_pair.potential_evaluations = self.pair
+            self.obj_density.density_evaluations = self.density
+            self.evaluate_embedding(rho=rho)
+            if is_view:
+                self.rho = get_read_only_view(rho)
+                if 'embedding' in out:
+                    for s,row in zip(self.symbols,out['embedding']):
+                        row[...] = self.embedding[s]
+                    self.embedding = OrderedDict(zip(
+                        self.symbols,get_read_only_view(out['embedding'])))
+        else:
+            self.embedding = evaluate_stage(
+                    'embedding',self.obj_embedding,self.symbols,
+                    lambda X,_out: self.obj_embedding.evaluate_packed(
+                        rho=rho,packed_parameters=X,out=_out))
+
+    def evaluate_population(self,
+            r,
+            rho,
+            rcut,
+            parameters,
+            parameter_names,
+            constrained_parameters=None):
+        """evaluate a population of candidate parameterizations at once
+
+        Instead of evaluating each candidate through an OrderedDict, the
+        parameters of all candidates are gathered into packed arrays and the
+        pair, density, and embedding functions are evaluated for every
+        candidate with a single broadcasted call each.  An embedding function
+        determined from an equation of state is solved for each candidate in
+        turn, from the pair and density tables of the candidate.
+
+        Args:
+            r(numpy.ndarray): the radial grid, with shape (n_r,)
+            rho(numpy.ndarray): the electron density grid, with shape (n_rho,)
+            rcut(float): the global cutoff
+            parameters(numpy.ndarray): the candidate parameterizations, with
+                shape (n_candidates, n_free_parameters)
+            parameter_names(list of str): the names of the columns of
+                parameters, which is normally the free_parameter_names
+                attribute of PotentialInformation.
+            constrained_parameters(dict,optional): the values of the
+                parameters which are not in parameter_names.  These values
+                are shared by all candidates, and include the non-numeric
+                parameters of an equation of state, e.g. the lattice type.
+        Returns:
+            (tuple): the pair, density and embedding tables as numpy arrays
+                with the shapes (n_candidates, n_pairs, n_r),
+                (n_candidates, n_symbols, n_r), and
+                (n_candidates, n_symbols, n_rho).  The pairs are ordered as
+                obj_pair.symbol_pairs and the symbols as the symbols attribute.
+        Raises:
+            ValueError: if a parameter is neither free nor constrained
+        """
+        assert isinstance(r,np.ndarray)
+        assert isinstance(rho,np.ndarray)
+        assert type(rcut) in [float,int,type(None)]
+
+        is_eos = isinstance(self.obj_embedding,EamEmbeddingEquationOfState)
+
+        _parameters = np.atleast_2d(np.asarray(parameters,dtype=float))
+        _n_candidates, _n_free = _parameters.shape
+        if _n_free != len(parameter_names):
+            msg_err = (
+                "the number of columns in parameters ({}) does not match the "
+                "number of parameter names ({})").format(
+                        _n_free,len(parameter_names))
+            raise ValueError(msg_err)
+
+        # map each argument of the sub-functions to a column of the extended
+        # parameter matrix, constrained parameters are appended as columns
+        _columns = OrderedDict([(pn,i) for i,pn in enumerate(parameter_names)])
+        _constrained_values = []
+
+        def get_column_indices(keys,prefix):
+            _indices = np.empty((len(keys),len(keys[0])),dtype=int)
+            for i,row in enumerate(keys):
+                for j,k in enumerate(row):
+                    pn = prefix + k
+                    if pn in _columns:
+                        _indices[i,j] = _columns[pn]
+                    elif constrained_parameters is not None \
+                            and pn in constrained_parameters:
+                        _indices[i,j] = _n_free + len(_constrained_values)
+                        _constrained_values.append(constrained_parameters[pn])
+                    else:
+                        raise ValueError(
+                            "parameter {} is neither free nor constrained".format(pn))
+            return _indices
+
+        _pair_indices = get_column_indices(
+                self.obj_pair.pair_function_parameter_keys,'p_')
+        _density_indices = get_column_indices(
+                self.obj_density.density_function_parameter_keys,'d_')
+        if is_eos:
+            # the equation of state depends on all the parameters
+            for pn in self.parameter_names:
+                if pn not in _columns and (constrained_parameters is None
+                        or pn not in constrained_parameters):
+                    raise ValueError(
+                        "parameter {} is neither free nor constrained".format(pn))
+        else:
+            _embedding_indices = get_column_indices(
+                    self.obj_embedding.embedding_function_parameter_keys,'e_')
+
+        _X = np.empty((_n_candidates,_n_free + len(_constrained_values)))
+        _X[:,:_n_free] = _parameters
+        _X[:,_n_free:] = np.array(_constrained_values,dtype=float)
+
+        # fancy indexing gathers the packed arrays of all candidates, with the
+        # shape (n_candidates, n_functions, n_function_parameters)
+        pair = self.obj_pair.evaluate_packed(
+                r=r,
+                packed_parameters=_X[:,_pair_indices],
+                r_cut=rcut)
+        density = self.obj_density.evaluate_packed(
+                r=r,
+                packed_parameters=_X[:,_density_indices],
+                r_cut=rcut)
+        if not is_eos:
+            embedding = self.obj_embedding.evaluate_packed(
+                    rho=rho,
+                    packed_parameters=_X[:,_embedding_indices])
+            return pair, density, embedding
+
+        embedding = np.empty((_n_candidates,len(self.symbols),rho.size))
+        for i in range(_n_candidates):
+            _candidate = OrderedDict()
+            for pn in self.parameter_names:
+                if pn in _columns:
+                    _candidate[pn] = _parameters[i,_columns[pn]]
+                else:
+                    _candidate[pn] = constrained_parameters[pn]
+            embedding[i] = self._evaluate_eos_embedding(
+                    r=r,
+                    rho=rho,
+                    parameters=_candidate,
+                    pair=pair[i],
+                    density=density[i])
+
+        return pair, density, embedding
+
+    def _evaluate_eos_embedding(self,r,rho,parameters,pair,density):
+        """solve an embedding function from an equation of state for tables
+
+        Args:
+            r(numpy.ndarray): the radial grid, with shape (n_r,)
+            rho(numpy.ndarray): the electron density grid, with shape (n_rho,)
+            parameters(OrderedDict): all the parameters of the potential
+            pair(numpy.ndarray): the pair tables, with shape (n_pairs, n_r)
+            density(numpy.ndarray): the density tables, with shape
+                (n_symbols, n_r)
+        Returns:
+            numpy.ndarray: the embedding tables, with shape (n_symbols, n_rho)
+        """
+        # the equation of state is solved with the tables of the pair and
+        # density objects
+        self.obj_pair.potential_evaluations = OrderedDict(
+                zip(self.obj_pair.pair_names,pair))
+        self.obj_density.density_evaluations = OrderedDict(
+                zip(self.symbols,density))
+        self.obj_embedding.evaluate(
+                rho=rho,
+                r=r,
+                parameters=parameters,
+                o_pair=self.obj_pair,
+                o_density=self.obj_density)
+        return np.array([self.obj_embedding.embedding_evaluations[s]
+            for s in self.symbols])
+
+    def evaluate_jacobian(self,r,rho,rcut,parameters):
+        """evaluate the Jacobian of the tables with respect to the parameters
+
+        The Jacobians of the pair, density, and embedding functions are
+        evaluated analytically, and assembled into a single block structured
+        matrix, since each parameter belongs to only one of the functions.
+
+        An embedding function determined from an equation of state depends
+        on all the parameters and has no analytic gradient, so its columns
+        are the central differences of evaluate_population, with a step of
+        1e-5*max(1,|x|) for each numeric parameter x.  The rows of the
+        non-numeric parameters, e.g. the lattice type, are zero.
+
+        Args:
+            r(numpy.ndarray): the radial grid, with shape (n_r,)
+            rho(numpy.ndarray): the electron density grid, with shape (n_rho,)
+            rcut(float): the global cutoff
+            parameters(OrderedDict): a dictionary of parameter names and values
+        Returns:
+            numpy.ndarray: the Jacobian with the shape (n_parameters, n_grid),
+                where the rows are in the order of parameter_names.  The
+                columns are the pair tables, the density tables and then the
+                embedding tables, each concatenated in the order of the
+                evaluate_jacobian method of the function.
+        """
+        assert isinstance(r,np.ndarray)
+        assert isinstance(rho,np.ndarray)
+        assert type(rcut) in [float,int,type(None)]
+        assert type(parameters) in [OrderedDict,dict]
+
+        is_eos = isinstance(self.obj_embedding,EamEmbeddingEquationOfState)
+
+        def get_parameters(prefix):
+            return OrderedDict([(p[len(prefix):],parameters[p])
+                for p in self.parameter_names if p.startswith(prefix)])
+
+        _jacobians = [
+            ('p_',self.obj_pair,self.obj_pair.evaluate_jacobian(
+                r=r,parameters=get_parameters('p_'),r_cut=rcut)),
+            ('d_',self.obj_density,self.obj_density.evaluate_jacobian(
+                r=r,parameters=get_parameters('d_'),r_cut=rcut))]
+        if not is_eos:
+            _jacobians.append(
+                ('e_',self.obj_embedding,self.obj_embedding.evaluate_jacobian(
+                    rho=rho,parameters=get_parameters('e_'))))
+
+        _rows = OrderedDict([(pn,i) for i,pn in enumerate(self.parameter_names)])
+        _n_grid = sum([J.shape[1] for _,_,J in _jacobians])
+        if is_eos:
+            _n_grid += len(self.symbols)*np.size(rho)
+        jacobian = np.zeros((len(self.parameter_names),_n_grid))
+
+        _offset = 0
+        for prefix,obj,J in _jacobians:
+            _indices = [_rows[prefix + pn] for pn in obj.parameter_names]
+            jacobian[_indices,_offset:_offset + J.shape[1]] = J
+            _offset += J.shape[1]
+
+        if is_eos:
+            _names = [pn for pn in self.parameter_names
+                    if isinstance(parameters[pn],numbers.Real)]
+            _constrained = OrderedDict([(pn,parameters[pn])
+                for pn in self.parameter_names if pn not in _names])
+            x = np.array([parameters[pn] for pn in _names],dtype=float)
+            h = 1e-5*np.maximum(1.,np.abs(x))
+            X = np.vstack([x + np.diag(h),x - np.diag(h)])
+            _,_,embedding = self.evaluate_population(
+                    r=r,
+                    rho=rho,
+                    rcut=rcut,
+                    parameters=X,
+                    parameter_names=_names,
+                    constrained_parameters=_constrained)
+            embedding = embedding.reshape(X.shape[0],-1)
+            jacobian[[_rows[pn] for pn in _names],_offset:] = \
+                    (embedding[:x.size] - embedding[x.size:])/(2*h[:,np.newaxis])
+
+        return jacobian
+
     def _log(self,msg):
         print(msg)
 
@@ -313,14 +778,20 @@ class EamPotential(Potential):
             for p in self.parameters:
                 self.parameters[p] = parameters[p]
 
-        # pair potential parameters are prepended with 'p_'
-        p_params = [p for p in self.parameters if p.startswith('p_')]
-
         # subselect the parameters required for the pair potential
-        _parameters = OrderedDict()
-        for p in p_params:
-            _parameter_name = p.partition('_')[2]
-            _parameters[_parameter_name] = self.parameters[p]
+        _parameters = OrderedDict([(pn,self.parameters[p])
+            for pn,p in self.parameter_plan['pair']['parameter_names']])
+
+        _key = None
+        if self.cache is not None:
+            _key = get_evaluation_key(self.obj_pair,r,_parameters,r_cut=rcut)
+            _pair = self.cache.get(_key)
+            if _pair is not None:
+                self.pair = copy.deepcopy(_pair)
+                # an embedding function from an equation of state reads the
+                # tables of the pair object, so they are restored on a hit
+                self.obj_pair.potential_evaluations = copy.deepcopy(_pair)
+                return
 
         self.obj_pair.evaluate(
                 r=r,
@@ -328,6 +799,8 @@ class EamPotential(Potential):
                 r_cut=rcut)
 
         self.pair = copy.deepcopy(self.obj_pair.potential_evaluations)
+        if _key is not None:
+            self.cache.put(_key,self.pair)
 
     def evaluate_density(self,
             r,
@@ -343,17 +816,24 @@ class EamPotential(Potential):
                 self.parameters[p] = parameters[p]
 
         #<--- grab the parameters of the density function
-        d_params = [p for p in self.parameters if p.startswith('d_')]
-
-        _parameters = OrderedDict()
-        for p in d_params:
-            _parameter_name = p.partition('_')[2]
-            _parameters[_parameter_name] = self.parameters[p]
+        _parameters = OrderedDict([(pn,self.parameters[p])
+            for pn,p in self.parameter_plan['density']['parameter_names']])
+
+        _key = None
+        if self.cache is not None:
+            _key = get_evaluation_key(self.obj_density,r,_parameters,r_cut=rcut)
+            _dens_eval = self.cache.get(_key)
+            if _dens_eval is not None:
+                self.density = copy.deepcopy(_dens_eval)
+                self.obj_density.density_evaluations = copy.deepcopy(_dens_eval)
+                return copy.deepcopy(_dens_eval)
 
         _dens_eval= self.obj_density.evaluate(
                 r=r,
                 parameters=_parameters,
                 r_cut=rcut)
+        if _key is not None:
+            self.cache.put(_key,_dens_eval)
 
         #<--- set the internal attribute
         self.density = copy.deepcopy(_dens_eval)
@@ -374,18 +854,32 @@ class EamPotential(Potential):
                 raise ValueError("r must be a numpy.ndarray")
             self.rho = np.copy(rho)
         #<--- grab the parameters for the embedding function
-        e_params = [p for p in self.parameters if p.startswith('e_')]
-
-        _parameters = OrderedDict()
-        for p in e_params:
-            _parameter_name = p.partition('_')[2]
-            _parameters[_parameter_name] = self.parameters[p]
+        _parameters = OrderedDict([(pn,self.parameters[p])
+            for pn,p in self.parameter_plan['embedding']['parameter_names']])
+
+        #<--- the embedding function from an equation of state depends on all
+        #     the parameters and the radial grid
+        _key = None
+        if self.cache is not None:
+            if isinstance(self.obj_embedding,EamEmbeddingEquationOfState):
+                _key = get_evaluation_key(
+                        self.obj_embedding,
+                        np.concatenate([self.rho,np.ravel(self.r)]),
+                        self.parameters if parameters is None else parameters,
+                        solver=getattr(self.obj_embedding,'solver',None))
+            else:
+                _key = get_evaluation_key(self.obj_embedding,self.rho,_parameters)
+            _embedding = self.cache.get(_key)
+            if _embedding is not None:
+                self.embedding = copy.deepcopy(_embedding)
+                return
 
         #<--- for solving embedding function implicitly from the RoseEquationOfState
         if type(self.obj_embedding) == RoseEquationOfStateEmbeddingFunction:
             if parameters is not None:
                 self.obj_embedding.evaluate(
                     rho=self.rho,
+                    r=self.r,
                     parameters=parameters, # pass in all parameters not just a subset
                     o_pair=self.obj_pair,
                     o_density=self.obj_density)
@@ -404,3 +898,5 @@ class EamPotential(Potential):
 
         #<--- set the internal attribute
         self.embedding = copy.deepcopy(self.obj_embedding.embedding_evaluations)
+        if _key is not None:
+            self.cache.put(_key,self.embedding)
@@ -1,8 +1,55 @@
+import copy
+import numpy as np
+from collections import OrderedDict
 from pypospack.potential import Potential
+from mexm.potential.potential import evaluate_packed_function
+from mexm.potential.potential import evaluate_packed_function_and_derivative
+from mexm.potential.potential import evaluate_packed_function_parameter_gradient
+from mexm.potential.potential import get_jacobian_from_parameter_gradient
 
 class EamDensityFunction(Potential):
+    """base class for the EAM electron density functions
+
+    Density functions which define a vectorized `density_function` along with
+    the ordered names of its arguments in `density_function_parameters` can be
+    evaluated for all symbols in a single broadcasted call using
+    `evaluate_packed`.  Density functions which also define
+    `density_function_and_derivative` can evaluate the analytic derivative
+    drho/dr in the same pass, and those which define
+    `density_function_parameter_gradient` can evaluate the Jacobian with
+    respect to the parameters using `evaluate_jacobian`.
+
+    Attributes:
+        density_function(function): a function f(r, *args) which evaluates the
+            electron density.  The arguments are broadcast against r.
+        density_function_and_derivative(function): a function which returns
+            the electron density and its derivative drho/dr, with the same
+            arguments as density_function.
+        density_function_and_second_derivative(function): a function which
+            returns the electron density and its derivatives drho/dr and
+            d2rho/dr2, with the same arguments as density_function.
+            Optional, it is used for the elastic constants of the lattice
+            sums.
+        density_function_parameter_gradient(function): a function which
+            returns a list of the derivatives of the electron density with
+            respect to each argument of density_function, after r.
+        density_function_parameter_gradient_and_derivative(function): a
+            function which returns the list of
+            density_function_parameter_gradient and the list of their
+            derivatives with respect to r, for the shifted force cutoff.
+            Optional, without it the mixed derivatives are approximated by
+            central differences.
+        density_function_parameters(list of str): the names of the arguments
+            of the density function, in the order they are passed.
+    """
 
     potential_type = 'eam_density_base'
+    density_function = None
+    density_function_and_derivative = None
+    density_function_and_second_derivative = None
+    density_function_parameter_gradient = None
+    density_function_parameter_gradient_and_derivative = None
+    density_function_parameters = None
     def __init__(self,
             symbols,
             potential_type='eamdens'):
@@ -13,5 +60,148 @@ class EamDensityFunction(Potential):
                 is_charge=False)
 
         self.density_evaluations = None
+        self.density_derivative_evaluations = None
+        self._density_function_parameter_keys = None
+
+    @property
+    def density_function_parameter_keys(self):
+        """list of list of str: the parameter names of the density function
+        arguments, with a row for each symbol"""
+        if self._density_function_parameter_keys is None:
+            self._density_function_parameter_keys = [
+                ["{}_{}".format(s, p) for p in type(self).density_function_parameters]
+                for s in self.symbols
+            ]
+        return self._density_function_parameter_keys
+
+    def pack_density_parameters(self, parameters):
+        """pack the density function parameters into a contiguous array
+
+        Args:
+            parameters(OrderedDict): a dictionary of parameter names and values
+        Returns:
+            numpy.ndarray: an array of shape (n_symbols, n_density_function_parameters)
+        """
+        return np.array(
+            [[parameters[k] for k in keys]
+                for keys in self.density_function_parameter_keys],
+            dtype=float
+        )
+
+    def evaluate_packed(self, r, packed_parameters, r_cut=None, out=None):
+        """evaluate the density function for packed parameters
+
+        Args:
+            r(numpy.ndarray or float): interatomic distances
+            packed_parameters(numpy.ndarray): an array of the shape
+                (..., n_symbols, n_density_function_parameters)
+            r_cut(float,optional): the global cutoff.  If provided, a shifted
+                force cutoff is applied.
+            out(numpy.ndarray,optional): the array the result is written
+                into, with the shape of the result.
+        Returns:
+            numpy.ndarray: an array of shape (..., n_symbols) + r.shape
+        """
+        return evaluate_packed_function(
+                function=type(self).density_function,
+                r=r,
+                packed_parameters=packed_parameters,
+                r_cut=r_cut,
+                function_and_derivative=type(self).density_function_and_derivative,
+                out=out)
+
+    def evaluate_packed_and_derivative(self, r, packed_parameters, r_cut=None):
+        """evaluate the density function and drho/dr for packed parameters
+
+        Args:
+            r(numpy.ndarray or float): interatomic distances
+            packed_parameters(numpy.ndarray): an array of the shape
+                (..., n_symbols, n_density_function_parameters)
+            r_cut(float,optional): the global cutoff.  If provided, a shifted
+                force cutoff is applied.
+        Returns:
+            tuple: the values and the derivatives, each an array of shape
+                (..., n_symbols) + r.shape
+        """
+        if type(self).density_function_and_derivative is None:
+            msg = "{} does not implement an analytic derivative"
+            raise NotImplementedError(msg.format(type(self).__name__))
+        return evaluate_packed_function_and_derivative(
+                function_and_derivative=type(self).density_function_and_derivative,
+                r=r,
+                packed_parameters=packed_parameters,
+                r_cut=r_cut)
+
+    def evaluate_derivative(self, r, parameters, r_cut=None):
+        """evaluate the derivative drho/dr of the density functions
+
+        The density functions are evaluated in the same pass, and are
+        available in density_evaluations afterwards.
+
+        Args:
+            r(numpy.ndarray): a numpy array of interatomic distances
+            parameters(OrderedDict): a dictionary of parameter names and values
+            r_cut(float,optional): the global cutoff
+        Returns:
+            OrderedDict: the key is the symbol, the value is drho/dr
+        """
+        _rho, _drhodr = self.evaluate_packed_and_derivative(
+                r=r,
+                packed_parameters=self.pack_density_parameters(parameters),
+                r_cut=r_cut)
+
+        self.density_evaluations = OrderedDict()
+        self.density_derivative_evaluations = OrderedDict()
+        for i,s in enumerate(self.symbols):
+            self.density_evaluations[s] = _rho[i]
+            self.density_derivative_evaluations[s] = _drhodr[i]
+
+        return copy.deepcopy(self.density_derivative_evaluations)
+
+    def evaluate_packed_parameter_gradient(self, r, packed_parameters, r_cut=None):
+        """evaluate the gradient of the density function for packed parameters
+
+        Args:
+            r(numpy.ndarray or float): interatomic distances
+            packed_parameters(numpy.ndarray): an array of the shape
+                (..., n_symbols, n_density_function_parameters)
+            r_cut(float,optional): the global cutoff.  If provided, a shifted
+                force cutoff is applied.
+        Returns:
+            numpy.ndarray: an array of shape
+                (..., n_symbols, n_density_function_parameters) + r.shape
+        """
+        if type(self).density_function_parameter_gradient is None:
+            msg = "{} does not implement an analytic parameter gradient"
+            raise NotImplementedError(msg.format(type(self).__name__))
+        return evaluate_packed_function_parameter_gradient(
+                parameter_gradient=type(self).density_function_parameter_gradient,
+                r=r,
+                packed_parameters=packed_parameters,
+                r_cut=r_cut,
+                parameter_gradient_and_derivative=\
+                        type(self).density_function_parameter_gradient_and_derivative)
+
+    def evaluate_jacobian(self, r, parameters, r_cut=None):
+        """evaluate the Jacobian of the density tables with respect to the
+        parameters
 
-# from pypospack.potentials.eam_dens_exp import ExponentialDensityFunction
+        Args:
+            r(numpy.ndarray): a numpy array of interatomic distances
+            parameters(OrderedDict): a dictionary of parameter names and values
+            r_cut(float,optional): the global cutoff
+        Returns:
+            numpy.ndarray: the Jacobian with the shape (n_parameters,
+                n_symbols*n_r).  The rows are in the order of parameter_names,
+                and the columns are the tables of the symbols concatenated in
+                order.
+        """
+        _r = np.atleast_1d(np.asarray(r, dtype=float))
+        G = self.evaluate_packed_parameter_gradient(
+                r=_r,
+                packed_parameters=self.pack_density_parameters(parameters),
+                r_cut=r_cut)
+        return get_jacobian_from_parameter_gradient(
+                parameter_gradient=G,
+                parameter_keys=self.density_function_parameter_keys,
+                parameter_names=self.parameter_names)
@@ -1,17 +1,32 @@
+import copy
 import inspect
 from collections import OrderedDict
+import numpy as np
 
 from pypospack.potential import EamEmbeddingFunction
+from mexm.crystal.shells import get_shell_table
+
+# the number of neighbor shells of the reference lattice
+N_NEIGHBOR_SHELLS = 6
+
+def get_neighbor_shells(a,lattice_type='fcc'):
+    try:
+        shells = get_shell_table(lattice_type,n_shells=N_NEIGHBOR_SHELLS)
+    except ValueError:
+        m = '{} is not an implmeented lattice_type'.format(lattice_type)
+        raise ValueError(m)
+    n_NN = shells.multiplicities
+    d_NN = [a*d for d in shells.distances]
+    return n_NN,d_NN
 
 def get_omega(a0,lattice_type='fcc'):
-    V=a0**3
-    if lattice_type == 'fcc':
-        n_atoms = 4
-    else:
-        m = '{} is an unsupported lattice type'
+    try:
+        shells = get_shell_table(lattice_type,n_shells=N_NEIGHBOR_SHELLS)
+    except ValueError:
+        m = '{} is an unsupported lattice type'.format(lattice_type)
         raise ValueError(m)
 
-    return V/n_atoms
+    return shells.volume_factor*a0**3
 
 def get_density_at_a(a,
         rho_bar,
@@ -19,16 +34,11 @@ def get_density_at_a(a,
         func_density_param,
         lattice_type='fcc'):
 
-    if lattice_type == 'fcc':
-        n_NN = [12,6,24,12,24,8]
-        d_NN = [a/np.sqrt(2.),a,a*np.sqrt(1.5),a*np.sqrt(2.0),a*np.sqrt(2.5),a*np.sqrt(3.0)]
-    else:
-        m = '{} is not an implmeented lattice_type'.format(lattice_type = 'fcc')
-        raise ValueError(m)
+    n_NN,d_NN = get_neighbor_shells(a,lattice_type)
 
     #calculate total density
     if isinstance(a,np.ndarray):
-        rho = np.zeros(len(r))
+        rho = np.zeros(len(a))
     else:
         rho = 0.
     arg_names = [k for k in inspect.getargspec(func_density)[0] if k != 'r']
@@ -38,7 +48,7 @@ def get_density_at_a(a,
         r = k[1]
         rho += n * func_density(r,*args)
 
-    return rho - rhobar
+    return rho - rho_bar
 
 def get_pair_energy_at_a(a,
         func_pair,
@@ -46,12 +56,7 @@ def get_pair_energy_at_a(a,
         lattice_type='fcc'):
 
 
-    if lattice_type == 'fcc':
-        n_NN = [12,6,24,12,24,8]
-        d_NN = [a/np.sqrt(2.),a,a*np.sqrt(1.5),a*np.sqrt(2.0),a*np.sqrt(2.5),a*np.sqrt(3.0)]
-    else:
-        m = '{} is not an implmeented lattice_type'.format(lattice_type = 'fcc')
-
+    n_NN,d_NN = get_neighbor_shells(a,lattice_type)
     # calculate total energy
     if isinstance(a,np.ndarray):
         phi = np.zeros(len(a))
@@ -77,14 +82,13 @@ class EamEmbeddingEquationOfState(EamEmbeddingFunction):
                  obj_pair_function=None,
                  lattice_type=None,
                  lattice_a0=None,
-                 parameters=None
+                 parameters=None,
+                 potential_type='eam_eos_base'
                  ):
 
-        potential_type_ = 'eam_eos_base'
-
         EamEmbeddingFunction.__init__(self,
                                       symbols=symbols,
-                                      potential_type='eam_eos_base')
+                                      potential_type=potential_type)
 
         # define member variables, and initialize with None
         self.parameters =None
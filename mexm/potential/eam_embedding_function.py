@@ -1,8 +1,48 @@
+import copy
+import numpy as np
+from collections import OrderedDict
 from pypospack.potential import Potential
+from mexm.potential.potential import evaluate_packed_function
+from mexm.potential.potential import evaluate_packed_function_and_derivative
+from mexm.potential.potential import evaluate_packed_function_parameter_gradient
+from mexm.potential.potential import get_jacobian_from_parameter_gradient
 
 class EamEmbeddingFunction(Potential):
+    """base class for the EAM embedding functions
+
+    Embedding functions which define a vectorized `embedding_function` along
+    with the ordered names of its arguments in `embedding_function_parameters`
+    can be evaluated for all symbols in a single broadcasted call using
+    `evaluate_packed`.  Embedding functions which also define
+    `embedding_function_and_derivative` can evaluate the analytic derivative
+    dF/drho in the same pass, and those which define
+    `embedding_function_parameter_gradient` can evaluate the Jacobian with
+    respect to the parameters using `evaluate_jacobian`.
+
+    Attributes:
+        embedding_function(function): a function F(rho, *args) which evaluates
+            the embedding energy.  The arguments are broadcast against rho.
+        embedding_function_and_derivative(function): a function which returns
+            the embedding energy and its derivative dF/drho, with the same
+            arguments as embedding_function.
+        embedding_function_and_second_derivative(function): a function which
+            returns the embedding energy and its derivatives dF/drho and
+            d2F/drho2, with the same arguments as embedding_function.
+            Optional, it is used for the elastic constants of the lattice
+            sums.
+        embedding_function_parameter_gradient(function): a function which
+            returns a list of the derivatives of the embedding energy with
+            respect to each argument of embedding_function, after rho.
+        embedding_function_parameters(list of str): the names of the arguments
+            of the embedding function, in the order they are passed.
+    """
 
     potential_type = 'eam_embed_base'
+    embedding_function = None
+    embedding_function_and_derivative = None
+    embedding_function_and_second_derivative = None
+    embedding_function_parameter_gradient = None
+    embedding_function_parameters = None
     def __init__(self,
             symbols,
             potential_type='eamembed'):
@@ -13,3 +53,133 @@ class EamEmbeddingFunction(Potential):
                 is_charge=False)
 
         self.embedding_evaluations = None
+        self.embedding_derivative_evaluations = None
+        self._embedding_function_parameter_keys = None
+
+    @property
+    def embedding_function_parameter_keys(self):
+        """list of list of str: the parameter names of the embedding function
+        arguments, with a row for each symbol"""
+        if self._embedding_function_parameter_keys is None:
+            self._embedding_function_parameter_keys = [
+                ["{}_{}".format(s, p) for p in type(self).embedding_function_parameters]
+                for s in self.symbols
+            ]
+        return self._embedding_function_parameter_keys
+
+    def pack_embedding_parameters(self, parameters):
+        """pack the embedding function parameters into a contiguous array
+
+        Args:
+            parameters(OrderedDict): a dictionary of parameter names and values
+        Returns:
+            numpy.ndarray: an array of shape (n_symbols, n_embedding_function_parameters)
+        """
+        return np.array(
+            [[parameters[k] for k in keys]
+                for keys in self.embedding_function_parameter_keys],
+            dtype=float
+        )
+
+    def evaluate_packed(self, rho, packed_parameters, out=None):
+        """evaluate the embedding function for packed parameters
+
+        Args:
+            rho(numpy.ndarray or float): electron densities
+            packed_parameters(numpy.ndarray): an array of the shape
+                (..., n_symbols, n_embedding_function_parameters)
+            out(numpy.ndarray,optional): the array the result is written
+                into, with the shape of the result.
+        Returns:
+            numpy.ndarray: an array of shape (..., n_symbols) + rho.shape
+        """
+        return evaluate_packed_function(
+                function=type(self).embedding_function,
+                r=rho,
+                packed_parameters=packed_parameters,
+                out=out)
+
+    def evaluate_packed_and_derivative(self, rho, packed_parameters):
+        """evaluate the embedding function and dF/drho for packed parameters
+
+        Args:
+            rho(numpy.ndarray or float): electron densities
+            packed_parameters(numpy.ndarray): an array of the shape
+                (..., n_symbols, n_embedding_function_parameters)
+        Returns:
+            tuple: the values and the derivatives, each an array of shape
+                (..., n_symbols) + rho.shape
+        """
+        if type(self).embedding_function_and_derivative is None:
+            msg = "{} does not implement an analytic derivative"
+            raise NotImplementedError(msg.format(type(self).__name__))
+        return evaluate_packed_function_and_derivative(
+                function_and_derivative=type(self).embedding_function_and_derivative,
+                r=rho,
+                packed_parameters=packed_parameters)
+
+    def evaluate_derivative(self, rho, parameters):
+        """evaluate the derivative dF/drho of the embedding functions
+
+        The embedding functions are evaluated in the same pass, and are
+        available in embedding_evaluations afterwards.
+
+        Args:
+            rho(numpy.ndarray): a numpy array of electron densities
+            parameters(OrderedDict): a dictionary of parameter names and values
+        Returns:
+            OrderedDict: the key is the symbol, the value is dF/drho
+        """
+        _embedding, _dembedding = self.evaluate_packed_and_derivative(
+                rho=rho,
+                packed_parameters=self.pack_embedding_parameters(parameters))
+
+        self.embedding_evaluations = OrderedDict()
+        self.embedding_derivative_evaluations = OrderedDict()
+        for i,s in enumerate(self.symbols):
+            self.embedding_evaluations[s] = _embedding[i]
+            self.embedding_derivative_evaluations[s] = _dembedding[i]
+
+        return copy.deepcopy(self.embedding_derivative_evaluations)
+
+    def evaluate_packed_parameter_gradient(self, rho, packed_parameters):
+        """evaluate the gradient of the embedding function for packed
+        parameters
+
+        Args:
+            rho(numpy.ndarray or float): electron densities
+            packed_parameters(numpy.ndarray): an array of the shape
+                (..., n_symbols, n_embedding_function_parameters)
+        Returns:
+            numpy.ndarray: an array of shape
+                (..., n_symbols, n_embedding_function_parameters) + rho.shape
+        """
+        if type(self).embedding_function_parameter_gradient is None:
+            msg = "{} does not implement an analytic parameter gradient"
+            raise NotImplementedError(msg.format(type(self).__name__))
+        return evaluate_packed_function_parameter_gradient(
+                parameter_gradient=type(self).embedding_function_parameter_gradient,
+                r=rho,
+                packed_parameters=packed_parameters)
+
+    def evaluate_jacobian(self, rho, parameters):
+        """evaluate the Jacobian of the embedding tables with respect to the
+        parameters
+
+        Args:
+            rho(numpy.ndarray): a numpy array of electron densities
+            parameters(OrderedDict): a dictionary of parameter names and values
+        Returns:
+            numpy.ndarray: the Jacobian with the shape (n_parameters,
+                n_symbols*n_rho).  The rows are in the order of
+                parameter_names, and the columns are the tables of the symbols
+                concatenated in order.
+        """
+        _rho = np.atleast_1d(np.asarray(rho, dtype=float))
+        G = self.evaluate_packed_parameter_gradient(
+                rho=_rho,
+                packed_parameters=self.pack_embedding_parameters(parameters))
+        return get_jacobian_from_parameter_gradient(
+                parameter_gradient=G,
+                parameter_keys=self.embedding_function_parameter_keys,
+                parameter_names=self.parameter_names)
@@ -11,6 +11,28 @@ from pypospack.potential import EamDensityFunction
 def function_exponential_density(r, rho0, beta,r0):
 
     return rho0 * np.exp(-beta*(r-r0))
+
+def function_exponential_density_and_derivative(r, rho0, beta, r0):
+    rho = rho0 * np.exp(-beta*(r-r0))
+    return rho, -beta*rho
+
+def function_exponential_density_and_second_derivative(r, rho0, beta, r0):
+    rho = rho0 * np.exp(-beta*(r-r0))
+    return rho, -beta*rho, beta*beta*rho
+
+def function_exponential_density_parameter_gradient(r, rho0, beta, r0):
+    _exp = np.exp(-beta*(r-r0))
+    rho = rho0 * _exp
+    return [_exp, -(r-r0)*rho, beta*rho]
+
+def function_exponential_density_parameter_gradient_and_derivative(
+        r, rho0, beta, r0):
+    _exp = np.exp(-beta*(r-r0))
+    rho = rho0 * _exp
+    G = [_exp, -(r-r0)*rho, beta*rho]
+    dGdr = [-beta*_exp, (beta*(r-r0) - 1.)*rho, -beta*beta*rho]
+    return G, dGdr
+
 class ExponentialDensityFunction(EamDensityFunction):
     """
     Args:
@@ -30,6 +52,12 @@ class ExponentialDensityFunction(EamDensityFunction):
         r(numpy.ndarray)
     """
 
+    density_function = function_exponential_density
+    density_function_and_derivative = function_exponential_density_and_derivative
+    density_function_and_second_derivative = function_exponential_density_and_second_derivative
+    density_function_parameter_gradient = function_exponential_density_parameter_gradient
+    density_function_parameter_gradient_and_derivative = \
+            function_exponential_density_parameter_gradient_and_derivative
     density_function_parameters = ['rho0','beta','r0']
     def __init__(self,symbols):
         self.density_func_parameters = ['rho0','beta','r0']
@@ -39,14 +67,14 @@ class ExponentialDensityFunction(EamDensityFunction):
                 potential_type='eamdens_exp')
 
 
-    def _init_parameter_names(self):
+    def _initialize_parameter_names(self):
         self.parameter_names = []
         for s in self.symbols:
             for p in self.density_func_parameters:
                 pn = "{}_{}".format(s,p)
                 self.parameter_names.append(pn)
 
-    def _init_parameters(self):
+    def _initialize_parameters(self):
         self.parameters = OrderedDict()
         for p in self.parameter_names:
             self.parameters[p] = None
@@ -96,30 +124,15 @@ class ExponentialDensityFunction(EamDensityFunction):
             if pv is None:
                 return False
 
-        def func_dens_exp(r, rho0, beta,r0):
-            return rho0 * np.exp(-beta*(r-r0))
+        # evaluate the density functions of all symbols at once
+        _rho = self.evaluate_packed(
+                r=r,
+                packed_parameters=self.pack_density_parameters(self.parameters),
+                r_cut=r_cut)
 
         self.density_evaluations = OrderedDict()
-        for s in self.symbols:
-            rho0 = self.parameters['{}_rho0'.format(s)]
-            beta = self.parameters['{}_beta'.format(s)]
-            r0 = self.parameters['{}_r0'.format(s)]
-
-            if r_cut is None:
-                _rho = func_dens_exp(r,rho0,beta,r0)
-                self.density_evaluations[s] = copy.deepcopy(_rho)
-            else:
-                _rho = func_dens_exp(r,rho0,beta,r0)
-                _rcut = np.max(r[np.where(r<r_cut)])
-                _h = r[1] - r[0]
-                _rho_rc = func_dens_exp(_rcut,rho0,beta,r0)
-                _rho_rc_p1 = func_dens_exp(_rcut+_h,rho0,beta,r0)
-                _rho_rc_m1 = func_dens_exp(_rcut-_h,rho0,beta,r0)
-                _drhodr_at_rc = (_rho_rc_p1 - _rho_rc)/_h
-
-                _rho = _rho - _rho_rc -_drhodr_at_rc * (r-_rcut)
-                _rho[np.where(r>=_rcut)] = 0
-                self.density_evaluations[s] = copy.deepcopy(_rho)
+        for i,s in enumerate(self.symbols):
+            self.density_evaluations[s] = _rho[i]
 
         return copy.deepcopy(self.density_evaluations)
 
@@ -45,6 +45,34 @@ def func_mishin2003_density(r,r0,A0,B0,C0,y,gamma):
 
     return density
 
+def func_mishin2003_density_and_derivative(r,r0,A0,B0,C0,y,gamma):
+    z = r - r0
+
+    exp_gamma_z = np.exp(-gamma*z)
+    z_y = z**y
+    density = A0*z_y*exp_gamma_z*(1+B0*exp_gamma_z)+C0
+    ddensitydr = A0*exp_gamma_z*(
+            y*z**(y-1)*(1+B0*exp_gamma_z)
+            - gamma*z_y*(1+2*B0*exp_gamma_z))
+
+    return density, ddensitydr
+
+def func_mishin2003_density_and_second_derivative(r,r0,A0,B0,C0,y,gamma):
+    z = r - r0
+
+    exp_gamma_z = np.exp(-gamma*z)
+    z_y = z**y
+    density = A0*z_y*exp_gamma_z*(1+B0*exp_gamma_z)+C0
+    ddensitydr = A0*exp_gamma_z*(
+            y*z**(y-1)*(1+B0*exp_gamma_z)
+            - gamma*z_y*(1+2*B0*exp_gamma_z))
+    y_z = y/z
+    d2densitydr2 = A0*z_y*exp_gamma_z*(
+            (y_z-gamma)**2 - y_z/z
+            + B0*exp_gamma_z*((y_z-2*gamma)**2 - y_z/z))
+
+    return density, ddensitydr, d2densitydr2
+
 def func_mishin2003_density_w_cutoff(r,r0,A0,B0,C0,y,gamma,rc,h):
 
     rho = func_mishin2003_density(
@@ -77,22 +105,25 @@ class Mishin2003DensityFunction(EamDensityFunction):
         r(numpy.ndarray)
     """
 
-    density_function_parameters = ['A0','B0','C0','y','gamma']
+    potential_type = 'eamdens_mishin2003'
+    density_function = func_mishin2003_density
+    density_function_and_derivative = func_mishin2003_density_and_derivative
+    density_function_and_second_derivative = func_mishin2003_density_and_second_derivative
+    density_function_parameters = ['r0','A0','B0','C0','y','gamma']
     def __init__(self,symbols):
         EamDensityFunction.__init__(
                 self,
                 symbols=symbols,
-                potential_type='eamdens_mishin2003')
-        self.density_function = function_mishin2003_density
+                potential_type=Mishin2003DensityFunction.potential_type)
 
-    def _init_parameter_names(self):
+    def _initialize_parameter_names(self):
         self.parameter_names = []
         for s in self.symbols:
             for p in self.density_function_parameters:
                 pn = "{}_{}".format(s,p)
                 self.parameter_names.append(pn)
 
-    def _init_parameters(self):
+    def _initialize_parameters(self):
         self.parameters = OrderedDict()
         for p in self.parameter_names:
             self.parameters[p] = None
@@ -111,17 +142,15 @@ class Mishin2003DensityFunction(EamDensityFunction):
                 of the embedding function for each atom.  The key is a
                 string containing the ISO chemical symbol of the element.
                 The value should be a numeric value.
-            r_cut(float): This would be the density cutoff.  However the
-                embedding energy is increasing with increasing electron
-                density so the a r_cut has no physical meaning.  Any
-                variable passed into r_cut will be ignored.
+            r_cut(float): the global cutoff.  If provided, a shifted force
+                cutoff is applied.
         """
         assert isinstance(r,np.ndarray) or isinstance(r,float)
-        assert isinstance(parameters,OrderedDict)
+        assert isinstance(parameters,dict)
         assert type(r_cut) in [int,float,type(None)]
         # attribute.parameters[p] <--- arg:parameters[p]
         for s in self.symbols:
-            for p in self.density_func_parameters:
+            for p in self.density_function_parameters:
                 pn = "{}_{}".format(s,p)
                 try:
                     self.parameters[pn] = parameters[pn]
@@ -133,8 +162,8 @@ class Mishin2003DensityFunction(EamDensityFunction):
                     print('arg -> parameters:')
                     for k,v in parameters.items():
                         print("    {}:{}".format(k,v))
-                    print('attr -> density_func_parameters')
-                    for v in self.density_func_parameters:
+                    print('attr -> density_function_parameters')
+                    for v in self.density_function_parameters:
                         print("    {}".format(v))
                     raise
         # cannot evaluate because
@@ -142,38 +171,15 @@ class Mishin2003DensityFunction(EamDensityFunction):
             if pv is None:
                 return False
 
-        self.density_evaluations = OrderedDict()
+        # evaluate the density functions of all symbols at once
+        _rho = self.evaluate_packed(
+                r=r,
+                packed_parameters=self.pack_density_parameters(self.parameters),
+                r_cut=r_cut)
 
-        # each species has a unique density function
-        for s in self.symbols:
-            A0 = self.parameters['{}_A0'.format(s)]
-            B0 = self.parameters['{}_B0'.format(s)]
-            C0 = self.parameters['{}_C0'.format(s)]
-            y = self.parameters['{}_y'.format(s)]
-            gamma = self.parameters['{}_gamma'.format(s)]
-
-            parameters = [A0,B0,C0,y,gamma]
-            if r_cut is None:
-                density = self.density_function(r,*parameters)
-                self.density_evaluations[s] = copy.deepcopy(density)
-            else:
-                density = self.density_function(r,rho0,beta,r0)
-                rcut = np.max(r[np.where(r<r_cut)])
-                rcut_step = r[1] - r[0]
-                density_rc = self.density_function(rcut,*parameters)
-                density_rc_p1 = self.density_function(
-                    rcut + rcut_step,
-                    *parameters
-                )
-                density_rc_m1 = self.density_function(
-                    rcut-rcut_step,
-                    *parameters
-                )
-                drhodr_at_rc = (density_rc_p1 - density_rc)/rcut_step
-
-                density = density - density_rc -drhodr_at_rc * (r-rcut)
-                density[np.where(r>=_rcut)] = 0
-                self.density_evaluations[s] = copy.deepcopy(_rho)
+        self.density_evaluations = OrderedDict()
+        for i,s in enumerate(self.symbols):
+            self.density_evaluations[s] = _rho[i]
 
         return copy.deepcopy(self.density_evaluations)
 
@@ -10,33 +10,76 @@ from pypospack.potential import EamDensityFunction
 from pypospack.potential import determine_symbol_pairs
 
 def func_cutoff_mishin2004(r, rc, hc, h0):
-    if isinstance(r,float):
-        if r > rc:
-            ind_rc = 0
-        else:
-            ind_rc = 1
-
-        xrc = (r-rc)/hc
-        psi_c = (xrc**4)/(1+xrc**4)
-
-        x0 = r/h0
-        psi_0 = (x0**4)/(1+x0**4)
-        
-        psi = psi_c * psi_0 * ind_rc
-    else:
-        ind_rc = np.ones(r.size)
-        ind_rc[r > rc] = 0
-        
-        xrc = (r-rc)/hc
-        psi_c = (xrc**4)/(1+xrc**4)
-
-        x0 = r/h0
-        psi_0 = (x0**4)/(1+x0**4)
-        
-        psi = psi_c * psi_0 * ind_rc
+    ind_rc = np.where(r > rc, 0., 1.)
+
+    xrc = (r-rc)/hc
+    psi_c = (xrc**4)/(1+xrc**4)
+
+    x0 = r/h0
+    psi_0 = (x0**4)/(1+x0**4)
+
+    psi = psi_c * psi_0 * ind_rc
 
     return psi
 
+def func_cutoff_mishin2004_and_derivative(r, rc, hc, h0):
+    ind_rc = np.where(r > rc, 0., 1.)
+
+    xrc = (r-rc)/hc
+    xrc4 = xrc**4
+    psi_c = xrc4/(1+xrc4)
+    dpsi_c = 4*xrc**3/(1+xrc4)**2/hc
+
+    x0 = r/h0
+    x04 = x0**4
+    psi_0 = x04/(1+x04)
+    dpsi_0 = 4*x0**3/(1+x04)**2/h0
+
+    psi = psi_c * psi_0 * ind_rc
+    dpsi = (dpsi_c * psi_0 + psi_c * dpsi_0) * ind_rc
+
+    return psi, dpsi
+
+def func_cutoff_mishin2004_and_second_derivative(r, rc, hc, h0):
+    ind_rc = np.where(r > rc, 0., 1.)
+
+    xrc = (r-rc)/hc
+    xrc4 = xrc**4
+    psi_c = xrc4/(1+xrc4)
+    dpsi_c = 4*xrc**3/(1+xrc4)**2/hc
+    d2psi_c = (12*xrc**2 - 20*xrc**6)/(1+xrc4)**3/hc**2
+
+    x0 = r/h0
+    x04 = x0**4
+    psi_0 = x04/(1+x04)
+    dpsi_0 = 4*x0**3/(1+x04)**2/h0
+    d2psi_0 = (12*x0**2 - 20*x0**6)/(1+x04)**3/h0**2
+
+    psi = psi_c * psi_0 * ind_rc
+    dpsi = (dpsi_c * psi_0 + psi_c * dpsi_0) * ind_rc
+    d2psi = (d2psi_c * psi_0 + 2 * dpsi_c * dpsi_0 + psi_c * d2psi_0) * ind_rc
+
+    return psi, dpsi, d2psi
+
+def func_cutoff_mishin2004_parameter_gradient(r, rc, hc, h0):
+    """the derivatives of the cutoff function with respect to rc, hc, and h0"""
+    ind_rc = np.where(r > rc, 0., 1.)
+
+    xrc = (r-rc)/hc
+    xrc4 = xrc**4
+    psi_c = xrc4/(1+xrc4)
+    dpsi_c = 4*xrc**3/(1+xrc4)**2
+
+    x0 = r/h0
+    x04 = x0**4
+    psi_0 = x04/(1+x04)
+    dpsi_0 = 4*x0**3/(1+x04)**2
+
+    return [
+        -ind_rc*psi_0*dpsi_c/hc,
+        -ind_rc*psi_0*dpsi_c*xrc/hc,
+        -ind_rc*psi_c*dpsi_0*x0/h0]
+
 def func_density_mishin2004(r,r0,A0,B0,C0,y,gamma):
     z = r - r0
 
@@ -44,12 +87,82 @@ def func_density_mishin2004(r,r0,A0,B0,C0,y,gamma):
 
     return phi
 
+def func_density_mishin2004_and_derivative(r,r0,A0,B0,C0,y,gamma):
+    z = r - r0
+
+    exp_gamma_z = np.exp(-gamma*z)
+    z_y = z**y
+    phi = A0 * z_y * exp_gamma_z * (1 + B0 * exp_gamma_z) + C0
+    dphidr = A0 * exp_gamma_z * (
+            y * z**(y-1) * (1 + B0 * exp_gamma_z)
+            - gamma * z_y * (1 + 2 * B0 * exp_gamma_z))
+
+    return phi, dphidr
+
+def func_density_mishin2004_and_second_derivative(r,r0,A0,B0,C0,y,gamma):
+    z = r - r0
+
+    exp_gamma_z = np.exp(-gamma*z)
+    z_y = z**y
+    phi = A0 * z_y * exp_gamma_z * (1 + B0 * exp_gamma_z) + C0
+    dphidr = A0 * exp_gamma_z * (
+            y * z**(y-1) * (1 + B0 * exp_gamma_z)
+            - gamma * z_y * (1 + 2 * B0 * exp_gamma_z))
+    # z**y*exp(-k*gamma*z) has the second derivative
+    # z**y*exp(-k*gamma*z)*((y/z - k*gamma)**2 - y/z**2)
+    y_z = y/z
+    d2phidr2 = A0 * z_y * exp_gamma_z * (
+            (y_z - gamma)**2 - y_z/z
+            + B0 * exp_gamma_z * ((y_z - 2 * gamma)**2 - y_z/z))
+
+    return phi, dphidr, d2phidr2
+
 def func_density_mishin2004_w_cutoff(r, r0, A0, B0, C0, y, gamma, rc, hc, h0):
     phi = func_density_mishin2004(r, r0, A0, B0, C0, y, gamma)
     psi = func_cutoff_mishin2004(r, rc, hc, h0)
 
     return psi*phi
 
+def func_density_mishin2004_w_cutoff_and_derivative(
+        r, r0, A0, B0, C0, y, gamma, rc, hc, h0):
+    phi, dphi = func_density_mishin2004_and_derivative(r, r0, A0, B0, C0, y, gamma)
+    psi, dpsi = func_cutoff_mishin2004_and_derivative(r, rc, hc, h0)
+
+    return psi*phi, dpsi*phi + psi*dphi
+
+def func_density_mishin2004_w_cutoff_and_second_derivative(
+        r, r0, A0, B0, C0, y, gamma, rc, hc, h0):
+    phi, dphi, d2phi = func_density_mishin2004_and_second_derivative(
+            r, r0, A0, B0, C0, y, gamma)
+    psi, dpsi, d2psi = func_cutoff_mishin2004_and_second_derivative(r, rc, hc, h0)
+
+    return psi*phi, dpsi*phi + psi*dphi, d2psi*phi + 2*dpsi*dphi + psi*d2phi
+
+def func_density_mishin2004_parameter_gradient(r,r0,A0,B0,C0,y,gamma):
+    """the derivatives with respect to r0, A0, B0, C0, y, and gamma"""
+    z = r - r0
+
+    exp_gamma_z = np.exp(-gamma*z)
+    z_y = z**y
+    _f = exp_gamma_z * (1 + B0 * exp_gamma_z)
+    return [
+        -A0 * exp_gamma_z * (
+            y * z**(y-1) * (1 + B0 * exp_gamma_z)
+            - gamma * z_y * (1 + 2 * B0 * exp_gamma_z)),
+        z_y * _f,
+        A0 * z_y * exp_gamma_z**2,
+        np.ones_like(z),
+        A0 * z_y * np.log(z) * _f,
+        -A0 * z_y * z * exp_gamma_z * (1 + 2 * B0 * exp_gamma_z)]
+
+def func_density_mishin2004_w_cutoff_parameter_gradient(
+        r, r0, A0, B0, C0, y, gamma, rc, hc, h0):
+    phi = func_density_mishin2004(r, r0, A0, B0, C0, y, gamma)
+    psi = func_cutoff_mishin2004(r, rc, hc, h0)
+    dphi = func_density_mishin2004_parameter_gradient(r, r0, A0, B0, C0, y, gamma)
+    dpsi = func_cutoff_mishin2004_parameter_gradient(r, rc, hc, h0)
+    return [psi*g for g in dphi] + [g*phi for g in dpsi]
+
 class Mishin2004DensityFunction(EamDensityFunction):
     """
     Args:
@@ -67,10 +180,16 @@ class Mishin2004DensityFunction(EamDensityFunction):
         d_r(float)
         r_max(float)
         r(numpy.ndarray)
+
+    The cutoff function is part of the functional form, through rc, hc and
+    h0, so the packed evaluations ignore r_cut.
     """
 
     potential_type = 'eamdens_mishin2004'
     density_function = func_density_mishin2004_w_cutoff
+    density_function_and_derivative = func_density_mishin2004_w_cutoff_and_derivative
+    density_function_and_second_derivative = func_density_mishin2004_w_cutoff_and_second_derivative
+    density_function_parameter_gradient = func_density_mishin2004_w_cutoff_parameter_gradient
     density_function_parameters = ['r0', 'A0','B0','C0','y','gamma', 'rc', 'hc', 'h0']
     def __init__(self,symbols):
         EamDensityFunction.__init__(
@@ -78,18 +197,33 @@ class Mishin2004DensityFunction(EamDensityFunction):
                 symbols=symbols,
                 potential_type=Mishin2004DensityFunction.potential_type)
 
-    def _init_parameter_names(self):
+    def _initialize_parameter_names(self):
         self.parameter_names = []
         for s in self.symbols:
             for p in self.density_function_parameters:
                 pn = "{}_{}".format(s,p)
                 self.parameter_names.append(pn)
 
-    def _init_parameters(self):
+    def _initialize_parameters(self):
         self.parameters = OrderedDict()
         for p in self.parameter_names:
             self.parameters[p] = None
 
+    # this method overrides the parent method
+    def evaluate_packed(self, r, packed_parameters, r_cut=None, out=None):
+        return EamDensityFunction.evaluate_packed(
+                self, r, packed_parameters, out=out)
+
+    # this method overrides the parent method
+    def evaluate_packed_and_derivative(self, r, packed_parameters, r_cut=None):
+        return EamDensityFunction.evaluate_packed_and_derivative(
+                self, r, packed_parameters)
+
+    # this method overrides the parent method
+    def evaluate_packed_parameter_gradient(self, r, packed_parameters, r_cut=None):
+        return EamDensityFunction.evaluate_packed_parameter_gradient(
+                self, r, packed_parameters)
+
     def evaluate(self,r,parameters,r_cut=None):
         """
 
@@ -137,10 +271,12 @@ class Mishin2004DensityFunction(EamDensityFunction):
 
         self.density_evaluations = OrderedDict()
 
-        # each species has a unique density function
-        for s in self.symbols:
-            params = [self.parameters['{}_{}'.format(s,k)] for k in self.density_function_parameters]
-            self.density_evaluations[s] = Mishin2004DensityFunction.density_function(r,*params)
+        # each species has a unique density function, evaluated all at once
+        _rho = self.evaluate_packed(
+                r=r,
+                packed_parameters=self.pack_density_parameters(self.parameters))
+        for i,s in enumerate(self.symbols):
+            self.density_evaluations[s] = _rho[i]
 
         return copy.deepcopy(self.density_evaluations)
 
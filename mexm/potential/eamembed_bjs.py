@@ -8,6 +8,37 @@ import numpy as np
 from collections import OrderedDict
 from pypospack.potential import EamEmbeddingFunction
 
+def func_embedding_bjs(rho, F0, gamma, F1):
+    with np.errstate(all='raise'):
+        return F0*(1-gamma*np.log(rho))*rho**gamma + F1*gamma
+
+def func_embedding_bjs_and_derivative(rho, F0, gamma, F1):
+    with np.errstate(all='raise'):
+        log_rho = np.log(rho)
+        rho_gamma = rho**gamma
+        F = F0*(1-gamma*log_rho)*rho_gamma + F1*gamma
+        dFdrho = -F0*gamma**2*log_rho*rho_gamma/rho
+        return F, dFdrho
+
+def func_embedding_bjs_and_second_derivative(rho, F0, gamma, F1):
+    with np.errstate(all='raise'):
+        log_rho = np.log(rho)
+        rho_gamma = rho**gamma
+        F = F0*(1-gamma*log_rho)*rho_gamma + F1*gamma
+        dFdrho = -F0*gamma**2*log_rho*rho_gamma/rho
+        d2Fdrho2 = -F0*gamma**2*(1 + (gamma-1)*log_rho)*rho_gamma/rho**2
+        return F, dFdrho, d2Fdrho2
+
+def func_embedding_bjs_parameter_gradient(rho, F0, gamma, F1):
+    """the derivatives with respect to F0, gamma, and F1"""
+    with np.errstate(all='raise'):
+        log_rho = np.log(rho)
+        rho_gamma = rho**gamma
+        return [
+            (1-gamma*log_rho)*rho_gamma,
+            -F0*gamma*rho_gamma*log_rho**2 + F1,
+            gamma]
+
 class BjsEmbeddingFunction(EamEmbeddingFunction):
     """
     Args:
@@ -27,20 +58,25 @@ class BjsEmbeddingFunction(EamEmbeddingFunction):
         rho(numpy.ndarray)
     """
     potential_type = 'eam_embed_bjs'
+    embedding_function = func_embedding_bjs
+    embedding_function_and_derivative = func_embedding_bjs_and_derivative
+    embedding_function_and_second_derivative = func_embedding_bjs_and_second_derivative
+    embedding_function_parameter_gradient = func_embedding_bjs_parameter_gradient
+    embedding_function_parameters = ['F0','gamma','F1']
     def __init__(self,symbols):
         self.embedding_func_parameters = ['F0','gamma','F1']
         EamEmbeddingFunction.__init__(self,
                 symbols=symbols,
                 potential_type = 'eam_embed_bjs')
 
-    def _init_parameter_names(self):
+    def _initialize_parameter_names(self):
         self.parameter_names = []
         for s in self.symbols:
             for p in self.embedding_func_parameters:
                 pn = "{}_{}".format(s,p)
                 self.parameter_names.append(pn)
 
-    def _init_parameters(self):
+    def _initialize_parameters(self):
         self.parameters = OrderedDict()
         for p in self.parameter_names:
             self.parameters[p] = None
@@ -70,16 +106,13 @@ class BjsEmbeddingFunction(EamEmbeddingFunction):
                 pn = "{}_{}".format(s,p)
                 self.parameters[pn] = parameters[pn]
 
-        self.embedding_evaluations = OrderedDict()
-        for s in self.symbols:
+        # evaluate the embedding functions of all symbols at once
+        _embedding = self.evaluate_packed(
+                rho=rho,
+                packed_parameters=self.pack_embedding_parameters(self.parameters))
 
-            # get parameters
-            F0 = self.parameters['{}_F0'.format(s)]
-            gamma = self.parameters['{}_gamma'.format(s)]
-            F1 = self.parameters['{}_F1'.format(s)]
-
-            with np.errstate(all='raise'):
-                self.embedding_evaluations[s] \
-                    = F0*(1-gamma*np.log(rho))*rho**gamma + F1*gamma
+        self.embedding_evaluations = OrderedDict()
+        for i,s in enumerate(self.symbols):
+            self.embedding_evaluations[s] = _embedding[i]
 
         return copy.deepcopy(self.embedding_evaluations)
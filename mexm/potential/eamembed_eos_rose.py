@@ -4,6 +4,8 @@ import numpy as np
 from pypospack.potential import EamEmbeddingEquationOfState
 from scipy.optimize import brentq
 from pypospack.exceptions import PypospackBadEamEosError
+from mexm.potential.tabulated_function import TabulatedFunction
+from mexm.crystal.shells import get_shell_table
 
 
 
@@ -36,12 +38,24 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
         lattice_a0(str,optional): the lattice parameter of the lattice type
             referenced in lattice_type.
         parameters(OrderedDict,optional): the parameters to be evaluated
+    Attributes:
+        n_neighbor_shells(int): the number of neighbor shells of the
+            reference lattice which are summed over
+        solver(str): the method used to invert the electron density of the
+            reference lattice.  'brentq' solves for the lattice parameter of
+            each point of the rho grid with Brent's method[2].  'interp'
+            tabulates rho(a) on a dense grid of lattice parameters, inverts the
+            table for the whole rho grid with monotone interpolation, and
+            polishes the lattice parameters with Newton iterations.  Both
+            solvers agree to within a_tol in the lattice parameter.
     Notes:
         [1] Foiles, Baskes, and Daw., Phys. Rev. B., 1986
         [2] Brent, R. P., Algorithms for Minimization Without Derivatives. Englewood Cliffs, NJ: Prentice-Hall, 1973. Ch. 3-4
     """
     potential_type = 'eam_embed_rose'
     potential_parameter_names = ['ecoh','latticetype','B','a0']
+    solvers = ['brentq','interp']
+    n_neighbor_shells = 6
     def __init__(self,
             symbols,
             obj_density_function=None,
@@ -66,6 +80,7 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
         self.obj_pair_fn = None
         self.lattice_type = None
         self.lattice_a0 = None
+        self.solver = 'brentq'
 
         # process arguments
         if parameters is not None:
@@ -83,7 +98,7 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
         if lattice_a0 is not None:
             self.lattice_a0 = lattice_a0
 
-    def _init_parameter_names(self):
+    def _initialize_parameter_names(self):
         PARAMETER_NAME_FORMAT = "{s}_{pn}"
         PARAMETER_NAMES_EA_SYMBOL = ['ecoh','latticetype','B','a0']
 
@@ -94,7 +109,7 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
                 pn_string = PARAMETER_NAME_FORMAT.format(s=s,pn=pn)
                 self.parameter_names.append(pn_string)
 
-    def _init_parameters(self):
+    def _initialize_parameters(self):
         self.parameters = OrderedDict()
         for p in self.parameter_names:
             self.parameters[p] = None
@@ -129,6 +144,164 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
         if latt_type is 'fcc':
             pass
 
+    def get_neighbor_shells(self,lattice_type):
+        """neighbor shells of the reference lattice
+
+        The shells are the shared tables of mexm.crystal.get_shell_table.
+
+        Args:
+            lattice_type(str): the type of the reference lattice
+        Returns:
+            (tuple): the number of neighbors in each shell, and the distance
+                of each shell in units of the lattice parameter, as numpy
+                arrays
+        """
+        try:
+            _shells = get_shell_table(lattice_type,n_shells=self.n_neighbor_shells)
+        except ValueError:
+            msg_err = '{} is an unsupported lattice type'.format(lattice_type)
+            raise ValueError(msg_err)
+        n_NN = _shells.multiplicities.astype(float)
+        d_NN = _shells.distances
+        return n_NN,d_NN
+
+    def get_atomic_volume(self,a,lattice_type):
+        """the volume per atom of the reference lattice
+
+        Args:
+            a(float): the lattice parameter
+            lattice_type(str): the type of the reference lattice
+        Returns:
+            float: the volume per atom, in the units of a cubed
+        """
+        _shells = get_shell_table(lattice_type,n_shells=self.n_neighbor_shells)
+        return _shells.volume_factor*a**3
+
+    def evaluate_embedding_interp(self,
+            s,
+            rho,
+            r,
+            parameters,
+            lattice_type,
+            a0,
+            e_coh,
+            B,
+            a_min=0.,
+            a_max=10000.,
+            a_tol=1.e-8,
+            n_a=10000,
+            max_iterations=50):
+        """evaluate the embedding function for the whole rho grid at once
+
+        The density of the reference lattice, rho(a), is tabulated on a dense
+        grid of lattice parameters.  Since rho(a) is monotonically decreasing,
+        the table is inverted for every point of the rho grid with numpy.interp
+        and the resulting lattice parameters are polished with Newton
+        iterations bracketed by the table.  The Rose energy and the pair
+        energy are then computed as array operations.
+
+        Args:
+            s(str): the symbol
+            rho(numpy.ndarray): the electron density grid
+            r(numpy.ndarray): the uniform radial grid on which the density
+                and the pair potential have been evaluated
+            parameters(OrderedDict): all the parameters of the potential
+            lattice_type(str): the type of the reference lattice
+            a0(float): the equilibrium lattice parameter
+            e_coh(float): the cohesive energy, in eV
+            B(float): the bulk modulus, in GPa
+            a_min(float): the smallest lattice parameter considered
+            a_max(float): the largest lattice parameter considered
+            a_tol(float): the tolerance of the lattice parameter
+            n_a(int): the number of points in the lattice parameter table
+            max_iterations(int): the maximum number of Newton iterations
+        Returns:
+            numpy.ndarray: the embedding energy on the rho grid
+        Raises:
+            PypospackBadEamEosError: if rho(a) is not monotonic, or if a
+                density in the rho grid cannot be reached by the lattice.
+        """
+        if not isinstance(r,np.ndarray):
+            msg_err = "the interp solver requires the radial grid, r"
+            raise ValueError(msg_err)
+
+        n_NN,d_NN = self.get_neighbor_shells(lattice_type)
+
+        # the linear interpolants of the tables, which are identical to
+        # numpy.interp, with the intervals found by index arithmetic
+        _density = TabulatedFunction.from_grid(
+                grid=r,
+                values=self.obj_density_fn.density_evaluations[s],
+                interpolation='linear')
+        _pair = TabulatedFunction.from_grid(
+                grid=r,
+                values=self.obj_pair_fn.potential_evaluations['{}{}'.format(s,s)],
+                interpolation='linear')
+
+        def rhofxn(a):
+            return _density.evaluate(np.multiply.outer(a,d_NN)).dot(n_NN)
+
+        def drhofxn(a):
+            _slope = _density.evaluate_derivative(np.multiply.outer(a,d_NN))
+            return (_slope*d_NN).dot(n_NN)
+
+        # rho(a) only varies while a shell is within the radial grid, outside
+        # of this range the interpolants clamp to the end values.  The end
+        # points a_min and a_max are included so flat regions resolve like
+        # brentq.
+        _a_lo = max(a_min,r[0]/d_NN.max())
+        _a_hi = min(a_max,r[-1]/d_NN.min())
+        _a = np.concatenate(([a_min],np.linspace(_a_lo,_a_hi,n_a),[a_max]))
+        _rho = rhofxn(_a)
+
+        if np.any(np.diff(_rho) > 0):
+            raise PypospackBadEamEosError(
+                    "rho(a) is not monotonic for {}".format(s),
+                    parameters=parameters)
+        if np.any(rho < _rho[-1]) or np.any(rho > _rho[0]):
+            raise PypospackBadEamEosError(
+                    "rho is not bracketed by the lattice for {}".format(s),
+                    parameters=parameters)
+
+        # invert the table, numpy.interp requires increasing x-coordinates
+        _rho_inc = _rho[::-1]
+        _a_dec = _a[::-1]
+        a = np.interp(rho,_rho_inc,_a_dec)
+
+        # brentq returns the end points of the bracket when they are roots
+        a[rho == _rho[-1]] = a_max
+        a[rho == _rho[0]] = a_min
+
+        # the root is bracketed by neighboring points of the table
+        j = np.clip(np.searchsorted(_rho_inc,rho,side='left'),1,len(_a)-1)
+        a_lower = _a_dec[j]
+        a_upper = _a_dec[j-1]
+
+        for i in range(max_iterations):
+            f = rhofxn(a) - rho
+            df = drhofxn(a)
+            _is_flat = (df == 0.)
+            step = np.where(_is_flat,0.,f/np.where(_is_flat,1.,df))
+            a_new = np.clip(a-step,a_lower,a_upper)
+            _is_converged = np.all(np.abs(a_new-a) <= a_tol)
+            a = a_new
+            if _is_converged:
+                break
+
+        # here we determine astar as in equation 5 in Foiles. Phys Rev B (33) 12. Jun 1986
+        # 160.22 is the conversion with _esub in eV, _B in GPa, and _omega in Angs^3
+        _esub = abs(e_coh)
+        _omega = self.get_atomic_volume(a0,lattice_type)
+        astar = ((a/a0)-1)/((_esub/(9*B*_omega) * 160.22)**0.5)
+
+        # now determine the rose energy as in Equation 4
+        _e_rose = -_esub*(1+astar)*np.exp(-astar)
+
+        # the pair energy, divided by 2 to remove double counting
+        _e_pot = 0.5*_pair.evaluate(np.multiply.outer(a,d_NN)).dot(n_NN)
+
+        return _e_rose - _e_pot
+
     def evaluate(self,
             rho,
             r,
@@ -137,7 +310,14 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
             o_density=None,
             a_min=0.,
             a_max=10000.,
-            a_tol=1.e-8):
+            a_tol=1.e-8,
+            solver=None):
+
+        if solver is None:
+            solver = self.solver
+        if solver not in self.solvers:
+            msg_err = "solver must be one of {}".format(",".join(self.solvers))
+            raise ValueError(msg_err)
 
         # need to add error handling code here
         if o_pair is not None:
@@ -172,34 +352,22 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
                     rho_fxn_parameters[k[2:]] = v
 
             lattice_type = args[0]['e_{}_latticetype'.format(_s)]
-            if lattice_type == 'fcc':
-                n_NN = [12,6,24,12,24,8]
-                d_NN = [a/np.sqrt(2.),a,a*np.sqrt(1.5),a*np.sqrt(2.0),a*np.sqrt(2.5),a*np.sqrt(3.0)]
-
-            _rho = 0.
+            n_NN,d_NN = self.get_neighbor_shells(lattice_type)
+            d_NN = a*d_NN
 
+            # all of the shells are evaluated at once
             if isinstance(r,np.ndarray) and isinstance(rho,np.ndarray):
-                _density = self.obj_density_fn.density_evaluations[s]
-
-                for i in range(len(n_NN)):
-                    _rho += n_NN[i] * np.interp(
-                            d_NN[i],
-                            r,
-                            self.obj_density_fn.density_evaluations[s]
-                        )
+                _rho = n_NN.dot(np.interp(
+                        d_NN,
+                        r,
+                        self.obj_density_fn.density_evaluations[s]
+                    ))
 
             else:
-                for i in range(len(n_NN)):
-                    if len(rho_fxn_parameters) == 0:
-                        _rho += n_NN[i] * self.obj_density_fn.evaluate(
-                                d_NN[i],
-                                rho_fxn_parameters
-                            )[s]
-                    else:
-                        _rho += n_NN[i] * self.obj_density_fn.evaluate(
-                                d_NN[i],
-                                rho_fxn_parameters
-                            )[s]
+                _rho = n_NN.dot(self.obj_density_fn.evaluate(
+                        d_NN,
+                        rho_fxn_parameters
+                    )[s])
 
             return _rho-_rho_bar
 
@@ -211,33 +379,22 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
                     pair_fxn_parameters[k[2:]] = v
 
             lattice_type = args['e_{}_latticetype'.format(s)]
-            if lattice_type == 'fcc':
-                n_NN = [12,6,24,12,24,8]
-                d_NN = [a/np.sqrt(2.),a,a*np.sqrt(1.5),a*np.sqrt(2.0),a*np.sqrt(2.5),a*np.sqrt(3.0)]
-
-            _pot = 0.
+            n_NN,d_NN = self.get_neighbor_shells(lattice_type)
+            d_NN = a*d_NN
 
+            # all of the shells are evaluated at once
             if isinstance(r_vector,np.ndarray):
                 _pair_key = '{}{}'.format(s,s)
-                for i in range(len(n_NN)):
-                    _pot += n_NN[i] * np.interp(
-                            d_NN[i],
-                            r_vector,
-                            self.obj_pair_fn.potential_evaluations[_pair_key]
-                        )
+                _pot = n_NN.dot(np.interp(
+                        d_NN,
+                        r_vector,
+                        self.obj_pair_fn.potential_evaluations[_pair_key]
+                    ))
             else:
-                print('notinterp')
-                for i in range(len(n_NN)):
-                    if len(pair_fxn_parameters) == 0:
-                        _pot += n_NN[i] * self.obj_pair_fn.evaluate(
-                                d_NN[i],
-                                pair_fxn_parameters
-                            )['{}{}'.format(s,s)]
-                    else:
-                        _pot += n_NN[i] * self.obj_pair_fn.evaluate(
-                                d_NN[i],
-                                pair_fxn_parameters
-                            )['{}{}'.format(s,s)]
+                _pot = n_NN.dot(self.obj_pair_fn.evaluate(
+                        d_NN,
+                        pair_fxn_parameters
+                    )['{}{}'.format(s,s)])
 
             # ?? remove double counting of pairs
             _pot = 0.5 * _pot
@@ -267,9 +424,21 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
             except KeyError as e:
                 _a0 = parameters['{}_a0'.format(s)]
 
-            if _latticetype == 'fcc':
-                _r0 = _a0/np.sqrt(2.)
-                _n_atoms_per_unit_cell = 4
+            if solver == 'interp':
+                embed_vals = self.evaluate_embedding_interp(
+                        s=s,
+                        rho=rho,
+                        r=r,
+                        parameters=parameters,
+                        lattice_type=_latticetype,
+                        a0=_a0,
+                        e_coh=_ecoh,
+                        B=_B,
+                        a_min=a_min,
+                        a_max=a_max,
+                        a_tol=a_tol)
+                self.embedding_evaluations[s] = embed_vals
+                continue
 
             for k,rhostar in enumerate(rho):
 
@@ -289,7 +458,7 @@ class RoseEquationOfStateEmbeddingFunction(EamEmbeddingEquationOfState):
                 # here we determine astar as in equation 5 in Foiles. Phys Rev B (33) 12. Jun 1986
                 # 160.22 is the conversion with _esub in eV, _B in GPa, and _omega in Angs^3
                 _esub = abs(_ecoh)
-                _omega = (_a0**3)/_n_atoms_per_unit_cell
+                _omega = self.get_atomic_volume(_a0,_latticetype)
                 astar = ((a/_a0)-1)/((_esub/(9*_B*_omega) * 160.22)**0.5)
 
                 # now determine the rose energy as in Equation 4
@@ -8,6 +8,28 @@ import numpy as np
 from collections import OrderedDict
 from pypospack.potential import EamEmbeddingFunction
 
+def func_embedding_fs(rho, F0):
+    with np.errstate(all='raise'):
+        return F0*(rho**0.5)
+
+def func_embedding_fs_and_derivative(rho, F0):
+    with np.errstate(all='raise'):
+        sqrt_rho = rho**0.5
+    # the derivative diverges at rho = 0
+    with np.errstate(divide='ignore'):
+        return F0*sqrt_rho, 0.5*F0/sqrt_rho
+
+def func_embedding_fs_and_second_derivative(rho, F0):
+    with np.errstate(all='raise'):
+        sqrt_rho = rho**0.5
+    # the derivatives diverge at rho = 0
+    with np.errstate(divide='ignore'):
+        return F0*sqrt_rho, 0.5*F0/sqrt_rho, -0.25*F0/(rho*sqrt_rho)
+
+def func_embedding_fs_parameter_gradient(rho, F0):
+    with np.errstate(all='raise'):
+        return [rho**0.5]
+
 class FinnisSinclairEmbeddingFunction(EamEmbeddingFunction):
     """
     Args:
@@ -26,20 +48,25 @@ class FinnisSinclairEmbeddingFunction(EamEmbeddingFunction):
         rho_max(float)
         rho(numpy.ndarray)
     """    
+    embedding_function = func_embedding_fs
+    embedding_function_and_derivative = func_embedding_fs_and_derivative
+    embedding_function_and_second_derivative = func_embedding_fs_and_second_derivative
+    embedding_function_parameter_gradient = func_embedding_fs_parameter_gradient
+    embedding_function_parameters = ['F0']
     def __init__(self,symbols):
         self.embedding_func_parameters = ['F0']
         EamEmbeddingFunction.__init__(self,
                 symbols=symbols,
                 potential_type='eam_embed_fs')
 
-    def _init_parameter_names(self):
+    def _initialize_parameter_names(self):
         self.parameter_names = []
         for s in self.symbols:
             for p in self.embedding_func_parameters:
                 pn = "{}_{}".format(s,p)
                 self.parameter_names.append(pn)
     
-    def _init_parameters(self):
+    def _initialize_parameters(self):
         self.parameters = OrderedDict()
         for p in self.parameter_names:
             self.parameters[p] = None
@@ -67,10 +94,14 @@ class FinnisSinclairEmbeddingFunction(EamEmbeddingFunction):
                 pn = "{}_{}".format(s,p)
                 self.parameters[pn] = parameters[pn]
 
+        # evaluate the embedding functions of all symbols at once
+        _embedding = self.evaluate_packed(
+                rho=rho,
+                packed_parameters=self.pack_embedding_parameters(self.parameters))
+
         self.embedding_evaluations = OrderedDict()
-        for s in self.symbols:
-            F0 = self.parameters['{}_F0'.format(s)]
-            with np.errstate(all='raise'):
-                self.embedding_evaluations[s] = F0*(rho**0.5)
+        for i,s in enumerate(self.symbols):
+            self.embedding_evaluations[s] = _embedding[i]
+
         return copy.deepcopy(self.embedding_evaluations)
 
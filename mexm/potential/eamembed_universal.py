@@ -8,6 +8,46 @@ import numpy as np
 from collections import OrderedDict
 from pypospack.potential import EamEmbeddingFunction
 
+def func_embedding_universal(rho, F0, p, q, F1, rho0):
+    return F0*(
+                 (q/(q-p))*((rho/rho0)**p)
+                -(p/(q-p))*((rho/rho0)**q)
+           )+F1*(rho/rho0)
+
+def func_embedding_universal_and_derivative(rho, F0, p, q, F1, rho0):
+    x = rho/rho0
+    F = F0*((q/(q-p))*x**p - (p/(q-p))*x**q) + F1*x
+    # the derivative diverges at rho = 0 when p < 1
+    with np.errstate(divide='ignore'):
+        dFdrho = (F0*(p*q/(q-p))*(x**(p-1) - x**(q-1)) + F1)/rho0
+    return F, dFdrho
+
+def func_embedding_universal_and_second_derivative(rho, F0, p, q, F1, rho0):
+    x = rho/rho0
+    F = F0*((q/(q-p))*x**p - (p/(q-p))*x**q) + F1*x
+    # the derivatives diverge at rho = 0 when p < 2
+    with np.errstate(divide='ignore'):
+        dFdrho = (F0*(p*q/(q-p))*(x**(p-1) - x**(q-1)) + F1)/rho0
+        d2Fdrho2 = F0*(p*q/(q-p))*((p-1)*x**(p-2) - (q-1)*x**(q-2))/rho0**2
+    return F, dFdrho, d2Fdrho2
+
+def func_embedding_universal_parameter_gradient(rho, F0, p, q, F1, rho0):
+    """the derivatives with respect to F0, p, q, F1, and rho0"""
+    x = rho/rho0
+    x_p = x**p
+    x_q = x**q
+    # x**p*log(x) goes to zero at x = 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_x = np.log(x)
+        x_p_log_x = np.where(x > 0, x_p*log_x, 0.)
+        x_q_log_x = np.where(x > 0, x_q*log_x, 0.)
+    return [
+        (q/(q-p))*x_p - (p/(q-p))*x_q,
+        F0*(q/(q-p)**2*(x_p - x_q) + (q/(q-p))*x_p_log_x),
+        F0*(p/(q-p)**2*(x_q - x_p) - (p/(q-p))*x_q_log_x),
+        x,
+        -(F0*(p*q/(q-p))*(x_p - x_q) + F1*x)/rho0]
+
 class UniversalEmbeddingFunction(EamEmbeddingFunction):
     """
     Args:
@@ -26,20 +66,25 @@ class UniversalEmbeddingFunction(EamEmbeddingFunction):
         rho_max(float)
         rho(numpy.ndarray)
     """    
+    embedding_function = func_embedding_universal
+    embedding_function_and_derivative = func_embedding_universal_and_derivative
+    embedding_function_and_second_derivative = func_embedding_universal_and_second_derivative
+    embedding_function_parameter_gradient = func_embedding_universal_parameter_gradient
+    embedding_function_parameters = ['F0','p','q','F1','rho0']
     def __init__(self,symbols):
         self.embedding_func_parameters = ['F0','p','q','F1','rho0']
         EamEmbeddingFunction.__init__(self,
                 symbols=symbols,
                 potential_type='eam_embed_univeral')
 
-    def _init_parameter_names(self):
+    def _initialize_parameter_names(self):
         self.parameter_names = []
         for s in self.symbols:
             for p in self.embedding_func_parameters:
                 pn = "{}_{}".format(s,p)
                 self.parameter_names.append(pn)
     
-    def _init_parameters(self):
+    def _initialize_parameters(self):
         self.parameters = OrderedDict()
         for p in self.parameter_names:
             self.parameters[p] = None
@@ -67,17 +112,14 @@ class UniversalEmbeddingFunction(EamEmbeddingFunction):
                 pn = "{}_{}".format(s,p)
                 self.parameters[pn] = parameters[pn]
 
+        # evaluate the embedding functions of all symbols at once
+        _embedding = self.evaluate_packed(
+                rho=rho,
+                packed_parameters=self.pack_embedding_parameters(self.parameters))
+
         self.embedding_evaluations = OrderedDict()
-        for s in self.symbols:
-            F0 = self.parameters['{}_F0'.format(s)]
-            q = self.parameters['{}_q'.format(s)]
-            p = self.parameters['{}_p'.format(s)]
-            F1 = self.parameters['{}_F1'.format(s)]
-            rho0 = self.parameters['{}_rho0'.format(s)]
-            self.embedding_evaluations[s] \
-                    = F0*(
-                             (q/(q-p))*((rho/rho0)**p)
-                            -(p/(q-p))*((rho/rho0)**q)
-                      )+F1*(rho/rho0)
+        for i,s in enumerate(self.symbols):
+            self.embedding_evaluations[s] = _embedding[i]
+
         return copy.deepcopy(self.embedding_evaluations)
 
@@ -0,0 +1,179 @@
+"""a memoization cache for the evaluation of potentials
+
+In sampling based fitting, the same subset of parameters recurs, e.g. the
+pair parameters are held fixed while the embedding parameters are varied.
+The tables of each stage of the evaluation can be cached by a canonical hash
+of the potential class, the symbols, the grid and the parameters of the stage,
+so that unchanged components are not recomputed.
+"""
+import copy
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_CACHE_MAX_BYTES = 64*1024*1024
+
+def get_evaluation_key(potential, grid, parameters, **kwargs):
+    """a canonical hash of an evaluation
+
+    Args:
+        potential(mexm.potential.Potential): the potential being evaluated
+        grid(numpy.ndarray): the points the potential is evaluated at
+        parameters(dict or numpy.ndarray): the parameters the evaluation
+            depends on.  The order of the parameters of a dict does not
+            change the hash.
+        kwargs: additional arguments of the evaluation, e.g. the cutoff
+    Returns:
+        str: the hex digest of the hash
+    """
+    _grid = np.ascontiguousarray(grid, dtype=float)
+
+    def get_value_repr(v):
+        try:
+            return float(v).hex()
+        except (TypeError, ValueError):
+            return repr(v)
+
+    _hash = hashlib.sha1()
+    _hash.update(repr((
+        type(potential).__module__,
+        type(potential).__name__,
+        tuple(potential.symbols),
+        _grid.shape)).encode())
+    _hash.update(_grid.tobytes())
+    if isinstance(parameters, np.ndarray):
+        _hash.update(np.ascontiguousarray(parameters, dtype=float).tobytes())
+    else:
+        _hash.update(repr(sorted(
+            [(k, get_value_repr(v)) for k, v in parameters.items()])).encode())
+    _hash.update(repr(sorted(
+        [(k, get_value_repr(v)) for k, v in kwargs.items()])).encode())
+    return _hash.hexdigest()
+
+def get_nbytes(value):
+    """the number of bytes of the arrays in a cached value"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum([get_nbytes(v) for v in value.values()])
+    if isinstance(value, (list, tuple)):
+        return sum([get_nbytes(v) for v in value])
+    return 0
+
+class EvaluationCache(object):
+    """a bounded least recently used (LRU) cache of potential evaluations
+
+    The cached values are copies, with the arrays set to read only, so they
+    are not changed by the caller.  A value which is not referenced
+    elsewhere can be cached without a copy, see put.  When the memory used
+    by the cached arrays exceeds max_bytes, the least recently used values
+    are evicted.
+
+    Args:
+        max_bytes(int,optional): the eviction budget in bytes.  Default is
+            DEFAULT_CACHE_MAX_BYTES.
+
+    Attributes:
+        n_hits(int): the number of lookups which were found
+        n_misses(int): the number of lookups which were not found
+        n_evictions(int): the number of values which have been evicted
+    """
+    def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        assert max_bytes >= 0
+        self._max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self._nbytes = 0
+
+        self.n_hits = 0
+        self.n_misses = 0
+        self.n_evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def max_bytes(self):
+        """int: the eviction budget in bytes"""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        assert max_bytes >= 0
+        self._max_bytes = int(max_bytes)
+        self._evict()
+
+    @property
+    def nbytes(self):
+        """int: the number of bytes used by the cached arrays"""
+        return self._nbytes
+
+    def get(self, key):
+        """lookup a cached value
+
+        Args:
+            key(str): the key of the value, from get_evaluation_key
+        Returns:
+            the cached value, or None if the key is not in the cache
+        """
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            self.n_misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.n_hits += 1
+        return value
+
+    def put(self, key, value, copy_value=True):
+        """cache a copy of a value
+
+        Values larger than max_bytes are not cached.
+
+        Args:
+            key(str): the key of the value, from get_evaluation_key
+            value: a numpy.ndarray, or a dict or list of numpy.ndarray
+            copy_value(bool,optional): if False, the value itself is cached
+                and its arrays are set to read only, so the caller must not
+                write to them through other references.  Default is True.
+        """
+        if key in self._entries:
+            self._remove(key)
+
+        if copy_value:
+            value = copy.deepcopy(value)
+        nbytes = get_nbytes(value)
+        if nbytes > self._max_bytes:
+            return
+        self._set_read_only(value)
+
+        self._entries[key] = (value, nbytes)
+        self._nbytes += nbytes
+        self._evict()
+
+    def clear(self):
+        """remove all the cached values, the counters are not reset"""
+        self._entries = OrderedDict()
+        self._nbytes = 0
+
+    def _remove(self, key):
+        _, nbytes = self._entries.pop(key)
+        self._nbytes -= nbytes
+
+    def _evict(self):
+        while self._nbytes > self._max_bytes:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.n_evictions += 1
+
+    def _set_read_only(self, value):
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        elif isinstance(value, dict):
+            for v in value.values():
+                self._set_read_only(v)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                self._set_read_only(v)
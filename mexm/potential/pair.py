@@ -1,18 +1,75 @@
 from collections import OrderedDict
+import numpy as np
 
 from mexm.potential import MEXM_1BODY_FORMAT
 from mexm.potential import MEXM_2BODY_FORMAT
 
 from mexm.potential import Potential
 from mexm.potential import get_symbol_pairs
+from mexm.potential.potential import evaluate_packed_function
+from mexm.potential.potential import evaluate_packed_function_and_derivative
+from mexm.potential.potential import evaluate_packed_function_parameter_gradient
+from mexm.potential.potential import get_jacobian_from_parameter_gradient
 
 class PairPotential(Potential):
+    """base class for pair potentials
+
+    Pair potentials which define a vectorized `pair_function` along with the
+    ordered names of its arguments in `pair_function_parameters` can be
+    evaluated for all symbol pairs in a single broadcasted call using
+    `evaluate_batch`.  Pair potentials which also define
+    `pair_function_and_derivative` can evaluate the analytic derivative dV/dr
+    in the same pass using `evaluate_batch_and_derivative`, and those which
+    define `pair_function_parameter_gradient` can evaluate the Jacobian with
+    respect to the parameters using `evaluate_jacobian`.
+
+    Attributes:
+        pair_function(function): a function f(r, *args) which evaluates the
+            pair potential.  The arguments are broadcast against r.
+        pair_function_and_derivative(function): a function which returns the
+            pair potential and its derivative dV/dr, with the same arguments
+            as pair_function.
+        pair_function_and_second_derivative(function): a function which
+            returns the pair potential and its derivatives dV/dr and
+            d2V/dr2, with the same arguments as pair_function.  Optional,
+            it is used for the elastic constants of the lattice sums.
+        pair_function_parameter_gradient(function): a function which returns
+            a list of the derivatives of the pair potential with respect to
+            each argument of pair_function, after r.
+        pair_function_parameter_gradient_and_derivative(function): a
+            function which returns the list of pair_function_parameter_gradient
+            and the list of their derivatives with respect to r, for the
+            shifted force cutoff.  Optional, without it the mixed derivatives
+            are approximated by central differences.
+        pair_function_parameters(list of str): the names of the arguments of
+            the pair function, in the order they are passed.
+        pair_evaluations(numpy.ndarray): the result of the last batched
+            evaluation with the shape (n_pairs, n_r).
+        potential_evaluations(OrderedDict): the key is the symbol pair, the
+            value is a view into the corresponding row of pair_evaluations.
+        pair_derivative_evaluations(numpy.ndarray): the derivatives from the
+            last batched evaluation with the shape (n_pairs, n_r).
+        derivative_evaluations(OrderedDict): the key is the symbol pair, the
+            value is a view into the corresponding row of
+            pair_derivative_evaluations.
+    """
+    pair_function = None
+    pair_function_and_derivative = None
+    pair_function_and_second_derivative = None
+    pair_function_parameter_gradient = None
+    pair_function_parameter_gradient_and_derivative = None
+    pair_function_parameters = None
+
     def __init__(self,symbols,potential_type,is_charge):
         Potential.__init__(self,
                 symbols=symbols,
                 potential_type=potential_type,
                 is_charge=is_charge)
         self.pair_evaluations = None
+        self.potential_evaluations = None
+        self.pair_derivative_evaluations = None
+        self.derivative_evaluations = None
+        self._pair_function_parameter_keys = None
         #self.pair_potential_parameters = None
         #self.symbol_pairs = None
 
@@ -33,7 +90,7 @@ class PairPotential(Potential):
             for p in self.pair_potential_parameters:
                 parameter_name = MEXM_2BODY_FORMAT.format(
                     s1=sp[0],
-                    s2=sp[2],
+                    s2=sp[1],
                     p=p
                 )
                 self.parameter_names.append(parameter_name)
@@ -44,3 +101,214 @@ class PairPotential(Potential):
         self.parameters = OrderedDict()
         for v in self.parameter_names:
             self.parameters[v] = None
+
+    def _initialize_pair_function_parameter_keys(self):
+        """build the parameter names of the pair function for each pair
+
+        The keys are only built once, so that the parameter names do not need
+        to be formatted on every evaluation.
+        """
+        self._pair_function_parameter_keys = []
+        for sp in self.symbol_pairs:
+            self._pair_function_parameter_keys.append([
+                MEXM_2BODY_FORMAT.format(s1=sp[0], s2=sp[1], p=p)
+                for p in type(self).pair_function_parameters
+            ])
+
+    @property
+    def pair_function_parameter_keys(self):
+        """list of list of str: the parameter names of the pair function
+        arguments, with a row for each symbol pair"""
+        if self._pair_function_parameter_keys is None:
+            self._initialize_pair_function_parameter_keys()
+        return self._pair_function_parameter_keys
+
+    @property
+    def pair_names(self):
+        """list of str: the name of each symbol pair, e.g. 'NiAl'"""
+        return ["".join(sp) for sp in self.symbol_pairs]
+
+    def pack_pair_parameters(self, parameters):
+        """pack the pair function parameters into a contiguous array
+
+        Args:
+            parameters(OrderedDict): a dictionary of parameter names and values
+        Returns:
+            numpy.ndarray: an array of shape (n_pairs, n_pair_function_parameters),
+                where the rows are in the order of symbol_pairs and the columns
+                are in the order of pair_function_parameters.
+        """
+        return np.array(
+            [[parameters[k] for k in keys]
+                for keys in self.pair_function_parameter_keys],
+            dtype=float
+        )
+
+    def evaluate_packed(self, r, packed_parameters, r_cut=None, out=None):
+        """evaluate the pair function for packed parameters
+
+        The parameters may have additional leading dimensions, which are
+        preserved in the result.
+
+        Args:
+            r(numpy.ndarray or float): interatomic distances
+            packed_parameters(numpy.ndarray): an array of shape
+                (..., n_pairs, n_pair_function_parameters)
+            r_cut(float,optional): the global cutoff.  If provided, a shifted
+                force cutoff is applied at the largest grid point less than
+                r_cut.
+            out(numpy.ndarray,optional): the array the result is written
+                into, with the shape of the result.
+        Returns:
+            numpy.ndarray: an array of shape (..., n_pairs) + r.shape
+        """
+        return evaluate_packed_function(
+                function=type(self).pair_function,
+                r=r,
+                packed_parameters=packed_parameters,
+                r_cut=r_cut,
+                function_and_derivative=type(self).pair_function_and_derivative,
+                out=out)
+
+    def evaluate_packed_and_derivative(self, r, packed_parameters, r_cut=None):
+        """evaluate the pair function and dV/dr for packed parameters
+
+        Args:
+            r(numpy.ndarray or float): interatomic distances
+            packed_parameters(numpy.ndarray): an array of shape
+                (..., n_pairs, n_pair_function_parameters)
+            r_cut(float,optional): the global cutoff.  If provided, a shifted
+                force cutoff is applied at the largest grid point less than
+                r_cut.
+        Returns:
+            tuple: the values and the derivatives, each an array of shape
+                (..., n_pairs) + r.shape
+        """
+        if type(self).pair_function_and_derivative is None:
+            msg = "{} does not implement an analytic derivative"
+            raise NotImplementedError(msg.format(type(self).__name__))
+        return evaluate_packed_function_and_derivative(
+                function_and_derivative=type(self).pair_function_and_derivative,
+                r=r,
+                packed_parameters=packed_parameters,
+                r_cut=r_cut)
+
+    def evaluate_batch(self, r, parameters, r_cut=None):
+        """evaluate all symbol pairs in a single broadcasted call
+
+        Args:
+            r(numpy.ndarray): a numpy array of interatomic distances
+            parameters(OrderedDict): a dictionary of parameter names and values
+            r_cut(float,optional): the global cutoff for the potential
+        Returns:
+            (tuple): the first element is a numpy.ndarray of shape
+                (n_pairs, n_r).  The second element is an OrderedDict where
+                the key is the pair name and the value is a view into the
+                row of the first element, rather than a copy.
+        """
+        packed_parameters = self.pack_pair_parameters(parameters)
+        self.pair_evaluations = self.evaluate_packed(
+                r=r,
+                packed_parameters=packed_parameters,
+                r_cut=r_cut)
+
+        self.potential_evaluations = OrderedDict()
+        for i, pair_name in enumerate(self.pair_names):
+            self.potential_evaluations[pair_name] = self.pair_evaluations[i]
+
+        return self.pair_evaluations, self.potential_evaluations
+
+    def evaluate_batch_and_derivative(self, r, parameters, r_cut=None):
+        """evaluate all symbol pairs and their derivatives in a single call
+
+        Args:
+            r(numpy.ndarray): a numpy array of interatomic distances
+            parameters(OrderedDict): a dictionary of parameter names and values
+            r_cut(float,optional): the global cutoff for the potential
+        Returns:
+            (tuple): numpy.ndarrays of the values and of the derivatives
+                dV/dr, each with the shape (n_pairs, n_r).  The rows are also
+                available as views in potential_evaluations and
+                derivative_evaluations.
+        """
+        packed_parameters = self.pack_pair_parameters(parameters)
+        self.pair_evaluations, self.pair_derivative_evaluations = \
+                self.evaluate_packed_and_derivative(
+                        r=r,
+                        packed_parameters=packed_parameters,
+                        r_cut=r_cut)
+
+        self.potential_evaluations = OrderedDict()
+        self.derivative_evaluations = OrderedDict()
+        for i, pair_name in enumerate(self.pair_names):
+            self.potential_evaluations[pair_name] = self.pair_evaluations[i]
+            self.derivative_evaluations[pair_name] = \
+                    self.pair_derivative_evaluations[i]
+
+        return self.pair_evaluations, self.pair_derivative_evaluations
+
+    def evaluate_derivative(self, r, parameters, r_cut=None):
+        """evaluate the derivative dV/dr of the pair potential
+
+        The pair potential is evaluated in the same pass, and is available in
+        potential_evaluations afterwards.
+
+        Args:
+            r(numpy.ndarray): a numpy array of interatomic distances
+            parameters(OrderedDict): a dictionary of parameter names and values
+            r_cut(float,optional): the global cutoff for the potential
+        Returns:
+            OrderedDict: the key is the pair name, the value is dV/dr
+        """
+        self.evaluate_batch_and_derivative(
+                r=r, parameters=parameters, r_cut=r_cut)
+        return self.derivative_evaluations
+
+    def evaluate_packed_parameter_gradient(self, r, packed_parameters, r_cut=None):
+        """evaluate the gradient of the pair function for packed parameters
+
+        Args:
+            r(numpy.ndarray or float): interatomic distances
+            packed_parameters(numpy.ndarray): an array of shape
+                (..., n_pairs, n_pair_function_parameters)
+            r_cut(float,optional): the global cutoff.  If provided, a shifted
+                force cutoff is applied at the largest grid point less than
+                r_cut.
+        Returns:
+            numpy.ndarray: an array of shape
+                (..., n_pairs, n_pair_function_parameters) + r.shape
+        """
+        if type(self).pair_function_parameter_gradient is None:
+            msg = "{} does not implement an analytic parameter gradient"
+            raise NotImplementedError(msg.format(type(self).__name__))
+        return evaluate_packed_function_parameter_gradient(
+                parameter_gradient=type(self).pair_function_parameter_gradient,
+                r=r,
+                packed_parameters=packed_parameters,
+                r_cut=r_cut,
+                parameter_gradient_and_derivative=\
+                        type(self).pair_function_parameter_gradient_and_derivative)
+
+    def evaluate_jacobian(self, r, parameters, r_cut=None):
+        """evaluate the Jacobian of the pair tables with respect to the parameters
+
+        Args:
+            r(numpy.ndarray): a numpy array of interatomic distances
+            parameters(OrderedDict): a dictionary of parameter names and values
+            r_cut(float,optional): the global cutoff for the potential
+        Returns:
+            numpy.ndarray: the Jacobian with the shape (n_parameters,
+                n_pairs*n_r).  The rows are in the order of parameter_names,
+                and the columns are the tables of the pairs concatenated in
+                the order of symbol_pairs.  Parameters which are not
+                arguments of the pair function have rows of zeros.
+        """
+        _r = np.atleast_1d(np.asarray(r, dtype=float))
+        G = self.evaluate_packed_parameter_gradient(
+                r=_r,
+                packed_parameters=self.pack_pair_parameters(parameters),
+                r_cut=r_cut)
+        return get_jacobian_from_parameter_gradient(
+                parameter_gradient=G,
+                parameter_keys=self.pair_function_parameter_keys,
+                parameter_names=self.parameter_names)
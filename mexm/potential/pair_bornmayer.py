@@ -9,6 +9,29 @@ from collections import OrderedDict
 from pypospack.potential import PairPotential
 from pypospack.potential import determine_symbol_pairs
 
+def func_bornmayer(r,phi0,gamma,r0):
+    return phi0*np.exp(-gamma*(r-r0))
+
+def func_bornmayer_and_derivative(r,phi0,gamma,r0):
+    phi = phi0*np.exp(-gamma*(r-r0))
+    return phi, -gamma*phi
+
+def func_bornmayer_and_second_derivative(r,phi0,gamma,r0):
+    phi = phi0*np.exp(-gamma*(r-r0))
+    return phi, -gamma*phi, gamma*gamma*phi
+
+def func_bornmayer_parameter_gradient(r,phi0,gamma,r0):
+    _exp = np.exp(-gamma*(r-r0))
+    phi = phi0*_exp
+    return [_exp, -(r-r0)*phi, gamma*phi]
+
+def func_bornmayer_parameter_gradient_and_derivative(r,phi0,gamma,r0):
+    _exp = np.exp(-gamma*(r-r0))
+    phi = phi0*_exp
+    G = [_exp, -(r-r0)*phi, gamma*phi]
+    dGdr = [-gamma*_exp, (gamma*(r-r0) - 1.)*phi, -gamma*gamma*phi]
+    return G, dGdr
+
 class BornMayerPotential(PairPotential):
     """ Implementation of a Born-Mayer repulsive potential
 
@@ -20,6 +43,13 @@ class BornMayerPotential(PairPotential):
     """
     potential_type = 'bornmayer'
     pair_potential_parameters = ['phi0','gamma','r0']
+    pair_function = func_bornmayer
+    pair_function_and_derivative = func_bornmayer_and_derivative
+    pair_function_and_second_derivative = func_bornmayer_and_second_derivative
+    pair_function_parameter_gradient = func_bornmayer_parameter_gradient
+    pair_function_parameter_gradient_and_derivative = \
+            func_bornmayer_parameter_gradient_and_derivative
+    pair_function_parameters = ['phi0','gamma','r0']
     def __init__(self,symbols):
         self.pair_potential_parameters = self.pair_potential_parameters
         PairPotential.__init__(self,
@@ -52,39 +82,10 @@ class BornMayerPotential(PairPotential):
         for k in self.parameters:
             self.parameters[k] = parameters[k]
 
-        # <----------------------------evaluate the parameters now
-        self.potential_evaluations = OrderedDict()
-        for s in self.symbol_pairs:
-            # <------------------------extract the parameters for symbol pair
-            phi0 = self.parameters['{}{}_phi0'.format(s[0],s[1])]
-            gamma  = self.parameters['{}{}_gamma'.format(s[0],s[1])]
-            r0 = self.parameters['{}{}_r0'.format(s[0],s[1])]
-            # <------------------------embedded morse function
-            def func_bornmayer(r,phi0,gamma,r0):
-                return phi0*np.exp(-gamma*(r-r0))
-
-            _pair_name = '{}{}'.format(s[0],s[1])
-            if r_cut is None:
-                _V = func_bornmayer(r,phi0,gamma,r0)
-                self.potential_evaluations[_pair_name] = copy.deepcopy(_V)
-            else:
-                _rcut = np.max(r[np.where(r < r_cut)])
-                _h = r[1] - r[0]
-                _V_rc = func_bornmayer(_rcut,phi0,gamma,r0)
-                _V_rc_p1 = func_bornmayer(_rcut+_h,phi0,gamma,r0)
-                _V_rc_m1 = func_bornmayer(_rcut-_h,phi0,gamma,r0)
-                _dVdr_at_rc = (_V_rc_p1-_V_rc)/_h
-
-                # <----- calculate morse with cutoff
-                _V = func_bornmayer(r,phi0,gamma,r0)
-                # <----- apply the cutoff
-                _V= _V - _V_rc - _dVdr_at_rc * (r-_rcut)
-                # <----- V=0, where r <= _rcut
-                _V[np.where(r>=_rcut)] = 0.0
-        
-                self.potential_evaluations[_pair_name] = copy.deepcopy(_V)
-        
-        return copy.deepcopy(self.potential_evaluations)
+        # <----------------------------evaluate all the pairs at once
+        self.evaluate_batch(r=r,parameters=self.parameters,r_cut=r_cut)
+
+        return self.potential_evaluations
     
     # same as parent class
     def lammps_potential_section_to_string(self):
@@ -12,12 +12,42 @@ from mexm.potential import get_symbol_pairs
 from mexm.potential import MEXM_1BODY_FORMAT
 from mexm.potential import MEXM_2BODY_FORMAT
 
+def func_buckingham(r, A, rho, C):
+    return A*np.exp(-r/rho) - C/r**6
+
+def func_buckingham_and_derivative(r, A, rho, C):
+    _exp = A*np.exp(-r/rho)
+    _r6 = C/r**6
+    return _exp - _r6, -_exp/rho + 6*_r6/r
+
+def func_buckingham_and_second_derivative(r, A, rho, C):
+    _exp = A*np.exp(-r/rho)
+    _r6 = C/r**6
+    return _exp - _r6, -_exp/rho + 6*_r6/r, _exp/rho**2 - 42*_r6/r**2
+
+def func_buckingham_parameter_gradient(r, A, rho, C):
+    _exp = np.exp(-r/rho)
+    return [_exp, A*_exp*r/rho**2, -1./r**6]
+
+def func_buckingham_parameter_gradient_and_derivative(r, A, rho, C):
+    _exp = np.exp(-r/rho)
+    G = [_exp, A*_exp*r/rho**2, -1./r**6]
+    dGdr = [-_exp/rho, A*_exp*(1./rho**2 - r/rho**3), 6./r**7]
+    return G, dGdr
+
 class BuckinghamPotential(PairPotential):
     global_parameters = ['cutoff']
     one_body_parameters = ['chrg', 'cutoff']
     two_body_parameters = ['A', 'rho', 'C', 'cutoff']
     potential_type = 'buckingham'
     is_charge = True
+    pair_function = func_buckingham
+    pair_function_and_derivative = func_buckingham_and_derivative
+    pair_function_and_second_derivative = func_buckingham_and_second_derivative
+    pair_function_parameter_gradient = func_buckingham_parameter_gradient
+    pair_function_parameter_gradient_and_derivative = \
+            func_buckingham_parameter_gradient_and_derivative
+    pair_function_parameters = ['A', 'rho', 'C']
 
     """ Implementation of the Buckingham Potential
 
@@ -83,8 +113,25 @@ class BuckinghamPotential(PairPotential):
         for v in self.parameter_names:
             self.parameters[v] = None
 
-    def evaluate(self,r,parameters,r_cut=False):
-        raise NotImplementedError
+    def evaluate(self,r,parameters,r_cut=None):
+        """evaluate the short range part of the buckingham potential
+
+        The Coulombic interaction between the charges is not included, since
+        it is long range and is handled separately by the simulation codes.
+
+        Args:
+            r(numpy.ndarray): a numpy array of interatomic distances
+            parameters(OrderedDict): a dictionary of parameter names and values
+            r_cut(float,optional): the global cutoff for the potential
+        Returns:
+            OrderedDict: the key is the pair name, the value is the evaluation
+        """
+        for k in self.parameters:
+            self.parameters[k] = parameters[k]
+
+        self.evaluate_batch(r=r, parameters=self.parameters, r_cut=r_cut)
+
+        return self.potential_evaluations
 
     # same as parent class
     def lammps_potential_section_set_masses_to_string(self, symbols=None):
@@ -6,45 +6,24 @@ from collections import OrderedDict
 import numpy as np
 from pypospack.potential import PairPotential
 from pypospack.potential import determine_symbol_pairs
+from mexm.potential.eamdens_mishin2004 import func_cutoff_mishin2004
+from mexm.potential.eamdens_mishin2004 import func_cutoff_mishin2004_and_derivative
+from mexm.potential.eamdens_mishin2004 import func_cutoff_mishin2004_and_second_derivative
+from mexm.potential.eamdens_mishin2004 import func_cutoff_mishin2004_parameter_gradient
 __author__ = "Eugene J. Ragasa"
 __copyright__ = "Copyright (C) 2019"
 __license__ = "Simplified BSD License"
 __version__ = 20171102
 
-def func_cutoff_mishin2004(r, rc, hc, h0):
-    ind_rc = np.ones(r.size)
-    ind_rc[r > rc] = 0
-    
-    xrc = (r-rc)/hc
-    psi_c = (xrc**4)/(1+xrc**4)
-
-    x0 = r/h0
-    psi_0 = (x0**4)/(1+x0**4)
-    
-    psi = psi_c * psi_0 * ind_rc
-
-    return psi
-
 def func_pair_generalized_lj(r,b1,b2,r1,V0,delta):
     """
     Reference:
         Y. Mishin.  Acta Materialia. 52 (2004) 1451-1467
     """
 
-    assert isinstance(r, np.ndarray) or isinstance(r, float)
-    assert isinstance(b1, float)
-    assert isinstance(b2, float)
-    assert isinstance(r1, float)
-    assert isinstance(V0, float)
-    assert isinstance(delta, float)
-
     z = r/r1
-    assert type(z) is type(r)
-
     phi = (V0/(b2-b1))*((b2/(z**b1))-(b1/(z**b2)))+delta
 
-    assert type(phi) is type(r)
-
     #print((5*"{:+10.4e} ").format(b1,b2,r1,V0,delta))
     #if isinstance(phi,np.ndarray):
     #    if np.isfinite(phi).any():
@@ -58,15 +37,80 @@ def func_pair_generalized_lj_w_cutoff(r, b1, b2, r1, V0, delta, rc, hc, h0):
 
     return psi*phi
 
+def func_pair_generalized_lj_and_derivative(r,b1,b2,r1,V0,delta):
+    z = r/r1
+    z_b1 = z**-b1
+    z_b2 = z**-b2
+    phi = (V0/(b2-b1))*(b2*z_b1-b1*z_b2)+delta
+    dphidr = (V0*b1*b2/(b2-b1))*(z_b2-z_b1)/r
+    return phi, dphidr
+
+def func_pair_generalized_lj_w_cutoff_and_derivative(
+        r, b1, b2, r1, V0, delta, rc, hc, h0):
+    phi, dphi = func_pair_generalized_lj_and_derivative(r,b1,b2,r1,V0,delta)
+    psi, dpsi = func_cutoff_mishin2004_and_derivative(r,rc,hc,h0)
+
+    return psi*phi, dpsi*phi + psi*dphi
+
+def func_pair_generalized_lj_and_second_derivative(r,b1,b2,r1,V0,delta):
+    z = r/r1
+    z_b1 = z**-b1
+    z_b2 = z**-b2
+    K = V0/(b2-b1)
+    phi = K*(b2*z_b1-b1*z_b2)+delta
+    dphidr = K*b1*b2*(z_b2-z_b1)/r
+    d2phidr2 = K*b1*b2*((b1+1)*z_b1-(b2+1)*z_b2)/r**2
+    return phi, dphidr, d2phidr2
+
+def func_pair_generalized_lj_w_cutoff_and_second_derivative(
+        r, b1, b2, r1, V0, delta, rc, hc, h0):
+    phi, dphi, d2phi = func_pair_generalized_lj_and_second_derivative(
+            r,b1,b2,r1,V0,delta)
+    psi, dpsi, d2psi = func_cutoff_mishin2004_and_second_derivative(r,rc,hc,h0)
+
+    return psi*phi, dpsi*phi + psi*dphi, d2psi*phi + 2*dpsi*dphi + psi*d2phi
+
+def func_pair_generalized_lj_parameter_gradient(r,b1,b2,r1,V0,delta):
+    """the derivatives with respect to b1, b2, r1, V0, and delta"""
+    z = r/r1
+    log_z = np.log(z)
+    z_b1 = z**-b1
+    z_b2 = z**-b2
+    K = V0/(b2-b1)
+    g = b2*z_b1 - b1*z_b2
+    return [
+        K*g/(b2-b1) - K*(b2*log_z*z_b1 + z_b2),
+        -K*g/(b2-b1) + K*(z_b1 + b1*log_z*z_b2),
+        K*b1*b2*(z_b1 - z_b2)/r1,
+        g/(b2-b1),
+        np.ones_like(z)]
+
+def func_pair_generalized_lj_w_cutoff_parameter_gradient(
+        r, b1, b2, r1, V0, delta, rc, hc, h0):
+    phi = func_pair_generalized_lj(r,b1,b2,r1,V0,delta)
+    psi = func_cutoff_mishin2004(r,rc,hc,h0)
+    dphi = func_pair_generalized_lj_parameter_gradient(r,b1,b2,r1,V0,delta)
+    dpsi = func_cutoff_mishin2004_parameter_gradient(r,rc,hc,h0)
+    return [psi*g for g in dphi] + [g*phi for g in dpsi]
+
 class GeneralizedLennardJonesPotential(PairPotential):
     """Implementation of the morse potential
 
+    The cutoff function of Mishin (2004) is part of the functional form,
+    through the parameters rc, hc and h0, so the global cutoff r_cut is not
+    applied.
+
     Args:
         symbols(list): a list of chemical symbols.
     """
 
     pair_function=func_pair_generalized_lj_w_cutoff
+    pair_function_and_derivative=func_pair_generalized_lj_w_cutoff_and_derivative
+    pair_function_and_second_derivative=func_pair_generalized_lj_w_cutoff_and_second_derivative
+    pair_function_parameter_gradient=func_pair_generalized_lj_w_cutoff_parameter_gradient
     pair_parameter_names=['b1','b2','r1','V0','delta','rc','hc','h0']
+    pair_potential_parameters = pair_parameter_names
+    pair_function_parameters = pair_parameter_names
     potential_type='general_lj'
     def __init__(self, symbols):
         potential_type = GeneralizedLennardJonesPotential.potential_type
@@ -74,7 +118,6 @@ class GeneralizedLennardJonesPotential(PairPotential):
                                symbols=symbols,
                                potential_type=potential_type,
                                is_charge=False)
-        self.pair_function = GeneralizedLennardJonesPotential.pair_function
 
     # this method overrides the parents stub
     def _init_parameter_names(self):
@@ -114,21 +157,30 @@ class GeneralizedLennardJonesPotential(PairPotential):
         assert isinstance(parameters, OrderedDict)
         assert type(r_cut) in [int, float, type(None)]
 
-        global_rcut = r_cut
         # <----------------------------copy a local of the parameters
         for k in self.parameters:
             self.parameters[k] = parameters[k]
 
-        # <----------------------------evaluate the parameters now
-        self.potential_evaluations = OrderedDict()
-        for s in self.symbol_pairs:
-            params = [self.parameters['{}_{}'.format("".join(s),k)]\
-                      for k in self.pair_parameter_names]
-            self.potential_evaluations["".join(s)] \
-                    = self.pair_function(r, *params)
+        # <----------------------------evaluate all the pairs at once
+        self.evaluate_batch(r=r, parameters=self.parameters)
 
         return self.potential_evaluations
 
+    # this method overrides the parent method
+    def evaluate_packed(self, r, packed_parameters, r_cut=None, out=None):
+        return PairPotential.evaluate_packed(
+                self, r, packed_parameters, out=out)
+
+    # this method overrides the parent method
+    def evaluate_packed_and_derivative(self, r, packed_parameters, r_cut=None):
+        return PairPotential.evaluate_packed_and_derivative(
+                self, r, packed_parameters)
+
+    # this method overrides the parent method
+    def evaluate_packed_parameter_gradient(self, r, packed_parameters, r_cut=None):
+        return PairPotential.evaluate_packed_parameter_gradient(
+                self, r, packed_parameters)
+
     # same as parent class
     def lammps_potential_section_to_string(self):
         """needs to be overridden"""
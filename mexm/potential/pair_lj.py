@@ -10,17 +10,42 @@ from pypospack.potential import PairPotential
 from pypospack.potential import determine_symbol_pairs
 
 def func_lj(r,epsilon,sigma,r_cut_pair=None):
-    assert isinstance(r, np.ndarray)
-    assert isinstance(epsilon,float) \
-        or isinstance(epsilon,int)
-    assert isinstance(sigma,float) \
-        or isinstance(sigma,int)
     assert isinstance(r_cut_pair,float) or r_cut_pair is None
 
     phi = 4*epsilon*((sigma/r)**12 - (sigma/r)**6)
 
     return phi
 
+def func_lj_and_derivative(r,epsilon,sigma):
+    _r6 = (sigma/r)**6
+    phi = 4*epsilon*(_r6*_r6 - _r6)
+    dphidr = 4*epsilon*(6*_r6 - 12*_r6*_r6)/r
+    return phi, dphidr
+
+def func_lj_and_second_derivative(r,epsilon,sigma):
+    _r6 = (sigma/r)**6
+    phi = 4*epsilon*(_r6*_r6 - _r6)
+    dphidr = 4*epsilon*(6*_r6 - 12*_r6*_r6)/r
+    d2phidr2 = 4*epsilon*(156*_r6*_r6 - 42*_r6)/r**2
+    return phi, dphidr, d2phidr2
+
+def func_lj_parameter_gradient(r,epsilon,sigma):
+    _r6 = (sigma/r)**6
+    return [
+        4*(_r6*_r6 - _r6),
+        4*epsilon*(12*_r6*_r6 - 6*_r6)/sigma]
+
+def func_lj_parameter_gradient_and_derivative(r,epsilon,sigma):
+    _r6 = (sigma/r)**6
+    _r12 = _r6*_r6
+    G = [
+        4*(_r12 - _r6),
+        4*epsilon*(12*_r12 - 6*_r6)/sigma]
+    dGdr = [
+        4*(6*_r6 - 12*_r12)/r,
+        4*epsilon*(36*_r6 - 144*_r12)/(sigma*r)]
+    return G, dGdr
+
 class LennardJonesPotential(PairPotential):
     """Potential implementation of the generalized Leonnard Jones Function
 
@@ -39,14 +64,19 @@ class LennardJonesPotential(PairPotential):
     RCUT_GLBOAL_COULOMB_DEFAULT = 10.0
     global_potential_parameters = ['r_cut_global']
     pair_potential_parameters = ['epsilon','sigma','r_cut_pair','r_cut_coulomb']
+    pair_function = func_lj
+    pair_function_and_derivative = func_lj_and_derivative
+    pair_function_and_second_derivative = func_lj_and_second_derivative
+    pair_function_parameter_gradient = func_lj_parameter_gradient
+    pair_function_parameter_gradient_and_derivative = \
+            func_lj_parameter_gradient_and_derivative
+    pair_function_parameters = ['epsilon','sigma']
 
     def __init__(self,symbols):
         PairPotential.__init__(self,
                 symbols,
                 potential_type='lj',
                 is_charge=False)
-        self.initialize_parameter_names()
-        self.initialize_parameters()
 
 
     # this method overrides the parents stub
@@ -105,16 +135,8 @@ class LennardJonesPotential(PairPotential):
                 else:
                     raise
 
-        # <-------------------------evaluate the parameters now
-        self.potential_evaluations = OrderedDict()
-        for s in self.symbol_pairs:
-            _pair_name = '{}{}'.format(s[0],s[1])
-            self.potential_evaluations[_pair_name] = func_lj(
-                    r,
-                    epsilon = self.parameters['{}{}_epsilon'.format(s[0],s[1])],
-                    sigma = self.parameters['{}{}_sigma'.format(s[0],s[1])],
-                    r_cut_pair = self.parameters['{}{}_r_cut_pair'.format(s[0],s[1])]
-            )
+        # <-------------------------evaluate all the pairs at once
+        self.evaluate_batch(r=r,parameters=self.parameters)
 
         return self.potential_evaluations
 
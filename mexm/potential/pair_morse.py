@@ -13,13 +13,56 @@ __version__ = 20171102
 
 
 def function_morse_potential(r, D0, a, r0):
-    assert isinstance(r, np.ndarray) or isinstance(r, float)
-    assert isinstance(D0, float)
-    assert isinstance(a, float)
-    assert isinstance(r0, float)
+    """morse potential
 
+    The parameters may either be floats or numpy arrays which broadcast
+    against r.
+    """
     return D0*(np.exp(-2*a*(r-r0))-2*np.exp(-a*(r-r0)))
 
+def function_morse_potential_and_derivative(r, D0, a, r0):
+    """morse potential and its derivative dV/dr
+
+    The exponential is shared between the value and the derivative.
+    """
+    _exp = np.exp(-a*(r-r0))
+    V = D0*(_exp*_exp - 2*_exp)
+    dVdr = 2*a*D0*(_exp - _exp*_exp)
+    return V, dVdr
+
+def function_morse_potential_and_second_derivative(r, D0, a, r0):
+    """morse potential and its first and second derivatives with respect to r"""
+    _exp = np.exp(-a*(r-r0))
+    _exp2 = _exp*_exp
+    V = D0*(_exp2 - 2*_exp)
+    dVdr = 2*a*D0*(_exp - _exp2)
+    d2Vdr2 = 2*a*a*D0*(2*_exp2 - _exp)
+    return V, dVdr, d2Vdr2
+
+def function_morse_potential_parameter_gradient(r, D0, a, r0):
+    """the derivatives of the morse potential with respect to D0, a, and r0"""
+    _exp = np.exp(-a*(r-r0))
+    _exp2 = _exp*_exp
+    return [
+        _exp2 - 2*_exp,
+        -2*D0*(r-r0)*(_exp2 - _exp),
+        2*a*D0*(_exp2 - _exp)]
+
+def function_morse_potential_parameter_gradient_and_derivative(r, D0, a, r0):
+    """the derivatives with respect to D0, a, and r0, and their derivatives
+    with respect to r"""
+    _exp = np.exp(-a*(r-r0))
+    _exp2 = _exp*_exp
+    G = [
+        _exp2 - 2*_exp,
+        -2*D0*(r-r0)*(_exp2 - _exp),
+        2*a*D0*(_exp2 - _exp)]
+    dGdr = [
+        2*a*(_exp - _exp2),
+        -2*D0*(_exp2 - _exp) + 2*a*D0*(r-r0)*(2*_exp2 - _exp),
+        -2*a*a*D0*(2*_exp2 - _exp)]
+    return G, dGdr
+
 class MorsePotential(PairPotential):
     """Implementation of the morse potential
 
@@ -27,6 +70,13 @@ class MorsePotential(PairPotential):
         symbols(list): a list of chemical symbols.
     """
 
+    pair_function = function_morse_potential
+    pair_function_and_derivative = function_morse_potential_and_derivative
+    pair_function_and_second_derivative = function_morse_potential_and_second_derivative
+    pair_function_parameter_gradient = function_morse_potential_parameter_gradient
+    pair_function_parameter_gradient_and_derivative = \
+            function_morse_potential_parameter_gradient_and_derivative
+    pair_function_parameters = ['D0', 'a', 'r0']
     def __init__(self, symbols):
         self.pair_potential_parameters = ['D0', 'a', 'r0']
         PairPotential.__init__(self,
@@ -72,49 +122,12 @@ class MorsePotential(PairPotential):
         assert isinstance(parameters, OrderedDict)
         assert type(r_cut) in [int, float, type(None)]
 
-        global_rcut = r_cut
         # <----------------------------copy a local of the parameters
         for k in self.parameters:
             self.parameters[k] = parameters[k]
 
-        # <----------------------------evaluate the parameters now
-        self.potential_evaluations = OrderedDict()
-        for s in self.symbol_pairs:
-            # <------------------------extract the paramters for symbol pair
-            D0 = self.parameters['{}{}_D0'.format(s[0], s[1])]
-            a = self.parameters['{}{}_a'.format(s[0], s[1])]
-            r0 = self.parameters['{}{}_r0'.format(s[0], s[1])]
-
-            # <------------------------determine radial cutoff
-            if '{}{}_rcut'.format(s[0], s[1]) in self.parameters:
-                rc = self.parameters['{}{}_rcut'.format(s[0].s[1])]
-            else:
-                rc = global_rcut
-            # <------------------------embedded morse function
-            func_morse = function_morse_potential
-            #def func_morse(r,D0,a,r0):
-            #    return D0*(np.exp(-2*a*(r-r0))-2*np.exp(-a*(r-r0)))
-
-            _pair_name = '{}{}'.format(s[0], s[1])
-            if r_cut is None:
-                _V = func_morse(r, D0, a, r0)
-                self.potential_evaluations[_pair_name] = copy.deepcopy(_V)
-            else:
-                _rcut = np.max(r[np.where(r < r_cut)])
-                _h = r[1] - r[0]
-                _V_rc = func_morse(_rcut, D0, a, r0)
-                _V_rc_p1 = func_morse(_rcut+_h, D0, a, r0)
-                _V_rc_m1 = func_morse(_rcut-_h, D0, a, r0)
-                _dVdr_at_rc = (_V_rc_p1-_V_rc)/_h
-
-                # <----- calculate morse with cutoff
-                _V = func_morse(r, D0, a, r0)
-                # <----- apply the cutoff
-                _V = _V - _V_rc - _dVdr_at_rc * (r-_rcut)
-                # <----- V=0, where r <= _rcut
-                _V[np.where(r >= _rcut)] = 0.0
-
-                self.potential_evaluations[_pair_name] = copy.deepcopy(_V)
+        # <----------------------------evaluate all the pairs at once
+        self.evaluate_batch(r=r, parameters=self.parameters, r_cut=r_cut)
 
         return self.potential_evaluations
    
@@ -6,6 +6,7 @@ __license__ = "Simplified BSD License"
 __version__ = "1.0"
 
 from collections import OrderedDict
+import numpy as np
 from mexm.exceptions import BadParameterException
 
 from mexm.elements import ELEMENTS
@@ -15,6 +16,199 @@ from mexm.potential import MEXM_2BODY_FORMAT
 from mexm.potential import MEXM_3BODY_FORMAT
 from mexm.potential import get_symbol_pairs
 
+def get_packed_arguments(r, packed_parameters):
+    """unpack the columns of packed parameters into function arguments
+
+    Args:
+        r(numpy.ndarray): the points to evaluate at
+        packed_parameters(numpy.ndarray): an array of the shape
+            (..., n_functions, n_function_parameters)
+    Returns:
+        list of numpy.ndarray: an argument for each function parameter, with
+            the shape (..., n_functions) + (1,)*r.ndim to broadcast against r
+    """
+    packed_parameters = np.asarray(packed_parameters, dtype=float)
+    arg_shape = packed_parameters.shape[:-1] + (1,) * r.ndim
+    return [packed_parameters[..., i].reshape(arg_shape)
+            for i in range(packed_parameters.shape[-1])]
+
+def evaluate_packed_function(function, r, packed_parameters, r_cut=None,
+        function_and_derivative=None, out=None):
+    """evaluate a vectorized function for packed parameters
+
+    Each row of the packed parameters is the argument list of the function for
+    one function, e.g. a symbol pair or a symbol.  Any additional leading
+    dimensions, e.g. candidate parameterizations, are preserved.
+
+    Args:
+        function(function): a function f(r, *args) where the arguments
+            broadcast against r.
+        r(numpy.ndarray or float): the points to evaluate at
+        packed_parameters(numpy.ndarray): an array of the shape
+            (..., n_functions, n_function_parameters)
+        r_cut(float,optional): the global cutoff.  If provided, a shifted
+            force cutoff is applied at the largest grid point less than r_cut.
+        function_and_derivative(function,optional): a function which returns
+            f(r, *args) and df/dr.  If provided, the slope of the shifted
+            force cutoff is analytic rather than a finite difference.
+        out(numpy.ndarray,optional): an array of shape
+            (..., n_functions) + r.shape the result is written into, rather
+            than a new array.
+    Returns:
+        numpy.ndarray: an array of shape (..., n_functions) + r.shape, which
+            is out if it is provided
+    """
+    r_ = np.asarray(r, dtype=float)
+    args = get_packed_arguments(r_, packed_parameters)
+
+    V = function(r_, *args)
+
+    if r_cut is None:
+        if out is not None:
+            np.copyto(out, V)
+            V = out
+    else:
+        _rcut = np.max(r_[r_ < r_cut])
+        if function_and_derivative is not None:
+            _V_rc, _dVdr_at_rc = function_and_derivative(_rcut, *args)
+        else:
+            _h = r_[1] - r_[0]
+            _V_rc = function(_rcut, *args)
+            _V_rc_p1 = function(_rcut + _h, *args)
+            _dVdr_at_rc = (_V_rc_p1 - _V_rc)/_h
+
+        # shifted force cutoff, V=0 where r >= _rcut
+        V = np.subtract(V, _V_rc, out=out)
+        V -= _dVdr_at_rc * (r_ - _rcut)
+        V[..., r_ >= _rcut] = 0.0
+
+    return V
+
+def evaluate_packed_function_and_derivative(function_and_derivative, r,
+        packed_parameters, r_cut=None):
+    """evaluate a vectorized function and its derivative for packed parameters
+
+    The function and its derivative are evaluated in a single pass, so that
+    intermediate values such as exponentials are shared.
+
+    Args:
+        function_and_derivative(function): a function which returns
+            f(r, *args) and df/dr, where the arguments broadcast against r.
+        r(numpy.ndarray or float): the points to evaluate at
+        packed_parameters(numpy.ndarray): an array of the shape
+            (..., n_functions, n_function_parameters)
+        r_cut(float,optional): the global cutoff.  If provided, a shifted
+            force cutoff is applied at the largest grid point less than r_cut.
+    Returns:
+        tuple: the values and the derivatives, each an array of shape
+            (..., n_functions) + r.shape
+    """
+    r_ = np.asarray(r, dtype=float)
+    args = get_packed_arguments(r_, packed_parameters)
+
+    V, dVdr = function_and_derivative(r_, *args)
+
+    if r_cut is not None:
+        _rcut = np.max(r_[r_ < r_cut])
+        _V_rc, _dVdr_at_rc = function_and_derivative(_rcut, *args)
+
+        # shifted force cutoff, V=0 and dV/dr=0 where r >= _rcut
+        V = V - _V_rc - _dVdr_at_rc * (r_ - _rcut)
+        dVdr = dVdr - _dVdr_at_rc
+        V[..., r_ >= _rcut] = 0.0
+        dVdr[..., r_ >= _rcut] = 0.0
+
+    return V, dVdr
+
+def evaluate_packed_function_parameter_gradient(parameter_gradient, r,
+        packed_parameters, r_cut=None, parameter_gradient_and_derivative=None):
+    """evaluate the gradient of a function with respect to its parameters
+
+    The shifted force cutoff depends on the mixed derivative d2f/(dr dp) at
+    the cutoff.  It is analytic if parameter_gradient_and_derivative is
+    provided, otherwise it is approximated by a central difference of the
+    parameter gradient, whose error is of the order of the square of the
+    step of 1e-6*max(1,r_cut).
+
+    Args:
+        parameter_gradient(function): a function g(r, *args) which returns a
+            list with the derivative of f(r, *args) with respect to each
+            argument, in the order of the arguments.
+        r(numpy.ndarray or float): the points to evaluate at
+        packed_parameters(numpy.ndarray): an array of the shape
+            (..., n_functions, n_function_parameters)
+        r_cut(float,optional): the global cutoff.  If provided, the gradient
+            of the shifted force cutoff is applied at the largest grid point
+            less than r_cut.
+        parameter_gradient_and_derivative(function,optional): a function
+            which returns the list of parameter_gradient and the list of the
+            derivatives of its elements with respect to r.
+    Returns:
+        numpy.ndarray: an array of the shape
+            (..., n_functions, n_function_parameters) + r.shape
+    """
+    r_ = np.asarray(r, dtype=float)
+    packed_parameters = np.asarray(packed_parameters, dtype=float)
+    args = get_packed_arguments(r_, packed_parameters)
+    _axis = packed_parameters.ndim - 1
+
+    def stack_gradient(gradient, x):
+        _shape = packed_parameters.shape[:-1] + np.shape(x)
+        return np.stack(
+                [np.broadcast_to(g, _shape) for g in gradient],
+                axis=_axis)
+
+    def get_gradient(x):
+        return stack_gradient(parameter_gradient(x, *args), x)
+
+    G = get_gradient(r_)
+
+    if r_cut is not None:
+        _rcut = np.full((1,) * r_.ndim, np.max(r_[r_ < r_cut]))
+        if parameter_gradient_and_derivative is not None:
+            _g, _dgdr = parameter_gradient_and_derivative(_rcut, *args)
+            _G_rc = stack_gradient(_g, _rcut)
+            _dGdr_at_rc = stack_gradient(_dgdr, _rcut)
+        else:
+            _h = 1e-6*max(1., abs(_rcut.item()))
+            _G_rc = get_gradient(_rcut)
+            # the mixed derivative d2f/(dr dp) at the cutoff
+            _dGdr_at_rc = (get_gradient(_rcut + _h) \
+                    - get_gradient(_rcut - _h))/(2*_h)
+
+        # shifted force cutoff, V=0 where r >= _rcut
+        G = G - _G_rc - _dGdr_at_rc * (r_ - _rcut)
+        G[..., r_ >= _rcut] = 0.0
+
+    return G
+
+def get_jacobian_from_parameter_gradient(
+        parameter_gradient, parameter_keys, parameter_names):
+    """scatter the parameter gradient of packed functions into a Jacobian
+
+    Args:
+        parameter_gradient(numpy.ndarray): the gradient with the shape
+            (n_functions, n_function_parameters, n_grid)
+        parameter_keys(list of list of str): the parameter name of each
+            function argument, with a row for each function
+        parameter_names(list of str): the parameter names, which are the rows
+            of the Jacobian
+    Returns:
+        numpy.ndarray: the Jacobian with the shape
+            (n_parameters, n_functions*n_grid), where the columns are the
+            tables of the functions concatenated in order
+    """
+    n_functions, _, n_grid = parameter_gradient.shape
+    _rows = OrderedDict([(pn,i) for i,pn in enumerate(parameter_names)])
+    _indices = np.array([[_rows[k] for k in keys] for keys in parameter_keys],
+            dtype=int)
+
+    J = np.zeros((len(parameter_names), n_functions, n_grid))
+    np.add.at(J,
+            (_indices, np.arange(n_functions)[:, np.newaxis]),
+            parameter_gradient)
+    return J.reshape(len(parameter_names), n_functions*n_grid)
+
 class Potential(object):
     """base class for potential
 
@@ -83,6 +277,19 @@ class Potential(object):
         """
         raise NotImplementedError
 
+    def evaluate_jacobian(self, r, parameters, r_cut=None):
+        """evaluate the Jacobian of the potential with respect to its parameters
+
+        Args:
+            r(numpy.ndarray): a numpy array of interatomic distances
+            parameters(OrderedDict): an dictionary of parameter values and keys
+            r_cut(float,optional): the global cutoff for the potential
+        Returns:
+            numpy.ndarray: the Jacobian with the shape (n_parameters, n_grid),
+                where the rows are in the order of parameter_names
+        """
+        raise NotImplementedError
+
     def write_lammps_potential_file(self, path):
         """writes the lammps_potential file
 
@@ -0,0 +1,309 @@
+"""piecewise cubic functions tabulated on a uniform grid
+
+The coefficients are stored in the layout of the eam/alloy pair style of
+LAMMPS, with 7 coefficients for each knot m, where for p = (x - x_m)/dx,
+
+    f(x)  = ((c[3]*p + c[4])*p + c[5])*p + c[6]
+    f'(x) = (c[0]*p + c[1])*p + c[2]
+
+so c[6] is the value at the knot, c[5] is dx times the slope at the knot,
+c[4] and c[3] are the quadratic and cubic terms of the interval, and c[2],
+c[1] and c[0] are the coefficients of the derivative.  Since the grid is
+uniform, the interval of a point is found by index arithmetic rather than a
+binary search.
+
+Past the last grid point x_max, the embedding function of LAMMPS is
+extrapolated linearly with the slope of the last knot,
+
+    f(x) = f(x_max) + f'(x_max)*(x - x_max)
+
+which is the 'linear' extrapolation.
+"""
+import numpy as np
+
+def get_uniform_grid_spacing(grid):
+    """the spacing of a uniform grid
+
+    Args:
+        grid (numpy.ndarray): the grid points, in increasing order
+    Returns:
+        float: the spacing between the grid points
+    Raises:
+        ValueError: if the grid has fewer than two points or is not uniform
+    """
+    grid = np.asarray(grid, dtype=float)
+    if grid.ndim != 1 or grid.size < 2:
+        raise ValueError("the grid must have at least two points")
+    dx = grid[1] - grid[0]
+    if dx <= 0 or not np.allclose(np.diff(grid), dx, rtol=1e-6, atol=0.):
+        raise ValueError("the grid must be uniform and increasing")
+    return float(dx)
+
+def get_knot_slopes(values):
+    """the slopes at the knots used by LAMMPS, in units of the grid spacing
+
+    The slopes are fourth order finite differences in the interior and
+    lower order finite differences at the two knots at each end.
+
+    Args:
+        values (numpy.ndarray): the tables with shape (n_functions, n_grid),
+            where n_grid is at least 5
+    Returns:
+        numpy.ndarray: the slopes times the grid spacing
+    """
+    f = values
+    slopes = np.empty_like(f)
+    slopes[:, 0] = f[:, 1] - f[:, 0]
+    slopes[:, 1] = 0.5*(f[:, 2] - f[:, 0])
+    slopes[:, -2] = 0.5*(f[:, -1] - f[:, -3])
+    slopes[:, -1] = f[:, -1] - f[:, -2]
+    slopes[:, 2:-2] = ((f[:, :-4] - f[:, 4:]) + 8.*(f[:, 3:-1] - f[:, 1:-3]))/12.
+    return slopes
+
+class TabulatedFunction(object):
+    """a set of functions tabulated on a uniform grid
+
+    The functions are interpolated with piecewise cubic polynomials whose
+    coefficients are computed once, in the layout used by LAMMPS.  With
+    the 'cubic' interpolation, the slopes at the knots are finite
+    differences of the tables as in the eam/alloy pair style of LAMMPS,
+    unless the analytic derivatives are provided, in which case the
+    polynomials are cubic Hermite interpolants.  With the 'linear'
+    interpolation, the polynomials are the linear interpolants, which are
+    identical to numpy.interp.
+
+    With the 'clamp' extrapolation, points outside of the grid are clamped
+    to the end points of the grid, and the derivative there is zero.  With
+    the 'linear' extrapolation, points past the last grid point are
+    extrapolated linearly as for the embedding functions in LAMMPS, while
+    points before the first grid point are still clamped.
+
+    Args:
+        x0 (float): the first grid point
+        dx (float): the grid spacing
+        values (numpy.ndarray): the tables, with shape (n_grid,) for a single
+            function or (n_functions, n_grid)
+        derivatives (numpy.ndarray,optional): the analytic derivatives at the
+            grid points, with the shape of values
+        interpolation (str,optional): 'cubic' or 'linear'.  Default is
+            'cubic'.
+        extrapolation (str,optional): 'clamp' or 'linear'.  Default is
+            'clamp'.
+
+    Attributes:
+        x0 (float): the first grid point
+        dx (float): the grid spacing
+        n_grid (int): the number of grid points
+        n_functions (int): the number of functions
+        interpolation (str): the interpolation
+        extrapolation (str): the extrapolation past the last grid point
+        coefficients (numpy.ndarray): the read-only coefficients, with shape
+            (n_functions, n_grid, 7)
+    """
+    interpolations = ['cubic', 'linear']
+    extrapolations = ['clamp', 'linear']
+    function_types = ['pair', 'density', 'embedding']
+
+    def __init__(self, x0, dx, values, derivatives=None, interpolation='cubic',
+            extrapolation='clamp'):
+        if interpolation not in self.interpolations:
+            msg = "interpolation must be one of {}".format(
+                    ",".join(self.interpolations))
+            raise ValueError(msg)
+        if extrapolation not in self.extrapolations:
+            msg = "extrapolation must be one of {}".format(
+                    ",".join(self.extrapolations))
+            raise ValueError(msg)
+        if dx <= 0:
+            raise ValueError("the grid spacing must be positive")
+
+        _values = np.array(values, dtype=float)
+        _values = np.atleast_2d(_values)
+        if _values.ndim != 2:
+            raise ValueError("values must have the shape (n_functions, n_grid)")
+
+        self.x0 = float(x0)
+        self.dx = float(dx)
+        self.n_functions, self.n_grid = _values.shape
+        self.interpolation = interpolation
+        self.extrapolation = extrapolation
+
+        if derivatives is not None:
+            _derivatives = np.atleast_2d(np.array(derivatives, dtype=float))
+            if _derivatives.shape != _values.shape:
+                raise ValueError("derivatives must have the shape of values")
+
+        if self.n_grid < 2:
+            raise ValueError("the grid must have at least two points")
+        if interpolation == 'cubic' and derivatives is None and self.n_grid < 5:
+            raise ValueError("the cubic spline needs at least 5 grid points")
+
+        c = np.zeros((self.n_functions, self.n_grid, 7))
+        c[:, :, 6] = _values
+        if interpolation == 'linear':
+            c[:, :-1, 5] = np.diff(_values, axis=1)
+            c[:, -1, 5] = c[:, -2, 5]
+        else:
+            if derivatives is None:
+                c[:, :, 5] = get_knot_slopes(_values)
+            else:
+                c[:, :, 5] = self.dx*_derivatives
+            _df = np.diff(_values, axis=1)
+            c[:, :-1, 4] = 3.*_df - 2.*c[:, :-1, 5] - c[:, 1:, 5]
+            c[:, :-1, 3] = c[:, :-1, 5] + c[:, 1:, 5] - 2.*_df
+        c[:, :, 2] = c[:, :, 5]/self.dx
+        c[:, :, 1] = 2.*c[:, :, 4]/self.dx
+        c[:, :, 0] = 3.*c[:, :, 3]/self.dx
+        c.flags.writeable = False
+        self.coefficients = c
+
+    @classmethod
+    def from_grid(cls, grid, values, derivatives=None, interpolation='cubic',
+            extrapolation='clamp'):
+        """tabulated functions from tables on a uniform grid
+
+        Args:
+            grid (numpy.ndarray): the uniform grid
+            values (numpy.ndarray): the tables, with shape (n_grid,) or
+                (n_functions, n_grid)
+            derivatives (numpy.ndarray,optional): the analytic derivatives
+            interpolation (str,optional): 'cubic' or 'linear'
+            extrapolation (str,optional): 'clamp' or 'linear'
+        Returns:
+            TabulatedFunction
+        """
+        return cls(
+                x0=grid[0],
+                dx=get_uniform_grid_spacing(grid),
+                values=values,
+                derivatives=derivatives,
+                interpolation=interpolation,
+                extrapolation=extrapolation)
+
+    @classmethod
+    def from_function(cls, function, grid, derivative=None, interpolation='cubic',
+            extrapolation='clamp'):
+        """tabulated functions from an analytic evaluation
+
+        Args:
+            function (function): a function of the grid which returns the
+                tables, e.g. the evaluate_packed method of a potential with
+                the parameters bound
+            grid (numpy.ndarray): the uniform grid
+            derivative (function,optional): a function of the grid which
+                returns the analytic derivatives
+            interpolation (str,optional): 'cubic' or 'linear'
+            extrapolation (str,optional): 'clamp' or 'linear'
+        Returns:
+            TabulatedFunction
+        """
+        return cls.from_grid(
+                grid=grid,
+                values=function(grid),
+                derivatives=None if derivative is None else derivative(grid),
+                interpolation=interpolation,
+                extrapolation=extrapolation)
+
+    @classmethod
+    def from_setfl(cls, setfl, function_type):
+        """tabulated functions from the tables of a setfl file
+
+        Args:
+            setfl (mexm.io.eamtools.EamSetflFile): a setfl file which has
+                been read
+            function_type (str): 'pair', 'density' or 'embedding'.  The pair
+                functions are in the order of the symbol pairs, and the
+                density and embedding functions in the order of the symbols.
+                As in LAMMPS, the embedding functions are extrapolated
+                linearly past the end of the grid.
+        Returns:
+            TabulatedFunction
+        """
+        if function_type not in cls.function_types:
+            msg = "function_type must be one of {}".format(
+                    ",".join(cls.function_types))
+            raise ValueError(msg)
+
+        if function_type == 'pair':
+            _values = []
+            for i1, s1 in enumerate(setfl.symbols):
+                for i2, s2 in enumerate(setfl.symbols):
+                    if i1 <= i2:
+                        _values.append(setfl.func_pairpotential[
+                            setfl.PAIR_KEY_FORMAT.format(s1, s2)])
+            return cls.from_grid(grid=setfl.r, values=_values)
+        elif function_type == 'density':
+            return cls.from_grid(grid=setfl.r,
+                    values=[setfl.func_density[s] for s in setfl.symbols])
+        else:
+            return cls.from_grid(grid=setfl.rho,
+                    values=[setfl.func_embedding[s] for s in setfl.symbols],
+                    extrapolation='linear')
+
+    @property
+    def grid(self):
+        """numpy.ndarray: the grid points"""
+        return self.x0 + self.dx*np.arange(self.n_grid)
+
+    def _get_intervals(self, x, rows):
+        x = np.asarray(x, dtype=float)
+        if rows is None:
+            if self.n_functions == 1:
+                rows = np.zeros(x.shape, dtype=int)
+            else:
+                rows = np.arange(self.n_functions).reshape(
+                        (self.n_functions,) + (1,)*x.ndim)
+        rows = np.asarray(rows, dtype=int)
+
+        s = (x - self.x0)/self.dx
+        _s = np.clip(s, 0., self.n_grid - 1)
+        m = np.minimum(_s.astype(int), self.n_grid - 2)
+        p = _s - m
+        c = self.coefficients.reshape(-1, 7)[rows*self.n_grid + m]
+        # the distance from the grid, in units of the grid spacing
+        return c, p, s - _s
+
+    def _evaluate_and_derivative(self, c, p, ds):
+        _df = (c[..., 0]*p + c[..., 1])*p + c[..., 2]
+        if self.extrapolation == 'linear':
+            # the slope of the last knot is kept past the end of the grid
+            _df = np.where(ds >= 0., _df, 0.)
+            _f = ((c[..., 3]*p + c[..., 4])*p + c[..., 5])*p + c[..., 6] \
+                    + _df*np.maximum(ds, 0.)*self.dx
+        else:
+            _df = np.where(ds == 0., _df, 0.)
+            _f = ((c[..., 3]*p + c[..., 4])*p + c[..., 5])*p + c[..., 6]
+        return _f, _df
+
+    def evaluate(self, x, rows=None):
+        """evaluate the functions
+
+        Args:
+            x (numpy.ndarray or float): the points
+            rows (numpy.ndarray,optional): the function of each point, which
+                is broadcast against x.  By default, a single function is
+                evaluated at x, and several functions are each evaluated at
+                every point.
+        Returns:
+            numpy.ndarray: the values, with the shape of x, or
+                (n_functions,) + x.shape when several functions are evaluated
+                without rows
+        """
+        c, p, ds = self._get_intervals(x, rows)
+        if self.extrapolation == 'linear':
+            return self._evaluate_and_derivative(c, p, ds)[0]
+        return ((c[..., 3]*p + c[..., 4])*p + c[..., 5])*p + c[..., 6]
+
+    def evaluate_derivative(self, x, rows=None):
+        """evaluate the derivatives of the functions, see evaluate"""
+        c, p, ds = self._get_intervals(x, rows)
+        return self._evaluate_and_derivative(c, p, ds)[1]
+
+    def evaluate_and_derivative(self, x, rows=None):
+        """evaluate the functions and their derivatives in a single pass
+
+        Returns:
+            tuple: the values and the derivatives, see evaluate
+        """
+        c, p, ds = self._get_intervals(x, rows)
+        return self._evaluate_and_derivative(c, p, ds)
@@ -11,7 +11,7 @@ from mexm.potential import ThreeBodyPotential
 
 class StillingerWeberPotential(ThreeBodyPotential):
     two_body_parameters = ['A','B','p','q','epsilon','sigma', 'a']
-    three_body_parameters = ['lambda', 'costheta0', 'tol']
+    three_body_parameters = ['lambda', 'gamma', 'costheta0', 'tol']
     potential_type = 'stillingerweber'
     is_charge = False
 
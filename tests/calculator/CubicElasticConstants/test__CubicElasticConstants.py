@@ -0,0 +1,106 @@
+import pytest
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import make_super_cell
+from mexm.calculator import EamCalculator
+from mexm.calculator import CubicElasticConstants
+
+def get_cell(lattice_type, a):
+    cell = SimulationCell()
+    cell.a0 = a
+    if lattice_type == 'fcc':
+        positions = [[0., 0., 0.], [0., .5, .5], [.5, 0., .5], [.5, .5, 0.]]
+    else:
+        positions = [[0., 0., 0.], [.5, .5, .5]]
+    for position in positions:
+        cell.add_atom('Ni', position)
+    return make_super_cell(cell, [2, 2, 2])
+
+def get_strained_energy(calculator, cell, eta):
+    """the energy per atom for a Lagrangian strain eta"""
+    w, v = np.linalg.eigh(np.eye(3) + 2*eta)
+    F = v.dot(np.diag(np.sqrt(w))).dot(v.T)
+    _cell = SimulationCell(cell)
+    _cell.H = np.array(cell.H, dtype=float).dot(F.T)
+    return calculator.get_potential_energy(_cell)/cell.n_atoms
+
+@pytest.mark.parametrize("lattice_type,a", [('fcc', 3.6), ('bcc', 2.9)])
+def test__evaluate_elastic_constants__matches_strained_cells(
+        ni_eam_potential, ni_eam_parameters, lattice_type, a):
+    potential, parameters = ni_eam_potential, ni_eam_parameters
+    r = 0.001*np.arange(1, 8001)
+    rho = 0.001*np.arange(1, 50001)
+    potential.evaluate(r=r, rho=rho, rcut=5.0005, parameters=parameters)
+    calculator = EamCalculator(potential)
+    cell = get_cell(lattice_type, a)
+
+    elastic = CubicElasticConstants(lattice_type)
+    results = elastic.evaluate_elastic_constants(
+            potential, np.array([a]), parameters, r_cut=5.0)
+    volume = elastic.get_atomic_volume(a)/160.21766208
+
+    h = 1e-3
+    def get_energy(i, j, e):
+        eta = np.zeros((3, 3))
+        eta[i, j] += 0.5*e
+        eta[j, i] += 0.5*e
+        return get_strained_energy(calculator, cell, eta)
+
+    E0 = get_strained_energy(calculator, cell, np.zeros((3, 3)))
+    C11 = (get_energy(0, 0, h) - 2*E0 + get_energy(0, 0, -h))/h**2/volume
+    # E = 2 V C44 e**2 for eta_xy = eta_yx = e/2
+    C44 = (get_energy(0, 1, h) - 2*E0 + get_energy(0, 1, -h))/h**2/volume
+    eta = np.diag([h, h, 0.])
+    E_pp = get_strained_energy(calculator, cell, eta)
+    E_mm = get_strained_energy(calculator, cell, -eta)
+    C12 = 0.5*((E_pp - 2*E0 + E_mm)/h**2/volume - 2*C11)
+
+    assert np.isclose(results['C11'][0], C11, rtol=1e-3)
+    assert np.isclose(results['C12'][0], C12, rtol=1e-3)
+    assert np.isclose(results['C44'][0], C44, rtol=1e-3)
+
+def test__evaluate_elastic_constants__second_derivative_fallback(
+        ni_eam_potential, ni_eam_parameters, monkeypatch):
+    potential, parameters = ni_eam_potential, ni_eam_parameters
+    elastic = CubicElasticConstants('fcc')
+    a = np.linspace(3.4, 3.8, 5)
+    results = elastic.evaluate_elastic_constants(
+            potential, a, parameters, r_cut=5.0)
+
+    # without the analytic second derivatives, they are central differences
+    for obj, stage in [(potential.obj_pair, 'pair'),
+            (potential.obj_density, 'density'),
+            (potential.obj_embedding, 'embedding')]:
+        name = '{}_function_and_second_derivative'.format(stage)
+        assert getattr(type(obj), name) is not None
+        monkeypatch.setattr(type(obj), name, None)
+    _results = elastic.evaluate_elastic_constants(
+            potential, a, parameters, r_cut=5.0)
+    for k in ['C11', 'C12', 'C44']:
+        assert np.allclose(results[k], _results[k], rtol=1e-6)
+
+def test__get_elastic_constants__candidates(
+        ni_eam_potential, ni_eam_parameters):
+    potential, parameters = ni_eam_potential, ni_eam_parameters
+    x = potential.get_parameter_vector(parameters)
+    X = x*np.random.RandomState(0).uniform(0.95, 1.05, size=(4, x.size))
+
+    elastic = CubicElasticConstants('fcc')
+    results = elastic.get_elastic_constants(
+            potential, X, a_min=3.5, a_max=5.0, r_cut=5.0)
+    assert results['C11'].shape == (4,)
+    for i in range(4):
+        _results = elastic.get_elastic_constants(
+                potential, X[i], a_min=3.5, a_max=5.0, r_cut=5.0)
+        for k in ['a0', 'C11', 'C12', 'C44']:
+            assert np.isclose(results[k][i], _results[k], equal_nan=True)
+
+    # the bulk modulus of a cubic crystal is (C11 + 2 C12)/3
+    assert np.allclose(
+            results['B'], (results['C11'] + 2*results['C12'])/3., rtol=1e-3,
+            equal_nan=True)
+    assert np.sum(np.isfinite(results['a0'])) >= 2
+
+def test__init__not_cubic():
+    with pytest.raises(ValueError):
+        CubicElasticConstants('hcp')
@@ -0,0 +1,155 @@
+import pytest
+import itertools
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.io.eamtools import EamSetflFile
+from mexm.calculator import EamCalculator
+
+def get_triclinic_cell(random_state):
+    cell = SimulationCell()
+    cell.a0 = 3.5
+    cell.H = np.eye(3) + random_state.uniform(-0.2, 0.2, size=(3, 3))
+    for s in ['Al', 'Ni', 'Ni', 'Al', 'Ni']:
+        cell.add_atom(s, list(random_state.uniform(0., 1., size=3)))
+    return cell
+
+def get_brute_force_energies(potential, cell, r_cut):
+    L = cell.a0*cell.H
+    positions = cell.positions.dot(L)
+    symbols = [a.symbol for a in cell.atomic_basis]
+    m = np.ceil(r_cut*np.linalg.norm(np.linalg.inv(L), axis=0)).astype(int) + 1
+
+    def get_pair(s1, s2):
+        if potential.symbols.index(s1) > potential.symbols.index(s2):
+            s1, s2 = s2, s1
+        return potential.pair[s1 + s2]
+
+    energies = []
+    for i, x_i in enumerate(positions):
+        rho_i = 0.
+        phi_i = 0.
+        for j, x_j in enumerate(positions):
+            for shift in itertools.product(*[range(-k, k+1) for k in m]):
+                r = np.linalg.norm(x_j + np.dot(shift, L) - x_i)
+                if r < r_cut and not (i == j and shift == (0, 0, 0)):
+                    rho_i += np.interp(r, potential.r, potential.density[symbols[j]])
+                    phi_i += np.interp(r, potential.r, get_pair(symbols[i], symbols[j]))
+        F_i = np.interp(rho_i, potential.rho, potential.embedding[symbols[i]])
+        energies.append(F_i + 0.5*phi_i)
+    return np.array(energies)
+
+def test__calculate__matches_brute_force(make_evaluated_eam_potential):
+    potential = make_evaluated_eam_potential(0.001, 6000, 20000)
+    cell = get_triclinic_cell(np.random.RandomState(1))
+
+    calculator = EamCalculator(potential)
+    assert calculator.r_cut == 5.0
+
+    energy = calculator.calculate(cell)
+    energies = get_brute_force_energies(potential, cell, calculator.r_cut)
+    assert np.allclose(calculator.energies, energies)
+    assert np.isclose(energy, np.sum(energies))
+    assert np.isclose(calculator.get_potential_energy(cell), energy)
+    assert np.allclose(calculator.get_potential_energies(cell), energies)
+
+def test__calculate__setfl_matches_potential(
+        make_evaluated_eam_potential, tmpdir):
+    potential = make_evaluated_eam_potential(0.05, 160, 200)
+    filename = str(tmpdir.join('NiAl.eam.alloy'))
+
+    def get_lines(values):
+        return ["".join("{:+24.16E}".format(v) for v in values[i:i+5])
+                for i in range(0, values.size, 5)]
+
+    lines = ['comment 1', 'comment 2', 'comment 3', '2 Ni Al']
+    lines.append("{:5d} {:+24.16E} {:5d} {:+24.16E} {:+24.16E}".format(
+        potential.rho.size, 0.05, potential.r.size, 0.05, potential.r_cut))
+    for s in potential.symbols:
+        lines.append("{:5d}{:+24.16E}{:+24.16E} fcc".format(28, 58.71, 3.52))
+        lines += get_lines(potential.embedding[s])
+        lines += get_lines(potential.density[s])
+    for pair_name in ['NiNi', 'NiAl', 'AlAl']:
+        lines += get_lines(potential.r*potential.pair[pair_name])
+    with open(filename, 'w') as f:
+        f.write("\n".join(lines))
+
+    setfl = EamSetflFile()
+    setfl.read_bulk(filename)
+
+    cell = get_triclinic_cell(np.random.RandomState(2))
+    assert np.allclose(
+            EamCalculator(setfl).get_potential_energies(cell),
+            EamCalculator(potential).get_potential_energies(cell))
+
+def test__calculate__missing_symbol(make_evaluated_eam_potential):
+    potential = make_evaluated_eam_potential(0.05, 160, 200)
+    cell = SimulationCell()
+    cell.a0 = 3.5
+    cell.add_atom('Cu', [0., 0., 0.])
+    with pytest.raises(ValueError):
+        EamCalculator(potential).calculate(cell)
+
+def test__calculate__densities_past_the_grid(make_evaluated_eam_potential):
+    """the embedding functions are extrapolated linearly as in LAMMPS"""
+    cell = get_triclinic_cell(np.random.RandomState(1))
+    reference = EamCalculator(make_evaluated_eam_potential(0.01, 600, 2000))
+    reference.calculate(cell)
+    species = reference.get_species(cell)
+    pair_energies = reference.energies \
+            - reference.embedding.evaluate(reference.densities, rows=species)
+
+    potential = make_evaluated_eam_potential(0.01, 600, 200)
+    calculator = EamCalculator(potential)
+    calculator.calculate(cell)
+    rho_max = potential.rho[-1]
+    assert np.all(calculator.densities > rho_max)
+    F, dF = calculator.embedding.evaluate_and_derivative(
+            np.full(cell.n_atoms, rho_max), rows=species)
+    assert np.allclose(
+            calculator.energies,
+            pair_energies + F + dF*(calculator.densities - rho_max))
+
+def test__get_forces__matches_finite_differences(make_evaluated_eam_potential):
+    potential = make_evaluated_eam_potential(0.001, 6000, 20000)
+    calculator = EamCalculator(potential)
+    cell = get_triclinic_cell(np.random.RandomState(1))
+    forces = calculator.get_forces(cell)
+    assert np.allclose(np.sum(forces, axis=0), 0.)
+
+    L = cell.a0*cell.H
+    h = 1e-3
+    for i in range(cell.n_atoms):
+        for k in range(3):
+            energies = []
+            for sign in [1, -1]:
+                _cell = SimulationCell(cell)
+                dx = np.zeros(3)
+                dx[k] = sign*h
+                _cell.positions[i] += np.linalg.solve(L.T, dx)
+                energies.append(calculator.get_potential_energy(_cell))
+            assert np.isclose(
+                    forces[i, k], -(energies[0] - energies[1])/(2*h),
+                    rtol=1e-4, atol=1e-6)
+
+def test__get_stress__matches_finite_differences(make_evaluated_eam_potential):
+    potential = make_evaluated_eam_potential(0.001, 6000, 20000)
+    calculator = EamCalculator(potential)
+    cell = get_triclinic_cell(np.random.RandomState(1))
+    stress = calculator.get_stress(cell)
+    assert np.allclose(stress, stress.T)
+    assert np.allclose(calculator.virial, -stress*np.linalg.det(cell.a0*cell.H))
+
+    volume = np.linalg.det(cell.a0*cell.H)
+    h = 1e-4
+    for a, b in [(0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (0, 2)]:
+        energies = []
+        for sign in [1, -1]:
+            strain = np.zeros((3, 3))
+            strain[a, b] += 0.5*sign*h
+            strain[b, a] += 0.5*sign*h
+            _cell = SimulationCell(cell)
+            _cell.H = cell.H.dot(np.eye(3) + strain)
+            energies.append(calculator.get_potential_energy(_cell))
+        assert np.isclose(
+                stress[a, b], (energies[0] - energies[1])/(2*h)/volume,
+                rtol=1e-4, atol=1e-7)
@@ -0,0 +1,100 @@
+import pytest
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import make_super_cell
+from mexm.calculator import EamCalculator
+from mexm.calculator import IncrementalEamCalculator
+
+def get_alloy_cell(random_state, n=3):
+    cell = SimulationCell()
+    cell.a0 = 3.6
+    for x in [[0., 0., 0.], [0., .5, .5], [.5, 0., .5], [.5, .5, 0.]]:
+        cell.add_atom('Ni', x)
+    cell = make_super_cell(cell, [n, n, n])
+    for a in cell.atomic_basis:
+        if random_state.uniform() < 0.3:
+            a.symbol = 'Al'
+    cell.positions += random_state.uniform(-0.01, 0.01, size=cell.positions.shape)
+    return cell
+
+def assert_matches_full_calculation(potential, calculator):
+    reference = EamCalculator(potential)
+    assert np.isclose(reference.calculate(calculator.cell), calculator.energy)
+    assert np.allclose(reference.energies, calculator.energies)
+    assert np.allclose(reference.densities, calculator.densities)
+
+@pytest.mark.parametrize('n', [1, 3])
+def test__monte_carlo__matches_full_calculation(
+        make_evaluated_eam_potential, n):
+    """a random sequence of accepted and rejected moves
+
+    The conventional cell, n=1, is smaller than the cutoff, so an atom
+    interacts with its own periodic images.
+    """
+    random_state = np.random.RandomState(n)
+    potential = make_evaluated_eam_potential(0.01, 600, 2000)
+    reference = EamCalculator(potential)
+    cell = get_alloy_cell(random_state, n)
+    calculator = IncrementalEamCalculator(potential, skin=0.4)
+    energy = calculator.initialize(cell)
+
+    for step in range(60):
+        if step % 2 == 0:
+            i = random_state.randint(cell.n_atoms)
+            dx = random_state.uniform(-0.1, 0.1, size=3)
+            delta_energy = calculator.propose_displacement(i, dx)
+            _cell = SimulationCell(cell)
+            _cell.positions[i] += np.linalg.solve((cell.a0*cell.H).T, dx)
+        else:
+            i, j = random_state.choice(cell.n_atoms, size=2, replace=False)
+            delta_energy = calculator.propose_swap(i, j)
+            _cell = SimulationCell(cell)
+            s_i, s_j = _cell.atomic_basis[i].symbol, _cell.atomic_basis[j].symbol
+            _cell.atomic_basis[i].symbol = s_j
+            _cell.atomic_basis[j].symbol = s_i
+        assert np.isclose(
+                delta_energy, reference.calculate(_cell) - energy, atol=1e-8)
+
+        if random_state.uniform() < 0.5:
+            energy = calculator.accept()
+        else:
+            assert calculator.reject() == energy
+    assert calculator.n_accepted + calculator.n_rejected == 60
+    assert calculator.candidate_list.n_builds > 1
+    assert_matches_full_calculation(potential, calculator)
+
+def test__reject__leaves_state(make_evaluated_eam_potential):
+    potential = make_evaluated_eam_potential(0.01, 600, 2000)
+    cell = get_alloy_cell(np.random.RandomState(0))
+    calculator = IncrementalEamCalculator(potential)
+    energy = calculator.initialize(cell)
+    positions = np.copy(cell.positions)
+    symbols = [a.symbol for a in cell.atomic_basis]
+
+    calculator.propose_displacement(0, [0.1, 0., 0.])
+    calculator.reject()
+    i_al = symbols.index('Al')
+    calculator.propose_swap(0, i_al)
+    calculator.reject()
+
+    assert calculator.energy == energy
+    assert np.array_equal(cell.positions, positions)
+    assert [a.symbol for a in cell.atomic_basis] == symbols
+    assert_matches_full_calculation(potential, calculator)
+    with pytest.raises(ValueError):
+        calculator.accept()
+
+def test__propose_displacement__larger_than_skin(make_evaluated_eam_potential):
+    potential = make_evaluated_eam_potential(0.01, 600, 2000)
+    calculator = IncrementalEamCalculator(potential, skin=0.4)
+    calculator.initialize(get_alloy_cell(np.random.RandomState(0)))
+    with pytest.raises(ValueError):
+        calculator.propose_displacement(0, [0.3, 0., 0.])
+
+def test__propose_swap__same_species(make_evaluated_eam_potential):
+    potential = make_evaluated_eam_potential(0.01, 600, 2000)
+    calculator = IncrementalEamCalculator(potential)
+    cell = get_alloy_cell(np.random.RandomState(0))
+    calculator.initialize(cell)
+    i, j = [k for k, a in enumerate(cell.atomic_basis) if a.symbol == 'Ni'][:2]
+    assert np.isclose(calculator.propose_swap(i, j), 0.)
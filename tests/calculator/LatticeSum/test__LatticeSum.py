@@ -0,0 +1,114 @@
+import pytest
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import make_super_cell
+from mexm.calculator import EamCalculator
+from mexm.calculator import LatticeSum
+
+def get_fcc_cell(a):
+    cell = SimulationCell()
+    cell.a0 = a
+    for position in [[0., 0., 0.], [0., .5, .5], [.5, 0., .5], [.5, .5, 0.]]:
+        cell.add_atom('Ni', position)
+    return make_super_cell(cell, [2, 2, 2])
+
+@pytest.mark.parametrize("lattice_type,distances,multiplicities", [
+    ('fcc', np.sqrt([0.5, 1., 1.5, 2.]), [12, 6, 24, 12]),
+    ('bcc', [np.sqrt(3.)/2., 1., np.sqrt(2.)], [8, 6, 12]),
+    ('sc', np.sqrt([1., 2., 3.]), [6, 12, 8]),
+    ('diamond', [np.sqrt(3.)/4., 1./np.sqrt(2.)], [4, 12]),
+    ('hcp', [1.], [12])])
+def test__shells(lattice_type, distances, multiplicities):
+    n = len(distances)
+    lattice_sum = LatticeSum(lattice_type, d_max=distances[-1] + 1e-3)
+    assert lattice_sum.n_shells == n
+    assert np.allclose(lattice_sum.shell_distances, distances)
+    assert np.array_equal(lattice_sum.shell_multiplicities, multiplicities)
+
+def test__get_atomic_volume():
+    assert np.isclose(LatticeSum('fcc').get_atomic_volume(2.), 2.)
+    assert np.isclose(LatticeSum('bcc').get_atomic_volume(2.), 4.)
+    assert np.isclose(LatticeSum('diamond').get_atomic_volume(2.), 1.)
+    # the ideal hcp and fcc lattices have the same nearest neighbor distance
+    # and volume per atom
+    assert np.isclose(
+            LatticeSum('hcp').get_atomic_volume(1.),
+            LatticeSum('fcc').get_atomic_volume(np.sqrt(2.)))
+
+def test__evaluate__matches_calculator(ni_eam_potential, ni_eam_parameters):
+    potential, parameters = ni_eam_potential, ni_eam_parameters
+    r = 0.001*np.arange(1, 8001)
+    rho = 0.001*np.arange(1, 50001)
+    # the shifted force cutoff of the tables is at the grid point 5.0
+    potential.evaluate(r=r, rho=rho, rcut=5.0005, parameters=parameters)
+    calculator = EamCalculator(potential)
+
+    a = np.array([3.3, 3.5, 3.7])
+    results = LatticeSum('fcc', d_max=2.).evaluate(
+            potential, a, parameters, r_cut=5.0)
+    for i, _a in enumerate(a):
+        cell = get_fcc_cell(_a)
+        calculator.calculate(cell, forces=True)
+        assert np.isclose(
+                results['energy'][i], calculator.energy/cell.n_atoms, rtol=1e-5)
+        assert np.isclose(
+                results['density'][i], calculator.densities[0], rtol=1e-5)
+        pressure = -np.trace(calculator.stress)/3.*160.21766208
+        assert np.isclose(results['pressure'][i], pressure, rtol=1e-3, atol=1e-3)
+
+def test__evaluate__candidates(ni_eam_potential, ni_eam_parameters):
+    potential, parameters = ni_eam_potential, ni_eam_parameters
+    x = potential.get_parameter_vector(parameters)
+    X = x*np.random.RandomState(0).uniform(0.9, 1.1, size=(5, x.size))
+    a = np.linspace(3.2, 3.8, 7)
+
+    lattice_sum = LatticeSum('bcc')
+    results = lattice_sum.evaluate(potential, a, X, r_cut=5.0)
+    assert results['energy'].shape == (5, 7)
+    for i in range(5):
+        _results = lattice_sum.evaluate(potential, a, X[i], r_cut=5.0)
+        for k in results:
+            assert np.allclose(results[k][i], _results[k])
+
+    # the pressure is -dE/dV
+    h = 1e-5
+    E_p = lattice_sum.evaluate(potential, a + h, X, r_cut=5.0)['energy']
+    E_m = lattice_sum.evaluate(potential, a - h, X, r_cut=5.0)['energy']
+    dV = lattice_sum.get_atomic_volume(a + h) - lattice_sum.get_atomic_volume(a - h)
+    assert np.allclose(
+            results['pressure'], -(E_p - E_m)/dV*160.21766208, rtol=1e-5, atol=1e-6)
+
+def test__get_equilibrium_properties(ni_eam_potential, ni_eam_parameters):
+    potential, parameters = ni_eam_potential, ni_eam_parameters
+    x = potential.get_parameter_vector(parameters)
+    X = x*np.random.RandomState(1).uniform(0.95, 1.05, size=(4, x.size))
+
+    lattice_sum = LatticeSum('fcc')
+    results = lattice_sum.get_equilibrium_properties(
+            potential, X, a_min=3.5, a_max=5.0, r_cut=5.0)
+    assert results['a0'].shape == (4,)
+
+    _results = lattice_sum.evaluate(
+            potential, results['a0'][:, np.newaxis], X, r_cut=5.0)
+    assert np.allclose(_results['pressure'], 0., atol=1e-6)
+    assert np.allclose(_results['energy'][:, 0], results['e_coh'])
+
+    # the bulk modulus from the curvature of E(V)
+    h = 1e-4
+    a = results['a0'][:, np.newaxis] + np.array([-h, 0., h])
+    E = lattice_sum.evaluate(potential, a, X, r_cut=5.0)['energy']
+    V = lattice_sum.get_atomic_volume(a)
+    dE_dV = np.diff(E, axis=1)/np.diff(V, axis=1)
+    d2E_dV2 = np.diff(dE_dV, axis=1)[:, 0]/(0.5*(V[:, 2] - V[:, 0]))
+    assert np.allclose(results['B'], V[:, 1]*d2E_dV2*160.21766208, rtol=1e-3)
+
+    single = lattice_sum.get_equilibrium_properties(
+            potential, parameters, a_min=3.5, a_max=5.0, r_cut=5.0)
+    assert isinstance(single['a0'], float)
+
+def test__evaluate__shells_do_not_reach_cutoff(
+        ni_eam_potential, ni_eam_parameters):
+    potential, parameters = ni_eam_potential, ni_eam_parameters
+    with pytest.raises(ValueError):
+        LatticeSum('fcc', d_max=1.).evaluate(
+                potential, np.array([3.5]), parameters, r_cut=5.0)
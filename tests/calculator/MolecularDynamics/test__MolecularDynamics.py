@@ -0,0 +1,85 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import make_super_cell
+from mexm.crystal.shells import get_lattice_basis
+from mexm.calculator import StillingerWeberCalculator
+from mexm.calculator import MolecularDynamics
+from mexm.calculator.dynamics import BOLTZMANN_CONSTANT
+
+# Stillinger and Weber, Phys. Rev. B 31, 5262 (1985)
+Si_parameters = OrderedDict([
+    ('SiSi_A', 7.049556277), ('SiSi_B', 0.6022245584), ('SiSi_p', 4.),
+    ('SiSi_q', 0.), ('SiSi_epsilon', 2.1683), ('SiSi_sigma', 2.0951),
+    ('SiSi_a', 1.80), ('SiSi_gamma', 1.20),
+    ('SiSiSi_lambda', 21.0), ('SiSiSi_costheta0', -1./3.)])
+
+def get_md(thermostat=None, temperature=None, seed=0):
+    H, basis = get_lattice_basis('diamond')
+    cell = SimulationCell()
+    cell.a0 = 5.431
+    cell.H = H
+    for x in basis:
+        cell.add_atom('Si', list(x))
+    cell = make_super_cell(cell, [2, 2, 2])
+    calculator = StillingerWeberCalculator(['Si'], Si_parameters, skin=0.5)
+    return MolecularDynamics(calculator, cell, timestep=0.001,
+            thermostat=thermostat, temperature=temperature, seed=seed)
+
+def test__initialize_velocities():
+    md = get_md()
+    md.initialize_velocities(500.)
+    assert np.isclose(md.get_temperature(), 500.)
+    assert np.allclose(np.dot(md.masses, md.velocities), 0.)
+    assert np.isclose(md.get_kinetic_energy(),
+            0.5*md.n_dof*BOLTZMANN_CONSTANT*500.)
+
+def test__run__conserves_energy():
+    md = get_md()
+    md.initialize_velocities(600.)
+    velocities = md.velocities
+    thermo = list(md.run(400, thermo_stride=100))
+
+    assert [t['step'] for t in thermo] == [0, 100, 200, 300, 400]
+    assert np.isclose(thermo[-1]['time'], 0.4)
+    total_energies = np.array([t['total_energy'] for t in thermo])
+    assert np.max(np.abs(total_energies - total_energies[0])) < 1e-3*md.cell.n_atoms
+    assert thermo[-1]['temperature'] < 500.
+
+    # the buffers are updated in place, and the cell follows the positions
+    assert md.velocities is velocities
+    assert np.allclose(
+            md.cell.positions.dot(md.cell.a0*md.cell.H), md.positions)
+    assert np.isclose(
+            md.calculator.calculate(md.cell), thermo[-1]['potential_energy'])
+    assert md.calculator.neighbor_list.n_builds < 400
+
+def test__run__momentum():
+    md = get_md()
+    md.initialize_velocities(300.)
+    for _ in md.run(50, thermo_stride=50):
+        pass
+    assert np.allclose(np.dot(md.masses, md.velocities), 0., atol=1e-8)
+
+@pytest.mark.parametrize('thermostat', ['berendsen', 'langevin'])
+def test__run__thermostat(thermostat):
+    md = get_md(thermostat=thermostat, temperature=300.)
+    md.initialize_velocities(1200.)
+    thermo = list(md.run(600, thermo_stride=10))
+    temperatures = np.array([t['temperature'] for t in thermo[30:]])
+    assert abs(np.mean(temperatures) - 300.) < 60.
+
+def test__run__pressure():
+    """the pressure of the ideal lattice is the virial of the calculator"""
+    md = get_md()
+    stress = md.calculator.get_stress(md.cell)
+    assert np.isclose(md.get_pressure(), -160.21766208*np.trace(stress)/3.)
+
+@pytest.mark.parametrize('kwargs', [
+    {'thermostat': 'nose-hoover', 'temperature': 300.},
+    {'thermostat': 'langevin'},
+])
+def test____init____bad_thermostat(kwargs):
+    with pytest.raises(ValueError):
+        get_md(**kwargs)
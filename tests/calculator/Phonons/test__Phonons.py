@@ -0,0 +1,119 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal.shells import get_lattice_basis
+from mexm.calculator import StillingerWeberCalculator
+from mexm.calculator import Phonons
+from mexm.calculator.phonons import get_q_mesh
+from mexm.calculator.dynamics import EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2
+
+# Stillinger and Weber, Phys. Rev. B 31, 5262 (1985)
+Si_parameters = OrderedDict([
+    ('SiSi_A', 7.049556277), ('SiSi_B', 0.6022245584), ('SiSi_p', 4.),
+    ('SiSi_q', 0.), ('SiSi_epsilon', 2.1683), ('SiSi_sigma', 2.0951),
+    ('SiSi_a', 1.80), ('SiSi_gamma', 1.20),
+    ('SiSiSi_lambda', 21.0), ('SiSiSi_costheta0', -1./3.)])
+
+def get_cell(lattice_type='diamond', a0=5.431):
+    H, basis = get_lattice_basis(lattice_type)
+    cell = SimulationCell()
+    cell.a0 = a0
+    cell.H = H
+    for x in basis:
+        cell.add_atom('Si', list(x))
+    return cell
+
+def get_calculator():
+    return StillingerWeberCalculator(['Si'], Si_parameters, skin=0.5)
+
+def test__displacements():
+    phonons = Phonons(get_calculator(), get_cell(), supercell=[2, 2, 2])
+
+    # the atoms of diamond are equivalent, and x, -x, y and z are related
+    # by the site symmetry
+    assert len(phonons.rotations) == 192
+    assert np.array_equal(phonons.irreducible_atoms, [0])
+    assert phonons.displacements.shape == (1, 3)
+    assert np.isclose(np.linalg.norm(phonons.displacements), 0.01)
+
+    phonons = Phonons(get_calculator(), get_cell(), supercell=[2, 2, 2],
+            use_symmetry=False)
+    assert phonons.displacements.shape == (6*phonons.n_basis, 3)
+
+@pytest.mark.parametrize('lattice_type,a0,supercell', [
+    ('diamond', 5.431, [2, 2, 2]),
+    ('hcp', 2.6, [3, 3, 2]),
+    ('bcc', 3.1, [[-1, 1, 1], [1, -1, 1], [1, 1, -1]])])
+def test__calculate_force_constants__symmetry(lattice_type, a0, supercell):
+    cell = get_cell(lattice_type, a0)
+    phonons = Phonons(get_calculator(), cell, supercell=supercell,
+            displacement=0.001)
+    reference = Phonons(get_calculator(), cell, supercell=supercell,
+            displacement=0.001, use_symmetry=False)
+
+    force_constants = phonons.calculate_force_constants()
+    assert phonons.forces.shape[0] < reference.displacements.shape[0]
+    assert np.allclose(force_constants,
+            reference.calculate_force_constants(), atol=1e-4)
+
+def test__get_frequencies__supercell_hessian():
+    calculator = get_calculator()
+    phonons = Phonons(calculator, get_cell(), supercell=[2, 2, 2])
+    frequencies = phonons.get_frequencies(get_q_mesh([2, 2, 2]))
+
+    # the q-points of a commensurate mesh are the modes of the supercell
+    cell = phonons.supercell
+    L = cell.a0*np.array(cell.H)
+    positions = np.array(cell.positions)
+    hessian = np.zeros((3*cell.n_atoms, 3*cell.n_atoms))
+    h = 0.01
+    for i in range(cell.n_atoms):
+        for k in range(3):
+            forces = []
+            for s in [h, -h]:
+                cell.positions[i] = positions[i] + s*np.linalg.inv(L)[k]
+                calculator.calculate(cell, forces=True)
+                forces.append(np.array(calculator.forces))
+            cell.positions[i] = positions[i]
+            hessian[3*i + k] = -(forces[0] - forces[1]).ravel()/(2.*h)
+    hessian = 0.5*(hessian + hessian.T)/phonons.masses[0]
+    eigenvalues = np.linalg.eigvalsh(hessian)
+    expected = np.sign(eigenvalues)*np.sqrt(np.abs(eigenvalues) \
+            *EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2)/(2.*np.pi)
+    assert np.allclose(np.sort(frequencies.ravel()), expected, atol=1e-4)
+
+def test__get_frequencies():
+    phonons = Phonons(get_calculator(), get_cell(), supercell=[3, 3, 3])
+    q = np.random.default_rng(0).uniform(-0.5, 0.5, (20, 3))
+    frequencies, eigenvectors = phonons.get_frequencies(
+            np.vstack(([0, 0, 0], q)), eigenvectors=True, chunk_size=7)
+
+    # the acoustic modes vanish at Gamma, and the crystal is stable
+    assert np.allclose(frequencies[0, :3], 0., atol=1e-3)
+    assert np.all(frequencies[1:] > 0.)
+    assert np.allclose(frequencies, phonons.get_frequencies(
+            np.vstack(([0, 0, 0], q))), atol=1e-6)
+
+    # the eigenvectors diagonalize the dynamical matrices
+    D = phonons.get_dynamical_matrices(q)
+    _l = np.einsum('qji,qjk,qki->qi', eigenvectors[1:].conj(), D, eigenvectors[1:])
+    assert np.allclose(np.sign(_l.real)*np.sqrt(np.abs(_l.real) \
+            *EV_PER_ANGSTROM_AMU_TO_ANGSTROM_PER_PS2)/(2.*np.pi), frequencies[1:])
+
+def test__get_density_of_states():
+    phonons = Phonons(get_calculator(), get_cell(), supercell=[2, 2, 2])
+    frequencies, dos = phonons.get_density_of_states(mesh=[8, 8, 8], sigma=0.2)
+
+    assert frequencies.shape == dos.shape
+    assert np.all(dos >= 0.)
+    _integral = np.sum(0.5*(dos[1:] + dos[:-1])*np.diff(frequencies))
+    assert np.isclose(_integral, 3*phonons.n_basis, rtol=1e-3)
+
+def test__get_q_mesh():
+    q = get_q_mesh([4, 4, 2])
+    assert q.shape == (32, 3)
+    assert np.all((q >= -0.5) & (q < 0.5))
+    assert np.any(np.all(q == 0., axis=1))
+    with pytest.raises(ValueError):
+        get_q_mesh([4, 4])
@@ -0,0 +1,115 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import make_super_cell
+from mexm.calculator import StillingerWeberCalculator
+
+# Stillinger and Weber, Phys. Rev. B 31, 5262 (1985)
+Si_2body_parameters = OrderedDict([
+    ('A', 7.049556277), ('B', 0.6022245584), ('p', 4.), ('q', 0.),
+    ('epsilon', 2.1683), ('sigma', 2.0951), ('a', 1.80), ('gamma', 1.20)])
+Si_3body_parameters = OrderedDict([('lambda', 21.0), ('costheta0', -1./3.)])
+
+def get_Si_parameters():
+    parameters = OrderedDict()
+    for p, v in Si_2body_parameters.items():
+        parameters['SiSi_{}'.format(p)] = v
+    for p, v in Si_3body_parameters.items():
+        parameters['SiSiSi_{}'.format(p)] = v
+    return parameters
+
+def get_SiGe_parameters():
+    """a two element potential with different parameters for each pair"""
+    parameters = OrderedDict()
+    _scale = {'SiSi': 1.0, 'SiGe': 1.05, 'GeGe': 1.1}
+    for s, x in _scale.items():
+        for p, v in Si_2body_parameters.items():
+            parameters['{}_{}'.format(s, p)] = v*x if p in ['epsilon', 'sigma'] else v
+    for s1 in ['Si', 'Ge']:
+        for s2 in ['Si', 'Ge']:
+            for s3 in ['Si', 'Ge']:
+                parameters['{}{}{}_lambda'.format(s1, s2, s3)] = \
+                        21.0 + 2.*(s1 == 'Ge') + (s2 == 'Ge') + (s3 == 'Ge')
+                parameters['{}{}{}_costheta0'.format(s1, s2, s3)] = -1./3.
+    return parameters
+
+def test__calculate__cohesive_energy(make_diamond_cell):
+    calculator = StillingerWeberCalculator(['Si'], get_Si_parameters())
+    cell = make_diamond_cell(5.431)
+    energy = calculator.calculate(cell)
+    assert np.isclose(energy/cell.n_atoms, -4.3366, atol=1e-3)
+    assert np.allclose(calculator.energies, energy/cell.n_atoms)
+
+    # a supercell has the same energy per atom
+    supercell = make_super_cell(cell, [2, 2, 2])
+    assert np.isclose(calculator.calculate(supercell), 8*energy)
+
+def test__calculate__lammps_parameter_names(make_diamond_cell):
+    parameters = OrderedDict()
+    for p, v in list(Si_2body_parameters.items()) + list(Si_3body_parameters.items()):
+        parameters['SiSiSi_{}'.format(p)] = v
+    cell = make_diamond_cell(5.3)
+    assert np.isclose(
+            StillingerWeberCalculator(['Si'], parameters).calculate(cell),
+            StillingerWeberCalculator(['Si'], get_Si_parameters()).calculate(cell))
+
+def test__calculate__missing_parameter():
+    parameters = get_Si_parameters()
+    del parameters['SiSi_gamma']
+    with pytest.raises(ValueError):
+        StillingerWeberCalculator(['Si'], parameters)
+
+def test__calculate__chunks(make_perturbed_cell):
+    cell = make_perturbed_cell(np.random.RandomState(0), 5.431, 0.03)
+    calculator = StillingerWeberCalculator(['Si', 'Ge'], get_SiGe_parameters())
+    forces = calculator.get_forces(cell)
+    energies = np.copy(calculator.energies)
+
+    calculator = StillingerWeberCalculator(
+            ['Si', 'Ge'], get_SiGe_parameters(), chunk_size=5)
+    assert np.allclose(calculator.get_forces(cell), forces)
+    assert np.allclose(calculator.energies, energies)
+
+def test__get_forces__matches_finite_differences(make_perturbed_cell):
+    calculator = StillingerWeberCalculator(['Si', 'Ge'], get_SiGe_parameters())
+    cell = make_perturbed_cell(np.random.RandomState(1), 5.431, 0.03)
+    forces = calculator.get_forces(cell)
+    assert np.allclose(np.sum(forces, axis=0), 0.)
+    assert np.max(np.abs(forces)) > 0.1
+
+    L = cell.a0*cell.H
+    h = 1e-5
+    for i in range(cell.n_atoms):
+        for k in range(3):
+            energies = []
+            for sign in [1, -1]:
+                _cell = SimulationCell(cell)
+                dx = np.zeros(3)
+                dx[k] = sign*h
+                _cell.positions[i] += np.linalg.solve(L.T, dx)
+                energies.append(calculator.get_potential_energy(_cell))
+            assert np.isclose(
+                    forces[i, k], -(energies[0] - energies[1])/(2*h),
+                    rtol=1e-5, atol=1e-6)
+
+def test__get_stress__matches_finite_differences(make_perturbed_cell):
+    calculator = StillingerWeberCalculator(['Si', 'Ge'], get_SiGe_parameters())
+    cell = make_perturbed_cell(np.random.RandomState(1), 5.431, 0.03)
+    stress = calculator.get_stress(cell)
+    assert np.allclose(stress, stress.T)
+
+    volume = np.linalg.det(cell.a0*cell.H)
+    h = 1e-5
+    for a, b in [(0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (0, 2)]:
+        energies = []
+        for sign in [1, -1]:
+            strain = np.zeros((3, 3))
+            strain[a, b] += 0.5*sign*h
+            strain[b, a] += 0.5*sign*h
+            _cell = SimulationCell(cell)
+            _cell.H = cell.H.dot(np.eye(3) + strain)
+            energies.append(calculator.get_potential_energy(_cell))
+        assert np.isclose(
+                stress[a, b], (energies[0] - energies[1])/(2*h)/volume,
+                rtol=1e-5, atol=1e-8)
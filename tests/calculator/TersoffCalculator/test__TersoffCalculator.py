@@ -0,0 +1,116 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.calculator import TersoffCalculator
+from mexm.calculator.tersoff import get_tersoff_cutoff
+
+# Tersoff, Phys. Rev. B 38, 9902 (1988), Si(C)
+Si_parameters = OrderedDict([
+    ('m', 3.), ('gamma', 1.), ('lambda3', 0.), ('c', 1.0039e5), ('d', 16.217),
+    ('costheta0', -0.59825), ('n', 0.78734), ('beta', 1.1e-6),
+    ('lambda2', 1.7322), ('B', 471.18), ('R', 2.85), ('D', 0.15),
+    ('lambda1', 2.4799), ('A', 1830.8)])
+
+def get_Si_parameters():
+    return OrderedDict(
+            ('SiSiSi_{}'.format(p), v) for p, v in Si_parameters.items())
+
+def get_SiGe_parameters():
+    """a two element potential with different parameters for each triplet"""
+    parameters = OrderedDict()
+    for s1 in ['Si', 'Ge']:
+        for s2 in ['Si', 'Ge']:
+            for s3 in ['Si', 'Ge']:
+                s = s1 + s2 + s3
+                x = 1. + 0.02*[s1, s2, s3].count('Ge')
+                for p, v in Si_parameters.items():
+                    parameters['{}_{}'.format(s, p)] = v
+                parameters['{}_lambda3'.format(s)] = 0.5*x
+                parameters['{}_R'.format(s)] = 2.85*x
+                parameters['{}_B'.format(s)] = 471.18*x
+                parameters['{}_costheta0'.format(s)] = -0.59825*x
+    return parameters
+
+def test__get_tersoff_cutoff():
+    r = np.linspace(2.5, 3.2, 71)
+    fc, dfc = get_tersoff_cutoff(r, 2.85, 0.15)
+    assert np.all(fc[r <= 2.7] == 1.)
+    assert np.all(fc[r >= 3.0] == 0.)
+    assert np.isclose(fc[np.isclose(r, 2.85)], 0.5)
+    _r = np.array([2.75, 2.8, 2.9, 2.95])
+    h = 1e-6
+    assert np.allclose(
+            get_tersoff_cutoff(_r, 2.85, 0.15)[1],
+            (get_tersoff_cutoff(_r + h, 2.85, 0.15)[0] \
+                    - get_tersoff_cutoff(_r - h, 2.85, 0.15)[0])/(2*h))
+
+def test__calculate__cohesive_energy(make_diamond_cell):
+    calculator = TersoffCalculator(['Si'], get_Si_parameters())
+    cell = make_diamond_cell(5.432)
+    energy = calculator.calculate(cell)
+    assert np.isclose(energy/cell.n_atoms, -4.63, atol=0.01)
+    assert np.allclose(calculator.energies, energy/cell.n_atoms)
+
+    # the forces vanish in the ideal lattice
+    assert np.allclose(calculator.get_forces(cell), 0., atol=1e-10)
+
+def test__calculate__missing_parameter():
+    parameters = get_Si_parameters()
+    del parameters['SiSiSi_lambda1']
+    with pytest.raises(ValueError):
+        TersoffCalculator(['Si'], parameters)
+
+def test__calculate__chunks(make_perturbed_cell):
+    cell = make_perturbed_cell(np.random.RandomState(0), 5.3, 0.04)
+    calculator = TersoffCalculator(['Si', 'Ge'], get_SiGe_parameters())
+    forces = calculator.get_forces(cell)
+    energies = np.copy(calculator.energies)
+
+    calculator = TersoffCalculator(
+            ['Si', 'Ge'], get_SiGe_parameters(), chunk_size=5)
+    assert np.allclose(calculator.get_forces(cell), forces)
+    assert np.allclose(calculator.energies, energies)
+
+def test__get_forces__matches_finite_differences(make_perturbed_cell):
+    calculator = TersoffCalculator(['Si', 'Ge'], get_SiGe_parameters())
+    cell = make_perturbed_cell(np.random.RandomState(1), 5.3, 0.04)
+    forces = calculator.get_forces(cell)
+    assert np.allclose(np.sum(forces, axis=0), 0.)
+    assert np.max(np.abs(forces)) > 0.1
+
+    L = cell.a0*cell.H
+    h = 1e-5
+    for i in range(cell.n_atoms):
+        for k in range(3):
+            energies = []
+            for sign in [1, -1]:
+                _cell = SimulationCell(cell)
+                dx = np.zeros(3)
+                dx[k] = sign*h
+                _cell.positions[i] += np.linalg.solve(L.T, dx)
+                energies.append(calculator.get_potential_energy(_cell))
+            assert np.isclose(
+                    forces[i, k], -(energies[0] - energies[1])/(2*h),
+                    rtol=1e-5, atol=1e-6)
+
+def test__get_stress__matches_finite_differences(make_perturbed_cell):
+    calculator = TersoffCalculator(['Si', 'Ge'], get_SiGe_parameters())
+    cell = make_perturbed_cell(np.random.RandomState(1), 5.3, 0.04)
+    stress = calculator.get_stress(cell)
+    assert np.allclose(stress, stress.T)
+
+    volume = np.linalg.det(cell.a0*cell.H)
+    h = 1e-5
+    for a, b in [(0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (0, 2)]:
+        energies = []
+        for sign in [1, -1]:
+            strain = np.zeros((3, 3))
+            strain[a, b] += 0.5*sign*h
+            strain[b, a] += 0.5*sign*h
+            _cell = SimulationCell(cell)
+            _cell.H = cell.H.dot(np.eye(3) + strain)
+            energies.append(calculator.get_potential_energy(_cell))
+        assert np.isclose(
+                stress[a, b], (energies[0] - energies[1])/(2*h)/volume,
+                rtol=1e-5, atol=1e-8)
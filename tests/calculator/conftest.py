@@ -0,0 +1,33 @@
+import pytest
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal.shells import get_lattice_basis
+
+def get_diamond_cell(a0, symbols=('Si',)):
+    """the conventional cell of diamond, with the symbols repeated over the
+    basis"""
+    H, basis = get_lattice_basis('diamond')
+    cell = SimulationCell()
+    cell.a0 = a0
+    cell.H = H
+    for k, x in enumerate(basis):
+        cell.add_atom(symbols[k % len(symbols)], list(x))
+    return cell
+
+def get_perturbed_cell(random_state, a0, max_displacement):
+    """a Si-Ge diamond cell with random strains and displacements"""
+    cell = get_diamond_cell(a0, symbols=('Si', 'Ge', 'Ge'))
+    cell.H = np.eye(3) + random_state.uniform(-0.03, 0.03, size=(3, 3))
+    cell.positions += random_state.uniform(
+            -max_displacement, max_displacement, size=cell.positions.shape)
+    return cell
+
+@pytest.fixture
+def make_diamond_cell():
+    """a factory of diamond cells, see get_diamond_cell"""
+    return get_diamond_cell
+
+@pytest.fixture
+def make_perturbed_cell():
+    """a factory of perturbed Si-Ge diamond cells, see get_perturbed_cell"""
+    return get_perturbed_cell
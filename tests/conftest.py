@@ -0,0 +1,53 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.potential.eam import EamPotential
+
+# a single element Morse, exponential density and universal embedding
+# potential, with an equilibrium lattice parameter close to that of Ni
+NI_EAM_PARAMETERS = OrderedDict([
+    ('p_NiNi_D0', 0.4), ('p_NiNi_a', 1.6), ('p_NiNi_r0', 2.5),
+    ('d_Ni_rho0', 1.0), ('d_Ni_beta', 4.0), ('d_Ni_r0', 2.5),
+    ('e_Ni_F0', 2.0), ('e_Ni_p', 0.5), ('e_Ni_q', 1.5), ('e_Ni_F1', 0.5),
+    ('e_Ni_rho0', 10.0)])
+
+def get_eam_potential(symbols=('Ni', 'Al'), cache=None):
+    return EamPotential(
+            symbols=list(symbols),
+            func_pair='morse',
+            func_density='eam_dens_exp',
+            func_embedding='eam_embed_universal',
+            cache=cache)
+
+def get_evaluated_eam_potential(d, n_r, n_rho, rcut=5.0):
+    """a Ni-Al potential with random parameters, evaluated on the grids
+    d, 2d, ..., n_r d of r and d, 2d, ..., n_rho d of rho"""
+    potential = get_eam_potential()
+    x = np.random.RandomState(0).uniform(
+            0.5, 2.0, size=len(potential.parameter_names))
+    parameters = OrderedDict(zip(potential.parameter_names, x))
+    r = d*np.arange(1, n_r + 1)
+    rho = d*np.arange(1, n_rho + 1)
+    potential.evaluate(r=r, rho=rho, rcut=rcut, parameters=parameters)
+    return potential
+
+@pytest.fixture
+def make_eam_potential():
+    """a factory of unevaluated EAM potentials, see get_eam_potential"""
+    return get_eam_potential
+
+@pytest.fixture
+def make_evaluated_eam_potential():
+    """a factory of evaluated Ni-Al EAM potentials, see
+    get_evaluated_eam_potential"""
+    return get_evaluated_eam_potential
+
+@pytest.fixture
+def ni_eam_potential():
+    """an unevaluated single element potential for NI_EAM_PARAMETERS"""
+    return get_eam_potential(symbols=['Ni'])
+
+@pytest.fixture
+def ni_eam_parameters():
+    """a copy of NI_EAM_PARAMETERS"""
+    return OrderedDict(NI_EAM_PARAMETERS)
@@ -0,0 +1,71 @@
+import pytest
+import itertools
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import NeighborList
+
+def get_brute_force_pairs(cell, r_cut):
+    L = cell.a0*cell.H
+    positions = np.array([a.position for a in cell.atomic_basis]).dot(L)
+    m = np.ceil(r_cut*np.linalg.norm(np.linalg.inv(L), axis=0)).astype(int) + 1
+    pairs = []
+    for i, x_i in enumerate(positions):
+        for j, x_j in enumerate(positions):
+            for shift in itertools.product(*[range(-k, k+1) for k in m]):
+                r = np.linalg.norm(x_j + np.dot(shift, L) - x_i)
+                if r < r_cut and not (i == j and shift == (0, 0, 0)):
+                    pairs.append((i, j, shift))
+    return sorted(pairs)
+
+def get_neighbor_list_pairs(neighbor_list):
+    return sorted([
+        (int(i), int(j), tuple(int(k) for k in shift))
+        for i, j, shift in zip(
+            neighbor_list.centers,
+            neighbor_list.neighbors,
+            neighbor_list.shifts)])
+
+def get_triclinic_cell(n_atoms, random_state):
+    cell = SimulationCell()
+    cell.a0 = 3.0
+    cell.H = np.eye(3) + random_state.uniform(-0.3, 0.3, size=(3, 3))
+    for i in range(n_atoms):
+        # positions outside of the unit cell are wrapped by the neighbor list
+        cell.add_atom('Ni', list(random_state.uniform(-0.5, 1.5, size=3)))
+    return cell
+
+@pytest.mark.parametrize("n_atoms,r_cut", [(1, 4.5), (3, 2.5), (6, 5.0)])
+def test__build__matches_brute_force(n_atoms, r_cut):
+    cell = get_triclinic_cell(n_atoms, np.random.RandomState(n_atoms))
+
+    neighbor_list = NeighborList(r_cut=r_cut)
+    neighbor_list.build(cell)
+
+    assert neighbor_list.offsets.shape == (n_atoms + 1,)
+    assert neighbor_list.offsets[-1] == neighbor_list.n_pairs
+    assert get_neighbor_list_pairs(neighbor_list) \
+            == get_brute_force_pairs(cell, r_cut)
+    assert np.allclose(
+            neighbor_list.distances,
+            np.linalg.norm(neighbor_list.vectors, axis=1))
+
+def test__update__verlet_skin():
+    cell = get_triclinic_cell(4, np.random.RandomState(0))
+    neighbor_list = NeighborList(r_cut=3.0, skin=0.5)
+    neighbor_list.build(cell)
+    assert neighbor_list.n_builds == 1
+
+    # small displacements reuse the binning
+    for a in cell.atomic_basis:
+        a.position = a.position + 0.01
+    assert not neighbor_list.update(cell)
+    assert neighbor_list.n_builds == 1
+    assert get_neighbor_list_pairs(neighbor_list) \
+            == get_brute_force_pairs(cell, 3.0)
+
+    # large displacements rebuild the binning
+    cell.atomic_basis[0].position = cell.atomic_basis[0].position + 0.2
+    assert neighbor_list.update(cell)
+    assert neighbor_list.n_builds == 2
+    assert get_neighbor_list_pairs(neighbor_list) \
+            == get_brute_force_pairs(cell, 3.0)
@@ -0,0 +1,128 @@
+import pytest
+import copy
+import numpy as np
+from mexm.crystal import Atom
+from mexm.crystal import SimulationCell
+
+def get_simulation_cell():
+    cell = SimulationCell()
+    cell.add_atom('Ni', [0.0, 0.0, 0.0])
+    cell.add_atom('Al', [0.5, 0.5, 0.0], magmom=1.0)
+    cell.add_atom('Ni', [0.5, 0.0, 0.5])
+    return cell
+
+def test__add_atom__arrays():
+    cell = get_simulation_cell()
+
+    assert cell.n_atoms == 3
+    assert cell.symbols == ['Ni', 'Al']
+    assert cell.positions.shape == (3, 3)
+    assert cell.positions.dtype == np.float64
+    np.testing.assert_array_equal(cell.species, [0, 1, 0])
+    np.testing.assert_array_equal(cell.magnetic_moments, [0., 1., 0.])
+    assert cell.get_number_of_atoms('Ni') == 2
+
+def test__add_atom__duplicate():
+    cell = get_simulation_cell()
+    with pytest.raises(ValueError):
+        cell.add_atom('Ni', [0.0, 0.0, 0.0])
+
+def test__atomic_basis__views():
+    cell = get_simulation_cell()
+
+    atom = cell.atomic_basis[1]
+    assert isinstance(atom, Atom)
+    assert atom.symbol == 'Al'
+    assert atom.magmom == 1.0
+
+    # the position of the atom is a view into the positions of the cell
+    atom.position[0] = 0.25
+    assert cell.positions[1, 0] == 0.25
+    atom.position = [0.1, 0.2, 0.3]
+    np.testing.assert_array_equal(cell.positions[1], [0.1, 0.2, 0.3])
+
+    # copies of the atomic basis are detached from the cell
+    atomic_basis = copy.deepcopy(cell.atomic_basis)
+    atomic_basis[1].position[0] = 0.9
+    assert cell.positions[1, 0] == 0.1
+
+def test__atomic_basis__setter():
+    cell = SimulationCell()
+    cell.atomic_basis = [Atom('Ni', [0., 0., 0.]), Atom('O', [0.5, 0.5, 0.5])]
+    assert cell.n_atoms == 2
+    assert cell.symbols == ['Ni', 'O']
+
+def test__remove_atom():
+    cell = get_simulation_cell()
+    cell.remove_atom('Al', [0.5, 0.5, 0.0])
+
+    assert cell.n_atoms == 2
+    assert cell.symbols == ['Ni']
+    np.testing.assert_array_equal(
+            cell.positions, [[0.0, 0.0, 0.0], [0.5, 0.0, 0.5]])
+
+    with pytest.raises(ValueError):
+        cell.remove_atom('Al', [0.5, 0.5, 0.0])
+
+def test__add_atoms__bulk():
+    n_atoms = 1000
+    positions = np.random.RandomState(0).rand(n_atoms, 3)
+    symbols = ['Ni']*n_atoms
+
+    cell = SimulationCell()
+    cell.add_atoms(symbols=symbols, positions=positions, check_if_atoms_exist=False)
+
+    assert cell.n_atoms == n_atoms
+    np.testing.assert_array_equal(cell.positions, positions)
+
+def test____init____copy():
+    cell = get_simulation_cell()
+    cell_copy = SimulationCell(cell)
+
+    np.testing.assert_array_equal(cell_copy.positions, cell.positions)
+    assert cell_copy.symbols == cell.symbols
+
+    cell_copy.positions[0] = 0.25
+    np.testing.assert_array_equal(cell.positions[0], [0., 0., 0.])
+
+def test__check_if_atom_exists_at_position__after_remove_atom():
+    cell = get_simulation_cell()
+    cell.remove_atom('Ni', [0.0, 0.0, 0.0])
+
+    assert cell.n_atoms == 2
+    assert cell.check_if_atom_exists_at_position('Ni', [0.5, 0.0, 0.5]) == (True, 1)
+    assert cell.check_if_atom_exists_at_position('Ni', [0.0, 0.0, 0.0]) == (False, None)
+
+    cell.add_atom('Ni', [0.0, 0.0, 0.0])
+    assert cell.check_if_atom_exists_at_position('Ni', [0.0, 0.0, 0.0]) == (True, 2)
+    assert cell.symbols == ['Ni', 'Al']
+
+def test__check_if_atom_exists_at_position__after_positions_changed():
+    cell = get_simulation_cell()
+    assert cell.check_if_atom_exists_at_position('Ni', [0.5, 0.5, 0.0]) == (True, 1)
+
+    cell.positions[1] = [0.25, 0.25, 0.25]
+    assert cell.check_if_atom_exists_at_position('Ni', [0.5, 0.5, 0.0]) == (False, None)
+    assert cell.check_if_atom_exists_at_position('Ni', [0.25, 0.25, 0.25]) == (True, 1)
+
+def test__add_atom__periodic_duplicate():
+    cell = get_simulation_cell()
+    with pytest.raises(ValueError):
+        cell.add_atom('Ni', [1.0, 0.0, 0.0])
+
+def test__add_atom__positions_read():
+    cell = get_simulation_cell()
+    cell.add_atom('Ni', [0.25, 0.25, 0.25])
+    spatial_hash = cell._get_spatial_hash()
+
+    # reading the positions does not rebuild the spatial hash
+    np.testing.assert_array_equal(cell.atomic_basis[-1].position, [0.25, 0.25, 0.25])
+    cell.add_atom('Ni', [0.75, 0.75, 0.75])
+    assert cell._get_spatial_hash() is spatial_hash
+
+    # writing through the view of a read is found before the next insert
+    position = cell.atomic_basis[-1].position
+    position[:] = [0.6, 0.6, 0.6]
+    cell.add_atom('Ni', [0.75, 0.75, 0.75])
+    with pytest.raises(ValueError):
+        cell.add_atom('Al', [0.6, 0.6, 0.6])
@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+from mexm.crystal.spatialhash import SpatialHash
+
+def get_positions():
+    return np.array([
+        [0.0, 0.0, 0.0],
+        [0.5, 0.5, 0.0],
+        [0.5, 0.0, 0.5],
+        [0.0, 0.5, 0.5]])
+
+def test____init__():
+    spatial_hash = SpatialHash(ptol=1e-3)
+    assert spatial_hash.n_buckets == 1000
+    assert spatial_hash.buckets == {}
+
+@pytest.mark.parametrize('position,expected',[
+    ([0.5, 0.5, 0.0], [1]),
+    ([0.5005, 0.4995, 0.0], [1]),
+    ([0.0, 0.0, 1.0], [0]),
+    ([0.9995, 0.0, 0.0], [0]),
+    ([0.25, 0.25, 0.25], [])])
+def test__query(position, expected):
+    positions = get_positions()
+    spatial_hash = SpatialHash(ptol=1e-3)
+    spatial_hash.build(positions)
+    assert spatial_hash.query(position, positions) == expected
+
+def test__build__is_excluded():
+    positions = get_positions()
+    spatial_hash = SpatialHash(ptol=1e-3)
+    spatial_hash.build(positions, is_excluded=np.array([False, True, False, False]))
+    assert spatial_hash.query([0.5, 0.5, 0.0], positions) == []
+
+def test__add__remove():
+    positions = get_positions()
+    spatial_hash = SpatialHash(ptol=1e-3)
+    for i, x in enumerate(positions):
+        spatial_hash.add(i, x)
+    assert spatial_hash.query([0.0, 0.5, 0.5], positions) == [3]
+
+    spatial_hash.remove(3, positions[3])
+    assert spatial_hash.query([0.0, 0.5, 0.5], positions) == []
+
+def test__build__matches_brute_force():
+    positions = np.random.RandomState(0).rand(500, 3)
+    spatial_hash = SpatialHash(ptol=0.05)
+    spatial_hash.build(positions)
+    for x in positions[:50]:
+        d = positions - x
+        d = d - np.round(d)
+        expected = np.flatnonzero(np.max(np.abs(d), axis=1) < 0.05).tolist()
+        assert spatial_hash.query(x, positions) == expected
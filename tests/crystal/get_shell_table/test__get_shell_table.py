@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import NeighborList
+from mexm.crystal import make_super_cell
+from mexm.crystal import get_shell_table
+from mexm.crystal import get_fcc_nearest_neighbor_distance
+from mexm.crystal.shells import get_lattice_basis
+
+expected_shells = {
+    'fcc': ([0.5, 1.0, 1.5, 2.0, 2.5, 3.0], [12, 6, 24, 12, 24, 8]),
+    'bcc': ([0.75, 1.0, 2.0, 2.75, 3.0, 4.0], [8, 6, 12, 24, 8, 6]),
+    'sc': ([1.0, 2.0, 3.0, 4.0, 5.0, 6.0], [6, 12, 8, 6, 24, 24]),
+    'hcp': ([1.0, 2.0, 8./3., 3.0, 11./3., 4.0], [12, 6, 2, 18, 12, 6]),
+    'diamond': ([3./16., 0.5, 11./16., 1.0, 19./16., 1.5], [4, 12, 12, 6, 12, 24]),
+}
+
+@pytest.mark.parametrize('lattice_type', list(expected_shells))
+def test__get_shell_table(lattice_type):
+    d2, n = expected_shells[lattice_type]
+    shells = get_shell_table(lattice_type, n_shells=6)
+
+    assert shells.n_shells == 6
+    assert np.allclose(shells.distances, np.sqrt(d2))
+    assert np.array_equal(shells.multiplicities, n)
+    assert shells.vectors.shape == (sum(n), 3)
+    assert np.array_equal(np.bincount(shells.shell_indices), n)
+
+@pytest.mark.parametrize('lattice_type', list(expected_shells))
+def test__get_shell_table__neighbor_list(lattice_type):
+    """the shells agree with the neighbors of a periodic cell"""
+    H, basis = get_lattice_basis(lattice_type)
+    cell = SimulationCell()
+    cell.a0 = 1.0
+    cell.H = H
+    for x in basis:
+        cell.add_atom('Ni', x)
+    cell = make_super_cell(cell, [3, 3, 3])
+
+    shells = get_shell_table(lattice_type, n_shells=4)
+    neighbors = NeighborList(r_cut=shells.distances[-1] + 1e-3)
+    neighbors.update(cell)
+    d = np.sort(neighbors.distances[neighbors.centers == 0])
+    assert np.allclose(d, np.repeat(shells.distances, shells.multiplicities))
+
+def test__get_shell_table__memoized():
+    shells = get_shell_table('fcc', n_shells=10)
+    assert get_shell_table('fcc', n_shells=10) is shells
+    assert not shells.distances.flags.writeable
+    with pytest.raises(ValueError):
+        shells.distances[0] = 0.
+
+def test__get_shell_table__d_max():
+    shells = get_shell_table('bcc', d_max=1.0)
+    assert np.allclose(shells.distances, [np.sqrt(0.75), 1.0])
+    assert np.array_equal(shells.multiplicities, [8, 6])
+
+def test__get_shell_table__many_shells():
+    shells = get_shell_table('fcc', n_shells=40)
+    assert shells.n_shells == 40
+    # the shells of fcc are at a*sqrt(m/2)
+    assert np.allclose(2.*shells.distances**2, np.round(2.*shells.distances**2))
+
+def test__get_shell_table__volume_factor():
+    assert np.isclose(get_shell_table('fcc', n_shells=1).volume_factor, 0.25)
+    assert np.isclose(get_shell_table('bcc', n_shells=1).volume_factor, 0.5)
+    assert np.isclose(get_shell_table('diamond', n_shells=1).volume_factor, 0.125)
+    assert np.isclose(
+            get_shell_table('hcp', n_shells=1).volume_factor, 1./np.sqrt(2.))
+
+@pytest.mark.parametrize('kwargs', [
+    {'lattice_type': 'fcc'},
+    {'lattice_type': 'fcc', 'n_shells': 2, 'd_max': 2.},
+    {'lattice_type': 'bct', 'n_shells': 2},
+    {'lattice_type': 'fcc', 'n_shells': 0},
+])
+def test__get_shell_table__bad_arguments(kwargs):
+    with pytest.raises(ValueError):
+        get_shell_table(**kwargs)
+
+def test__get_fcc_nearest_neighbor_distance():
+    a0 = 3.52
+    assert np.isclose(get_fcc_nearest_neighbor_distance(a0, 1), a0/np.sqrt(2.))
+    assert np.isclose(get_fcc_nearest_neighbor_distance(a0, 3), a0*np.sqrt(1.5))
+    assert np.isclose(get_fcc_nearest_neighbor_distance(a0, 8), a0*2.)
+    assert np.isclose(
+            get_fcc_nearest_neighbor_distance(a0, 1.5), a0*(1. + 1./np.sqrt(2.))/2.)
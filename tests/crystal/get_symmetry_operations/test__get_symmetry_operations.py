@@ -0,0 +1,51 @@
+import pytest
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import get_symmetry_operations
+from mexm.crystal.shells import get_lattice_basis
+
+expected_n_operations = {
+    'fcc': 192,
+    'bcc': 96,
+    'sc': 48,
+    'hcp': 24,
+    'diamond': 192,
+}
+
+def get_cell(lattice_type, symbols=None):
+    H, basis = get_lattice_basis(lattice_type)
+    cell = SimulationCell()
+    cell.a0 = 3.
+    cell.H = H
+    for k, x in enumerate(basis):
+        cell.add_atom('Ni' if symbols is None else symbols[k], list(x))
+    return cell
+
+@pytest.mark.parametrize('lattice_type', list(expected_n_operations))
+def test__get_symmetry_operations(lattice_type):
+    cell = get_cell(lattice_type)
+    rotations, translations, permutations = get_symmetry_operations(cell)
+
+    assert rotations.shape == (expected_n_operations[lattice_type], 3, 3)
+    assert np.all(np.abs(np.linalg.det(rotations)) == 1)
+
+    # each operation maps every atom onto its permuted atom
+    x = np.array(cell.positions)
+    _x = np.einsum('nij,bj->nbi', rotations, x) + translations[:, np.newaxis, :]
+    _dx = _x - x[permutations]
+    assert np.allclose(_dx, np.round(_dx))
+
+def test__get_symmetry_operations__species():
+    # rocksalt in the conventional cell of the B1 structure
+    H, _ = get_lattice_basis('sc')
+    cell = SimulationCell()
+    cell.a0 = 5.
+    cell.H = H
+    for x in [[0, 0, 0], [0, .5, .5], [.5, 0, .5], [.5, .5, 0]]:
+        cell.add_atom('Na', x)
+        cell.add_atom('Cl', list(np.array(x) + [.5, 0, 0]))
+    rotations, translations, permutations = get_symmetry_operations(cell)
+
+    assert rotations.shape[0] == 192
+    species = np.array(cell.species)
+    assert np.all(species[permutations] == species)
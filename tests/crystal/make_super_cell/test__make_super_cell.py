@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+from mexm.crystal import SimulationCell
+from mexm.crystal import make_super_cell
+from mexm.crystal import get_super_cell_translations
+
+def get_fcc_cell():
+    cell = SimulationCell()
+    cell.a0 = 3.52
+    cell.add_atom('Ni', [0.0, 0.0, 0.0])
+    cell.add_atom('Al', [0.5, 0.5, 0.0], magmom=1.0)
+    cell.add_atom('Ni', [0.5, 0.0, 0.5])
+    cell.add_atom('Ni', [0.0, 0.5, 0.5])
+    return cell
+
+def test__get_super_cell_translations__diagonal():
+    translations = get_super_cell_translations(np.diag([2, 1, 3]))
+    expected = [[i, j, k] for i in range(2) for j in range(1) for k in range(3)]
+    np.testing.assert_array_equal(translations, expected)
+
+def test__get_super_cell_translations__singular():
+    with pytest.raises(ValueError):
+        get_super_cell_translations(np.zeros((3, 3), dtype=int))
+
+def test__make_super_cell__diagonal():
+    cell = get_fcc_cell()
+    supercell = make_super_cell(structure=cell, sc=[2, 3, 4])
+
+    assert supercell.structure_comment == "2x3x4"
+    assert supercell.a0 == cell.a0
+    assert supercell.n_atoms == 2*3*4*cell.n_atoms
+    assert supercell.symbols == ['Ni', 'Al']
+    np.testing.assert_array_equal(supercell.H, np.diag([2., 3., 4.]))
+
+    # the images are ordered by translation, then by basis atom
+    np.testing.assert_array_equal(supercell.positions[:4], cell.positions/[2, 3, 4])
+    np.testing.assert_array_equal(supercell.positions[4], [0., 0., 0.25])
+    np.testing.assert_array_equal(
+            supercell.magnetic_moments, np.tile(cell.magnetic_moments, 24))
+
+@pytest.mark.parametrize('sc',[
+    [[0, 1, 1], [1, 0, 1], [1, 1, 0]],
+    [[1, -1, 0], [1, 1, 0], [0, 0, 2]],
+    [[2, 1, 0], [0, 1, 0], [0, 0, -1]]])
+def test__make_super_cell__nondiagonal(sc):
+    cell = get_fcc_cell()
+    supercell = make_super_cell(structure=cell, sc=sc)
+
+    n_cells = abs(int(round(np.linalg.det(sc))))
+    assert supercell.n_atoms == n_cells*cell.n_atoms
+    np.testing.assert_array_equal(supercell.H, np.dot(sc, cell.H))
+    assert np.all(supercell.positions >= 0.)
+    assert np.all(supercell.positions < 1.)
+
+    # every image is distinct, and is a lattice site of the base structure
+    cartesian = supercell.positions.dot(supercell.H)
+    d = cartesian[:, np.newaxis, :] - cartesian[np.newaxis, :, :]
+    d = np.linalg.solve(supercell.H.T, d.reshape(-1, 3).T).T
+    d = d - np.round(d)
+    d = np.max(np.abs(d.reshape(supercell.n_atoms, supercell.n_atoms, 3)), axis=2)
+    assert np.count_nonzero(d < 1e-6) == supercell.n_atoms
+
+    direct = np.linalg.solve(np.array(cell.H, dtype=float).T, cartesian.T).T
+    d = direct[:, np.newaxis, :] - cell.positions[np.newaxis, :, :]
+    assert np.all(np.any(np.all(np.abs(d - np.round(d)) < 1e-8, axis=2), axis=1))
@@ -0,0 +1,233 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.io.eamtools import EamSetflFile
+
+def write_setfl_file(filename, symbols, N_rho=20, N_r=30):
+    """write a setfl file with random tables, returning the tables"""
+    random_state = np.random.RandomState(0)
+    d_rho = 0.1
+    d_r = 0.2
+    r = N_r*d_r*np.linspace(1, N_r, N_r)/N_r
+
+    def get_lines(values):
+        return ["".join("{:+24.16E}".format(v) for v in values[i:i+5])
+                for i in range(0, values.size, 5)]
+
+    lines = ['comment 1', 'comment 2', 'comment 3']
+    lines.append(" ".join([str(len(symbols))] + symbols))
+    lines.append("{:5d} {:+24.16E} {:5d} {:+24.16E} {:+24.16E}".format(
+        N_rho, d_rho, N_r, d_r, N_r*d_r))
+
+    tables = OrderedDict()
+    for s in symbols:
+        embedding = random_state.randn(N_rho)
+        density = random_state.randn(N_r)
+        tables[s] = (embedding, density)
+        lines.append("{:5d}{:+24.16E}{:+24.16E} fcc".format(28, 58.71, 3.52))
+        lines += get_lines(embedding)
+        lines += get_lines(density)
+    for i1, s1 in enumerate(symbols):
+        for i2, s2 in enumerate(symbols):
+            if i1 <= i2:
+                pair = random_state.randn(N_r)
+                tables['{}.{}'.format(s1, s2)] = pair
+                lines += get_lines(r*pair)
+
+    with open(filename, 'w') as f:
+        f.write("\n".join(lines))
+    return tables
+
+def test__read_bulk__single_element_matches_read(tmpdir):
+    filename = str(tmpdir.join('Ni.eam.alloy'))
+    write_setfl_file(filename, ['Ni'], N_rho=30, N_r=30)
+
+    setfl_lines = EamSetflFile()
+    setfl_lines.read(filename)
+    setfl_bulk = EamSetflFile()
+    setfl_bulk.read_bulk(filename)
+
+    assert setfl_bulk.comments == setfl_lines.comments
+    assert setfl_bulk.symbols == setfl_lines.symbols
+    assert setfl_bulk.symbol_dict == setfl_lines.symbol_dict
+    assert np.array_equal(setfl_bulk.r, setfl_lines.r)
+    assert np.array_equal(setfl_bulk.rho, setfl_lines.rho)
+    assert np.array_equal(
+            setfl_bulk.func_embedding['Ni'], setfl_lines.func_embedding['Ni'])
+    assert np.array_equal(
+            setfl_bulk.func_density['Ni'], setfl_lines.func_density['Ni'])
+    assert np.array_equal(
+            setfl_bulk.func_pairpotential['Ni.Ni'],
+            setfl_lines.func_pairpotential['Ni.Ni'])
+
+def test__read_bulk__multiple_elements(tmpdir):
+    filename = str(tmpdir.join('NiAlCu.eam.alloy'))
+    symbols = ['Ni', 'Al', 'Cu']
+    tables = write_setfl_file(filename, symbols)
+
+    setfl = EamSetflFile()
+    setfl.read_bulk(filename)
+
+    assert setfl.symbols == symbols
+    for s in symbols:
+        assert np.array_equal(setfl.func_embedding[s], tables[s][0])
+        assert np.array_equal(setfl.func_density[s], tables[s][1])
+    assert list(setfl.func_pairpotential.keys()) \
+            == ['Ni.Ni', 'Ni.Al', 'Ni.Cu', 'Al.Al', 'Al.Cu', 'Cu.Cu']
+    for k, v in setfl.func_pairpotential.items():
+        assert np.allclose(v, tables[k])
+
+def test__read_bulk__truncated_file(tmpdir):
+    filename = str(tmpdir.join('Ni.eam.alloy'))
+    write_setfl_file(filename, ['Ni'])
+    with open(filename, 'r') as f:
+        lines = f.readlines()
+    with open(filename, 'w') as f:
+        f.write("".join(lines[:-2]))
+
+    setfl = EamSetflFile()
+    with pytest.raises(ValueError):
+        setfl.read_bulk(filename)
+
+def test__read_cached(tmpdir):
+    filename = str(tmpdir.join('NiAl.eam.alloy'))
+    write_setfl_file(filename, ['Ni', 'Al'])
+
+    setfl_bulk = EamSetflFile()
+    setfl_bulk.read_bulk(filename)
+
+    # the first read writes the sidecar
+    setfl = EamSetflFile()
+    assert not setfl.read_sidecar(filename)
+    setfl.read_cached(filename)
+    assert tmpdir.join('NiAl.eam.alloy.bin').check()
+
+    # the second read memory-maps the sidecar
+    setfl_cached = EamSetflFile()
+    assert setfl_cached.read_sidecar(filename)
+    assert isinstance(setfl_cached.r, np.memmap)
+    assert setfl_cached.comments == setfl_bulk.comments
+    assert setfl_cached.symbol_dict == setfl_bulk.symbol_dict
+    assert np.array_equal(setfl_cached.r, setfl_bulk.r)
+    assert np.array_equal(setfl_cached.rho, setfl_bulk.rho)
+    for s in ['Ni', 'Al']:
+        assert np.array_equal(
+                setfl_cached.func_embedding[s], setfl_bulk.func_embedding[s])
+        assert np.array_equal(
+                setfl_cached.func_density[s], setfl_bulk.func_density[s])
+    for k, v in setfl_bulk.func_pairpotential.items():
+        assert np.array_equal(setfl_cached.func_pairpotential[k], v)
+
+def test__read_sidecar__stale(tmpdir):
+    filename = str(tmpdir.join('Ni.eam.alloy'))
+    write_setfl_file(filename, ['Ni'])
+    EamSetflFile().read_cached(filename)
+
+    with open(filename, 'a') as f:
+        f.write("\n")
+    assert not EamSetflFile().read_sidecar(filename)
+
+def test__read_cached__read_only_directory(tmpdir, monkeypatch):
+    import tempfile
+    filename = str(tmpdir.join('Ni.eam.alloy'))
+    tables = write_setfl_file(filename, ['Ni'])
+
+    def mkstemp(*args, **kwargs):
+        raise PermissionError(13, 'Permission denied')
+    monkeypatch.setattr(tempfile, 'mkstemp', mkstemp)
+
+    setfl = EamSetflFile()
+    setfl.read_cached(filename)
+    assert not tmpdir.join('Ni.eam.alloy.bin').check()
+    assert np.array_equal(setfl.func_embedding['Ni'], tables['Ni'][0])
+    assert np.array_equal(setfl.func_density['Ni'], tables['Ni'][1])
+
+def test__write_sidecar__temporary_file(tmpdir):
+    import os
+    filename = str(tmpdir.join('Ni.eam.alloy'))
+    write_setfl_file(filename, ['Ni'])
+    os.chmod(filename, 0o644)
+    EamSetflFile().read_cached(filename)
+
+    assert sorted(os.listdir(str(tmpdir))) == ['Ni.eam.alloy', 'Ni.eam.alloy.bin']
+    assert os.stat(str(tmpdir.join('Ni.eam.alloy.bin'))).st_mode & 0o777 == 0o644
+
+def get_setfl_tables(N=100):
+    random_state = np.random.RandomState(0)
+    r = np.linspace(0.1, 10., N)
+    rho = np.linspace(0.1, 100., N)
+    pair = OrderedDict([('NiNi', random_state.randn(N))])
+    embedding = OrderedDict([('Ni', random_state.randn(N))])
+    density = OrderedDict([('Ni', random_state.randn(N))])
+    return dict(
+            symbols=['Ni'],
+            r=r,
+            rcut=10.,
+            rho=rho,
+            pair=pair,
+            embedding=embedding,
+            density=density)
+
+def test__write_bulk__matches_write(tmpdir):
+    filename_write = str(tmpdir.join('write.eam.alloy'))
+    filename_bulk = str(tmpdir.join('bulk.eam.alloy'))
+    EamSetflFile().write(filename=filename_write, **get_setfl_tables())
+    EamSetflFile().write_bulk(
+            filename=filename_bulk,
+            n_lines_per_chunk=3,
+            **get_setfl_tables())
+
+    with open(filename_write, 'rb') as f:
+        str_write = f.read()
+    with open(filename_bulk, 'rb') as f:
+        str_bulk = f.read()
+    assert str_bulk == str_write
+
+def test__write_bulk__file_descriptor(tmpdir):
+    import os
+    filename_write = str(tmpdir.join('write.eam.alloy'))
+    filename_bulk = str(tmpdir.join('bulk.eam.alloy'))
+    EamSetflFile().write(filename=filename_write, **get_setfl_tables())
+
+    fd = os.open(filename_bulk, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    EamSetflFile().write_bulk(filename=fd, **get_setfl_tables())
+    os.close(fd)
+
+    with open(filename_write, 'rb') as f:
+        str_write = f.read()
+    with open(filename_bulk, 'rb') as f:
+        str_bulk = f.read()
+    assert str_bulk == str_write
+
+@pytest.mark.parametrize('write_method', ['write', 'write_bulk'])
+def test__write_sidecar__after_write(tmpdir, write_method):
+    filename = str(tmpdir.join('Ni.eam.alloy'))
+    tables = get_setfl_tables()
+    setfl = EamSetflFile()
+    getattr(setfl, write_method)(filename=filename, **tables)
+    setfl.write_sidecar(filename)
+
+    setfl_bulk = EamSetflFile()
+    setfl_bulk.read_bulk(filename)
+    setfl_cached = EamSetflFile()
+    setfl_cached.read_cached(filename)
+    assert isinstance(setfl_cached.r, np.memmap)
+    assert setfl_cached.comments == setfl_bulk.comments
+    assert setfl_cached.symbol_dict == setfl_bulk.symbol_dict
+    assert np.array_equal(setfl_cached.r, tables['r'])
+    assert np.array_equal(setfl_cached.rho, tables['rho'])
+    assert np.array_equal(
+            setfl_cached.func_embedding['Ni'], tables['embedding']['Ni'])
+    assert np.array_equal(
+            setfl_cached.func_density['Ni'], tables['density']['Ni'])
+    assert np.allclose(
+            setfl_cached.func_pairpotential['Ni.Ni'], tables['pair']['NiNi'])
+    assert np.allclose(
+            setfl_cached.func_pairpotential['Ni.Ni'],
+            setfl_bulk.func_pairpotential['Ni.Ni'])
+
+def test__write__sidecar(tmpdir):
+    filename = str(tmpdir.join('Ni.eam.alloy'))
+    EamSetflFile().write(filename=filename, sidecar=True, **get_setfl_tables())
+    assert tmpdir.join('Ni.eam.alloy.bin').check()
+    assert EamSetflFile().read_sidecar(filename)
@@ -1,5 +1,6 @@
 import pytest
 from collections import OrderedDict
+import numpy as np
 from mexm.potential import BuckinghamPotential
 
 def test__static_variables():
@@ -112,6 +113,77 @@ def test__gulp_potential_section_to_string():
     s = potential.gulp_potential_section_to_string(parameters=parameters)
     assert isinstance(s, str)
 
+def test__evaluate_batch():
+    symbols = ['Mg', 'O']
+    parameters = OrderedDict([
+        ('cutoff',12.0),
+        ('Mg_chrg', +2.),
+        ('O_chrg', -2.),
+        ('MgMg_A',10000.),
+        ('MgMg_rho', 500.),
+        ('MgMg_C', 200.),
+        ('MgMg_cutoff', 12.),
+        ('MgO_A',10000.),
+        ('MgO_rho', 500.),
+        ('MgO_C', 200.),
+        ('MgO_cutoff', 12.),
+        ('OO_A',10000.),
+        ('OO_rho', 500.),
+        ('OO_C', 200.),
+        ('OO_cutoff', 12.)
+    ])
+    r = np.linspace(1., 10., 100)
+
+    potential = BuckinghamPotential(symbols=symbols)
+    values, evaluations = potential.evaluate_batch(r=r, parameters=parameters)
+
+    assert values.shape == (3, r.size)
+    assert list(evaluations.keys()) == ['MgMg', 'MgO', 'OO']
+    for i, pair_name in enumerate(evaluations):
+        assert np.shares_memory(evaluations[pair_name], values)
+        np.testing.assert_allclose(
+            evaluations[pair_name],
+            10000.*np.exp(-r/500.) - 200./r**6)
+
+def test__evaluate_batch_and_derivative():
+    symbols = ['Mg', 'O']
+    parameters = OrderedDict([
+        ('cutoff',12.0),
+        ('Mg_chrg', +2.),
+        ('O_chrg', -2.),
+        ('MgMg_A',10000.),
+        ('MgMg_rho', 0.3),
+        ('MgMg_C', 200.),
+        ('MgMg_cutoff', 12.),
+        ('MgO_A',10000.),
+        ('MgO_rho', 0.3),
+        ('MgO_C', 200.),
+        ('MgO_cutoff', 12.),
+        ('OO_A',10000.),
+        ('OO_rho', 0.3),
+        ('OO_C', 200.),
+        ('OO_cutoff', 12.)
+    ])
+    r = np.linspace(1., 10., 91)
+
+    potential = BuckinghamPotential(symbols=symbols)
+    values, derivatives = potential.evaluate_batch_and_derivative(
+            r=r, parameters=parameters)
+
+    assert values.shape == derivatives.shape == (3, r.size)
+    assert list(potential.derivative_evaluations.keys()) == ['MgMg', 'MgO', 'OO']
+    np.testing.assert_allclose(
+        potential.derivative_evaluations['MgO'],
+        -10000.*np.exp(-r/0.3)/0.3 + 6*200./r**7)
+
+    # the shifted force cutoff goes to zero with zero slope
+    values, derivatives = potential.evaluate_batch_and_derivative(
+            r=r, parameters=parameters, r_cut=8.)
+    np.testing.assert_array_equal(values[:, r >= 7.95], 0.)
+    np.testing.assert_array_equal(derivatives[:, r >= 7.95], 0.)
+    np.testing.assert_allclose(
+        values, potential.evaluate_batch(r=r, parameters=parameters, r_cut=8.)[0])
+
 def dev__gulp_potential_section_to_string():
     symbols = ['Mg', 'O']
     potential = BuckinghamPotential(symbols=symbols)
@@ -0,0 +1,235 @@
+import pytest
+import copy
+from collections import OrderedDict
+import numpy as np
+from mexm.potential.evaluation_cache import EvaluationCache
+
+def test__evaluate_population(make_eam_potential):
+    potential = make_eam_potential()
+    parameter_names = potential.parameter_names
+    free_parameter_names = parameter_names[:-1]
+    constrained_parameters = {parameter_names[-1]: 1.3}
+
+    n_candidates = 4
+    X = np.random.RandomState(0).uniform(
+            0.5, 2.0, size=(n_candidates, len(free_parameter_names)))
+    r = np.linspace(0.1, 8.0, 100)
+    rho = np.linspace(0.01, 10.0, 50)
+    rcut = 6.0
+
+    pair, density, embedding = potential.evaluate_population(
+            r=r,
+            rho=rho,
+            rcut=rcut,
+            parameters=X,
+            parameter_names=free_parameter_names,
+            constrained_parameters=constrained_parameters)
+
+    assert pair.shape == (n_candidates, 3, r.size)
+    assert density.shape == (n_candidates, 2, r.size)
+    assert embedding.shape == (n_candidates, 2, rho.size)
+
+    for i in range(n_candidates):
+        parameters = OrderedDict(zip(free_parameter_names, X[i]))
+        parameters.update(constrained_parameters)
+        potential.evaluate(r=r, rho=rho, rcut=rcut, parameters=parameters)
+        for j, pair_name in enumerate(potential.obj_pair.pair_names):
+            assert np.allclose(potential.pair[pair_name], pair[i, j])
+        for j, s in enumerate(potential.symbols):
+            assert np.allclose(potential.density[s], density[i, j])
+            assert np.allclose(potential.embedding[s], embedding[i, j])
+
+def test__evaluate_population__missing_parameter(make_eam_potential):
+    potential = make_eam_potential()
+    free_parameter_names = potential.parameter_names[:-1]
+    X = np.ones((2, len(free_parameter_names)))
+    with pytest.raises(ValueError):
+        potential.evaluate_population(
+                r=np.linspace(0.1, 8.0, 10),
+                rho=np.linspace(0.01, 10.0, 10),
+                rcut=6.0,
+                parameters=X,
+                parameter_names=free_parameter_names)
+
+def test__evaluate_jacobian(make_eam_potential):
+    potential = make_eam_potential()
+    parameter_names = potential.parameter_names
+    x = np.random.RandomState(0).uniform(0.5, 2.0, size=len(parameter_names))
+    r = np.linspace(0.5, 8.0, 100)
+    rho = np.linspace(0.01, 10.0, 50)
+    rcut = 6.0
+
+    parameters = OrderedDict(zip(parameter_names, x))
+    J = potential.evaluate_jacobian(
+            r=r, rho=rho, rcut=rcut, parameters=parameters)
+    assert J.shape == (len(parameter_names), 3*r.size + 2*r.size + 2*rho.size)
+
+    # central differences of all the tables, from a population of candidates
+    h = 1e-6
+    X = np.vstack([x + h*np.eye(x.size), x - h*np.eye(x.size)])
+    tables = potential.evaluate_population(
+            r=r,
+            rho=rho,
+            rcut=rcut,
+            parameters=X,
+            parameter_names=parameter_names)
+    tables = np.hstack([t.reshape(X.shape[0], -1) for t in tables])
+    J_fd = (tables[:x.size] - tables[x.size:])/(2*h)
+    np.testing.assert_allclose(J, J_fd, rtol=1e-5, atol=1e-6)
+
+def test__evaluate__cache(make_eam_potential):
+    potential = make_eam_potential(cache=True)
+    x = np.random.RandomState(0).uniform(0.5, 2.0, size=len(potential.parameter_names))
+    parameters = OrderedDict(zip(potential.parameter_names, x))
+    r = np.linspace(0.5, 8.0, 100)
+    rho = np.linspace(0.01, 10.0, 50)
+
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters)
+    assert (potential.cache.n_hits, potential.cache.n_misses) == (0, 3)
+
+    # only the embedding function is recomputed
+    for pn in potential.parameter_names:
+        if pn.startswith('e_'):
+            parameters[pn] *= 1.1
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters)
+    assert (potential.cache.n_hits, potential.cache.n_misses) == (2, 4)
+
+    pair = potential.pair
+    density = potential.density
+    embedding = potential.embedding
+    potential = make_eam_potential()
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters)
+    for k in pair:
+        np.testing.assert_array_equal(pair[k], potential.pair[k])
+    for s in potential.symbols:
+        np.testing.assert_array_equal(density[s], potential.density[s])
+        np.testing.assert_array_equal(embedding[s], potential.embedding[s])
+
+def test__parameter_plan(make_eam_potential):
+    potential = make_eam_potential()
+    plan = potential.parameter_plan
+
+    assert list(plan.keys()) == ['pair', 'density', 'embedding']
+    for stage, prefix in zip(plan, ['p_', 'd_', 'e_']):
+        for (pn, p), i in zip(plan[stage]['parameter_names'], plan[stage]['indices']):
+            assert p == prefix + pn
+            assert potential.parameter_names[i] == p
+
+    assert plan['pair']['packed_indices'].shape == (3, 3)
+    assert plan['density']['packed_indices'].shape == (2, 3)
+    assert plan['embedding']['packed_indices'].shape == (2, 5)
+    assert potential.parameter_names[plan['pair']['packed_indices'][1, 0]] == 'p_NiAl_D0'
+
+def test__evaluate_parameter_vector(make_eam_potential):
+    potential = make_eam_potential()
+    x = np.random.RandomState(0).uniform(0.5, 2.0, size=len(potential.parameter_names))
+    parameters = OrderedDict(zip(potential.parameter_names, x))
+    r = np.linspace(0.5, 8.0, 100)
+    rho = np.linspace(0.01, 10.0, 50)
+
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters)
+    pair = potential.pair
+    density = potential.density
+    embedding = potential.embedding
+
+    potential = make_eam_potential(cache=True)
+    np.testing.assert_array_equal(potential.get_parameter_vector(parameters), x)
+    for i in range(2):
+        potential.evaluate_parameter_vector(r=r, rho=rho, rcut=6.0, parameters=x)
+        assert list(potential.pair.keys()) == list(pair.keys())
+        for k in pair:
+            np.testing.assert_array_equal(pair[k], potential.pair[k])
+        for s in potential.symbols:
+            np.testing.assert_array_equal(density[s], potential.density[s])
+            np.testing.assert_array_equal(embedding[s], potential.embedding[s])
+    assert potential.cache.n_hits == 3
+    assert potential.parameters == parameters
+
+    with pytest.raises(ValueError):
+        potential.evaluate_parameter_vector(r=r, rho=rho, rcut=6.0, parameters=x[:-1])
+
+def test__evaluate__copy_results_false(make_eam_potential):
+    potential = make_eam_potential()
+    x = np.random.RandomState(0).uniform(0.5, 2.0, size=len(potential.parameter_names))
+    parameters = OrderedDict(zip(potential.parameter_names, x))
+    r = np.linspace(0.5, 8.0, 100)
+    rho = np.linspace(0.01, 10.0, 50)
+
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters)
+    pair = potential.pair
+    embedding = potential.embedding
+
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters,
+            copy_results=False)
+    assert np.shares_memory(potential.r, r)
+    assert not potential.r.flags.writeable
+    for k in pair:
+        np.testing.assert_array_equal(pair[k], potential.pair[k])
+        assert not potential.pair[k].flags.writeable
+    with pytest.raises(ValueError):
+        potential.pair['NiNi'][0] = 0.
+
+def test__evaluate__out(make_eam_potential):
+    potential = make_eam_potential(cache=True)
+    x = np.random.RandomState(0).uniform(0.5, 2.0, size=len(potential.parameter_names))
+    parameters = OrderedDict(zip(potential.parameter_names, x))
+    r = np.linspace(0.5, 8.0, 100)
+    rho = np.linspace(0.01, 10.0, 50)
+    out = {
+        'pair': np.empty((3, r.size)),
+        'density': np.empty((2, r.size)),
+        'embedding': np.empty((2, rho.size))}
+
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters, out=out)
+    for k, row in zip(potential.pair, out['pair']):
+        assert np.shares_memory(potential.pair[k], out['pair'])
+        np.testing.assert_array_equal(potential.pair[k], row)
+    for s, row in zip(potential.symbols, out['embedding']):
+        assert np.shares_memory(potential.embedding[s], out['embedding'])
+    # the buffers of the caller are not cached
+    assert len(potential.cache) == 0
+
+    # the buffers are reused by the next evaluation, including cache hits
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters,
+            copy_results=False)
+    _embedding = np.copy(out['embedding'])
+    parameters[potential.parameter_names[-1]] *= 1.1
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters, out=out)
+    assert potential.cache.n_hits == 2
+    assert not np.allclose(out['embedding'], _embedding)
+    for k, row in zip(potential.pair, out['pair']):
+        assert np.shares_memory(potential.pair[k], out['pair'])
+        np.testing.assert_array_equal(potential.pair[k], row)
+
+@pytest.mark.parametrize('use_out', [False, True])
+def test__evaluate__copy_results_false__no_copies(
+        make_eam_potential, monkeypatch, use_out):
+    potential = make_eam_potential(cache=True)
+    x = np.random.RandomState(0).uniform(0.5, 2.0, size=len(potential.parameter_names))
+    r = np.linspace(0.5, 8.0, 100)
+    rho = np.linspace(0.01, 10.0, 50)
+    out = None
+    if use_out:
+        out = {
+            'pair': np.empty((3, r.size)),
+            'density': np.empty((2, r.size)),
+            'embedding': np.empty((2, rho.size))}
+
+    n_copies = []
+    _deepcopy = copy.deepcopy
+    def deepcopy(*args, **kwargs):
+        n_copies.append(1)
+        return _deepcopy(*args, **kwargs)
+    monkeypatch.setattr(copy, 'deepcopy', deepcopy)
+
+    for i in range(3):
+        x[-1] *= 1.1
+        potential.evaluate_parameter_vector(
+                r=r, rho=rho, rcut=6.0, parameters=x, copy_results=False, out=out)
+    assert len(n_copies) == 0
+
+def test__init__cache(make_eam_potential):
+    assert make_eam_potential().cache is None
+    assert isinstance(make_eam_potential(cache=True).cache, EvaluationCache)
+    cache = EvaluationCache(max_bytes=1024)
+    assert make_eam_potential(cache=cache).cache is cache
@@ -0,0 +1,69 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.potential import MorsePotential
+from mexm.potential.evaluation_cache import EvaluationCache
+from mexm.potential.evaluation_cache import get_evaluation_key
+
+def test__get_evaluation_key():
+    potential = MorsePotential(symbols=['Ni'])
+    r = np.linspace(0.1, 6.0, 60)
+    parameters = OrderedDict([('NiNi_D0', 0.5), ('NiNi_a', 1.3), ('NiNi_r0', 2.5)])
+
+    key = get_evaluation_key(potential, r, parameters, r_cut=5.0)
+
+    # the order of the parameters does not matter
+    assert key == get_evaluation_key(
+            potential, r, OrderedDict(reversed(list(parameters.items()))), r_cut=5.0)
+    assert key != get_evaluation_key(potential, r, parameters, r_cut=None)
+    assert key != get_evaluation_key(potential, r[:-1], parameters, r_cut=5.0)
+    assert key != get_evaluation_key(
+            MorsePotential(symbols=['Ni', 'Al']), r, parameters, r_cut=5.0)
+
+    parameters['NiNi_D0'] = 0.5 + 1e-15
+    assert key != get_evaluation_key(potential, r, parameters, r_cut=5.0)
+
+def test__get__put():
+    cache = EvaluationCache()
+    value = OrderedDict([('Ni', np.arange(10.))])
+
+    assert cache.get('a') is None
+    cache.put('a', value)
+    value['Ni'][0] = 100.
+
+    cached = cache.get('a')
+    assert cached['Ni'][0] == 0.
+    assert not cached['Ni'].flags.writeable
+    assert cache.nbytes == 80
+    assert (cache.n_hits, cache.n_misses) == (1, 1)
+
+def test__put__copy_value_false():
+    cache = EvaluationCache()
+    value = np.arange(10.)
+
+    cache.put('a', value, copy_value=False)
+    assert cache.get('a') is value
+    assert not value.flags.writeable
+    assert cache.nbytes == 80
+
+def test__eviction():
+    cache = EvaluationCache(max_bytes=200)
+    for key in ['a', 'b']:
+        cache.put(key, np.zeros(10))
+    cache.get('a')
+    cache.put('c', np.zeros(10))
+
+    # b is the least recently used
+    assert len(cache) == 2
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert cache.n_evictions == 1
+    assert cache.nbytes == 160
+
+    # values larger than the budget are not cached
+    cache.put('d', np.zeros(100))
+    assert 'd' not in cache
+
+    cache.max_bytes = 80
+    assert len(cache) == 1
+    assert 'c' in cache
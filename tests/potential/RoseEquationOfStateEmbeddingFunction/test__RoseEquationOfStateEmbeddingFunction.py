@@ -0,0 +1,185 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.potential.eam import EamPotential
+
+parameters = OrderedDict()
+parameters['p_NiNi_D0'] = 0.4
+parameters['p_NiNi_a'] = 1.6
+parameters['p_NiNi_r0'] = 2.5
+parameters['d_Ni_rho0'] = 1.0
+parameters['d_Ni_beta'] = 4.0
+parameters['d_Ni_r0'] = 2.5
+parameters['e_Ni_ecoh'] = -4.45
+parameters['e_Ni_latticetype'] = 'fcc'
+parameters['e_Ni_B'] = 180.
+parameters['e_Ni_a0'] = 3.52
+
+def get_eam_potential(cache=None):
+    return EamPotential(
+            symbols=['Ni'],
+            func_pair='morse',
+            func_density='eam_dens_exp',
+            func_embedding='eam_embed_eos_rose',
+            cache=cache)
+
+def test__evaluate__interp_solver_matches_brentq():
+    r = np.linspace(0.01, 10., 1000)
+    rho = np.linspace(0., 40., 200)
+    rcut = 6.0
+
+    potential = get_eam_potential()
+    assert potential.obj_embedding.solver == 'brentq'
+    potential.evaluate(r=r, rho=rho, rcut=rcut, parameters=parameters)
+    embedding_brentq = np.copy(potential.embedding['Ni'])
+
+    potential.obj_embedding.solver = 'interp'
+    potential.evaluate(r=r, rho=rho, rcut=rcut, parameters=parameters)
+    embedding_interp = potential.embedding['Ni']
+
+    assert embedding_interp.shape == rho.shape
+    assert np.allclose(embedding_interp, embedding_brentq, rtol=0., atol=1e-6)
+
+def test__evaluate__bad_solver():
+    potential = get_eam_potential()
+    potential.obj_embedding.solver = 'not_a_solver'
+    with pytest.raises(ValueError):
+        potential.evaluate(
+                r=np.linspace(0.01, 10., 100),
+                rho=np.linspace(0., 40., 10),
+                rcut=6.0,
+                parameters=parameters)
+
+def test__evaluate__cache():
+    r = np.linspace(0.01, 10., 1000)
+    rho = np.linspace(0., 40., 200)
+    rcut = 6.0
+
+    # the pair and density tables of P1 are cache hits when P3 is evaluated,
+    # after the tables of P2 were left in the pair object
+    P1 = OrderedDict(parameters)
+    P2 = OrderedDict(parameters)
+    P2['p_NiNi_D0'] = 0.5
+    P3 = OrderedDict(parameters)
+    P3['e_Ni_ecoh'] = -4.2
+
+    potential = get_eam_potential(cache=True)
+    for p in [P1, P2, P3]:
+        potential.evaluate(r=r, rho=rho, rcut=rcut, parameters=p)
+    assert potential.cache.n_hits > 0
+
+    expected = get_eam_potential()
+    expected.evaluate(r=r, rho=rho, rcut=rcut, parameters=P3)
+    np.testing.assert_array_equal(
+            potential.embedding['Ni'], expected.embedding['Ni'])
+
+def test__evaluate__cache_solver():
+    r = np.linspace(0.01, 10., 1000)
+    rho = np.linspace(0., 40., 200)
+
+    potential = get_eam_potential(cache=True)
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters)
+    n_misses = potential.cache.n_misses
+    potential.obj_embedding.solver = 'interp'
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters)
+    assert potential.cache.n_misses == n_misses + 1
+
+def test__evaluate__copy_results_false():
+    r = np.linspace(0.01, 10., 1000)
+    rho = np.linspace(0., 40., 200)
+
+    expected = get_eam_potential()
+    expected.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters)
+
+    # the pair and density tables are views, the embedding is from the
+    # tables of the same evaluation
+    potential = get_eam_potential()
+    P = OrderedDict(parameters)
+    P['p_NiNi_D0'] = 0.5
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=P)
+    out = {'pair': np.empty((1, r.size)), 'embedding': np.empty((1, rho.size))}
+    potential.evaluate(r=r, rho=rho, rcut=6.0, parameters=parameters, out=out)
+    assert np.shares_memory(potential.pair['NiNi'], out['pair'])
+    assert np.shares_memory(potential.embedding['Ni'], out['embedding'])
+    assert not potential.embedding['Ni'].flags.writeable
+    np.testing.assert_array_equal(potential.pair['NiNi'], expected.pair['NiNi'])
+    np.testing.assert_array_equal(
+            potential.embedding['Ni'], expected.embedding['Ni'])
+
+    x = potential.get_parameter_vector(parameters)
+    potential.evaluate_parameter_vector(
+            r=r, rho=rho, rcut=6.0, parameters=x, copy_results=False)
+    np.testing.assert_array_equal(
+            potential.embedding['Ni'], expected.embedding['Ni'])
+
+def test__evaluate_population():
+    r = np.linspace(0.01, 10., 1000)
+    rho = np.linspace(0., 40., 200)
+
+    potential = get_eam_potential()
+    free_parameter_names = [
+            pn for pn in potential.parameter_names if pn != 'e_Ni_latticetype']
+    constrained_parameters = {'e_Ni_latticetype': 'fcc'}
+    x = np.array([parameters[pn] for pn in free_parameter_names])
+    X = x*np.random.RandomState(0).uniform(0.95, 1.05, size=(3, x.size))
+
+    pair, density, embedding = potential.evaluate_population(
+            r=r,
+            rho=rho,
+            rcut=6.0,
+            parameters=X,
+            parameter_names=free_parameter_names,
+            constrained_parameters=constrained_parameters)
+    assert embedding.shape == (3, 1, rho.size)
+
+    for i in range(3):
+        P = OrderedDict(zip(free_parameter_names, X[i]))
+        P.update(constrained_parameters)
+        expected = get_eam_potential()
+        expected.evaluate(r=r, rho=rho, rcut=6.0, parameters=P)
+        np.testing.assert_allclose(pair[i, 0], expected.pair['NiNi'])
+        np.testing.assert_allclose(density[i, 0], expected.density['Ni'])
+        np.testing.assert_allclose(embedding[i, 0], expected.embedding['Ni'])
+
+    with pytest.raises(ValueError):
+        potential.evaluate_population(
+                r=r,
+                rho=rho,
+                rcut=6.0,
+                parameters=X,
+                parameter_names=free_parameter_names)
+
+def test__evaluate_jacobian():
+    r = np.linspace(0.01, 10., 1000)
+    rho = np.linspace(0., 40., 200)
+    rcut = 6.0
+
+    potential = get_eam_potential()
+    J = potential.evaluate_jacobian(
+            r=r, rho=rho, rcut=rcut, parameters=parameters)
+    n_parameters = len(potential.parameter_names)
+    assert J.shape == (n_parameters, 2*r.size + rho.size)
+
+    # the pair and density blocks are analytic, the embedding depends on all
+    # the parameters except the lattice type
+    J_pair = potential.obj_pair.evaluate_jacobian(
+            r=r,
+            parameters=OrderedDict([(pn[2:], parameters[pn])
+                for pn in potential.parameter_names if pn.startswith('p_')]),
+            r_cut=rcut)
+    np.testing.assert_array_equal(J[:3, :r.size], J_pair)
+    i = potential.parameter_names.index('e_Ni_latticetype')
+    assert np.all(J[i] == 0.)
+
+    for pn in ['p_NiNi_D0', 'd_Ni_beta', 'e_Ni_B']:
+        h = 1e-6*max(1., abs(parameters[pn]))
+        embedding = []
+        for s in [h, -h]:
+            P = OrderedDict(parameters)
+            P[pn] += s
+            expected = get_eam_potential()
+            expected.evaluate(r=r, rho=rho, rcut=rcut, parameters=P)
+            embedding.append(expected.embedding['Ni'])
+        np.testing.assert_allclose(
+                J[potential.parameter_names.index(pn), 2*r.size:],
+                (embedding[0] - embedding[1])/(2*h), rtol=1e-3, atol=1e-6)
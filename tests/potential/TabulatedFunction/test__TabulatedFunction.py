@@ -0,0 +1,136 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+from mexm.potential import TabulatedFunction
+
+def get_tables(x):
+    return np.array([np.exp(-x), np.sin(x), x**3])
+
+def get_derivative_tables(x):
+    return np.array([-np.exp(-x), np.cos(x), 3*x**2])
+
+def test__evaluate__interpolates_knots():
+    grid = np.linspace(0.5, 3.0, 51)
+    f = TabulatedFunction.from_grid(grid=grid, values=get_tables(grid))
+    assert f.coefficients.shape == (3, 51, 7)
+    assert not f.coefficients.flags.writeable
+    assert np.allclose(f.evaluate(grid), get_tables(grid), rtol=1e-12, atol=0.)
+
+def test__evaluate__cubic_accuracy():
+    grid = np.linspace(0.5, 3.0, 251)
+    x = np.random.RandomState(0).uniform(0.5, 3.0, size=100)
+    f = TabulatedFunction.from_grid(grid=grid, values=get_tables(grid))
+    values, derivatives = f.evaluate_and_derivative(x)
+    assert values.shape == (3, 100)
+    assert np.allclose(values, get_tables(x), rtol=0., atol=1e-6)
+    assert np.allclose(derivatives, get_derivative_tables(x), rtol=0., atol=1e-4)
+    assert np.array_equal(derivatives, f.evaluate_derivative(x))
+
+def test__evaluate__rows():
+    grid = np.linspace(0.5, 3.0, 51)
+    f = TabulatedFunction.from_grid(grid=grid, values=get_tables(grid))
+    x = np.array([0.7, 1.3, 2.9, 1.1])
+    rows = np.array([2, 0, 1, 0])
+    assert np.array_equal(f.evaluate(x, rows=rows), f.evaluate(x)[rows, np.arange(4)])
+
+def test__evaluate__derivative_is_consistent():
+    """the derivative is the derivative of the interpolant"""
+    grid = np.linspace(0.5, 3.0, 11)
+    x = np.linspace(0.6, 2.9, 37)
+    h = 1e-6
+    for derivatives in [None, get_derivative_tables(grid)]:
+        f = TabulatedFunction.from_grid(
+                grid=grid, values=get_tables(grid), derivatives=derivatives)
+        assert np.allclose(
+                f.evaluate_derivative(x),
+                (f.evaluate(x + h) - f.evaluate(x - h))/(2*h), atol=1e-6)
+
+def test__evaluate__hermite_with_derivatives():
+    grid = np.linspace(0.5, 3.0, 11)
+    f = TabulatedFunction.from_function(
+            function=get_tables, grid=grid, derivative=get_derivative_tables)
+    assert np.allclose(f.evaluate_derivative(grid[:-1]), get_derivative_tables(grid)[:, :-1])
+
+def test__evaluate__linear_matches_numpy_interp():
+    grid = np.linspace(0.5, 3.0, 11)
+    values = np.random.RandomState(0).randn(11)
+    f = TabulatedFunction.from_grid(grid=grid, values=values, interpolation='linear')
+    x = np.linspace(0., 4., 101)
+    assert f.evaluate(x).shape == x.shape
+    assert np.allclose(f.evaluate(x), np.interp(x, grid, values))
+
+    slopes = f.evaluate_derivative(x)
+    assert np.all(slopes[(x < 0.5) | (x > 3.0)] == 0.)
+
+def get_lammps_embedding(f, rho):
+    """the embedding energy and its derivative as in PairEAM::compute of
+    LAMMPS, for a grid which starts at 0"""
+    nrho = f.n_grid
+    rhomax = (nrho - 1)*f.dx
+    p = rho/f.dx + 1.0
+    m = max(1, min(int(p), nrho - 1))
+    p = min(p - m, 1.0)
+    # the arrays of LAMMPS are indexed from 1
+    coeff = f.coefficients[0, m - 1]
+    fp = (coeff[0]*p + coeff[1])*p + coeff[2]
+    phi = ((coeff[3]*p + coeff[4])*p + coeff[5])*p + coeff[6]
+    if rho > rhomax:
+        phi += fp*(rho - rhomax)
+    return phi, fp
+
+def test__evaluate__linear_extrapolation_matches_lammps():
+    grid = 0.1*np.arange(50)
+    table = -np.sqrt(grid) + 0.05*grid**2
+    f = TabulatedFunction.from_grid(
+            grid=grid, values=table, extrapolation='linear')
+    x = np.linspace(0., 8., 161)
+    assert np.any(x > grid[-1])
+
+    phi, fp = np.array([get_lammps_embedding(f, _x) for _x in x]).T
+    values, derivatives = f.evaluate_and_derivative(x)
+    assert np.allclose(values, phi, rtol=1e-12, atol=1e-12)
+    assert np.allclose(derivatives, fp, rtol=1e-12, atol=1e-12)
+    assert np.array_equal(values, f.evaluate(x))
+    assert np.array_equal(derivatives, f.evaluate_derivative(x))
+
+    # the functions are clamped before the first grid point
+    f = TabulatedFunction.from_grid(
+            grid=grid + 1., values=table, extrapolation='linear')
+    assert np.allclose(f.evaluate([0., 0.5]), table[0])
+    assert np.all(f.evaluate_derivative([0., 0.5]) == 0.)
+
+def test__init__bad_arguments():
+    with pytest.raises(ValueError):
+        TabulatedFunction(x0=0., dx=0.1, values=np.ones(10), interpolation='quintic')
+    with pytest.raises(ValueError):
+        TabulatedFunction(x0=0., dx=0.1, values=np.ones(4))
+    with pytest.raises(ValueError):
+        TabulatedFunction(x0=0., dx=0.1, values=np.ones(10), extrapolation='cubic')
+    with pytest.raises(ValueError):
+        TabulatedFunction.from_grid(grid=np.array([0., 0.1, 0.3, 0.4, 0.5]), values=np.ones(5))
+
+def test__from_setfl():
+    class SetflFile(object):
+        PAIR_KEY_FORMAT = "{}.{}"
+        symbols = ['Ni', 'Al']
+        r = 0.1*np.arange(1, 11)
+        rho = 0.2*np.arange(1, 11)
+        func_pairpotential = OrderedDict([
+            ('Ni.Ni', r), ('Ni.Al', 2*r), ('Al.Al', 3*r)])
+        func_density = OrderedDict([('Ni', r**2), ('Al', r**3)])
+        func_embedding = OrderedDict([('Ni', -rho), ('Al', -2*rho)])
+
+    setfl = SetflFile()
+    pair = TabulatedFunction.from_setfl(setfl, 'pair')
+    assert pair.n_functions == 3
+    assert np.allclose(pair.evaluate(0.55), [0.55, 1.1, 1.65])
+    embedding = TabulatedFunction.from_setfl(setfl, 'embedding')
+    assert np.allclose(embedding.grid, setfl.rho)
+    assert np.allclose(embedding.evaluate_derivative(1.0), [-1., -2.])
+    # the embedding functions are extrapolated past the end of the grid,
+    # the other functions are clamped
+    assert np.allclose(embedding.evaluate(3.0), [-3., -6.])
+    assert np.allclose(embedding.evaluate_derivative(3.0), [-1., -2.])
+    assert np.allclose(pair.evaluate(2.0), [1., 2., 3.])
+    with pytest.raises(ValueError):
+        TabulatedFunction.from_setfl(setfl, 'triplet')
@@ -0,0 +1,139 @@
+import pytest
+from collections import OrderedDict
+import numpy as np
+
+from mexm.potential.pair_morse import function_morse_potential
+from mexm.potential.pair_morse import function_morse_potential_and_derivative
+from mexm.potential.pair_bornmayer import func_bornmayer
+from mexm.potential.pair_bornmayer import func_bornmayer_and_derivative
+from mexm.potential.pair_buckingham import func_buckingham
+from mexm.potential.pair_buckingham import func_buckingham_and_derivative
+from mexm.potential.pair_lj import func_lj
+from mexm.potential.pair_lj import func_lj_and_derivative
+from mexm.potential.pair_general_lj import func_pair_generalized_lj_w_cutoff
+from mexm.potential.pair_general_lj import func_pair_generalized_lj_w_cutoff_and_derivative
+from mexm.potential.eamdens_exponential import function_exponential_density
+from mexm.potential.eamdens_exponential import function_exponential_density_and_derivative
+from mexm.potential.eamdens_mishin2003 import func_mishin2003_density
+from mexm.potential.eamdens_mishin2003 import func_mishin2003_density_and_derivative
+from mexm.potential.eamdens_mishin2004 import func_density_mishin2004_w_cutoff
+from mexm.potential.eamdens_mishin2004 import func_density_mishin2004_w_cutoff_and_derivative
+from mexm.potential.eamembed_universal import func_embedding_universal
+from mexm.potential.eamembed_universal import func_embedding_universal_and_derivative
+from mexm.potential.eamembed_bjs import func_embedding_bjs
+from mexm.potential.eamembed_bjs import func_embedding_bjs_and_derivative
+from mexm.potential.eamembed_fs import func_embedding_fs
+from mexm.potential.eamembed_fs import func_embedding_fs_and_derivative
+from mexm.potential.pair_morse import function_morse_potential_and_second_derivative
+from mexm.potential.pair_bornmayer import func_bornmayer_and_second_derivative
+from mexm.potential.pair_buckingham import func_buckingham_and_second_derivative
+from mexm.potential.pair_lj import func_lj_and_second_derivative
+from mexm.potential.pair_general_lj import func_pair_generalized_lj_w_cutoff_and_second_derivative
+from mexm.potential.eamdens_exponential import function_exponential_density_and_second_derivative
+from mexm.potential.eamdens_mishin2003 import func_mishin2003_density_and_second_derivative
+from mexm.potential.eamdens_mishin2004 import func_density_mishin2004_w_cutoff_and_second_derivative
+from mexm.potential.eamembed_universal import func_embedding_universal_and_second_derivative
+from mexm.potential.eamembed_bjs import func_embedding_bjs_and_second_derivative
+from mexm.potential.eamembed_fs import func_embedding_fs_and_second_derivative
+from mexm.potential.eamdens_mishin2003 import Mishin2003DensityFunction
+
+cases = [
+    (function_morse_potential, function_morse_potential_and_derivative,
+        [0.5, 1.3, 2.5]),
+    (func_bornmayer, func_bornmayer_and_derivative,
+        [0.5, 1.3, 2.5]),
+    (func_buckingham, func_buckingham_and_derivative,
+        [1000., 0.3, 10.]),
+    (func_lj, func_lj_and_derivative,
+        [0.1, 2.0]),
+    (func_pair_generalized_lj_w_cutoff,
+        func_pair_generalized_lj_w_cutoff_and_derivative,
+        [6., 4., 2.5, 0.3, 0.01, 5., 0.5, 0.5]),
+    (function_exponential_density, function_exponential_density_and_derivative,
+        [1., 2., 2.5]),
+    (func_mishin2003_density, func_mishin2003_density_and_derivative,
+        [-1., 1., 0.5, 0., 3., 2.]),
+    (func_density_mishin2004_w_cutoff,
+        func_density_mishin2004_w_cutoff_and_derivative,
+        [-1., 1., 0.5, 0., 3., 2., 5., 0.5, 0.5]),
+    (func_embedding_universal, func_embedding_universal_and_derivative,
+        [-2., 0.5, 2., 0.1, 1.2]),
+    (func_embedding_bjs, func_embedding_bjs_and_derivative,
+        [-2., 0.5, 0.1]),
+    (func_embedding_fs, func_embedding_fs_and_derivative,
+        [-2.]),
+]
+
+@pytest.mark.parametrize('function,function_and_derivative,args',
+        cases, ids=[c[0].__name__ for c in cases])
+def test__function_and_derivative(function, function_and_derivative, args):
+    r = np.linspace(1.5, 5.5, 41)
+    h = 1e-6
+
+    V, dVdr = function_and_derivative(r, *args)
+
+    np.testing.assert_allclose(V, function(r, *args), rtol=1e-12, atol=1e-14)
+    np.testing.assert_allclose(
+            dVdr,
+            (function(r + h, *args) - function(r - h, *args))/(2*h),
+            rtol=1e-5, atol=1e-7)
+
+second_derivative_cases = [
+    (function_morse_potential_and_derivative,
+        function_morse_potential_and_second_derivative, cases[0][2]),
+    (func_bornmayer_and_derivative,
+        func_bornmayer_and_second_derivative, cases[1][2]),
+    (func_buckingham_and_derivative,
+        func_buckingham_and_second_derivative, cases[2][2]),
+    (func_lj_and_derivative,
+        func_lj_and_second_derivative, cases[3][2]),
+    (func_pair_generalized_lj_w_cutoff_and_derivative,
+        func_pair_generalized_lj_w_cutoff_and_second_derivative, cases[4][2]),
+    (function_exponential_density_and_derivative,
+        function_exponential_density_and_second_derivative, cases[5][2]),
+    (func_mishin2003_density_and_derivative,
+        func_mishin2003_density_and_second_derivative, cases[6][2]),
+    (func_density_mishin2004_w_cutoff_and_derivative,
+        func_density_mishin2004_w_cutoff_and_second_derivative, cases[7][2]),
+    (func_embedding_universal_and_derivative,
+        func_embedding_universal_and_second_derivative, cases[8][2]),
+    (func_embedding_bjs_and_derivative,
+        func_embedding_bjs_and_second_derivative, cases[9][2]),
+    (func_embedding_fs_and_derivative,
+        func_embedding_fs_and_second_derivative, cases[10][2]),
+]
+
+@pytest.mark.parametrize('function_and_derivative,function_and_second_derivative,args',
+        second_derivative_cases, ids=[c[1].__name__ for c in second_derivative_cases])
+def test__function_and_second_derivative(
+        function_and_derivative, function_and_second_derivative, args):
+    r = np.linspace(1.5, 5.5, 41)
+    h = 1e-6
+
+    V, dVdr, d2Vdr2 = function_and_second_derivative(r, *args)
+    _V, _dVdr = function_and_derivative(r, *args)
+
+    np.testing.assert_allclose(V, _V, rtol=1e-12, atol=1e-14)
+    np.testing.assert_allclose(dVdr, _dVdr, rtol=1e-12, atol=1e-14)
+    np.testing.assert_allclose(
+            d2Vdr2,
+            (function_and_derivative(r + h, *args)[1]
+                - function_and_derivative(r - h, *args)[1])/(2*h),
+            rtol=1e-5, atol=1e-6)
+
+def test__Mishin2003DensityFunction():
+    r = np.linspace(1.5, 5.5, 41)
+    args = cases[6][2]
+
+    density = Mishin2003DensityFunction(symbols=['Ni'])
+    assert density.parameter_names \
+            == ['Ni_{}'.format(p) for p in ['r0', 'A0', 'B0', 'C0', 'y', 'gamma']]
+    parameters = OrderedDict(zip(density.parameter_names, args))
+    rho = density.evaluate(r=r, parameters=parameters)
+    np.testing.assert_allclose(rho['Ni'], func_mishin2003_density(r, *args))
+
+    _rho, _drho = density.evaluate_packed_and_derivative(
+            r=r, packed_parameters=density.pack_density_parameters(parameters))
+    _, drho = func_mishin2003_density_and_derivative(r, *args)
+    np.testing.assert_allclose(_rho[0], rho['Ni'])
+    np.testing.assert_allclose(_drho[0], drho)
@@ -0,0 +1,144 @@
+import pytest
+import numpy as np
+
+from mexm.potential.pair_morse import function_morse_potential
+from mexm.potential.pair_morse import function_morse_potential_parameter_gradient
+from mexm.potential.pair_bornmayer import func_bornmayer
+from mexm.potential.pair_bornmayer import func_bornmayer_parameter_gradient
+from mexm.potential.pair_buckingham import func_buckingham
+from mexm.potential.pair_buckingham import func_buckingham_parameter_gradient
+from mexm.potential.pair_lj import func_lj
+from mexm.potential.pair_lj import func_lj_parameter_gradient
+from mexm.potential.pair_general_lj import func_pair_generalized_lj_w_cutoff
+from mexm.potential.pair_general_lj import func_pair_generalized_lj_w_cutoff_parameter_gradient
+from mexm.potential.eamdens_exponential import function_exponential_density
+from mexm.potential.eamdens_exponential import function_exponential_density_parameter_gradient
+from mexm.potential.eamdens_mishin2004 import func_density_mishin2004_w_cutoff
+from mexm.potential.eamdens_mishin2004 import func_density_mishin2004_w_cutoff_parameter_gradient
+from mexm.potential.eamembed_universal import func_embedding_universal
+from mexm.potential.eamembed_universal import func_embedding_universal_parameter_gradient
+from mexm.potential.eamembed_bjs import func_embedding_bjs
+from mexm.potential.eamembed_bjs import func_embedding_bjs_parameter_gradient
+from mexm.potential.eamembed_fs import func_embedding_fs
+from mexm.potential.eamembed_fs import func_embedding_fs_parameter_gradient
+from mexm.potential.pair_morse import function_morse_potential_parameter_gradient_and_derivative
+from mexm.potential.pair_bornmayer import func_bornmayer_parameter_gradient_and_derivative
+from mexm.potential.pair_buckingham import func_buckingham_parameter_gradient_and_derivative
+from mexm.potential.pair_lj import func_lj_parameter_gradient_and_derivative
+from mexm.potential.eamdens_exponential import function_exponential_density_parameter_gradient_and_derivative
+from mexm.potential.pair_morse import function_morse_potential_and_derivative
+from mexm.potential.pair_bornmayer import func_bornmayer_and_derivative
+from mexm.potential.pair_buckingham import func_buckingham_and_derivative
+from mexm.potential.pair_lj import func_lj_and_derivative
+from mexm.potential.eamdens_exponential import function_exponential_density_and_derivative
+from mexm.potential.potential import evaluate_packed_function_and_derivative
+from mexm.potential.potential import evaluate_packed_function_parameter_gradient
+
+cases = [
+    (function_morse_potential, function_morse_potential_parameter_gradient,
+        [0.5, 1.3, 2.5]),
+    (func_bornmayer, func_bornmayer_parameter_gradient,
+        [0.5, 1.3, 2.5]),
+    (func_buckingham, func_buckingham_parameter_gradient,
+        [1000., 0.3, 10.]),
+    (func_lj, func_lj_parameter_gradient,
+        [0.1, 2.0]),
+    (func_pair_generalized_lj_w_cutoff,
+        func_pair_generalized_lj_w_cutoff_parameter_gradient,
+        [6., 4., 2.5, 0.3, 0.01, 5., 0.5, 0.5]),
+    (function_exponential_density,
+        function_exponential_density_parameter_gradient,
+        [1., 2., 2.5]),
+    (func_density_mishin2004_w_cutoff,
+        func_density_mishin2004_w_cutoff_parameter_gradient,
+        [-1., 1., 0.5, 0.1, 3., 2., 5., 0.5, 0.5]),
+    (func_embedding_universal, func_embedding_universal_parameter_gradient,
+        [-2., 0.5, 2., 0.1, 1.2]),
+    (func_embedding_bjs, func_embedding_bjs_parameter_gradient,
+        [-2., 0.5, 0.1]),
+    (func_embedding_fs, func_embedding_fs_parameter_gradient,
+        [-2.]),
+]
+
+@pytest.mark.parametrize('function,parameter_gradient,args',
+        cases, ids=[c[0].__name__ for c in cases])
+def test__function_parameter_gradient(function, parameter_gradient, args):
+    r = np.linspace(1.5, 5.5, 41)
+
+    G = parameter_gradient(r, *args)
+
+    assert len(G) == len(args)
+    for i in range(len(args)):
+        h = 1e-6*max(1., abs(args[i]))
+        args_p = list(args)
+        args_m = list(args)
+        args_p[i] += h
+        args_m[i] -= h
+        np.testing.assert_allclose(
+                np.broadcast_to(G[i], r.shape),
+                (function(r, *args_p) - function(r, *args_m))/(2*h),
+                rtol=1e-5, atol=1e-7)
+
+derivative_cases = [
+    (function_morse_potential_and_derivative,
+        function_morse_potential_parameter_gradient,
+        function_morse_potential_parameter_gradient_and_derivative,
+        [0.5, 1.3, 2.5]),
+    (func_bornmayer_and_derivative,
+        func_bornmayer_parameter_gradient,
+        func_bornmayer_parameter_gradient_and_derivative,
+        [0.5, 1.3, 2.5]),
+    (func_buckingham_and_derivative,
+        func_buckingham_parameter_gradient,
+        func_buckingham_parameter_gradient_and_derivative,
+        [1000., 0.3, 10.]),
+    (func_lj_and_derivative,
+        func_lj_parameter_gradient,
+        func_lj_parameter_gradient_and_derivative,
+        [0.1, 2.0]),
+    (function_exponential_density_and_derivative,
+        function_exponential_density_parameter_gradient,
+        function_exponential_density_parameter_gradient_and_derivative,
+        [1., 2., 2.5]),
+]
+
+@pytest.mark.parametrize(
+        'function_and_derivative,parameter_gradient,gradient_and_derivative,args',
+        derivative_cases, ids=[c[1].__name__ for c in derivative_cases])
+def test__function_parameter_gradient_and_derivative(
+        function_and_derivative, parameter_gradient, gradient_and_derivative, args):
+    r = np.linspace(1.5, 5.5, 41)
+
+    G, dGdr = gradient_and_derivative(r, *args)
+    h = 1e-6
+    G_p = parameter_gradient(r + h, *args)
+    G_m = parameter_gradient(r - h, *args)
+    for i, g in enumerate(parameter_gradient(r, *args)):
+        np.testing.assert_allclose(G[i], g, rtol=1e-12)
+        np.testing.assert_allclose(
+                np.broadcast_to(dGdr[i], r.shape),
+                np.broadcast_to((G_p[i] - G_m[i])/(2*h), r.shape),
+                rtol=1e-5, atol=1e-7)
+
+    # the gradient of the shifted force cutoff is analytic
+    packed_parameters = np.array([args])
+    r_cut = 4.9
+    J = evaluate_packed_function_parameter_gradient(
+            parameter_gradient=parameter_gradient,
+            r=r,
+            packed_parameters=packed_parameters,
+            r_cut=r_cut,
+            parameter_gradient_and_derivative=gradient_and_derivative)
+
+    def evaluate(p):
+        return evaluate_packed_function_and_derivative(
+                function_and_derivative, r, p, r_cut=r_cut)[0][0]
+
+    for i in range(len(args)):
+        h = 1e-6*max(1., abs(args[i]))
+        p_p = np.array(packed_parameters)
+        p_m = np.array(packed_parameters)
+        p_p[0, i] += h
+        p_m[0, i] -= h
+        np.testing.assert_allclose(J[0, i], (evaluate(p_p) - evaluate(p_m))/(2*h),
+                rtol=1e-5, atol=1e-7)